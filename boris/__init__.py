@@ -21,6 +21,15 @@ This file is part of BORIS.
 
 """
 
-from .core import main
-
 name = "BORIS"
+
+
+def __getattr__(attribute: str):
+    """
+    main is imported on first use: the processes of the process pools import the package without the GUI
+    """
+    if attribute == "main":
+        from .core import main
+
+        return main
+    raise AttributeError(f"module {__name__!r} has no attribute {attribute!r}")
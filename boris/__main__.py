@@ -20,6 +20,21 @@ This file is part of BORIS.
 
 """
 
-from boris import main
+import multiprocessing
 
-main()
+
+def main():
+    """
+    start BORIS
+    The GUI modules are imported here: the processes of the process pools (see utilities.parallel_map)
+    import the main module of the program without them
+    """
+    multiprocessing.freeze_support()
+
+    from boris.core import main as boris_main
+
+    boris_main()
+
+
+if __name__ == "__main__":
+    main()
@@ -19,24 +19,89 @@ Copyright 2012-2026 Olivier Friard
   MA 02110-1301, USA.
 """
 
+import csv
 import os
 import pathlib
 from decimal import Decimal as dec
 
+import numpy as np
 import tablib
 from PySide6.QtWidgets import QFileDialog, QInputDialog, QMessageBox
 
 from . import observation_operations
 
 from . import dialog
+from . import event_index
 from . import project_functions
 from . import select_observations
 from . import utilities as util
 from . import config as cfg
 from . import select_subj_behav
 
+# number of time steps computed at once for the behavior binary table
+BINARY_TABLE_CHUNK_SIZE = 10_000
 
-def create_behavior_binary_table(pj: dict, selected_observations: list, parameters_obs: dict, time_interval: float) -> dict:
+
+def binary_table_rows(
+    index: event_index.EventIntervalIndex,
+    subject_name: str,
+    observed_behav: list,
+    state_behavior_codes: list,
+    start_time: dec,
+    end_time: dec,
+    time_interval: dec,
+    chunk_size: int = BINARY_TABLE_CHUNK_SIZE,
+):
+    """
+    generate the rows of the behavior binary table of a subject
+
+    The table is computed by chunks of time steps as a (time x behavior) matrix
+    with searchsorted on the indexed state intervals and point event times.
+
+    Args:
+        index (event_index.EventIntervalIndex): index of the events of the observation
+        subject_name (str): subject ("" for no focal subject)
+        observed_behav (list): list of (behavior, modifiers) (one column for each)
+        state_behavior_codes (list): list of state behavior codes
+        start_time (Decimal): start time
+        end_time (Decimal): end time
+        time_interval (Decimal): time interval
+        chunk_size (int): number of time steps computed at once
+
+    Yields:
+        list: time and values of behaviors (1/0 for state behaviors, number of occurrences for point behaviors)
+    """
+
+    if end_time < start_time:
+        return
+    n_steps = int((end_time - start_time) // time_interval) + 1
+
+    for chunk_start in range(0, n_steps, chunk_size):
+        chunk_end = min(chunk_start + chunk_size, n_steps)
+        # time grid (with the end of the last interval)
+        grid = np.array([float(start_time + i * time_interval) for i in range(chunk_start, chunk_end + 1)], dtype=np.float64)
+        times, ends = grid[:-1], grid[1:]
+
+        matrix = np.zeros((len(times), len(observed_behav)), dtype=np.int64)
+        for col, (behavior, modifiers) in enumerate(observed_behav):
+            key = (subject_name, behavior, modifiers)
+            if behavior in state_behavior_codes:
+                starts, stops = index.state_intervals(key)
+                if not len(starts):
+                    continue
+                idx = np.searchsorted(starts, times, side="right")
+                matrix[:, col] = (idx > 0) & (stops[np.maximum(idx - 1, 0)] > times)
+            else:
+                points = index.point_times(key)
+                if not len(points):
+                    continue
+                matrix[:, col] = np.searchsorted(points, ends, side="left") - np.searchsorted(points, times, side="left")
+
+        for t, values in zip(times.tolist(), matrix.tolist()):
+            yield [t] + values
+
+
+def create_behavior_binary_table(pj: dict, selected_observations: list, parameters_obs: dict, time_interval: dec) -> dict:
     """
     create behavior binary table
 
@@ -44,10 +109,10 @@ def create_behavior_binary_table(pj: dict, selected_observations: list, paramete
         pj (dict): project dictionary
         selected_observations (list): list of selected observations
         parameters_obs (dict): dcit of parameters
-        time_interval (float): time interval (in seconds)
+        time_interval (Decimal): time interval (in seconds)
 
     Returns:
-        dict: dictionary of tablib dataset
+        dict: dictionary of (headers, rows generator) by observation and subject
 
     """
 
@@ -90,70 +155,67 @@ def create_behavior_binary_table(pj: dict, selected_observations: list, paramete
         if obs_id not in results_df:
             results_df[obs_id] = {}
 
+        index = event_index.EventIntervalIndex(
+            pj[cfg.OBSERVATIONS][obs_id][cfg.EVENTS],
+            state_behavior_codes,
+            selected_behaviors=state_behavior_codes + point_behavior_codes,
+        )
+
         for subject in parameters_obs[cfg.SELECTED_SUBJECTS]:
-            # extract tuple (behavior, modifier)
-            behav_modif_list = [
-                (idx[2], idx[3])
-                for idx in pj[cfg.OBSERVATIONS][obs_id][cfg.EVENTS]
-                if idx[1] == (subject if subject != cfg.NO_FOCAL_SUBJECT else "") and idx[2] in parameters_obs[cfg.SELECTED_BEHAVIORS]
-            ]
+            subject_name = event_index.subject_key(subject)
 
-            # extract observed subjects NOT USED at the moment
-            """observed_subjects = [
-                event[cfg.EVENT_SUBJECT_FIELD_IDX] for event in pj[cfg.OBSERVATIONS][obs_id][cfg.EVENTS]
-            ]"""
+            # extract tuple (behavior, modifier)
+            behav_modif_set = {(key[1], key[2]) for key in index.state_keys + index.point_keys if key[0] == subject_name}
 
             # add selected behavior if not found in (behavior, modifier)
             if not parameters_obs[cfg.EXCLUDE_BEHAVIORS]:
-                # for behav in state_behavior_codes:
+                observed_behaviors = {x[0] for x in behav_modif_set}
                 for behav in parameters_obs[cfg.SELECTED_BEHAVIORS]:
-                    if behav not in [x[0] for x in behav_modif_list]:
-                        behav_modif_list.append((behav, ""))
+                    if behav not in observed_behaviors:
+                        behav_modif_set.add((behav, ""))
 
-            behav_modif_set = set(behav_modif_list)
-            observed_behav = [(x[0], x[1]) for x in sorted(behav_modif_set)]
+            observed_behav = sorted(behav_modif_set)
             if parameters_obs[cfg.INCLUDE_MODIFIERS]:
-                results_df[obs_id][subject] = tablib.Dataset(
-                    headers=["time"] + [f"{x[0]}" + f" ({x[1]})" * (x[1] != "") for x in sorted(behav_modif_set)]
-                )
+                headers = ["time"] + [f"{x[0]}" + f" ({x[1]})" * (x[1] != "") for x in observed_behav]
             else:
-                results_df[obs_id][subject] = tablib.Dataset(headers=["time"] + [x[0] for x in sorted(behav_modif_set)])
+                headers = ["time"] + [x[0] for x in observed_behav]
 
-            if subject == cfg.NO_FOCAL_SUBJECT:
-                sel_subject_dict = {"": {cfg.SUBJECT_NAME: ""}}
-            else:
-                sel_subject_dict = dict(
-                    [(idx, pj[cfg.SUBJECTS][idx]) for idx in pj[cfg.SUBJECTS] if pj[cfg.SUBJECTS][idx][cfg.SUBJECT_NAME] == subject]
-                )
+            results_df[obs_id][subject] = (
+                headers,
+                binary_table_rows(index, subject_name, observed_behav, state_behavior_codes, start_time, end_time, time_interval),
+            )
 
-            row_idx = 0
-            t = start_time
-            while t <= end_time:
-                # state events
-                current_states = util.get_current_states_modifiers_by_subject_2(
-                    state_behavior_codes, pj[cfg.OBSERVATIONS][obs_id][cfg.EVENTS], sel_subject_dict, t
-                )
+    return results_df
 
-                # point events
-                current_point = util.get_current_points_by_subject(
-                    point_behavior_codes, pj[cfg.OBSERVATIONS][obs_id][cfg.EVENTS], sel_subject_dict, t, time_interval
-                )
 
-                cols = [float(t)]  # time
+def write_binary_table(file_name: str, output_format: str, headers: list, rows) -> None:
+    """
+    write the behavior binary table in file_name.
+    Rows are streamed to the file for the text formats (CSV, TSV)
 
-                for behav in observed_behav:
-                    if behav[0] in state_behavior_codes:
-                        cols.append(int(behav in current_states[list(current_states.keys())[0]]))
+    Args:
+        file_name (str): path of output file
+        output_format (str): output format (cfg.CSV_EXT, cfg.TSV_EXT, cfg.HTML_EXT, cfg.ODS_EXT, cfg.XLSX_EXT, cfg.XLS_EXT)
+        headers (list): list of column headers
+        rows (iterable): rows of table
+    """
 
-                    if behav[0] in point_behavior_codes:
-                        cols.append(current_point[list(current_point.keys())[0]].count(behav))
+    if output_format in [cfg.CSV_EXT, cfg.TSV_EXT]:
+        with open(file_name, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f, delimiter="\t" if output_format == cfg.TSV_EXT else ",")
+            writer.writerow(headers)
+            writer.writerows(rows)
+        return
 
-                results_df[obs_id][subject].append(cols)
+    dataset = tablib.Dataset(*rows, headers=headers)
 
-                t += time_interval
-                row_idx += 1
+    if output_format == cfg.HTML_EXT:
+        with open(file_name, "wb") as f:
+            f.write(str.encode(dataset.export(output_format)))
 
-    return results_df
+    if output_format in [cfg.ODS_EXT, cfg.XLSX_EXT, cfg.XLS_EXT]:
+        with open(file_name, "wb") as f:
+            f.write(dataset.export(output_format))
 
 
 def behavior_binary_table(self):
@@ -296,10 +358,5 @@ def behavior_binary_table(self):
                 if mem_command in ["Skip", "Skip all"]:
                     continue
 
-            if output_format in [cfg.CSV_EXT, cfg.TSV_EXT, cfg.HTML]:
-                with open(file_name_with_subject, "wb") as f:
-                    f.write(str.encode(results_df[obs_id][subject].export(output_format)))
-
-            if output_format in [cfg.ODS_EXT, cfg.XLSX_EXT, cfg.XLS_EXT]:
-                with open(file_name_with_subject, "wb") as f:
-                    f.write(results_df[obs_id][subject].export(output_format))
+            headers, rows = results_df[obs_id][subject]
+            write_binary_table(file_name_with_subject, output_format, headers, rows)
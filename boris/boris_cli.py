@@ -28,9 +28,8 @@ import pathlib
 import utilities
 import project_functions
 from config import *
-import db_functions
 import export_observation
-import irr
+import irr_functions
 import plot_events
 import version
 
@@ -234,13 +233,7 @@ if args.command:
         behaviors = [pj[ETHOGRAM][k]["code"] for k in utilities.sorted_keys(pj[ETHOGRAM])]
         subjects = [pj[SUBJECTS][k]["name"] for k in utilities.sorted_keys(pj[SUBJECTS])] + [NO_FOCAL_SUBJECT]
 
-        ok, msg, db_connector = db_functions.load_aggregated_events_in_db(pj, subjects, observations_id_list, behaviors)
-
-        if not ok:
-            print(cleanhtml(msg))
-            sys.exit()
-
-        cursor = db_connector.cursor()
+        indexes = irr_functions.observations_indexes(pj, observations_id_list, behaviors)
 
         interval = 1
         if len(args.command) > 1:
@@ -250,7 +243,7 @@ if args.command:
         if len(args.command) > 2:
             include_modifiers = "TRUE" in args.command[2].upper()
 
-        K, out = irr.cohen_kappa(cursor, observations_id_list[0], observations_id_list[1], interval, subjects, include_modifiers)
+        K, out = irr_functions.cohen_kappa(indexes, observations_id_list[0], observations_id_list[1], interval, subjects, include_modifiers)
 
         print(("Cohen's Kappa - Index of Inter-Rater Reliability\n\nInterval time: {interval:.3f} s\n").format(interval=interval))
 
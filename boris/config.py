@@ -50,6 +50,9 @@ N_PLAYER: int = 8
 
 MAX_UNDO_QUEUE: int = 25
 
+# maximum number of inserted/removed events notified row by row to the events table (the table is reloaded above)
+MAX_EVENTS_ROWS_NOTIFICATIONS: int = 100
+
 NA: str = "NA"
 
 REALTIME_PLOT_CURSOR_COLOR: str = "red"
@@ -456,6 +459,18 @@ OFFICIAL_PLUGINS_ARCHIVE_URL = f"{OFFICIAL_PLUGINS_REPO_URL}/archive/refs/heads/
 OFFICIAL_PLUGINS_SOURCE_BRANCH = "branch"
 OFFICIAL_PLUGINS_SOURCE_RELEASE = "release"
 PERSONAL_PLUGINS_DIR = "personal_plugins_dir"
+# running time (in seconds, 0 for no limit) after which the results of a plugin running in a worker thread are discarded.
+# The plugin is asked to stop but a thread cannot be killed: a plugin that does not call its progress callback runs until its end
+PLUGIN_TIME_LIMIT = "plugin_time_limit"
+PLUGIN_TIME_LIMIT_DEFAULT_VALUE = 3600
+
+# maximum number of refreshes by second of the observation status during media playback
+UI_REFRESH_RATE = "ui_refresh_rate"
+UI_REFRESH_RATE_DEFAULT_VALUE = 25
+
+# the analyses read the events from columnar copies (NumPy arrays) of the events lists (see event_columns)
+COLUMNAR_EVENT_STORE = "columnar_event_store"
+COLUMNAR_EVENT_STORE_DEFAULT_VALUE = False
 
 PROJECT_FILE_INDENTATION = "project file indentation"
 PROJECT_FILE_INDENTATION_COMBO_OPTIONS = ("None", "Newline", "Tab", "2 spaces", "4 spaces")
@@ -28,7 +28,7 @@ import time
 from PySide6.QtCore import QByteArray, QSettings
 
 from . import config as cfg
-from . import dialog
+from . import dialog, event_columns
 
 
 def read(self) -> None:
@@ -284,6 +284,8 @@ def read(self) -> None:
         else:
             self.checkForNewVersion = False
 
+    event_columns.enable_columnar_store(self.config_param.get(cfg.COLUMNAR_EVENT_STORE, cfg.COLUMNAR_EVENT_STORE_DEFAULT_VALUE))
+
     # recent projects
     logging.debug("read recent projects")
     self.recent_projects: list = []
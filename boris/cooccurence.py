@@ -61,7 +61,8 @@ def get_cooccurence(self):
         if interval.empty:
             return dec(0)
         else:
-            return dec(sum([x.upper - x.lower for x in interval]))
+            # intervals in integer milliseconds
+            return util.ms_to_time(sum([x.upper - x.lower for x in interval]))
 
     _, selected_observations = select_observations.select_observations2(
         self, cfg.MULTIPLE, windows_title="Select the observations for behaviors co-occurence analysis"
@@ -137,6 +138,7 @@ def get_cooccurence(self):
 
     state_events_list = util.state_behavior_codes(self.pj[cfg.ETHOGRAM])
 
+    # intervals of events with times in integer milliseconds
     events_interval: dict = {}
     mem_events_interval: dict = {}
 
@@ -156,7 +158,7 @@ def get_cooccurence(self):
             # state event
             if event[cfg.EVENT_BEHAVIOR_FIELD_IDX] in state_events_list:
                 mem_events_interval[obs_id][event[cfg.EVENT_SUBJECT_FIELD_IDX]][event[cfg.EVENT_BEHAVIOR_FIELD_IDX]].append(
-                    event[cfg.EVENT_TIME_FIELD_IDX]
+                    util.time_to_ms(event[cfg.EVENT_TIME_FIELD_IDX])
                 )
                 if len(mem_events_interval[obs_id][event[cfg.EVENT_SUBJECT_FIELD_IDX]][event[cfg.EVENT_BEHAVIOR_FIELD_IDX]]) == 2:
                     events_interval[obs_id][event[cfg.EVENT_SUBJECT_FIELD_IDX]][event[cfg.EVENT_BEHAVIOR_FIELD_IDX]] |= I.closedopen(
@@ -167,7 +169,7 @@ def get_cooccurence(self):
             # point event
             else:
                 events_interval[obs_id][event[cfg.EVENT_SUBJECT_FIELD_IDX]][event[cfg.EVENT_BEHAVIOR_FIELD_IDX]] |= I.singleton(
-                    event[cfg.EVENT_TIME_FIELD_IDX]
+                    util.time_to_ms(event[cfg.EVENT_TIME_FIELD_IDX])
                 )
 
     logging.debug(f"events_interval: {events_interval}")
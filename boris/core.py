@@ -29,7 +29,6 @@ os.environ["PATH"] = str(Path(__file__).parent / "misc") + os.pathsep + os.envir
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), ".")))
 
 import datetime
-import gzip
 import json
 import locale
 import logging
@@ -42,7 +41,6 @@ import tempfile
 import time
 import urllib.request
 import zipfile
-from collections import deque
 from decimal import ROUND_DOWN
 from decimal import Decimal as dec
 
@@ -53,7 +51,7 @@ from PIL.ImageQt import Image
 
 matplotlib.use("QtAgg")
 
-from PySide6.QtCore import QAbstractTableModel, QDateTime, QElapsedTimer, QEvent, QPoint, QSettings, Qt, QUrl, Signal
+from PySide6.QtCore import QDateTime, QElapsedTimer, QEvent, QPoint, QSettings, Qt, QUrl, Signal
 from PySide6.QtGui import QAction, QColor, QDesktopServices, QFont, QIcon, QKeyEvent, QKeySequence, QPainter, QPixmap, QPolygon
 from PySide6.QtMultimedia import QSoundEffect
 from PySide6.QtWidgets import (
@@ -96,9 +94,15 @@ from . import (
     advanced_event_filtering,
     config_file,
     core_qrc,
+    current_states,
+    db_functions,
     dialog,
+    event_columns,
     event_operations,
+    event_store,
     events_cursor,
+    events_table_model,
+    events_undo,
     geometric_measurement,
     gui_utilities,
     modifier_coding_map_creator,
@@ -111,6 +115,9 @@ from . import (
     plugins,
     project,
     project_functions,
+    project_journal,
+    project_save,
+    refresh_scheduler,
     select_observations,
     select_subj_behav,
     subjects_pad,
@@ -163,47 +170,6 @@ def excepthook(exception_type, exception_value, traceback_object):
 sys.excepthook = excepthook
 
 
-class TableModel(QAbstractTableModel):
-    """
-    class for populating table view with events
-    """
-
-    def __init__(self, data, header: list, time_format: str, observation_type: str, parent=None):
-        super(TableModel, self).__init__(parent)
-        self._data = data
-        self.header = header
-        self.time_format = time_format
-        self.observation_type = observation_type
-
-    def headerData(self, section: int, orientation: Qt.Orientation, role: int):
-        if role == Qt.ItemDataRole.DisplayRole:
-            if orientation == Qt.Orientation.Horizontal:
-                return self.header[section]
-            else:
-                return str(section + 1)
-
-    def rowCount(self, parent=None):
-        return len(self._data)
-
-    def columnCount(self, parent=None):
-        return len(self._data[0]) if self.rowCount() else 0
-
-    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
-        if role == Qt.ItemDataRole.DisplayRole:
-            row = index.row()
-            if 0 <= row < self.rowCount():
-                column = index.column()
-
-                if cfg.TW_EVENTS_FIELDS[self.observation_type][column] == "type":
-                    return self._data[row][-1]
-                else:
-                    event_idx = cfg.PJ_OBS_FIELDS[self.observation_type][cfg.TW_EVENTS_FIELDS[self.observation_type][column]]
-                    if column == 0:  # time
-                        return util.convertTime(self.time_format, self._data[row][event_idx])
-                    elif column < self.columnCount():
-                        return self._data[row][event_idx]
-
-
 class MainWindow(QMainWindow, Ui_MainWindow):
     """
     Main BORIS window
@@ -226,9 +192,6 @@ class MainWindow(QMainWindow, Ui_MainWindow):
     processes: list = []  # list of QProcess processes
     overlays: dict = {}  # dict for storing video overlays
 
-    undo_queue = deque()  # queue for undoing event operations
-    undo_description = deque()  # queue for description of event operations
-
     current_player: int = 0  # id of the selected (left click) video player
 
     mem_media_name: str = ""  # record current media name. Use to check if media changed
@@ -250,6 +213,8 @@ class MainWindow(QMainWindow, Ui_MainWindow):
     repositioningTimeOffset = 0
     automaticBackup: int = 0  # automatic backup interval (0 no backup)
     events_current_row: int = -1
+    events_row_cursor: events_cursor.EventsRowCursor | None = None  # sorted times of events for the tracking cursor
+    events_cursor_mem: tuple | None = None  # last row of the tracking cursor (delegate row, after last event)
     projectChanged: bool = False  # store if project was changed
     liveObservationStarted = False
     # data structures for external data plot
@@ -271,6 +236,7 @@ class MainWindow(QMainWindow, Ui_MainWindow):
     fast = 10
 
     currentStates: dict = {}
+    current_states_cursor: current_states.CurrentStatesCursor | None = None  # incremental tracker of current states
     subject_name_index: dict = {}
     flag_slow = False
     play_rate: float = 1
@@ -352,6 +318,31 @@ class MainWindow(QMainWindow, Ui_MainWindow):
         self.pb_live_obs.setFocusPolicy(Qt.FocusPolicy.NoFocus)
 
         self.ffmpeg_bin = ffmpeg_bin
+
+        # cache the events databases and the observations dataframe data used by the analyses (invalidated by project_changed)
+        db_functions.enable_analysis_cache()
+        project_functions.enable_dataframe_cache()
+
+        # plugins running in worker threads (see plugins.PluginRun)
+        self.running_plugins: list = []
+
+        # undo of event operations
+        self.events_undo = events_undo.EventsUndoStack(cfg.MAX_UNDO_QUEUE)
+
+        # the time-pos notifications of the player (libmpv mode) are coalesced to the UI refresh rate
+        self.refresh_scheduler = refresh_scheduler.RefreshScheduler(
+            lambda position: self.mpv_time_checks(),
+            lambda position: self.mpv_timer_out(value=position, checks=False),
+            parent=self,
+        )
+        self.time_observer_signal.connect(self.refresh_scheduler.notify)
+
+        # the autosave serializes and writes the project in a worker thread
+        self.background_save = project_save.BackgroundProjectSave(self)
+        self.background_save.saved.connect(self.background_save_finished)
+        # journal of the modifications written by the autosave (see project_journal)
+        self.project_journal: project_journal.ProjectJournal | None = None
+
         # set icons
         self.setWindowIcon(QIcon(":/small_logo"))
         """
@@ -429,7 +420,8 @@ class MainWindow(QMainWindow, Ui_MainWindow):
         self.tv_events.setItemDelegate(delegate)
 
         # PySide6
-        self.tv_events.setItemDelegate(events_cursor.StyledItemDelegateTriangle(self.events_current_row))
+        self.events_cursor_delegate = events_cursor.StyledItemDelegateTriangle(self.events_current_row, self.tv_events)
+        self.tv_events.setItemDelegate(self.events_cursor_delegate)
 
         connections.connections(self)
         self.config_param = dict(cfg.INIT_PARAM)
@@ -512,6 +504,12 @@ class MainWindow(QMainWindow, Ui_MainWindow):
         project was changed
         """
         self.projectChanged = True
+        db_functions.invalidate_analysis_cache()
+        # only the events of the current observation can be modified during coding
+        project_functions.invalidate_dataframe_cache(self.observationId if self.observationId else None)
+        # the modifications of the events of the current observation are journaled by events_changed
+        if self.project_journal is not None and not self.observationId:
+            self.project_journal.mark_changed(None)
         menu_options.update_windows_title(self)
 
     def remove_media_files_path(self):
@@ -534,6 +532,8 @@ class MainWindow(QMainWindow, Ui_MainWindow):
 
         if project_functions.remove_media_files_path(self.pj, self.projectFileName):
             self.project_changed()
+            # the media paths of all observations were changed
+            project_functions.invalidate_dataframe_cache()
 
     def remove_data_files_path(self):
         """
@@ -569,6 +569,8 @@ class MainWindow(QMainWindow, Ui_MainWindow):
             return
         if project_functions.set_media_paths_relative_to_project_dir(self.pj, self.projectFileName):
             self.project_changed()
+            # the media paths of all observations were changed
+            project_functions.invalidate_dataframe_cache()
 
     def set_data_files_path_relative_to_project_dir(self):
         """
@@ -1620,9 +1622,12 @@ class MainWindow(QMainWindow, Ui_MainWindow):
         """
 
         if self.observationId and self.projectFileName:
-            if not self.save_project_activated():
-                logging.info("project autosaved")
-            else:
+            # only the modifications are appended to the journal of the project
+            if self.project_journal is not None and self.project_journal.flush(self.pj):
+                logging.debug(f"project journal written in {self.project_journal.path}")
+                return
+            # the project is saved in a worker thread (see background_save_finished)
+            if self.save_project_json(self.projectFileName, background=True):
                 logging.warning("Error autosaving project")
         else:
             logging.debug((f"project not autosaved: observation id: {self.observationId} project file name: {self.projectFileName}"))
@@ -1734,10 +1739,8 @@ class MainWindow(QMainWindow, Ui_MainWindow):
         # index of current subject selected by observer
         subject_idx = self.subject_name_index[self.currentSubject] if self.currentSubject else ""
 
-        self.currentStates = util.get_current_states_modifiers_by_subject(
-            self.state_behaviors_codes,
+        self.currentStates = self.current_states_cursor.current_states(
             self.pj[cfg.OBSERVATIONS][self.observationId][cfg.EVENTS],
-            dict(self.pj[cfg.SUBJECTS], **{"": {"name": ""}}),
             self.getLaps(),
             include_modifiers=True,
         )
@@ -2248,54 +2251,20 @@ class MainWindow(QMainWindow, Ui_MainWindow):
             self.tv_events.setModel(None)
             model.deleteLater()
 
-        # add behavior type (POINT, START, STOP)
-        mem_behav: dict = {}
-        state_events_list = util.state_behavior_codes(self.pj[cfg.ETHOGRAM])
-
-        state = [""] * len(self.pj[cfg.OBSERVATIONS][obs_id][cfg.EVENTS])
-
-        for idx, row in enumerate(self.pj[cfg.OBSERVATIONS][obs_id][cfg.EVENTS]):
-            code = row[cfg.PJ_OBS_FIELDS[self.playerType][cfg.BEHAVIOR_CODE]]
-
-            # check if code is state
-            if code in state_events_list:
-                subject = row[cfg.PJ_OBS_FIELDS[self.playerType][cfg.SUBJECT]]
-                modifier = row[cfg.PJ_OBS_FIELDS[self.playerType][cfg.MODIFIER]]
-
-                if f"{subject}|{code}|{modifier}" in mem_behav and mem_behav[f"{subject}|{code}|{modifier}"]:
-                    state[idx] = cfg.STOP
-                else:
-                    state[idx] = cfg.START
-
-                if f"{subject}|{code}|{modifier}" in mem_behav:
-                    mem_behav[f"{subject}|{code}|{modifier}"] = not mem_behav[f"{subject}|{code}|{modifier}"]
-                else:
-                    mem_behav[f"{subject}|{code}|{modifier}"] = 1
-
-        self.event_state: list = []
-        self.tv_idx2events_idx: list = []
-        for idx, row in enumerate(self.pj[cfg.OBSERVATIONS][obs_id][cfg.EVENTS]):
-            # filter
-            if subjects_filter and row[cfg.PJ_OBS_FIELDS[self.playerType][cfg.SUBJECT]] not in subjects_filter:
-                continue
-            if behaviors_filter and row[cfg.PJ_OBS_FIELDS[self.playerType][cfg.BEHAVIOR_CODE]] not in behaviors_filter:
-                continue
-
-            if self.playerType in (cfg.MEDIA, cfg.VIEWER_MEDIA) and len(row) == 5:
-                # add frame index if not present
-                self.event_state.append(row[:] + [dec("NaN")] + [state[idx]])
-            else:
-                self.event_state.append(row[:] + [state[idx]])
-            self.tv_idx2events_idx.append(idx)
-
+        # the model computes the behavior type (POINT, START, STOP) and reads the events list without copying the rows
         self.tv_events.setSortingEnabled(False)
-        model = TableModel(
-            self.event_state,
+        model = events_table_model.EventsTableModel(
+            self.pj[cfg.OBSERVATIONS][obs_id][cfg.EVENTS],
             header,
             time_format,
             self.playerType,
+            util.state_behavior_codes(self.pj[cfg.ETHOGRAM]),
+            behaviors_filter,
+            subjects_filter,
             self.tv_events,
         )
+        # index in events list of the rows of the table view (updated by the model)
+        self.tv_idx2events_idx: list = model.rows
         self.tv_events.setModel(model)
 
         # column width
@@ -2314,6 +2283,14 @@ class MainWindow(QMainWindow, Ui_MainWindow):
 
         logging.debug(f"begin load events from obs in tableView: {obs_id}")
 
+        # the events list may have been modified: restart the tracking of current states
+        self.current_states_cursor = current_states.CurrentStatesCursor(
+            util.state_behavior_codes(self.pj[cfg.ETHOGRAM]), self.pj[cfg.SUBJECTS]
+        )
+        # and the tracking cursor of the events table
+        self.events_row_cursor = None
+        self.events_cursor_mem = None
+
         # t1 = time.time()
         self.populate_tv_events(
             obs_id,
@@ -2327,6 +2304,117 @@ class MainWindow(QMainWindow, Ui_MainWindow):
 
         return
 
+    def update_tw_events(self, inserted: list | None = None, modified: list | None = None, removed: list | None = None) -> None:
+        """
+        update the events table view after modification of the events list of the current observation
+        (only the rows of the modified events are updated instead of reloading all events with load_tw_events)
+
+        Args:
+            inserted (list): indexes of the inserted events (in the modified events list)
+            modified (list): indexes of events modified in place
+            removed (list): indexes of the removed events (in the events list before removal)
+        """
+        model = self.tv_events.model()
+        if (
+            not isinstance(model, events_table_model.EventsTableModel)
+            or (model.events is not self.pj[cfg.OBSERVATIONS][self.observationId][cfg.EVENTS])
+            # reloading the table is faster than the notification of many inserted/removed rows
+            or len(inserted or []) + len(removed or []) > cfg.MAX_EVENTS_ROWS_NOTIFICATIONS
+        ):
+            self.load_tw_events(self.observationId)
+            return
+
+        if removed:
+            model.remove_events(removed)
+        if inserted:
+            model.insert_events(inserted)
+        if modified:
+            model.update_events(modified)
+
+        # the events list was modified (the current states cursor is updated with the hunks, see events_changed)
+        if self.events_row_cursor is not None and self.events_row_cursor.events is model.events and not modified:
+            if removed:
+                self.events_row_cursor.remove_events(removed)
+            if inserted:
+                self.events_row_cursor.insert_events(inserted)
+        else:
+            self.events_row_cursor = None
+        self.events_cursor_mem = None
+
+    def events_changed(self, hunks: list, undoable: bool = True) -> None:
+        """
+        record the modifications of the events list of the current observation in the undo stack
+        and in the project journal and update the current states cursor
+
+        Args:
+            hunks (list): hunks (position, old rows, new rows) of the modifications (see event_store)
+            undoable (bool): False if the modifications must not be added to the undo stack (e.g. undo)
+        """
+        if self.current_states_cursor is not None:
+            self.current_states_cursor.apply_hunks(self.pj[cfg.OBSERVATIONS][self.observationId][cfg.EVENTS], hunks)
+        if undoable:
+            self.events_undo.add(hunks)
+        if self.project_journal is not None:
+            self.project_journal.events_changed(self.observationId, hunks)
+
+    def insert_events(self, new_events: list) -> list:
+        """
+        insert events in the events list of the current observation keeping the order (binary insertion)
+        and update the events table, the current states and the events cursor
+
+        Args:
+            new_events (list): events to insert
+
+        Returns:
+            list: indexes of the inserted events
+        """
+        if not new_events:
+            return []
+        hunks: list = []
+        positions = event_store.insert_events(
+            self.pj[cfg.OBSERVATIONS][self.observationId][cfg.EVENTS],
+            new_events,
+            self.pj[cfg.OBSERVATIONS][self.observationId][cfg.TYPE],
+            hunks,
+        )
+        self.update_tw_events(inserted=positions)
+        self.events_changed(hunks)
+        return positions
+
+    def remove_events(self, positions: list) -> list:
+        """
+        remove events from the events list of the current observation
+        and update the events table, the current states and the events cursor
+
+        Args:
+            positions (list): indexes of the events to remove
+
+        Returns:
+            list: removed events
+        """
+        if not positions:
+            return []
+        hunks: list = []
+        removed = event_store.remove_events(self.pj[cfg.OBSERVATIONS][self.observationId][cfg.EVENTS], positions, hunks)
+        self.update_tw_events(removed=sorted(set(positions)))
+        self.events_changed(hunks)
+        return removed
+
+    def replace_events(self, replacements: dict) -> None:
+        """
+        replace events of the events list of the current observation (the events are not modified in place)
+        and update the events table, the current states and the events cursor
+
+        Args:
+            replacements (dict): index of event: new event
+        """
+        if not replacements:
+            return
+        hunks: list = []
+        event_store.replace_events(self.pj[cfg.OBSERVATIONS][self.observationId][cfg.EVENTS], replacements, hunks)
+        self.update_tw_events(modified=sorted(replacements))
+        self.events_changed(hunks)
+
     def close_observation_tools(self):
         """
         close observation tools objects
@@ -2786,6 +2874,11 @@ class MainWindow(QMainWindow, Ui_MainWindow):
             None
         """
         self.pj = dict(pj)
+        db_functions.invalidate_analysis_cache()
+        project_functions.invalidate_dataframe_cache()
+        event_columns.invalidate_columnar_store()
+        if self.open_project_journal(project_path):
+            project_changed = True
         self.clear_interface()
         self.projectChanged = project_changed
         self.load_behaviors_in_twEthogram([self.pj[cfg.ETHOGRAM][x][cfg.BEHAVIOR_CODE] for x in self.pj[cfg.ETHOGRAM]])
@@ -2798,6 +2891,50 @@ class MainWindow(QMainWindow, Ui_MainWindow):
             self.set_recent_projects_menu()
         menu_options.update_menu(self)
 
+    def open_project_journal(self, project_path: str) -> bool:
+        """
+        recover the modifications of the project recorded in the journal after a crash
+        and start the journal of the project
+
+        Args:
+            project_path (str): path of project file
+
+        Returns:
+            bool: True if modifications were recovered from the journal
+        """
+        if self.project_journal is not None:
+            self.project_journal.remove()
+        self.project_journal = None
+        if not project_path:
+            return False
+
+        project_file_name = str(Path(project_path).absolute())
+        recovered = False
+        flushes = project_journal.read_journal(project_file_name)
+        if flushes and (
+            dialog.MessageDialog(
+                cfg.programName,
+                (
+                    "The last modifications of this project were not saved (the program was not closed correctly).<br>"
+                    "Do you want to recover them from the autosave journal?"
+                ),
+                (cfg.YES, cfg.NO),
+            )
+            == cfg.YES
+        ):
+            try:
+                project_journal.replay(self.pj, flushes)
+                recovered = True
+            except Exception:
+                logging.warning(f"Error recovering the project journal: {sys.exc_info()[1]}")
+                QMessageBox.critical(self, cfg.programName, f"Error recovering the modifications from the journal: {sys.exc_info()[1]}")
+                # the journal file is kept
+                return True
+
+        self.project_journal = project_journal.ProjectJournal(project_file_name)
+        self.project_journal.start(project_save.project_snapshot(self.pj), keep=recovered)
+        return recovered
+
     def open_project_activated(self):
         """
         open a project
@@ -3024,7 +3161,15 @@ class MainWindow(QMainWindow, Ui_MainWindow):
         self.projectChanged = False
         self.setWindowTitle(cfg.programName)
 
+        # the modifications are saved or discarded
+        if self.project_journal is not None:
+            self.project_journal.remove()
+            self.project_journal = None
+
         self.pj = dict(cfg.EMPTY_PROJECT)
+        db_functions.invalidate_analysis_cache()
+        project_functions.invalidate_dataframe_cache()
+        event_columns.invalidate_columnar_store()
 
         self.project = False
         config_file.read(self)
@@ -3244,6 +3389,9 @@ class MainWindow(QMainWindow, Ui_MainWindow):
 
             # retrieve project dict from window
             self.pj = dict(newProjectWindow.pj)
+            # the events of the observations can be modified (e.g. renamed behaviors): the project file must be saved
+            if mode == cfg.EDIT and self.projectChanged and self.project_journal is not None:
+                self.project_journal.mark_changed(None)
             self.project = True
 
             # time format
@@ -3270,13 +3418,17 @@ class MainWindow(QMainWindow, Ui_MainWindow):
 
         del newProjectWindow
 
-    def save_project_json(self, project_file_name: str) -> int | None:
+    def save_project_json(self, project_file_name: str, background: bool = False) -> int | None:
         """
         save project to JSON file
         convert Decimal type in float
 
+        A snapshot of the project is serialized and written in a temporary file that replaces the project file.
+        With background=True the snapshot is serialized and written in a worker thread (see background_save_finished).
+
         Args:
             project_file_name (str): path of project to save
+            background (bool): save the project in a worker thread
 
         Returns:
             str:
@@ -3288,6 +3440,10 @@ class MainWindow(QMainWindow, Ui_MainWindow):
             logging.warning("Function save_project_json already launched")
             return
 
+        if background and self.background_save.is_running():
+            logging.info("The previous save of the project is running")
+            return 0
+
         self.save_project_json_started = True
 
         # check if project contains IMAGES observations
@@ -3304,25 +3460,30 @@ class MainWindow(QMainWindow, Ui_MainWindow):
 
         # project file indentation
         file_indentation = self.config_param.get(cfg.PROJECT_FILE_INDENTATION, cfg.PROJECT_FILE_INDENTATION_DEFAULT_VALUE)
+
+        snapshot = project_save.project_snapshot(self.pj)
+
+        if background:
+            self.background_save.start(snapshot, project_file_name, file_indentation)
+            if self.project_journal is not None:
+                # the journal restarts from the snapshot when the save is finished
+                self.project_journal.start(snapshot, pending=True)
+            # the modifications done during the save will set projectChanged again
+            self.projectChanged = False
+            menu_options.update_windows_title(self)
+            self.save_project_json_started = False
+            return 0
+
         try:
-            if project_file_name.endswith(".boris.gz"):
-                with gzip.open(project_file_name, mode="wt", encoding="utf-8") as f_out:
-                    f_out.write(
-                        json.dumps(
-                            self.pj,
-                            default=util.decimal_default,
-                            indent=file_indentation,
-                        )
-                    )
-            else:  # .boris and other extensions
-                with open(project_file_name, "w") as f_out:
-                    f_out.write(
-                        json.dumps(
-                            self.pj,
-                            default=util.decimal_default,
-                            indent=file_indentation,
-                        )
-                    )
+            # wait for the end of a save running in background (the last snapshot must be written last)
+            self.background_save.wait()
+            project_save.save_project(snapshot, project_file_name, file_indentation)
+
+            # the journal restarts from the saved project
+            if self.project_journal is not None:
+                self.project_journal.remove()
+            self.project_journal = project_journal.ProjectJournal(project_file_name)
+            self.project_journal.start(snapshot)
 
             self.projectChanged = False
             menu_options.update_windows_title(self)
@@ -3354,6 +3515,26 @@ class MainWindow(QMainWindow, Ui_MainWindow):
             self.save_project_json_started = False
             return 2
 
+    def background_save_finished(self, project_file_name: str, error: str) -> None:
+        """
+        end of the save of the project in the worker thread
+
+        Args:
+            project_file_name (str): path of the saved project
+            error (str): error message ("" if the project was saved)
+        """
+        if self.project_journal is not None and self.project_journal.project_file_name == project_file_name:
+            self.project_journal.saved(error)
+        if not error:
+            logging.info(f"project autosaved in {project_file_name}")
+            return
+        logging.warning(f"Error autosaving project: {error}")
+        # the project was not saved
+        if project_file_name == self.projectFileName:
+            self.projectChanged = True
+            menu_options.update_windows_title(self)
+        QMessageBox.critical(None, cfg.programName, error, QMessageBox.StandardButton.Ok)
+
     def save_project_as_activated(self):
         """
         save current project asking for a new file name
@@ -3546,10 +3727,8 @@ class MainWindow(QMainWindow, Ui_MainWindow):
         self.currentStates = {}
         # add states for no focal subject
 
-        self.currentStates = util.get_current_states_modifiers_by_subject(
-            util.state_behavior_codes(self.pj[cfg.ETHOGRAM]),
+        self.currentStates = self.current_states_cursor.current_states(
             self.pj[cfg.OBSERVATIONS][self.observationId][cfg.EVENTS],
-            dict(self.pj[cfg.SUBJECTS], **{"": {cfg.SUBJECT_NAME: ""}}),
             current_time,
             include_modifiers=True,
         )
@@ -3603,7 +3782,7 @@ class MainWindow(QMainWindow, Ui_MainWindow):
         else:
             if self.pj[cfg.OBSERVATIONS][self.observationId][cfg.EVENTS]:
                 if dialog.MessageDialog(cfg.programName, "Delete the current events?", (cfg.YES, cfg.NO)) == cfg.YES:
-                    self.pj[cfg.OBSERVATIONS][self.observationId][cfg.EVENTS] = []
+                    self.remove_events(list(range(len(self.pj[cfg.OBSERVATIONS][self.observationId][cfg.EVENTS]))))
                 self.project_changed()
                 self.load_tw_events(self.observationId)
 
@@ -4026,7 +4205,8 @@ class MainWindow(QMainWindow, Ui_MainWindow):
 
         # logging.debug("get_events_current_row")
 
-        if not self.pj[cfg.OBSERVATIONS][self.observationId][cfg.EVENTS]:
+        events = self.pj[cfg.OBSERVATIONS][self.observationId][cfg.EVENTS]
+        if not events:
             return
         ct = self.getLaps()
 
@@ -4034,47 +4214,35 @@ class MainWindow(QMainWindow, Ui_MainWindow):
             self.events_current_row = -1
             return
 
-        # check if NaN in time column for observation from images
-        if self.pj[cfg.OBSERVATIONS][self.observationId][cfg.TYPE] == cfg.IMAGES:
-            for event in self.pj[cfg.OBSERVATIONS][self.observationId][cfg.EVENTS]:
-                if event[0].is_nan():
-                    return
+        if self.events_row_cursor is None or not self.events_row_cursor.is_valid(events):
+            self.events_row_cursor = events_cursor.EventsRowCursor(events)
+
+        # check if NaN in time column (observation from images)
+        if self.events_row_cursor.has_nan:
+            return
 
         # add time offset if any
         ct += dec(self.pj[cfg.OBSERVATIONS][self.observationId][cfg.TIME_OFFSET])
 
-        if ct >= self.pj[cfg.OBSERVATIONS][self.observationId][cfg.EVENTS][-1][cfg.TW_OBS_FIELD[self.playerType][cfg.TIME]]:
-            self.events_current_row = len(self.pj[cfg.OBSERVATIONS][self.observationId][cfg.EVENTS])
+        self.events_current_row = self.events_row_cursor.row(ct, self.trackingCursorAboveEvent)
 
-            self.tv_events.scrollToBottom()
-            self.tv_events.setItemDelegate(events_cursor.StyledItemDelegateTriangle(len(self.tv_idx2events_idx)))
+        # the cursor is after the last event
+        at_bottom = self.events_current_row == len(events)
+        delegate_row = len(self.tv_idx2events_idx) if at_bottom else self.events_current_row
 
+        # the delegate is repainted and the table scrolled only if the row changed
+        if (delegate_row, at_bottom) == self.events_cursor_mem:
             return
-        else:
-            cr_list = [
-                idx
-                for idx, x in enumerate(self.pj[cfg.OBSERVATIONS][self.observationId][cfg.EVENTS][:-1])
-                if x[0] <= ct
-                and self.pj[cfg.OBSERVATIONS][self.observationId][cfg.EVENTS][idx + 1][cfg.TW_OBS_FIELD[self.playerType][cfg.TIME]] > ct
-            ]
+        self.events_cursor_mem = (delegate_row, at_bottom)
 
-            if cr_list:
-                self.events_current_row = cr_list[0]
-                if not self.trackingCursorAboveEvent:
-                    self.events_current_row += 1
-            else:
-                self.events_current_row = -1
+        self.events_cursor_delegate.row = delegate_row
+        self.tv_events.viewport().update()
 
-        self.tv_events.setItemDelegate(events_cursor.StyledItemDelegateTriangle(self.events_current_row))
-
-        # if self.twEvents.item(self.events_current_row, 0):
-        #    self.twEvents.scrollToItem(
-        #        self.twEvents.item(self.events_current_row, 0),
-        #        QAbstractItemView.EnsureVisible,
-        #    )
-
-        index = self.tv_events.model().index(self.events_current_row, 0)
-        self.tv_events.scrollTo(index, QAbstractItemView.EnsureVisible)
+        if at_bottom:
+            self.tv_events.scrollToBottom()
+        else:
+            index = self.tv_events.model().index(self.events_current_row, 0)
+            self.tv_events.scrollTo(index, QAbstractItemView.EnsureVisible)
 
     def show_current_states_in_subjects_table(self):
         """
@@ -4228,26 +4396,17 @@ class MainWindow(QMainWindow, Ui_MainWindow):
 
         return current_playlist_index, current_media_path_
 
-    def mpv_timer_out(self, value: float | None = None, scroll_slider=True):
+    def mpv_time_checks(self, cumulative_time_pos=None) -> None:
         """
-        print the media current position and total length for MPV player
-        scroll video slider to video position
-        update spectro, waveform and data (if any)
-        Time offset is NOT added!
+        checks done at every new position of the media player (not only at the UI refresh rate):
+        end of observation interval, alarm and scan sampling
         """
 
         if not self.observationId:
             return
 
-        cumulative_time_pos = self.getLaps()
-
-        # get frame index
-        frame_idx = self.get_frame_index()
-
-        if value is None:  # ipc mpv
-            current_media_time_pos = self.dw_player[0].player.time_pos
-        else:
-            current_media_time_pos = value
+        if cumulative_time_pos is None:
+            cumulative_time_pos = self.getLaps()
 
         # observation time interval
         if self.pj[cfg.OBSERVATIONS][self.observationId].get(cfg.OBSERVATION_TIME_INTERVAL, [0, 0])[1]:
@@ -4278,6 +4437,35 @@ class MainWindow(QMainWindow, Ui_MainWindow):
 
                     self.pause_video(msg=f"Player paused. Scan sampling at {scan_sampling_step} s")
 
+    def mpv_timer_out(self, value: float | None = None, scroll_slider=True, checks: bool = True):
+        """
+        print the media current position and total length for MPV player
+        scroll video slider to video position
+        update spectro, waveform and data (if any)
+        Time offset is NOT added!
+
+        Args:
+            value (float): media position (None for ipc mpv)
+            scroll_slider (bool): scroll the video slider to the position
+            checks (bool): do the checks of mpv_time_checks (False if already done by the refresh scheduler)
+        """
+
+        if not self.observationId:
+            return
+
+        cumulative_time_pos = self.getLaps()
+
+        # get frame index
+        frame_idx = self.get_frame_index()
+
+        if value is None:  # ipc mpv
+            current_media_time_pos = self.dw_player[0].player.time_pos
+        else:
+            current_media_time_pos = value
+
+        if checks:
+            self.mpv_time_checks(cumulative_time_pos)
+
         # highlight current event in tw events and scroll event list
         self.get_events_current_row()
 
@@ -4308,15 +4496,11 @@ class MainWindow(QMainWindow, Ui_MainWindow):
         # index of current subject selected by observer
         subject_idx = self.subject_name_index[self.currentSubject] if self.currentSubject else ""
 
-        # t1 = time.time()
-        self.currentStates = util.get_current_states_modifiers_by_subject(
-            self.state_behaviors_codes,
+        self.currentStates = self.current_states_cursor.current_states(
             self.pj[cfg.OBSERVATIONS][self.observationId][cfg.EVENTS],
-            dict(self.pj[cfg.SUBJECTS], **{"": {"name": ""}}),
             currentTimeOffset,
             include_modifiers=True,
         )
-        # print("get_current_states_modifiers_by_subject:", time.time() - t1)
 
         self.lbCurrentStates.setText(f"Observed behaviors: {', '.join(self.currentStates[subject_idx])}")
 
@@ -4347,11 +4531,8 @@ class MainWindow(QMainWindow, Ui_MainWindow):
             if events_to_add:
                 self.statusbar.showMessage("The media changed. Some ongoing state events were stopped automatically", 0)
 
-                self.pj[cfg.OBSERVATIONS][self.observationId][cfg.EVENTS].extend(events_to_add)
+                self.insert_events(events_to_add)
                 self.project_changed()
-                self.pj[cfg.OBSERVATIONS][self.observationId][cfg.EVENTS].sort(key=lambda x: x[:3])
-
-                self.load_tw_events(self.observationId)
 
                 self.pause_video()
 
@@ -4433,11 +4614,8 @@ class MainWindow(QMainWindow, Ui_MainWindow):
                     if events_to_add:
                         self.statusbar.showMessage("The playlist has finished. Some ongoing state events were stopped automatically", 0)
 
-                        self.pj[cfg.OBSERVATIONS][self.observationId][cfg.EVENTS].extend(events_to_add)
+                        self.insert_events(events_to_add)
                         self.project_changed()
-                        self.pj[cfg.OBSERVATIONS][self.observationId][cfg.EVENTS].sort(key=lambda x: x[:3])
-
-                        self.load_tw_events(self.observationId)
 
                         self.update_visualizations()
 
@@ -5496,6 +5674,8 @@ class MainWindow(QMainWindow, Ui_MainWindow):
                         number_replacement += 1
                         self.find_replace_dialog.currentIdx = event_idx
                         self.find_replace_dialog.currentIdx_idx = idx1
+                        # the event is replaced by a modified copy (see event_store.replace_events)
+                        event = list(event)
                         if self.find_replace_dialog.cb_case_sensitive.isChecked():
                             event[idx1] = event[idx1].replace(
                                 self.find_replace_dialog.findText.text(),
@@ -5504,9 +5684,7 @@ class MainWindow(QMainWindow, Ui_MainWindow):
                         if not self.find_replace_dialog.cb_case_sensitive.isChecked():
                             event[idx1] = insensitive_re.sub(self.find_replace_dialog.replaceText.text(), event[idx1])
 
-                        self.pj[cfg.OBSERVATIONS][self.observationId][cfg.EVENTS][event_idx] = event
-
-                        self.load_tw_events(self.observationId)
+                        self.replace_events({event_idx: event})
                         # self.twEvents.scrollToItem(self.twEvents.item(event_idx, 0))
                         # self.twEvents.selectRow(event_idx)
 
@@ -5577,6 +5755,26 @@ class MainWindow(QMainWindow, Ui_MainWindow):
                 if not ps[0].waitForFinished(5000):
                     ps[0].kill()
 
+        # check if plugins are running
+        if [plugin_run for plugin_run in self.running_plugins if plugin_run.is_running()]:
+            if (
+                dialog.MessageDialog(
+                    cfg.programName,
+                    "A plugin is running. What do you want to do?",
+                    ("Wait", "Quit BORIS"),
+                )
+                == "Wait"
+            ):
+                event.ignore()
+                return
+            for plugin_run in list(self.running_plugins):
+                plugin_run.cancel()
+                plugin_run.thread.quit()
+                plugin_run.thread.wait(3000)
+
+        # wait for the end of the autosave
+        self.background_save.wait()
+
         if self.observationId:
             observation_operations.close_observation(self)
 
@@ -5591,6 +5789,10 @@ class MainWindow(QMainWindow, Ui_MainWindow):
                 if self.save_project_activated() == "not saved":
                     event.ignore()
 
+            # the modifications recorded in the journal are discarded
+            if response == cfg.DISCARD and self.project_journal is not None:
+                self.project_journal.remove()
+
             if response == cfg.CANCEL:
                 try:
                     del self.config_param["refresh_preferences"]
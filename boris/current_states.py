@@ -0,0 +1,181 @@
+"""
+BORIS
+Behavioral Observation Research Interactive Software
+Copyright 2012-2026 Olivier Friard
+
+This file is part of BORIS.
+
+  BORIS is free software; you can redistribute it and/or modify
+  it under the terms of the GNU General Public License as published by
+  the Free Software Foundation; either version 3 of the License, or
+  any later version.
+
+  BORIS is distributed in the hope that it will be useful,
+  but WITHOUT ANY WARRANTY; without even the implied warranty of
+  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+  GNU General Public License for more details.
+
+  You should have received a copy of the GNU General Public License
+  along with this program; if not see <http://www.gnu.org/licenses/>.
+
+"""
+
+from decimal import Decimal as dec
+
+from . import config as cfg
+
+
+class CurrentStatesCursor:
+    """
+    incremental tracker of the current state events of an observation
+
+    The cursor remembers the position of the last query in the (sorted) events list
+    and the START/STOP parity of every (subject, behavior, modifier).
+    Moving the playhead forward or backward only processes the events between
+    the previous and the new position. The modifications of the events list are applied
+    to the cursor from their hunks (see apply_hunks).
+
+    The results are the same as util.get_current_states_modifiers_by_subject
+    """
+
+    def __init__(self, state_behaviors_codes, subjects: dict):
+        """
+        Args:
+            state_behaviors_codes (list): list of behavior codes defined as STATE event
+            subjects (dict): dictionary of subjects (without the "No focal subject")
+        """
+        self.state_behaviors_codes = tuple(state_behaviors_codes)
+        self._state_behaviors_set = frozenset(self.state_behaviors_codes)
+        # add the "No focal subject"
+        self.subjects: dict = dict(subjects, **{"": {cfg.SUBJECT_NAME: ""}})
+        self.invalidate()
+
+    def invalidate(self) -> None:
+        """
+        forget the current position.
+        Must be called when the events list was modified without hunks (see apply_hunks)
+        """
+        self._events: list | None = None
+        self._n_events: int = 0
+        self._position: int = 0  # number of events with time <= last queried time
+        self._check_index: int = cfg.EVENT_TIME_FIELD_IDX
+        # {subject name: {(behavior, modifier): bool}}
+        self._states_modifiers: dict = {}
+        # {subject name: {behavior: bool}}
+        self._states: dict = {}
+
+    def _reset(self, events: list) -> None:
+        """
+        start tracking a new events list from the beginning
+        """
+        self.invalidate()
+        self._events = events
+        self._n_events = len(events)
+
+        # check if time contains NA (observation from images)
+        for event in events:
+            if event[cfg.EVENT_TIME_FIELD_IDX].is_nan():
+                self._check_index = cfg.PJ_OBS_FIELDS[cfg.IMAGES][cfg.IMAGE_INDEX]
+                break
+
+        for idx in self.subjects:
+            self._states_modifiers[self.subjects[idx][cfg.SUBJECT_NAME]] = {}
+            self._states[self.subjects[idx][cfg.SUBJECT_NAME]] = dict.fromkeys(self.state_behaviors_codes, False)
+
+    def _toggle(self, event: list) -> None:
+        """
+        switch the state of the behavior of event (START <-> STOP)
+        """
+        behavior = event[cfg.EVENT_BEHAVIOR_FIELD_IDX]
+        if behavior not in self._state_behaviors_set:
+            return
+        subject = event[cfg.EVENT_SUBJECT_FIELD_IDX]
+        key = (behavior, event[cfg.EVENT_MODIFIER_FIELD_IDX])
+
+        states_modifiers = self._states_modifiers.setdefault(subject, {})
+        states_modifiers[key] = not states_modifiers.get(key, False)
+
+        states = self._states.setdefault(subject, dict.fromkeys(self.state_behaviors_codes, False))
+        states[behavior] = not states[behavior]
+
+    def apply_hunks(self, events: list, hunks: list) -> None:
+        """
+        update the cursor after the modification of the events list (events added, edited or deleted)
+        without processing the events list again from the beginning
+
+        Args:
+            events (list): modified events list
+            hunks (list): hunks (position, old rows, new rows) of the modification in the order they were applied (see event_store)
+        """
+        if events is not self._events:
+            return
+        for position, old_rows, new_rows in hunks:
+            self._n_events += len(new_rows) - len(old_rows)
+            if position >= self._position:
+                # events after the cursor: the current states are not modified
+                continue
+            if self._check_index == cfg.EVENT_TIME_FIELD_IDX and any(row[cfg.EVENT_TIME_FIELD_IDX].is_nan() for row in new_rows):
+                # events without timestamp (observation from images): the cursor will restart from the beginning
+                self._events = None
+                return
+            # the old rows before the cursor are cancelled and the new rows are counted before the cursor.
+            # The new rows after the last queried time are cancelled by the next move of the cursor (backward)
+            old_before = old_rows[: self._position - position]
+            for row in old_before:
+                self._toggle(row)
+            for row in new_rows:
+                self._toggle(row)
+            self._position += len(new_rows) - len(old_before)
+        if len(events) != self._n_events:
+            self._events = None
+
+    def _move_to(self, events: list, time_: dec) -> None:
+        """
+        move the cursor to time_
+        """
+        if events is not self._events or len(events) != self._n_events:
+            self._reset(events)
+
+        check_index = self._check_index
+        position = self._position
+
+        # forward
+        while position < self._n_events and events[position][check_index] <= time_:
+            self._toggle(events[position])
+            position += 1
+
+        # backward
+        while position > 0 and events[position - 1][check_index] > time_:
+            position -= 1
+            self._toggle(events[position])
+
+        self._position = position
+
+    def current_states(self, events: list, time_: dec, include_modifiers: bool = False) -> dict:
+        """
+        get current states and modifiers (if requested) for subjects at given time
+
+        Args:
+            events (list): list of events (sorted)
+            time_ (Decimal): time or image index for an observation from images
+            include_modifiers (bool): include modifier if True (default: False)
+
+        Returns:
+            dict: current states by subject. dict of list
+        """
+        if time_.is_nan():
+            return {idx: [] for idx in self.subjects}
+
+        self._move_to(events, time_)
+
+        r: dict = {}
+        if include_modifiers:
+            for idx in self.subjects:
+                states = self._states_modifiers[self.subjects[idx][cfg.SUBJECT_NAME]]
+                r[idx] = [f"{bm[0]} ({bm[1]})" for bm in states if states[bm]]
+        else:
+            for idx in self.subjects:
+                states = self._states[self.subjects[idx][cfg.SUBJECT_NAME]]
+                r[idx] = [b for b in self.state_behaviors_codes if states[b]]
+
+        return r
@@ -23,11 +23,99 @@ Copyright 2012-2026 Olivier Friard
 
 import logging
 import sqlite3
+import threading
+from collections import OrderedDict
 from typing import Optional, Tuple
 
 from . import config as cfg
 from . import event_operations, project_functions
 
+# maximum memory used by the cached databases (in bytes)
+ANALYSIS_CACHE_MAX_SIZE = 256 * 1024 * 1024
+
+# cache of the events and aggregated events databases
+# key: (project revision, database, selection) value: (project dict, db connector, size in bytes)
+_analysis_cache: OrderedDict = OrderedDict()
+_analysis_cache_size: int = 0
+_analysis_cache_enabled: bool = False
+_analysis_cache_lock = threading.Lock()
+_project_revision: int = 0
+
+
+def enable_analysis_cache(enabled: bool = True) -> None:
+    """
+    enable or disable the cache of the events and aggregated events databases.
+    The cache must be invalidated (see invalidate_analysis_cache) every time the project is modified
+    """
+    global _analysis_cache_enabled
+    _analysis_cache_enabled = enabled
+    invalidate_analysis_cache()
+
+
+def invalidate_analysis_cache() -> None:
+    """
+    increment the project revision and empty the cache of databases
+    """
+    global _project_revision, _analysis_cache_size
+    with _analysis_cache_lock:
+        _project_revision += 1
+        for _, db, _ in _analysis_cache.values():
+            db.close()
+        _analysis_cache.clear()
+        _analysis_cache_size = 0
+
+
+def _copy_db(source: sqlite3.Connection, isolation_level) -> sqlite3.Connection:
+    """
+    return a copy in memory of the source database
+    """
+    db = sqlite3.connect(":memory:", isolation_level=isolation_level)
+    source.backup(db)
+    db.row_factory = sqlite3.Row
+    return db
+
+
+def _cache_get(pj: dict, key: tuple, isolation_level) -> Optional[sqlite3.Connection]:
+    """
+    return a copy of the cached database for key (None if not in cache).
+    The analyses can modify the returned database without altering the cache
+    """
+    if not _analysis_cache_enabled:
+        return None
+    with _analysis_cache_lock:
+        key = (_project_revision,) + key
+        # the project dict is kept with the database: another project can not have the same id
+        if key not in _analysis_cache or _analysis_cache[key][0] is not pj:
+            return None
+        _analysis_cache.move_to_end(key)
+        return _copy_db(_analysis_cache[key][1], isolation_level)
+
+
+def _cache_put(pj: dict, key: tuple, source: sqlite3.Connection) -> None:
+    """
+    store a copy of the database in cache (LRU eviction if the cache exceeds ANALYSIS_CACHE_MAX_SIZE)
+    """
+    global _analysis_cache_size
+    if not _analysis_cache_enabled:
+        return
+    source.commit()
+    size = source.execute("PRAGMA page_count").fetchone()[0] * source.execute("PRAGMA page_size").fetchone()[0]
+    if size > ANALYSIS_CACHE_MAX_SIZE:
+        return
+    db = sqlite3.connect(":memory:", check_same_thread=False)
+    source.backup(db)
+    with _analysis_cache_lock:
+        key = (_project_revision,) + key
+        if key in _analysis_cache:
+            _analysis_cache_size -= _analysis_cache[key][2]
+            _analysis_cache.pop(key)[1].close()
+        _analysis_cache[key] = (pj, db, size)
+        _analysis_cache_size += size
+        while _analysis_cache_size > ANALYSIS_CACHE_MAX_SIZE:
+            _, (_, old_db, old_size) = _analysis_cache.popitem(last=False)
+            old_db.close()
+            _analysis_cache_size -= old_size
+
 
 def load_events_in_db(
     pj: dict,
@@ -35,24 +123,34 @@ def load_events_in_db(
     selected_observations: list,
     selected_behaviors: list,
     time_interval: str = cfg.TIME_FULL_OBS,
+    cache_size_kib: int = 0,
 ):
     """
     populate a memory sqlite database with events from selected_observations,
     selected_subjects and selected_behaviors
     include modifiers
 
+    The events of each observation are read once, the rows are inserted with executemany
+    and the indexes are created after the load.
+
     Args:
         pj (dict): project dictionary
         selected_observations (list):
         selected_subjects (list):
         selected_behaviors (list):
         time_interval (str): time interval for loading events (cfg.TIME_FULL_OBS / TIME_cfg.EVENTS / TIME_ARBITRARY_INTERVAL)
+        cache_size_kib (int): size of the sqlite page cache in KiB (0 for the sqlite default)
 
     Returns:
         database cursor:
 
     """
 
+    cache_key = ("events", tuple(selected_subjects), tuple(selected_observations), tuple(selected_behaviors), time_interval)
+    db = _cache_get(pj, cache_key, isolation_level=None)
+    if db is not None:
+        return db.cursor()
+
     # selected behaviors defined as state event
     state_behaviors_codes = [
         pj[cfg.ETHOGRAM][x][cfg.BEHAVIOR_CODE]
@@ -70,6 +168,9 @@ def load_events_in_db(
 
     db.row_factory = sqlite3.Row
     cursor = db.cursor()
+    if cache_size_kib > 0:
+        # negative value: size in KiB
+        cursor.execute(f"PRAGMA cache_size = -{int(cache_size_kib)}")
     cursor.execute(
         (
             "CREATE TABLE events (observation TEXT, "
@@ -84,67 +185,180 @@ def load_events_in_db(
         )
     )
 
+    # the "No focal subject" events have an empty subject
+    subjects_filter = {subject: subject for subject in selected_subjects}
+    if cfg.NO_FOCAL_SUBJECT in subjects_filter:
+        subjects_filter[""] = cfg.NO_FOCAL_SUBJECT
+    behaviors_set = set(selected_behaviors)
+    state_behaviors_set = set(state_behaviors_codes)
+
+    # rows are grouped by subject (in the order of selected_subjects)
+    rows_by_subject: dict = {subject: [] for subject in selected_subjects}
+    for obs_id in selected_observations:
+        obs_type = pj[cfg.OBSERVATIONS][obs_id][cfg.TYPE]
+        if obs_type not in (cfg.MEDIA, cfg.LIVE, cfg.IMAGES):
+            continue
+        for event in pj[cfg.OBSERVATIONS][obs_id][cfg.EVENTS]:
+            if event[cfg.EVENT_BEHAVIOR_FIELD_IDX] not in behaviors_set or event[cfg.EVENT_SUBJECT_FIELD_IDX] not in subjects_filter:
+                continue
+            # extract time, code, modifier and comment (time:0, subject:1, code:2, modifier:3, comment:4)
+            if obs_type == cfg.IMAGES:
+                image_index = event[cfg.PJ_OBS_FIELDS[cfg.IMAGES][cfg.IMAGE_INDEX]]
+                image_path = event[cfg.PJ_OBS_FIELDS[cfg.IMAGES][cfg.IMAGE_PATH]]
+            else:
+                # frame index or NA
+                image_index = event_operations.read_event_field(event, obs_type, cfg.FRAME_INDEX)
+                image_path = None
+
+            rows_by_subject[subjects_filter[event[cfg.EVENT_SUBJECT_FIELD_IDX]]].append(
+                (
+                    obs_id,
+                    cfg.NO_FOCAL_SUBJECT if event[cfg.EVENT_SUBJECT_FIELD_IDX] == "" else event[cfg.EVENT_SUBJECT_FIELD_IDX],
+                    event[cfg.EVENT_BEHAVIOR_FIELD_IDX],
+                    cfg.STATE if event[cfg.EVENT_BEHAVIOR_FIELD_IDX] in state_behaviors_set else cfg.POINT,
+                    event[cfg.EVENT_MODIFIER_FIELD_IDX],
+                    float(event[cfg.EVENT_TIME_FIELD_IDX]) if not event[cfg.EVENT_TIME_FIELD_IDX].is_nan() else None,
+                    event[cfg.EVENT_COMMENT_FIELD_IDX],
+                    image_index,
+                    image_path,
+                )
+            )
+
+    cursor.execute("BEGIN")
+    for subject in rows_by_subject:
+        cursor.executemany(
+            (
+                "INSERT INTO events "
+                "(observation, subject, code, type, modifiers, occurence, comment, image_index, image_path) "
+                "VALUES (?,?,?,?,?,?,?,?,?)"
+            ),
+            rows_by_subject[subject],
+        )
+    cursor.execute("COMMIT")
+
+    # indexes are created after the bulk insert
     cursor.execute("CREATE INDEX observation_idx ON events(observation)")
     cursor.execute("CREATE INDEX subject_idx ON events(subject)")
     cursor.execute("CREATE INDEX code_idx ON events(code)")
     cursor.execute("CREATE INDEX modifiers_idx ON events(modifiers)")
 
-    for subject_to_analyze in selected_subjects:
-        for obs_id in selected_observations:
-            for event in pj[cfg.OBSERVATIONS][obs_id][cfg.EVENTS]:
-                if event[cfg.EVENT_BEHAVIOR_FIELD_IDX] in selected_behaviors:
-                    # extract time, code, modifier and comment (time:0, subject:1, code:2, modifier:3, comment:4)
-                    if (subject_to_analyze == cfg.NO_FOCAL_SUBJECT and event[cfg.EVENT_SUBJECT_FIELD_IDX] == "") or (
-                        event[cfg.EVENT_SUBJECT_FIELD_IDX] == subject_to_analyze
-                    ):
-                        if pj[cfg.OBSERVATIONS][obs_id][cfg.TYPE] in (cfg.MEDIA, cfg.LIVE):
-                            cursor.execute(
-                                (
-                                    "INSERT INTO events "
-                                    "(observation, subject, code, type, modifiers, occurence, comment, image_index) "
-                                    "VALUES (?,?,?,?,?,?,?,?)"
-                                ),
-                                (
-                                    obs_id,
-                                    cfg.NO_FOCAL_SUBJECT
-                                    if event[cfg.EVENT_SUBJECT_FIELD_IDX] == ""
-                                    else event[cfg.EVENT_SUBJECT_FIELD_IDX],
-                                    event[cfg.EVENT_BEHAVIOR_FIELD_IDX],
-                                    cfg.STATE if event[cfg.EVENT_BEHAVIOR_FIELD_IDX] in state_behaviors_codes else cfg.POINT,
-                                    event[cfg.EVENT_MODIFIER_FIELD_IDX],
-                                    float(event[cfg.EVENT_TIME_FIELD_IDX]) if not event[cfg.EVENT_TIME_FIELD_IDX].is_nan() else None,
-                                    event[cfg.EVENT_COMMENT_FIELD_IDX],
-                                    # frame index or NA
-                                    event_operations.read_event_field(event, pj[cfg.OBSERVATIONS][obs_id][cfg.TYPE], cfg.FRAME_INDEX),
-                                ),
-                            )
-
-                        if pj[cfg.OBSERVATIONS][obs_id][cfg.TYPE] == cfg.IMAGES:
-                            cursor.execute(
-                                (
-                                    "INSERT INTO events "
-                                    "(observation, subject, code, type, modifiers, occurence, comment, image_index, image_path) "
-                                    "VALUES (?,?,?,?,?,?,?,?,?)"
-                                ),
-                                (
-                                    obs_id,
-                                    cfg.NO_FOCAL_SUBJECT
-                                    if event[cfg.EVENT_SUBJECT_FIELD_IDX] == ""
-                                    else event[cfg.EVENT_SUBJECT_FIELD_IDX],
-                                    event[cfg.EVENT_BEHAVIOR_FIELD_IDX],
-                                    cfg.STATE if event[cfg.EVENT_BEHAVIOR_FIELD_IDX] in state_behaviors_codes else cfg.POINT,
-                                    event[cfg.EVENT_MODIFIER_FIELD_IDX],
-                                    float(event[cfg.EVENT_TIME_FIELD_IDX]) if not event[cfg.EVENT_TIME_FIELD_IDX].is_nan() else None,
-                                    event[cfg.EVENT_COMMENT_FIELD_IDX],
-                                    event[cfg.PJ_OBS_FIELDS[cfg.IMAGES][cfg.IMAGE_INDEX]],
-                                    event[cfg.PJ_OBS_FIELDS[cfg.IMAGES][cfg.IMAGE_PATH]],
-                                ),
-                            )
-
     db.commit()
+    _cache_put(pj, cache_key, db)
+
     return cursor
 
 
+def aggregated_events_rows(
+    pj: dict,
+    obs_id: str,
+    selected_subjects: list,
+    selected_behaviors: list,
+    state_behaviors_codes: list,
+    point_behaviors_codes: list,
+) -> list:
+    """
+    aggregate the events of an observation in a single pass:
+    state events are paired (start, stop) and point events have start = stop.
+    The state events must be paired (see project_functions.check_state_events_obs)
+
+    Rows are ordered by subject, behavior (order of selected_subjects and selected_behaviors), modifiers and start
+
+    Args:
+        pj (dict): project dictionary
+        obs_id (str): observation id
+        selected_subjects (list): selected subjects
+        selected_behaviors (list): selected behaviors
+        state_behaviors_codes (list): selected behaviors defined as state event
+        point_behaviors_codes (list): selected behaviors defined as point event
+
+    Returns:
+        list: list of rows (observation, subject, behavior, type, modifiers, start, stop, comment, comment_stop,
+              image_index_start, image_index_stop, image_path_start, image_path_stop)
+    """
+
+    observation = pj[cfg.OBSERVATIONS][obs_id]
+    obs_type = observation[cfg.TYPE]
+    subjects_set = set(selected_subjects)
+    behaviors_set = set(selected_behaviors)
+
+    # occurrences by (subject, behavior, modifiers)
+    occurrences: dict = {}
+    for event in observation[cfg.EVENTS]:
+        behavior = event[cfg.EVENT_BEHAVIOR_FIELD_IDX]
+        if behavior not in behaviors_set:
+            continue
+        subject = event[cfg.EVENT_SUBJECT_FIELD_IDX] if event[cfg.EVENT_SUBJECT_FIELD_IDX] else cfg.NO_FOCAL_SUBJECT
+        if subject not in subjects_set:
+            continue
+
+        if obs_type == cfg.IMAGES:
+            image_index = event[cfg.PJ_OBS_FIELDS[cfg.IMAGES][cfg.IMAGE_INDEX]]
+            image_path = event[cfg.PJ_OBS_FIELDS[cfg.IMAGES][cfg.IMAGE_PATH]]
+        else:
+            # frame index or NA
+            image_index = event_operations.read_event_field(event, obs_type, cfg.FRAME_INDEX)
+            image_path = None
+
+        occurrences.setdefault((subject, behavior, event[cfg.EVENT_MODIFIER_FIELD_IDX]), []).append(
+            (
+                float(event[cfg.EVENT_TIME_FIELD_IDX]) if not event[cfg.EVENT_TIME_FIELD_IDX].is_nan() else None,
+                event[cfg.EVENT_COMMENT_FIELD_IDX],
+                image_index,
+                image_path,
+            )
+        )
+
+    subjects_order = {subject: idx for idx, subject in enumerate(selected_subjects)}
+    behaviors_order = {behavior: idx for idx, behavior in enumerate(selected_behaviors)}
+
+    rows: list = []
+    for subject, behavior, modifiers in sorted(occurrences, key=lambda k: (subjects_order[k[0]], behaviors_order[k[1]], k[2])):
+        # sort by time (events without time first), events list order is kept for same time
+        occ = sorted(occurrences[(subject, behavior, modifiers)], key=lambda x: -float("inf") if x[0] is None else x[0])
+
+        if behavior in point_behaviors_codes:
+            for time_, comment, image_index, image_path in occ:
+                rows.append(
+                    (
+                        obs_id,
+                        subject,
+                        behavior,
+                        cfg.POINT,
+                        modifiers,
+                        time_,
+                        time_,
+                        comment,
+                        "",  # no stop comment for point event
+                        image_index,
+                        image_index,
+                        image_path,
+                        image_path,
+                    )
+                )
+
+        if behavior in state_behaviors_codes:
+            for start, stop in zip(occ[0::2], occ[1::2]):
+                rows.append(
+                    (
+                        obs_id,
+                        subject,
+                        behavior,
+                        cfg.STATE,
+                        modifiers,
+                        start[0],
+                        stop[0],
+                        start[1],
+                        stop[1],
+                        start[2],
+                        stop[2],
+                        start[3],
+                        stop[3],
+                    )
+                )
+
+    return rows
+
+
 def load_aggregated_events_in_db(
     pj: dict, selected_subjects: list, selected_observations: list, selected_behaviors: list
 ) -> Tuple[bool, str, Optional[sqlite3.Connection]]:
@@ -166,6 +380,11 @@ def load_aggregated_events_in_db(
 
     logging.debug("function: load_aggregated_events_in_db")
 
+    cache_key = ("aggregated_events", tuple(selected_subjects), tuple(selected_observations), tuple(selected_behaviors))
+    db = _cache_get(pj, cache_key, isolation_level="")
+    if db is not None:
+        return True, "", db
+
     # if no observation selected select all
     if not selected_observations:
         selected_observations = sorted([x for x in pj[cfg.OBSERVATIONS]])
@@ -232,11 +451,6 @@ def load_aggregated_events_in_db(
         )
     )
 
-    cursor2.execute("CREATE INDEX observation_idx ON aggregated_events(observation)")
-    cursor2.execute("CREATE INDEX subject_idx ON aggregated_events(subject)")
-    cursor2.execute("CREATE INDEX behavior_idx ON aggregated_events(behavior)")
-    cursor2.execute("CREATE INDEX modifiers_idx ON aggregated_events(modifiers)")
-
     # too slow! cursor1 = load_events_in_db(pj, selected_subjects, selected_observations, selected_behaviors)
 
     insert_sql = (
@@ -247,69 +461,18 @@ def load_aggregated_events_in_db(
     )
 
     for obs_id in selected_observations:
-        cursor1 = load_events_in_db(pj, selected_subjects, [obs_id], selected_behaviors)
-
-        for subject in selected_subjects:
-            for behavior in selected_behaviors:
-                cursor1.execute(
-                    "SELECT DISTINCT modifiers FROM events WHERE subject=? AND code=? ORDER BY modifiers",
-                    (
-                        subject,
-                        behavior,
-                    ),
-                )
-
-                rows_distinct_modifiers = list(x[0] for x in cursor1.fetchall())
+        cursor2.executemany(
+            insert_sql,
+            aggregated_events_rows(pj, obs_id, selected_subjects, selected_behaviors, state_behaviors_codes, point_behaviors_codes),
+        )
 
-                for distinct_modifiers in rows_distinct_modifiers:
-                    cursor1.execute(
-                        (
-                            "SELECT occurence, comment, image_index, image_path FROM events "
-                            "WHERE subject = ? AND code = ? AND modifiers = ? ORDER by occurence"
-                        ),
-                        (subject, behavior, distinct_modifiers),
-                    )
-                    rows = list(cursor1.fetchall())
-
-                    for idx, row in enumerate(rows):
-                        if behavior in point_behaviors_codes:
-                            data = (
-                                obs_id,
-                                subject,
-                                behavior,
-                                cfg.POINT,
-                                distinct_modifiers,
-                                row["occurence"],
-                                row["occurence"],
-                                row["comment"],
-                                "",  # no stop comment for point event
-                                row["image_index"],
-                                row["image_index"],
-                                row["image_path"],
-                                row["image_path"],
-                            )
-                            cursor2.execute(insert_sql, data)
-
-                        if behavior in state_behaviors_codes:
-                            if idx % 2 == 0:
-                                data = (
-                                    obs_id,
-                                    subject,
-                                    behavior,
-                                    cfg.STATE,
-                                    distinct_modifiers,
-                                    row["occurence"],
-                                    rows[idx + 1]["occurence"],
-                                    row["comment"],
-                                    rows[idx + 1]["comment"],
-                                    row["image_index"],
-                                    rows[idx + 1]["image_index"],
-                                    row["image_path"],
-                                    rows[idx + 1]["image_path"],
-                                )
-
-                                cursor2.execute(insert_sql, data)
+    # indexes are created after the bulk insert
+    cursor2.execute("CREATE INDEX observation_idx ON aggregated_events(observation)")
+    cursor2.execute("CREATE INDEX subject_idx ON aggregated_events(subject)")
+    cursor2.execute("CREATE INDEX behavior_idx ON aggregated_events(behavior)")
+    cursor2.execute("CREATE INDEX modifiers_idx ON aggregated_events(modifiers)")
 
     db.commit()
+    _cache_put(pj, cache_key, db)
 
     return True, "", db
@@ -0,0 +1,409 @@
+"""
+BORIS
+Behavioral Observation Research Interactive Software
+Copyright 2012-2026 Olivier Friard
+
+This file is part of BORIS.
+
+  BORIS is free software; you can redistribute it and/or modify
+  it under the terms of the GNU General Public License as published by
+  the Free Software Foundation; either version 3 of the License, or
+  any later version.
+
+  BORIS is distributed in the hope that it will be useful,
+  but WITHOUT ANY WARRANTY; without even the implied warranty of
+  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+  GNU General Public License for more details.
+
+  You should have received a copy of the GNU General Public License
+  along with this program; if not see <http://www.gnu.org/licenses/>.
+
+Columnar (array-backed) storage of the events of an observation
+"""
+
+from collections.abc import MutableSequence
+from decimal import Decimal as dec
+
+import numpy as np
+
+from . import config as cfg
+from . import event_index
+
+# sentinel values of the integer columns
+TIME_NAN = np.iinfo(np.int64).min  # time NaN (observations from images)
+FRAME_NA = -1  # frame index "NA"
+FRAME_NONE = -2  # frame index None
+
+# number of fields of the events stored in columns (time, subject, behavior, modifiers, comment, frame or image index, image path)
+MAX_FIELDS = 7
+
+# opt-in columnar copies of the events lists of the observations (see enable_columnar_store)
+_columnar_store_enabled: bool = False
+# {id of events list: (events list, EventColumns)}
+_columnar_store: dict = {}
+
+
+class Categories:
+    """
+    interned strings: every distinct string is stored once and replaced by an integer code in the columns
+    """
+
+    def __init__(self, values=()):
+        self.values: list = []
+        self.codes: dict = {}
+        for value in values:
+            self.code(value)
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def code(self, value: str) -> int:
+        """
+        code of value (the value is added if not already present)
+        """
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def get(self, value: str, default: int = -1) -> int:
+        """
+        code of value without adding it (default if value is not present)
+        """
+        return self.codes.get(value, default)
+
+
+def time_to_ms(time_) -> int:
+    """
+    convert a time (Decimal) in integer milliseconds (TIME_NAN for NaN)
+    """
+    if not isinstance(time_, dec):
+        time_ = dec(str(time_))
+    if time_.is_nan():
+        return TIME_NAN
+    return event_index.time_to_ms(time_)
+
+
+def ms_to_time(ms: int) -> dec:
+    """
+    convert integer milliseconds in time (Decimal with 3 decimals)
+    """
+    if ms == TIME_NAN:
+        return dec("NaN")
+    return event_index.ms_to_time(ms)
+
+
+class EventColumns(MutableSequence):
+    """
+    events of an observation stored in columns:
+      * time in milliseconds (int64)
+      * frame index for media observations or image index for images observations (int32)
+      * subject, behavior, modifiers, comment and image path as codes (int32) of interned strings (Categories)
+
+    The columns are NumPy arrays that analyses can read without copy (time_ms, frame_idx, subject_codes...).
+
+    The object can replace the events list (list-like interface): an event is returned as a new list
+    [time, subject, behavior, modifiers, comment, ...] (modifying the returned list does not modify the store).
+    Inserting or deleting events shifts the columns (O(n)): the events of the observations are modified in the list of events,
+    the columnar copy of the list is kept in sync by event_store (see observation_columns).
+
+    The times are stored in milliseconds, the precision used to save the project file.
+    """
+
+    def __init__(self, capacity: int = 0):
+        self._size: int = 0
+        self._time_ms = np.empty(capacity, dtype=np.int64)
+        self._frame_idx = np.empty(capacity, dtype=np.int32)
+        # number of fields of every event (5 for live observations, 6 for media observations...)
+        self._n_fields = np.empty(capacity, dtype=np.int8)
+        self._strings: dict = {
+            cfg.EVENT_SUBJECT_FIELD_IDX: np.empty(capacity, dtype=np.int32),
+            cfg.EVENT_BEHAVIOR_FIELD_IDX: np.empty(capacity, dtype=np.int32),
+            cfg.EVENT_MODIFIER_FIELD_IDX: np.empty(capacity, dtype=np.int32),
+            cfg.EVENT_COMMENT_FIELD_IDX: np.empty(capacity, dtype=np.int32),
+            MAX_FIELDS - 1: np.empty(capacity, dtype=np.int32),  # image path
+        }
+        self.categories: dict = {field_idx: Categories() for field_idx in self._strings}
+
+    @classmethod
+    def from_events(cls, events: list) -> "EventColumns":
+        """
+        build the columnar store from a list of events
+
+        Args:
+            events (list): list of events of an observation
+
+        Returns:
+            EventColumns
+        """
+        columns = cls(capacity=len(events))
+        for idx, event in enumerate(events):
+            columns._set_row(idx, event)
+        columns._size = len(events)
+        return columns
+
+    def to_events(self) -> list:
+        """
+        list of events (as stored in the project, for example to be saved in JSON)
+        """
+        return [self[idx] for idx in range(self._size)]
+
+    # zero-copy access to columns
+
+    def _view(self, array: np.ndarray) -> np.ndarray:
+        view = array[: self._size]
+        view.flags.writeable = False
+        return view
+
+    @property
+    def time_ms(self) -> np.ndarray:
+        """
+        times in milliseconds (read-only view, TIME_NAN for NaN)
+        """
+        return self._view(self._time_ms)
+
+    @property
+    def frame_idx(self) -> np.ndarray:
+        """
+        frame index (media) or image index (images) (read-only view, FRAME_NA / FRAME_NONE for NA / None)
+        """
+        return self._view(self._frame_idx)
+
+    @property
+    def subject_codes(self) -> np.ndarray:
+        return self._view(self._strings[cfg.EVENT_SUBJECT_FIELD_IDX])
+
+    @property
+    def behavior_codes(self) -> np.ndarray:
+        return self._view(self._strings[cfg.EVENT_BEHAVIOR_FIELD_IDX])
+
+    @property
+    def modifier_codes(self) -> np.ndarray:
+        return self._view(self._strings[cfg.EVENT_MODIFIER_FIELD_IDX])
+
+    @property
+    def comment_codes(self) -> np.ndarray:
+        return self._view(self._strings[cfg.EVENT_COMMENT_FIELD_IDX])
+
+    def times(self) -> np.ndarray:
+        """
+        times in seconds (float64, NaN for NaN)
+        """
+        times = self.time_ms / 1000
+        times[self.time_ms == TIME_NAN] = np.nan
+        return times
+
+    def codes(self, field_idx: int, values) -> np.ndarray:
+        """
+        codes of values for a string field (-1 for values not present)
+
+        Args:
+            field_idx (int): index of field (cfg.EVENT_SUBJECT_FIELD_IDX, cfg.EVENT_BEHAVIOR_FIELD_IDX...)
+            values (list): strings
+
+        Returns:
+            np.ndarray: codes
+        """
+        return np.array([self.categories[field_idx].get(value) for value in values], dtype=np.int32)
+
+    def mask(self, field_idx: int, values) -> np.ndarray:
+        """
+        boolean mask of the events with the field in values
+        """
+        return np.isin(self._view(self._strings[field_idx]), self.codes(field_idx, values))
+
+    def groups(self, behaviors=None) -> dict:
+        """
+        positions of the events grouped by (subject, behavior, modifiers)
+
+        Args:
+            behaviors (list): behaviors to group (None for all behaviors)
+
+        Returns:
+            dict: {(subject, behavior, modifiers): positions of events (np.ndarray)} in order of first event
+        """
+        if behaviors is None:
+            positions = np.arange(self._size)
+        else:
+            positions = np.flatnonzero(self.mask(cfg.EVENT_BEHAVIOR_FIELD_IDX, behaviors))
+        if not len(positions):
+            return {}
+        keys = np.stack((self.subject_codes[positions], self.behavior_codes[positions], self.modifier_codes[positions]), axis=1)
+        unique_keys, first, inverse = np.unique(keys, axis=0, return_index=True, return_inverse=True)
+        inverse = inverse.ravel()
+        # positions sorted by key (stable: positions of a key stay in events order)
+        grouped = np.split(positions[np.argsort(inverse, kind="stable")], np.cumsum(np.bincount(inverse))[:-1])
+        subjects = self.categories[cfg.EVENT_SUBJECT_FIELD_IDX].values
+        behaviors_ = self.categories[cfg.EVENT_BEHAVIOR_FIELD_IDX].values
+        modifiers = self.categories[cfg.EVENT_MODIFIER_FIELD_IDX].values
+        return {
+            (subjects[unique_keys[key_idx][0]], behaviors_[unique_keys[key_idx][1]], modifiers[unique_keys[key_idx][2]]): grouped[key_idx]
+            for key_idx in np.argsort(first, kind="stable").tolist()
+        }
+
+    # list-like interface
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _get_row(self, idx: int) -> list:
+        n_fields = int(self._n_fields[idx])
+        event: list = [ms_to_time(int(self._time_ms[idx]))]
+        for field_idx in range(1, min(n_fields, cfg.EVENT_COMMENT_FIELD_IDX + 1)):
+            event.append(self.categories[field_idx].values[self._strings[field_idx][idx]])
+        if n_fields > cfg.EVENT_COMMENT_FIELD_IDX + 1:
+            frame_idx = int(self._frame_idx[idx])
+            event.append(cfg.NA if frame_idx == FRAME_NA else None if frame_idx == FRAME_NONE else frame_idx)
+        if n_fields == MAX_FIELDS:
+            event.append(self.categories[MAX_FIELDS - 1].values[self._strings[MAX_FIELDS - 1][idx]])
+        return event
+
+    def _set_row(self, idx: int, event: list) -> None:
+        if not cfg.EVENT_COMMENT_FIELD_IDX < len(event) <= MAX_FIELDS:
+            raise ValueError(f"invalid event: {event}")
+        self._n_fields[idx] = len(event)
+        self._time_ms[idx] = time_to_ms(event[cfg.EVENT_TIME_FIELD_IDX])
+        for field_idx, array in self._strings.items():
+            array[idx] = self.categories[field_idx].code(event[field_idx] if field_idx < len(event) else "")
+        frame_idx = event[cfg.EVENT_COMMENT_FIELD_IDX + 1] if len(event) > cfg.EVENT_COMMENT_FIELD_IDX + 1 else None
+        self._frame_idx[idx] = FRAME_NA if frame_idx == cfg.NA else FRAME_NONE if frame_idx is None else frame_idx
+
+    def _arrays(self) -> list:
+        return [self._time_ms, self._frame_idx, self._n_fields] + list(self._strings.values())
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return [self._get_row(i) for i in range(*idx.indices(self._size))]
+        if idx < 0:
+            idx += self._size
+        if not 0 <= idx < self._size:
+            raise IndexError("event index out of range")
+        return self._get_row(idx)
+
+    def __setitem__(self, idx, event) -> None:
+        if isinstance(idx, slice):
+            start, stop, step = idx.indices(self._size)
+            if step != 1:
+                raise TypeError("extended slice assignment is not supported")
+            self.apply_hunk((start, [None] * max(0, stop - start), event))
+            return
+        if idx < 0:
+            idx += self._size
+        if not 0 <= idx < self._size:
+            raise IndexError("event index out of range")
+        self._set_row(idx, event)
+
+    def __delitem__(self, idx) -> None:
+        if isinstance(idx, slice):
+            positions = list(range(*idx.indices(self._size)))
+        else:
+            if idx < 0:
+                idx += self._size
+            if not 0 <= idx < self._size:
+                raise IndexError("event index out of range")
+            positions = [idx]
+        if not positions:
+            return
+        keep = np.ones(len(self._time_ms), dtype=bool)
+        keep[positions] = False
+        keep[self._size :] = False
+        self._time_ms, self._frame_idx, self._n_fields = self._time_ms[keep], self._frame_idx[keep], self._n_fields[keep]
+        self._strings = {field_idx: array[keep] for field_idx, array in self._strings.items()}
+        self._size -= len(positions)
+
+    def insert(self, idx: int, event: list) -> None:
+        if idx < 0:
+            idx = max(0, idx + self._size)
+        idx = min(idx, self._size)
+        if self._size == len(self._time_ms):
+            # grow the columns (amortized like list.append)
+            capacity = max(8, 2 * self._size)
+            for name in ("_time_ms", "_frame_idx", "_n_fields"):
+                array = getattr(self, name)
+                setattr(self, name, np.resize(array, capacity))
+            self._strings = {field_idx: np.resize(array, capacity) for field_idx, array in self._strings.items()}
+        for array in self._arrays():
+            array[idx + 1 : self._size + 1] = array[idx : self._size]
+        self._size += 1
+        self._set_row(idx, event)
+
+    def apply_hunk(self, hunk: tuple) -> None:
+        """
+        apply a hunk (position, old rows, new rows) of a modification of the events list (see event_store)
+
+        Args:
+            hunk (tuple): position, old rows (only their number is used), new rows
+        """
+        position, old_rows, new_rows = hunk
+        n_common = min(len(old_rows), len(new_rows))
+        for idx in range(n_common):
+            self._set_row(position + idx, new_rows[idx])
+        if len(old_rows) > n_common:
+            del self[position + n_common : position + len(old_rows)]
+        for idx in range(n_common, len(new_rows)):
+            self.insert(position + idx, new_rows[idx])
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, EventColumns):
+            return self.to_events() == other.to_events()
+        if isinstance(other, list):
+            return self.to_events() == other
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"EventColumns({self.to_events()!r})"
+
+
+def enable_columnar_store(enabled: bool = True) -> None:
+    """
+    enable or disable the columnar copies of the events lists used by the analyses (see observation_columns)
+    """
+    global _columnar_store_enabled
+    _columnar_store_enabled = enabled
+    invalidate_columnar_store()
+
+
+def columnar_store_enabled() -> bool:
+    return _columnar_store_enabled
+
+
+def invalidate_columnar_store() -> None:
+    """
+    remove the columnar copies of all events lists (e.g. when a project is opened or closed)
+    """
+    _columnar_store.clear()
+
+
+def observation_columns(events: list) -> EventColumns | None:
+    """
+    columnar copy of the events list of an observation (None if the columnar store is not enabled).
+    The copy is built at the first call and then kept in sync by the modifications made with event_store.
+
+    Args:
+        events (list): events list of the observation
+
+    Returns:
+        EventColumns: columnar copy of events (must not be modified)
+    """
+    if not _columnar_store_enabled:
+        return None
+    columns = tracked_columns(events)
+    if columns is None:
+        columns = EventColumns.from_events(events)
+        _columnar_store[id(events)] = (events, columns)
+    return columns
+
+
+def tracked_columns(events: list) -> EventColumns | None:
+    """
+    columnar copy of the events list kept in sync (None if events is not tracked).
+    A copy with a different number of events (list modified without event_store) is discarded.
+    """
+    stored = _columnar_store.get(id(events))
+    if stored is None or stored[0] is not events:
+        return None
+    if len(stored[1]) != len(events):
+        del _columnar_store[id(events)]
+        return None
+    return stored[1]
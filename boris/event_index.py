@@ -0,0 +1,325 @@
+"""
+BORIS
+Behavioral Observation Research Interactive Software
+Copyright 2012-2026 Olivier Friard
+
+This file is part of BORIS.
+
+  BORIS is free software; you can redistribute it and/or modify
+  it under the terms of the GNU General Public License as published by
+  the Free Software Foundation; either version 3 of the License, or
+  any later version.
+
+  BORIS is distributed in the hope that it will be useful,
+  but WITHOUT ANY WARRANTY; without even the implied warranty of
+  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+  GNU General Public License for more details.
+
+  You should have received a copy of the GNU General Public License
+  along with this program; if not see <http://www.gnu.org/licenses/>.
+
+"""
+
+from decimal import Decimal as dec
+
+import numpy as np
+
+from . import config as cfg
+from . import event_columns
+
+
+class EventIntervalIndex:
+    """
+    index of the events of an observation for fast state-at-time and time window queries
+
+    State events are paired in intervals (start, stop) and point events are stored as times,
+    both as sorted NumPy arrays keyed by (subject, behavior, modifiers).
+    The subject of events without focal subject is "".
+
+    A state interval is active at time t if start <= t < stop (same rule as the START/STOP parity of the events list).
+    An unpaired START is active until the end of the observation.
+    """
+
+    def __init__(self, events: list, state_behaviors_codes, selected_behaviors=None, time_idx: int = cfg.EVENT_TIME_FIELD_IDX):
+        """
+        Args:
+            events (list): list of events of the observation (sorted by time) or event_columns.EventColumns
+            state_behaviors_codes (list): list of behavior codes defined as STATE event
+            selected_behaviors (list): behaviors to index (None for all behaviors)
+            time_idx (int): index of the time field in events
+        """
+        state_behaviors_codes = tuple(state_behaviors_codes)
+        state_set = set(state_behaviors_codes)
+        selected_set = None if selected_behaviors is None else set(selected_behaviors)
+
+        state_times: dict = {}
+        point_times: dict = {}
+        point_positions: dict = {}
+        behaviors_order: dict = {code: idx for idx, code in enumerate(state_behaviors_codes)}
+
+        if isinstance(events, event_columns.EventColumns):
+            # columnar events: vectorised grouping by (subject, behavior, modifiers)
+            times = events.times()
+            for key, positions in events.groups(selected_behaviors).items():
+                if key[1] in state_set:
+                    state_times[key] = times[positions].tolist()
+                else:
+                    point_times[key] = times[positions].tolist()
+                    point_positions[key] = positions.tolist()
+                    behaviors_order.setdefault(key[1], len(behaviors_order))
+            events = ()
+
+        for position, event in enumerate(events):
+            behavior = event[cfg.EVENT_BEHAVIOR_FIELD_IDX]
+            if selected_set is not None and behavior not in selected_set:
+                continue
+            key = (event[cfg.EVENT_SUBJECT_FIELD_IDX], behavior, event[cfg.EVENT_MODIFIER_FIELD_IDX])
+            if behavior in state_set:
+                state_times.setdefault(key, []).append(float(event[time_idx]))
+            else:
+                point_times.setdefault(key, []).append(float(event[time_idx]))
+                point_positions.setdefault(key, []).append(position)
+                behaviors_order.setdefault(behavior, len(behaviors_order))
+
+        # (starts, stops) by key
+        self._states: dict = {}
+        for key, times in state_times.items():
+            if len(times) % 2:
+                # unpaired START
+                times.append(np.inf)
+            times_array = np.array(times, dtype=np.float64)
+            self._states[key] = (times_array[0::2], times_array[1::2])
+
+        # (times, position of event in events list) by key
+        self._points: dict = {
+            key: (np.array(times, dtype=np.float64), np.array(point_positions[key], dtype=np.int64)) for key, times in point_times.items()
+        }
+
+        # keys by subject in a deterministic order (behavior order, modifiers)
+        self._subject_state_keys: dict = {}
+        for key in sorted(self._states, key=lambda k: (behaviors_order.get(k[1], len(behaviors_order)), k[1], k[2])):
+            self._subject_state_keys.setdefault(key[0], []).append(key)
+        self._subject_point_keys: dict = {}
+        for key in sorted(self._points, key=lambda k: (behaviors_order.get(k[1], len(behaviors_order)), k[1], k[2])):
+            self._subject_point_keys.setdefault(key[0], []).append(key)
+
+    @property
+    def state_keys(self) -> list:
+        """
+        list of (subject, behavior, modifiers) of state events
+        """
+        return [key for keys in self._subject_state_keys.values() for key in keys]
+
+    @property
+    def point_keys(self) -> list:
+        """
+        list of (subject, behavior, modifiers) of point events
+        """
+        return [key for keys in self._subject_point_keys.values() for key in keys]
+
+    def subjects(self) -> set:
+        """
+        set of subjects with indexed events
+        """
+        return set(self._subject_state_keys) | set(self._subject_point_keys)
+
+    def state_intervals(self, key: tuple) -> tuple:
+        """
+        start and stop times of the state intervals for key (subject, behavior, modifiers)
+
+        Returns:
+            np.ndarray: start times
+            np.ndarray: stop times
+        """
+        return self._states.get(key, (np.empty(0), np.empty(0)))
+
+    def point_times(self, key: tuple) -> np.ndarray:
+        """
+        times of point events for key (subject, behavior, modifiers)
+        """
+        return self._points.get(key, (np.empty(0), None))[0]
+
+    def states_at(self, subject: str, time_, include_stop: bool = False) -> list:
+        """
+        state behaviors active for subject at time_
+
+        Args:
+            subject (str): subject ("" for no focal subject)
+            time_ (float or Decimal): time
+            include_stop (bool): True: a state is also active at its stop time (start <= t <= stop)
+
+        Returns:
+            list: list of (behavior, modifiers)
+        """
+        t = float(time_)
+        out: list = []
+        for key in self._subject_state_keys.get(subject, ()):
+            starts, stops = self._states[key]
+            idx = int(np.searchsorted(starts, t, side="right"))
+            if idx and (stops[idx - 1] >= t if include_stop else stops[idx - 1] > t):
+                out.append(key[1:])
+        return out
+
+    def points_between(self, subject: str, start, end, include_end: bool = False) -> list:
+        """
+        point events of subject with start <= time < end (or <= end)
+
+        Args:
+            subject (str): subject ("" for no focal subject)
+            start (float or Decimal): beginning of time window
+            end (float or Decimal): end of time window
+            include_end (bool): True to include the events at end time
+
+        Returns:
+            list: list of (behavior, modifiers) for each event in the window (in events list order)
+        """
+        t_start, t_end = float(start), float(end)
+        found: list = []
+        for key in self._subject_point_keys.get(subject, ()):
+            times, positions = self._points[key]
+            i1 = int(np.searchsorted(times, t_start, side="left"))
+            i2 = int(np.searchsorted(times, t_end, side="right" if include_end else "left"))
+            if i2 > i1:
+                found.extend((position, key[1:]) for position in positions[i1:i2].tolist())
+        found.sort()
+        return [x[1] for x in found]
+
+    def states_matrix(self, subject: str, times: np.ndarray, include_stop: bool = False) -> tuple:
+        """
+        state behaviors active for subject at every time (vectorised states_at)
+
+        Args:
+            subject (str): subject ("" for no focal subject)
+            times (np.ndarray): times (float64)
+            include_stop (bool): True: a state is also active at its stop time (start <= t <= stop)
+
+        Returns:
+            list: list of (behavior, modifiers) in the order of states_at
+            np.ndarray: boolean matrix (times x states)
+        """
+        keys = self._subject_state_keys.get(subject, [])
+        active = np.zeros((len(times), len(keys)), dtype=bool)
+        for column, key in enumerate(keys):
+            starts, stops = self._states[key]
+            idx = np.searchsorted(starts, times, side="right")
+            previous_stops = stops[np.maximum(idx - 1, 0)] if len(stops) else np.empty(len(times))
+            active[:, column] = (idx > 0) & ((previous_stops >= times) if include_stop else (previous_stops > times))
+        return [key[1:] for key in keys], active
+
+    def points_in_windows(self, subject: str, starts: np.ndarray, ends: np.ndarray, include_end: bool = False) -> dict:
+        """
+        point events of subject in every time window (vectorised points_between)
+
+        Args:
+            subject (str): subject ("" for no focal subject)
+            starts (np.ndarray): beginnings of time windows (float64)
+            ends (np.ndarray): ends of time windows (float64)
+            include_end (bool): True to include the events at end time
+
+        Returns:
+            dict: {index of window: list of (behavior, modifiers) for each event in the window (in events list order)}
+            for the windows containing events
+        """
+        found: dict = {}
+        for key in self._subject_point_keys.get(subject, ()):
+            times, positions = self._points[key]
+            i1 = np.searchsorted(times, starts, side="left")
+            i2 = np.searchsorted(times, ends, side="right" if include_end else "left")
+            for window in np.flatnonzero(i2 > i1).tolist():
+                found.setdefault(window, []).extend((position, key[1:]) for position in positions[i1[window] : i2[window]].tolist())
+        return {window: [x[1] for x in sorted(events)] for window, events in found.items()}
+
+    def count(self, subjects=None) -> int:
+        """
+        number of state intervals and point events (for selected subjects)
+        """
+        return sum(len(self._states[key][0]) for key in self._states if subjects is None or key[0] in subjects) + sum(
+            len(self._points[key][0]) for key in self._points if subjects is None or key[0] in subjects
+        )
+
+    def time_range(self, subjects=None) -> tuple:
+        """
+        first start and last stop of indexed events (for selected subjects)
+
+        Returns:
+            float: first time (None if no events)
+            float: last time (None if no events)
+        """
+        first, last = np.inf, -np.inf
+        for key, (starts, stops) in self._states.items():
+            if (subjects is None or key[0] in subjects) and len(starts):
+                first, last = min(first, starts[0]), max(last, stops[-1])
+        for key, (times, _) in self._points.items():
+            if (subjects is None or key[0] in subjects) and len(times):
+                first, last = min(first, times[0]), max(last, times[-1])
+        if first == np.inf:
+            return None, None
+        return float(first), float(last)
+
+
+def observation_index(pj: dict, obs_id: str, selected_behaviors=None) -> EventIntervalIndex:
+    """
+    build the interval index of the events of observation obs_id
+    (from the columnar copy of the events if the columnar store is enabled, see event_columns.enable_columnar_store)
+
+    Args:
+        pj (dict): project dictionary
+        obs_id (str): observation id
+        selected_behaviors (list): behaviors to index (None for all behaviors)
+
+    Returns:
+        EventIntervalIndex
+    """
+    # utilities imports PySide6: the processes of the process pools (see irr_functions) import this module without the GUI
+    from . import utilities as util
+
+    events = pj[cfg.OBSERVATIONS][obs_id][cfg.EVENTS]
+    columns = event_columns.observation_columns(events)
+    return EventIntervalIndex(
+        events if columns is None else columns,
+        util.state_behavior_codes(pj[cfg.ETHOGRAM]),
+        selected_behaviors=selected_behaviors,
+    )
+
+
+def subject_key(subject_name: str) -> str:
+    """
+    subject of events for subject name (the "No focal subject" is "")
+    """
+    return "" if subject_name == cfg.NO_FOCAL_SUBJECT else subject_name
+
+
+def window_bounds(time_: dec, half_width: dec) -> tuple:
+    """
+    bounds of the time window [time_ - half_width, time_ + half_width] computed with Decimal precision
+    """
+    return float(time_ - half_width), float(time_ + half_width)
+
+
+def time_to_ms(time_) -> int:
+    """
+    convert a time in seconds in integer milliseconds (rounded to the nearest millisecond).
+    The integer milliseconds are used in analyses instead of Decimal arithmetic.
+
+    Args:
+        time_ (Decimal, int, float or str): time in seconds (not NaN)
+
+    Returns:
+        int: time in milliseconds
+    """
+    if not isinstance(time_, dec):
+        time_ = dec(str(time_))
+    return int(time_.scaleb(3).to_integral_value())
+
+
+def ms_to_time(ms: int) -> dec:
+    """
+    convert a time in integer milliseconds in seconds (Decimal with 3 decimals, like the times of events)
+
+    Args:
+        ms (int): time in milliseconds
+
+    Returns:
+        Decimal: time in seconds
+    """
+    return dec(ms).scaleb(-3)
@@ -21,7 +21,6 @@ Copyright 2012-2026 Olivier Friard
 
 """
 
-import copy
 import logging
 import time
 from decimal import ROUND_DOWN, InvalidOperation
@@ -33,7 +32,7 @@ from PySide6.QtGui import QClipboard
 from PySide6.QtWidgets import QAbstractItemView, QApplication, QInputDialog, QLineEdit, QMessageBox
 
 from . import config as cfg
-from . import dialog, select_modifiers, select_subj_behav, write_event
+from . import dialog, event_store, select_modifiers, select_subj_behav, write_event
 from . import utilities as util
 from .edit_event import DlgEditEvent, EditSelectedEvents
 
@@ -256,23 +255,18 @@ def show_all_events(self) -> None:
 def fill_events_undo_list(self, operation_description: str) -> None:
     """
     fill the undo events list for Undo function (CTRL + Z)
+    Must be called before the operation on events: the modifications of the events list are added
+    to the recorded operation (see events_undo.EventsUndoStack)
     """
     logging.debug("fill_events_undo_list function")
 
-    self.undo_queue.append(copy.deepcopy(self.pj[cfg.OBSERVATIONS][self.observationId][cfg.EVENTS]))
-
-    self.undo_description.append(operation_description)
+    self.events_undo.record(operation_description)
 
     self.actionUndo.setText(operation_description)
     self.actionUndo.setEnabled(True)
 
     logging.debug(f"{operation_description} added to undo events list")
 
-    if len(self.undo_queue) > cfg.MAX_UNDO_QUEUE:
-        self.undo_queue.popleft()
-        self.undo_description.popleft()
-        logging.debug("Max events undo ")
-
 
 def undo_event_operation(self) -> None:
     """
@@ -281,30 +275,37 @@ def undo_event_operation(self) -> None:
 
     logging.debug("Undo event operation function")
 
-    if len(self.undo_queue) == 0:
+    operation_description, hunks = self.events_undo.undo()
+    if operation_description is None:
         self.statusbar.showMessage("The Undo buffer is empty", 5000)
         return
 
-    events = self.undo_queue.pop()
+    # the table is updated after every hunk: the positions of a hunk refer to the events list modified by the previous hunks
+    for hunk in hunks:
+        position, old_rows, new_rows = hunk
+        event_store.apply_hunk(self.pj[cfg.OBSERVATIONS][self.observationId][cfg.EVENTS], hunk)
+        if len(old_rows) == len(new_rows):
+            self.update_tw_events(modified=list(range(position, position + len(new_rows))))
+        else:
+            self.update_tw_events(
+                removed=list(range(position, position + len(old_rows))),
+                inserted=list(range(position, position + len(new_rows))),
+            )
+    self.events_changed(hunks, undoable=False)
 
-    operation_description = self.undo_description.pop()
-    self.pj[cfg.OBSERVATIONS][self.observationId][cfg.EVENTS] = events[:]
     self.project_changed()
 
     self.statusbar.showMessage(operation_description, 5000)
 
     logging.debug(operation_description)
 
-    # reload all events in tw
-    self.load_tw_events(self.observationId)
-
     self.update_realtime_plot(force_plot=True)
 
-    if not len(self.undo_queue):
+    if not len(self.events_undo):
         self.actionUndo.setText("Undo")
         self.actionUndo.setEnabled(False)
     else:
-        self.actionUndo.setText(self.undo_description[-1])
+        self.actionUndo.setText(self.events_undo.last_description())
 
 
 def delete_all_events(self):
@@ -331,16 +332,11 @@ def delete_all_events(self):
         # fill the undo list
         fill_events_undo_list(self, "Undo 'Delete all events'")
 
-        self.pj[cfg.OBSERVATIONS][self.observationId][cfg.EVENTS] = [
-            event
-            for event_idx, event in enumerate(self.pj[cfg.OBSERVATIONS][self.observationId][cfg.EVENTS])
-            if event_idx not in self.tv_idx2events_idx
-        ]
+        self.remove_events(list(self.tv_idx2events_idx))
 
         self.update_realtime_plot(force_plot=True)
 
         self.project_changed()
-        self.load_tw_events(self.observationId)
 
 
 def delete_selected_events(self):
@@ -365,16 +361,11 @@ def delete_selected_events(self):
         for row in set([item.row() for item in self.tv_events.selectedIndexes()]):
             rows_to_delete.append(self.tv_idx2events_idx[row])
 
-        self.pj[cfg.OBSERVATIONS][self.observationId][cfg.EVENTS] = [
-            event
-            for event_idx, event in enumerate(self.pj[cfg.OBSERVATIONS][self.observationId][cfg.EVENTS])
-            if event_idx not in rows_to_delete
-        ]
+        self.remove_events(rows_to_delete)
 
         self.update_realtime_plot(force_plot=True)
 
         self.project_changed()
-        self.load_tw_events(self.observationId)
 
 
 def select_events_between_activated(self):
@@ -493,15 +484,16 @@ def add_comment(self):
     # fill the undo list
     fill_events_undo_list(self, "Undo last comment operation")
 
+    replacements: dict = {}
     for tvevents_row in tvevents_rows_to_edit:
         pj_event_idx = self.tv_idx2events_idx[tvevents_row]
+        new_event = list(self.pj[cfg.OBSERVATIONS][self.observationId][cfg.EVENTS][pj_event_idx])
+        new_event[cfg.PJ_OBS_FIELDS[self.pj[cfg.OBSERVATIONS][self.observationId][cfg.TYPE]][cfg.COMMENT]] = new_comment
+        replacements[pj_event_idx] = new_event
 
-        self.pj[cfg.OBSERVATIONS][self.observationId][cfg.EVENTS][pj_event_idx][
-            cfg.PJ_OBS_FIELDS[self.pj[cfg.OBSERVATIONS][self.observationId][cfg.TYPE]][cfg.COMMENT]
-        ] = new_comment
+    self.replace_events(replacements)
 
-    # reload all events in tw
-    self.load_tw_events(self.observationId)
+    self.project_changed()
 
 
 def edit_selected_events(self):
@@ -537,6 +529,7 @@ def edit_selected_events(self):
             behavior_codes: list = []
             modifiers_mem: list = []
             mem_event_idx: list = []
+            replacements: dict = {}
             for idx, event in enumerate(self.pj[cfg.OBSERVATIONS][self.observationId][cfg.EVENTS]):
                 if idx in tsb_to_edit:
                     new_event = list(event)
@@ -556,9 +549,12 @@ def edit_selected_events(self):
                     if new_event[cfg.EVENT_MODIFIER_FIELD_IDX] not in modifiers_mem:
                         modifiers_mem.append(new_event[cfg.EVENT_MODIFIER_FIELD_IDX])
 
-                    self.pj[cfg.OBSERVATIONS][self.observationId][cfg.EVENTS][idx] = list(new_event)
+                    replacements[idx] = new_event
                     mem_event_idx.append(idx)
-                    self.project_changed()
+
+            self.replace_events(replacements)
+            if replacements:
+                self.project_changed()
 
             # check if behavior is unique for editing modifiers
             if len(behavior_codes) == 1:
@@ -597,11 +593,12 @@ def edit_selected_events(self):
                     modifier_str = ""
 
                 # set new modifier
-                for idx, event in enumerate(self.pj[cfg.OBSERVATIONS][self.observationId][cfg.EVENTS]):
-                    if idx in mem_event_idx:
-                        self.pj[cfg.OBSERVATIONS][self.observationId][cfg.EVENTS][idx][cfg.EVENT_MODIFIER_FIELD_IDX] = modifier_str
-
-            self.load_tw_events(self.observationId)
+                replacements = {}
+                for idx in mem_event_idx:
+                    new_event = list(self.pj[cfg.OBSERVATIONS][self.observationId][cfg.EVENTS][idx])
+                    new_event[cfg.EVENT_MODIFIER_FIELD_IDX] = modifier_str
+                    replacements[idx] = new_event
+                self.replace_events(replacements)
 
             self.update_realtime_plot(force_plot=True)
 
@@ -888,32 +885,34 @@ def edit_time_selected_events(self):
     fill_events_undo_list(self, "Undo 'Edit time'")
 
     mem_time = self.getLaps()
+    pj_events_idx: list = []
+    shifted_events: list = []
     for tw_event_idx in tvevents_rows_to_shift:
         pj_event_idx = self.tv_idx2events_idx[tw_event_idx]
 
-        self.pj[cfg.OBSERVATIONS][self.observationId][cfg.EVENTS][pj_event_idx][cfg.PJ_OBS_FIELDS[self.playerType][cfg.TIME]] += dec(
-            f"{d:.3f}"
-        )
+        new_event = list(self.pj[cfg.OBSERVATIONS][self.observationId][cfg.EVENTS][pj_event_idx])
+        new_event[cfg.PJ_OBS_FIELDS[self.playerType][cfg.TIME]] += dec(f"{d:.3f}")
         # set new frame index
         if self.playerType == cfg.MEDIA:
-            if not self.seek_mediaplayer(
-                self.pj[cfg.OBSERVATIONS][self.observationId][cfg.EVENTS][pj_event_idx][cfg.PJ_OBS_FIELDS[self.playerType][cfg.TIME]]
-            ):
+            if not self.seek_mediaplayer(new_event[cfg.PJ_OBS_FIELDS[self.playerType][cfg.TIME]]):
                 # determine the new frame index
                 time.sleep(0.1)
                 frame_idx = self.get_frame_index()
-                if len(self.pj[cfg.OBSERVATIONS][self.observationId][cfg.EVENTS][pj_event_idx]) == 6:
-                    self.pj[cfg.OBSERVATIONS][self.observationId][cfg.EVENTS][pj_event_idx][-1] = frame_idx
-                elif len(self.pj[cfg.OBSERVATIONS][self.observationId][cfg.EVENTS][pj_event_idx]) == 5:
-                    self.pj[cfg.OBSERVATIONS][self.observationId][cfg.EVENTS][pj_event_idx].append(frame_idx)
+                if len(new_event) == 6:
+                    new_event[-1] = frame_idx
+                elif len(new_event) == 5:
+                    new_event.append(frame_idx)
 
-        self.project_changed()
+        pj_events_idx.append(pj_event_idx)
+        shifted_events.append(new_event)
 
     if self.playerType == cfg.MEDIA:
         self.seek_mediaplayer(mem_time)
 
-    self.pj[cfg.OBSERVATIONS][self.observationId][cfg.EVENTS] = sorted(self.pj[cfg.OBSERVATIONS][self.observationId][cfg.EVENTS])
-    self.load_tw_events(self.observationId)
+    # the shifted events are removed and inserted at their new position
+    self.remove_events(pj_events_idx)
+    self.insert_events(shifted_events)
+    self.project_changed()
 
     self.update_realtime_plot(force_plot=True)
 
@@ -976,6 +975,7 @@ def paste_clipboard_to_events(self):
 
         return
 
+    new_events: list = []
     for event in content:
         # convert time in decimal
         event[cfg.EVENT_TIME_FIELD_IDX] = dec(event[cfg.EVENT_TIME_FIELD_IDX])
@@ -987,16 +987,15 @@ def paste_clipboard_to_events(self):
                     pass
 
         # skip if event already present
-        if event in self.pj[cfg.OBSERVATIONS][self.observationId][cfg.EVENTS]:
+        if event in self.pj[cfg.OBSERVATIONS][self.observationId][cfg.EVENTS] or event in new_events:
             continue
 
-        self.pj[cfg.OBSERVATIONS][self.observationId][cfg.EVENTS].append(event)
+        new_events.append(event)
 
+    if new_events:
+        self.insert_events(new_events)
         self.project_changed()
 
-    self.pj[cfg.OBSERVATIONS][self.observationId][cfg.EVENTS] = sorted(self.pj[cfg.OBSERVATIONS][self.observationId][cfg.EVENTS])
-    self.load_tw_events(self.observationId)
-
     self.update_realtime_plot(force_plot=True)
 
 
@@ -1022,15 +1021,18 @@ def add_frame_indexes(self):
         return
 
     mem_time = self.getLaps()
+    replacements: dict = {}
     for idx, event in enumerate(self.pj[cfg.OBSERVATIONS][self.observationId][cfg.EVENTS]):
         if event[0] == "NA":
             continue
         if not self.seek_mediaplayer(event[0]):
             time.sleep(0.1)
-            self.pj[cfg.OBSERVATIONS][self.observationId][cfg.EVENTS][idx][cfg.PJ_OBS_FIELDS[cfg.MEDIA][cfg.FRAME_INDEX]] = (
-                self.get_frame_index()
-            )
+            new_event = list(event)
+            new_event[cfg.PJ_OBS_FIELDS[cfg.MEDIA][cfg.FRAME_INDEX]] = self.get_frame_index()
+            replacements[idx] = new_event
 
     self.seek_mediaplayer(mem_time)
 
-    self.load_tw_events(self.observationId)
+    self.replace_events(replacements)
+    if replacements:
+        self.project_changed()
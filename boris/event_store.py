@@ -0,0 +1,143 @@
+"""
+BORIS
+Behavioral Observation Research Interactive Software
+Copyright 2012-2026 Olivier Friard
+
+This file is part of BORIS.
+
+  BORIS is free software; you can redistribute it and/or modify
+  it under the terms of the GNU General Public License as published by
+  the Free Software Foundation; either version 3 of the License, or
+  any later version.
+
+  BORIS is distributed in the hope that it will be useful,
+  but WITHOUT ANY WARRANTY; without even the implied warranty of
+  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+  GNU General Public License for more details.
+
+  You should have received a copy of the GNU General Public License
+  along with this program; if not see <http://www.gnu.org/licenses/>.
+
+Operations on the events list of an observation keeping its order.
+The columnar copy of the events list (see event_columns.observation_columns) is modified with the list.
+"""
+
+import bisect
+
+from . import config as cfg
+from . import event_columns
+
+
+def events_sort_key(observation_type: str):
+    """
+    key function of the order of the events list of an observation:
+    image index for observations from images, (time, subject, behavior) for the other observations
+    """
+    if observation_type in (cfg.IMAGES, cfg.VIEWER_IMAGES):
+        image_index_idx = cfg.PJ_OBS_FIELDS[cfg.IMAGES][cfg.IMAGE_INDEX]
+        return lambda event: event[image_index_idx]
+    return lambda event: event[:3]
+
+
+def _hunk(position: int, old_rows: list, new_rows: list) -> tuple:
+    """
+    hunk of a modification of the events list: the rows are stored as tuples (not modified by later edits)
+    """
+    return (position, tuple(tuple(row) for row in old_rows), tuple(tuple(row) for row in new_rows))
+
+
+def insert_events(events: list, new_events: list, observation_type: str, hunks: list | None = None) -> list:
+    """
+    insert new events in the ordered events list with a binary search (the list is not sorted again).
+    The new events are inserted after the events with the same key (like list.sort)
+
+    Args:
+        events (list): events list of the observation (modified in place)
+        new_events (list): events to insert
+        observation_type (str): type of observation
+        hunks (list): if not None the hunks (position, old rows, new rows) of the modification are appended
+
+    Returns:
+        list: indexes of the inserted events in the modified events list (ascending order)
+    """
+    key = events_sort_key(observation_type)
+    columns = event_columns.tracked_columns(events)
+    positions: list = []
+    # the new events are ordered, so the index of an inserted event is not modified by the following insertions
+    for event in sorted(new_events, key=key):
+        position = bisect.bisect_right(events, key(event), lo=positions[-1] + 1 if positions else 0, key=key)
+        events.insert(position, event)
+        if columns is not None:
+            columns.insert(position, event)
+        positions.append(position)
+        if hunks is not None:
+            hunks.append(_hunk(position, [], [event]))
+    return positions
+
+
+def remove_events(events: list, positions: list, hunks: list | None = None) -> list:
+    """
+    remove events from the events list
+
+    Args:
+        events (list): events list of the observation (modified in place)
+        positions (list): indexes of events to remove
+        hunks (list): if not None the hunks (position, old rows, new rows) of the modification are appended
+
+    Returns:
+        list: removed events
+    """
+    columns = event_columns.tracked_columns(events)
+    removed: list = []
+    # the contiguous events are removed together, from the end of the list
+    positions = sorted(set(positions), reverse=True)
+    idx = 0
+    while idx < len(positions):
+        end = positions[idx] + 1
+        while idx + 1 < len(positions) and positions[idx + 1] == positions[idx] - 1:
+            idx += 1
+        start = positions[idx]
+        idx += 1
+        rows = events[start:end]
+        del events[start:end]
+        if columns is not None:
+            del columns[start:end]
+        removed.extend(reversed(rows))
+        if hunks is not None:
+            hunks.append(_hunk(start, rows, []))
+    return removed[::-1]
+
+
+def replace_events(events: list, replacements: dict, hunks: list | None = None) -> None:
+    """
+    replace events of the events list (the positions of the events are not modified).
+    The events are replaced by new lists and not modified in place, so the rows shared with the undo stack
+    or with a snapshot of the events list are not modified.
+
+    Args:
+        events (list): events list of the observation (modified in place)
+        replacements (dict): index of event: new event
+        hunks (list): if not None the hunks (position, old rows, new rows) of the modification are appended
+    """
+    columns = event_columns.tracked_columns(events)
+    for position in sorted(replacements):
+        if hunks is not None:
+            hunks.append(_hunk(position, [events[position]], [replacements[position]]))
+        events[position] = replacements[position]
+        if columns is not None:
+            columns[position] = replacements[position]
+
+
+def apply_hunk(events: list, hunk: tuple) -> None:
+    """
+    apply a hunk (position, old rows, new rows) to the events list (e.g. to undo an operation)
+
+    Args:
+        events (list): events list of the observation (modified in place)
+        hunk (tuple): position, old rows, new rows
+    """
+    columns = event_columns.tracked_columns(events)
+    position, old_rows, new_rows = hunk
+    events[position : position + len(old_rows)] = [list(row) for row in new_rows]
+    if columns is not None:
+        columns.apply_hunk(hunk)
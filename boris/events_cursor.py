@@ -21,10 +21,14 @@ Copyright 2012-2026 Olivier Friard
 
 """
 
+import bisect
+
 from PySide6.QtCore import QPoint, Qt
 from PySide6.QtGui import QPolygon, QPen, QColor, QBrush, QPainter
 from PySide6.QtWidgets import QStyledItemDelegate
 
+from . import config as cfg
+
 
 class StyledItemDelegateTriangle(QStyledItemDelegate):
     """
@@ -59,3 +63,67 @@ class StyledItemDelegateTriangle(QStyledItemDelegate):
             painter.setPen(QPen(QColor(Qt.red)))
             painter.drawPolygon(triangle)
             painter.restore()
+
+
+class EventsRowCursor:
+    """
+    sorted times of the events of an observation to find the event corresponding to the current time
+    with a binary search
+    """
+
+    def __init__(self, events: list):
+        """
+        Args:
+            events (list): events of the observation (sorted by time)
+        """
+        self.events = events
+        self.times: list = [event[cfg.EVENT_TIME_FIELD_IDX] for event in events]
+        # observations from images may have events without time
+        self.has_nan: bool = any(time_.is_nan() for time_ in self.times)
+
+    def insert_events(self, positions: list) -> None:
+        """
+        update the times after the insertion of events
+
+        Args:
+            positions (list): indexes of the inserted events in the modified events list
+        """
+        for position in sorted(positions):
+            self.times.insert(position, self.events[position][cfg.EVENT_TIME_FIELD_IDX])
+            self.has_nan = self.has_nan or self.times[position].is_nan()
+
+    def remove_events(self, positions: list) -> None:
+        """
+        update the times after the removal of events
+
+        Args:
+            positions (list): indexes of the removed events in the events list before removal
+        """
+        for position in sorted(positions, reverse=True):
+            del self.times[position]
+        if self.has_nan:
+            self.has_nan = any(time_.is_nan() for time_ in self.times)
+
+    def is_valid(self, events: list) -> bool:
+        """
+        check if the cursor was built for the events list
+        """
+        return events is self.events and len(events) == len(self.times)
+
+    def row(self, current_time, cursor_above_event: bool) -> int:
+        """
+        index of the event corresponding to the current time
+
+        Args:
+            current_time (Decimal): current time (with time offset)
+            cursor_above_event (bool): True to return the index of the last event before current time, False for the next one
+
+        Returns:
+            int: index of event (len(events) if current time is after the last event, -1 if before the first event)
+        """
+        if current_time >= self.times[-1]:
+            return len(self.times)
+        idx = bisect.bisect_right(self.times, current_time) - 1
+        if idx < 0:
+            return -1
+        return idx if cursor_above_event else idx + 1
@@ -0,0 +1,278 @@
+"""
+BORIS
+Behavioral Observation Research Interactive Software
+Copyright 2012-2026 Olivier Friard
+
+This file is part of BORIS.
+
+  BORIS is free software; you can redistribute it and/or modify
+  it under the terms of the GNU General Public License as published by
+  the Free Software Foundation; either version 3 of the License, or
+  any later version.
+
+  BORIS is distributed in the hope that it will be useful,
+  but WITHOUT ANY WARRANTY; without even the implied warranty of
+  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+  GNU General Public License for more details.
+
+  You should have received a copy of the GNU General Public License
+  along with this program; if not see <http://www.gnu.org/licenses/>.
+
+"""
+
+import bisect
+from decimal import Decimal as dec
+
+from PySide6.QtCore import QAbstractTableModel, QModelIndex, Qt
+
+from . import config as cfg
+from . import utilities as util
+
+
+class EventsTableModel(QAbstractTableModel):
+    """
+    model of the events table view
+
+    The model reads the events list of the observation (rows are not copied) and keeps:
+      * the type of every event (POINT: "", START or STOP) computed with the parity of the (subject, behavior, modifiers) chain
+      * the index in the events list of every row of the table (events not filtered)
+
+    The events list can be modified and the model notified with insert_events, update_events and remove_events:
+    only the affected rows are inserted/removed/updated in the view and the START/STOP types are recomputed
+    only for the modified (subject, behavior, modifiers) chains.
+    """
+
+    def __init__(
+        self,
+        events: list,
+        header: list,
+        time_format: str,
+        observation_type: str,
+        state_behaviors_codes,
+        behaviors_filter=tuple(),
+        subjects_filter=tuple(),
+        parent=None,
+    ):
+        """
+        Args:
+            events (list): events of the observation (not copied)
+            header (list): header of columns
+            time_format (str): time format
+            observation_type (str): type of observation (cfg.MEDIA, cfg.LIVE, cfg.IMAGES)
+            state_behaviors_codes (list): codes of state behaviors
+            behaviors_filter (tuple): behaviors to show (empty for all behaviors)
+            subjects_filter (tuple): subjects to show (empty for all subjects)
+        """
+        super().__init__(parent)
+        self.events = events
+        self.header = header
+        self.time_format = time_format
+        self.observation_type = observation_type
+        self.state_behaviors_codes = frozenset(state_behaviors_codes)
+        self.behaviors_filter = set(behaviors_filter)
+        self.subjects_filter = set(subjects_filter)
+
+        self._subject_idx = cfg.PJ_OBS_FIELDS[observation_type][cfg.SUBJECT]
+        self._behavior_idx = cfg.PJ_OBS_FIELDS[observation_type][cfg.BEHAVIOR_CODE]
+        self._modifier_idx = cfg.PJ_OBS_FIELDS[observation_type][cfg.MODIFIER]
+        # index of field in event for every column (None for the type column)
+        self._columns_idx: list = [
+            None if field == "type" else cfg.PJ_OBS_FIELDS[observation_type][field] for field in cfg.TW_EVENTS_FIELDS[observation_type]
+        ]
+
+        # (subject, behavior, modifiers) of every state event (None for point events)
+        self.keys: list = [self._key(event) for event in events]
+        self.types: list = [""] * len(events)
+        parity: dict = {}
+        for idx, key in enumerate(self.keys):
+            if key is not None:
+                self.types[idx] = cfg.STOP if parity.get(key, False) else cfg.START
+                parity[key] = not parity.get(key, False)
+
+        # index in events list of rows of the table view (the list object is kept and modified in place)
+        self.rows: list = [idx for idx, event in enumerate(events) if self._is_visible(event)]
+
+    def _key(self, event: list):
+        if event[self._behavior_idx] in self.state_behaviors_codes:
+            return (event[self._subject_idx], event[self._behavior_idx], event[self._modifier_idx])
+        return None
+
+    def _is_visible(self, event: list) -> bool:
+        if self.subjects_filter and event[self._subject_idx] not in self.subjects_filter:
+            return False
+        if self.behaviors_filter and event[self._behavior_idx] not in self.behaviors_filter:
+            return False
+        return True
+
+    def headerData(self, section: int, orientation: Qt.Orientation, role: int):
+        if role == Qt.ItemDataRole.DisplayRole:
+            if orientation == Qt.Orientation.Horizontal:
+                return self.header[section]
+            else:
+                return str(section + 1)
+
+    def rowCount(self, parent=QModelIndex()):
+        return len(self.rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return len(self.header) if self.rows else 0
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if role != Qt.ItemDataRole.DisplayRole:
+            return None
+        row = index.row()
+        if not 0 <= row < len(self.rows):
+            return None
+        event_idx = self.rows[row]
+        if event_idx >= len(self.events):
+            return None
+        field_idx = self._columns_idx[index.column()]
+        if field_idx is None:  # type
+            return self.types[event_idx]
+        event = self.events[event_idx]
+        if field_idx >= len(event):
+            # media events without frame index
+            return dec("NaN")
+        if index.column() == 0:  # time
+            return util.convertTime(self.time_format, event[field_idx])
+        return event[field_idx]
+
+    def _update_types(self, start: int, keys: set) -> list:
+        """
+        recompute the START/STOP types of the chains of keys from start
+
+        Returns:
+            list: indexes of events with a modified type
+        """
+        keys.discard(None)
+        if not keys:
+            return []
+
+        # parity of every chain before start
+        parity: dict = {}
+        pending = set(keys)
+        for idx in range(start - 1, -1, -1):
+            key = self.keys[idx]
+            if key in pending:
+                parity[key] = self.types[idx] == cfg.START
+                pending.discard(key)
+                if not pending:
+                    break
+
+        changed: list = []
+        for idx in range(start, len(self.keys)):
+            key = self.keys[idx]
+            if key in keys:
+                new_type = cfg.STOP if parity.get(key, False) else cfg.START
+                parity[key] = not parity.get(key, False)
+                if self.types[idx] != new_type:
+                    self.types[idx] = new_type
+                    changed.append(idx)
+        return changed
+
+    def _emit_types_changed(self, events_idx: list) -> None:
+        """
+        emit dataChanged for the type column of the visible rows of events_idx
+        """
+        if not events_idx or None not in self._columns_idx:
+            return
+        type_column = self._columns_idx.index(None)
+        for event_idx in events_idx:
+            row = bisect.bisect_left(self.rows, event_idx)
+            if row < len(self.rows) and self.rows[row] == event_idx:
+                self.dataChanged.emit(self.index(row, type_column), self.index(row, type_column))
+
+    def insert_events(self, positions: list) -> None:
+        """
+        notify the model that events were inserted in the events list
+
+        Args:
+            positions (list): indexes of the new events in the (modified) events list
+        """
+        for position in sorted(positions):
+            event = self.events[position]
+            self.keys.insert(position, self._key(event))
+            self.types.insert(position, "")
+
+            # shift the index of the following rows
+            row = bisect.bisect_left(self.rows, position)
+            self.rows[row:] = [idx + 1 for idx in self.rows[row:]]
+
+            if self._is_visible(event):
+                if not self.rows:
+                    # the number of columns changes with the first row
+                    self.beginResetModel()
+                    self.rows.insert(row, position)
+                    self.endResetModel()
+                else:
+                    self.beginInsertRows(QModelIndex(), row, row)
+                    self.rows.insert(row, position)
+                    self.endInsertRows()
+
+        if positions:
+            inserted = set(positions)
+            changed = self._update_types(min(positions), {self.keys[position] for position in positions})
+            self._emit_types_changed([idx for idx in changed if idx not in inserted])
+
+    def update_events(self, positions: list) -> None:
+        """
+        notify the model that events were modified in place (without changing their position)
+
+        Args:
+            positions (list): indexes of the modified events
+        """
+        if not positions:
+            return
+        keys: set = set()
+        for position in positions:
+            keys.add(self.keys[position])
+            self.keys[position] = self._key(self.events[position])
+            keys.add(self.keys[position])
+            if self.keys[position] is None:
+                self.types[position] = ""
+
+            visible = self._is_visible(self.events[position])
+            row = bisect.bisect_left(self.rows, position)
+            is_shown = row < len(self.rows) and self.rows[row] == position
+            if visible and not is_shown:
+                self.beginInsertRows(QModelIndex(), row, row)
+                self.rows.insert(row, position)
+                self.endInsertRows()
+            elif not visible and is_shown:
+                self.beginRemoveRows(QModelIndex(), row, row)
+                del self.rows[row]
+                self.endRemoveRows()
+            elif is_shown:
+                self.dataChanged.emit(self.index(row, 0), self.index(row, len(self.header) - 1))
+
+        self._emit_types_changed(self._update_types(min(positions), keys))
+
+    def remove_events(self, positions: list) -> None:
+        """
+        notify the model that events were removed from the events list
+
+        Args:
+            positions (list): indexes of the removed events in the events list before removal
+        """
+        if not positions:
+            return
+        keys: set = set()
+        for position in sorted(positions, reverse=True):
+            keys.add(self.keys.pop(position))
+            del self.types[position]
+
+            row = bisect.bisect_left(self.rows, position)
+            if row < len(self.rows) and self.rows[row] == position:
+                if len(self.rows) == 1:
+                    # no more columns without rows
+                    self.beginResetModel()
+                    del self.rows[row]
+                    self.endResetModel()
+                else:
+                    self.beginRemoveRows(QModelIndex(), row, row)
+                    del self.rows[row]
+                    self.endRemoveRows()
+            # shift the index of the following rows
+            self.rows[row:] = [idx - 1 for idx in self.rows[row:]]
+
+        self._emit_types_changed(self._update_types(min(positions), keys))
@@ -0,0 +1,89 @@
+"""
+BORIS
+Behavioral Observation Research Interactive Software
+Copyright 2012-2026 Olivier Friard
+
+This file is part of BORIS.
+
+  BORIS is free software; you can redistribute it and/or modify
+  it under the terms of the GNU General Public License as published by
+  the Free Software Foundation; either version 3 of the License, or
+  any later version.
+
+  BORIS is distributed in the hope that it will be useful,
+  but WITHOUT ANY WARRANTY; without even the implied warranty of
+  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+  GNU General Public License for more details.
+
+  You should have received a copy of the GNU General Public License
+  along with this program; if not see <http://www.gnu.org/licenses/>.
+
+"""
+
+from collections import deque
+
+
+class EventsUndoStack:
+    """
+    undo stack of the operations on the events of an observation
+
+    Every operation is stored as a list of hunks (position, old rows, new rows) recorded when the events list
+    is modified (see event_store), so the size of an operation is proportional to the number of modified events.
+    The hunks are applied in order: the position of a hunk refers to the events list modified by the previous hunks.
+
+    record() is called before the operation, the hunks of the following modifications of the events list
+    are added to the last recorded operation with add().
+    """
+
+    def __init__(self, max_size: int):
+        """
+        Args:
+            max_size (int): maximum number of operations that can be undone
+        """
+        self._operations: deque = deque(maxlen=max_size)
+
+    def __len__(self) -> int:
+        return len(self._operations)
+
+    def clear(self) -> None:
+        self._operations.clear()
+
+    def last_description(self) -> str:
+        """
+        description of the last operation ("" if the stack is empty)
+        """
+        return self._operations[-1][0] if self._operations else ""
+
+    def record(self, description: str) -> None:
+        """
+        start a new operation
+
+        Args:
+            description (str): description of the operation
+        """
+        self._operations.append((description, []))
+
+    def add(self, hunks: list) -> None:
+        """
+        add the hunks of a modification of the events list to the last operation
+        (the hunks are ignored if no operation was recorded)
+
+        Args:
+            hunks (list): hunks (position, old rows, new rows) in order of application
+        """
+        if self._operations:
+            self._operations[-1][1].extend(hunks)
+
+    def undo(self):
+        """
+        remove the last operation from the stack
+
+        Returns:
+            str: description of the undone operation (None if the stack is empty)
+            list: hunks (position, old rows, new rows) restoring the events list in order of application
+        """
+        if not self._operations:
+            return None, []
+
+        description, hunks = self._operations.pop()
+        return description, [(position, new_rows, old_rows) for position, old_rows, new_rows in reversed(hunks)]
@@ -44,6 +44,7 @@ from . import utilities as util
 from . import project_functions
 from . import observation_operations
 from . import db_functions
+from . import event_index
 from . import event_operations
 
 
@@ -342,7 +343,7 @@ def export_tabular_events(
 
     logging.debug(f"min_time: {min_time}  max_time: {max_time}")
 
-    events_with_status = project_functions.events_start_stop(ethogram, observation[cfg.EVENTS], observation[cfg.TYPE])
+    events_with_status = project_functions.observation_events_start_stop(pj, obs_id)
 
     # check max number of modifiers
     max_modifiers = 0
@@ -932,9 +933,7 @@ def events_to_behavioral_sequences(pj, obs_id: str, subj: str, parameters: dict,
     out: str = ""
     current_states: list = []
     # add status (POINT, START, STOP) to event
-    events_with_status = project_functions.events_start_stop(
-        pj[cfg.ETHOGRAM], pj[cfg.OBSERVATIONS][obs_id][cfg.EVENTS], pj[cfg.OBSERVATIONS][obs_id][cfg.TYPE]
-    )
+    events_with_status = project_functions.observation_events_start_stop(pj, obs_id)
 
     for event in events_with_status:
         # check if event in selected behaviors
@@ -1014,9 +1013,7 @@ def events_to_behavioral_sequences_all_subj(pj, obs_id: str, subjects_list: list
 
     out = ""
     current_states = {i: [] for i in subjects_list}
-    events_with_status = project_functions.events_start_stop(
-        pj[cfg.ETHOGRAM], pj[cfg.OBSERVATIONS][obs_id][cfg.EVENTS], pj[cfg.OBSERVATIONS][obs_id][cfg.TYPE]
-    )
+    events_with_status = project_functions.observation_events_start_stop(pj, obs_id)
 
     for event in events_with_status:
         # check if event in selected behaviors
@@ -1100,6 +1097,9 @@ def events_to_timed_behavioral_sequences(
     out: str = ""
 
     state_behaviors_codes = util.state_behavior_codes(pj[cfg.ETHOGRAM])
+    index = event_index.EventIntervalIndex(
+        pj[cfg.OBSERVATIONS][obs_id][cfg.EVENTS], state_behaviors_codes, selected_behaviors=state_behaviors_codes
+    )
     delta = dec(str(round(precision, 3)))
     out = ""
     t = dec("0.000")
@@ -1110,13 +1110,8 @@ def events_to_timed_behavioral_sequences(
         if out:
             out += behav_seq_separator
         """
-        csbs = util.get_current_states_modifiers_by_subject(
-            state_behaviors_codes,
-            pj[cfg.OBSERVATIONS][obs_id][cfg.EVENTS],
-            {"": {"name": subject}},
-            t,
-            include_modifiers=False,
-        )[""]
+        # current states of subject (without modifiers)
+        csbs = list(dict.fromkeys(behavior for behavior, _ in index.states_at(subject, t)))
         if csbs:
             if current:
                 if csbs == current[-1]:
@@ -21,218 +21,149 @@ Copyright 2012-2026 Olivier Friard
 
 """
 
-import logging
+import itertools
+import math
 from decimal import Decimal as dec
 
 import numpy as np
 from PySide6.QtWidgets import QInputDialog, QMessageBox
 
 from . import config as cfg
-from . import db_functions, dialog, observation_operations, project_functions, select_observations, select_subj_behav
+from . import dialog, event_index, irr_functions, observation_operations, project_functions, select_observations, select_subj_behav
 from . import utilities as util
 
+# minimum number of time units (sum of the lengths of the time grids of the pairs) analysed in a process pool:
+# under these values starting the processes costs more than the analysis.
+# Cohen's kappa is vectorised on the grid, the Needleman-Wunsch alignment loops on the rows (time units)
+PARALLEL_MIN_TIME_UNITS_COHEN_KAPPA = 2_000_000
+PARALLEL_MIN_TIME_UNITS_NEEDLEMAN_WUNSCH = 20_000
 
-def subj_behav_modif(cursor, obsid: str, subject: str, time: dec, interval, include_modifiers: bool) -> list:
+# default maximum time shift (s) between the observations aligned by Needleman-Wunsch.
+# The alignment stores (number of time units) x (2 x shift / time unit) directions instead of the full square matrix
+NW_DEFAULT_MAX_SHIFT = 60
+
+
+def pairs_time_units(indexes: dict, pairs: list, interval: dec, selected_subjects: list) -> float:
     """
-    current behaviors for observation obsId at time
+    number of time units of the time grids of the pairs of observations (estimation of the work of the analysis)
 
     Args:
-        cursor (sqlite3.cursor): cursor to aggregated events db
-        obsid (str): id of observation
-        subject (str): name of subject
-        time (Decimal): time
-        include_modifiers (bool): True: include modifiers False: do not
+        indexes (dict): interval indexes of observations events (see irr_functions.observations_indexes)
+        pairs (list): pairs of observations ids
+        interval (decimal.Decimal): time unit (s)
+        selected_subjects (list): subjects selected for analysis
 
     Returns:
-        list: list of lists [subject, behavior, modifiers]
+        float: number of time units
     """
-
-    s = []
-    # state behaviors
-    rows = cursor.execute(
-        (
-            "SELECT behavior, modifiers FROM aggregated_events "
-            "WHERE "
-            "observation = ? "
-            "AND subject = ? "
-            "AND type = 'STATE' "
-            "AND (? BETWEEN start AND STOP) "
-        ),
-        (
-            obsid,
-            subject,
-            float(time),
-        ),
-    ).fetchall()
-
-    for row in rows:
-        if include_modifiers:
-            s.append([subject, row[0], row[1]])
-        else:
-            s.append([subject, row[0]])
-
-    # point behaviors
-    rows = cursor.execute(
-        (
-            "SELECT behavior, modifiers FROM aggregated_events "
-            "WHERE "
-            "observation = ? "
-            "AND subject = ? "
-            "AND type = 'POINT' "
-            "AND abs(start - ?) <= ? "
-        ),
-        (
-            obsid,
-            subject,
-            float(time),
-            float(interval / 2),
-        ),
-    ).fetchall()
-
-    for row in rows:
-        if include_modifiers:
-            s.append([subject, row[0], row[1]])
-        else:
-            s.append([subject, row[0]])
-
-    return s
-
-
-def cohen_kappa(cursor, obsid1: str, obsid2: str, interval: dec, selected_subjects: list, include_modifiers: bool):
+    subjects_keys = {event_index.subject_key(subject) for subject in selected_subjects}
+    time_units = 0.0
+    for obsid1, obsid2 in pairs:
+        first_event, last_event = irr_functions.first_last_events(indexes[obsid1], indexes[obsid2], subjects_keys)
+        if first_event is not None and interval > 0:
+            time_units += (last_event - first_event) / float(interval) + 1
+    return time_units
+
+
+def pairs_matrix(
+    function,
+    min_time_units: int,
+    indexes: dict,
+    selected_observations: list,
+    interval: dec,
+    selected_subjects: list,
+    include_modifiers: bool,
+    extra_arguments: tuple = (),
+) -> tuple:
     """
-    Inter-rater reliability Cohen's kappa coefficient (time-unit)
-    see Sequential Analysis and Observational Methods for the Behavioral Sciences p. 77
+    result of function for all pairs of observations.
+    The pairs are analysed in a process pool (see utilities.parallel_map) if their time grids have at least min_time_units
 
     Args:
-        cursor (sqlite3.cursor): cursor to aggregated events db
-        obsid1 (str): id of observation #1
-        obsid2 (str): id of observation #2
+        function: function of irr_functions called with the arguments of cohen_kappa for a pair
+        min_time_units (int): minimum number of time units to use the process pool
+        indexes (dict): interval indexes of observations events (see irr_functions.observations_indexes)
+        selected_observations (list): ids of observations
         interval (decimal.Decimal): time unit (s)
         selected_subjects (list): subjects selected for analysis
         include_modifiers (bool): True: include modifiers False: do not
+        extra_arguments (tuple): arguments of function after include_modifiers
 
-    Return:
-        float: K
-        str: result of analysis
+    Returns:
+        np.ndarray: symmetric matrix of results (1 on the diagonal)
+        list: results of analysis of pairs
     """
-
-    # check if obs have events
-    for obs_id in [obsid1, obsid2]:
-        if not cursor.execute("SELECT * FROM aggregated_events WHERE observation = ? ", (obs_id,)).fetchall():
-            return -100, f"The observation {obs_id} has no recorded events"
-
-    first_event = cursor.execute(
+    pairs = list(itertools.combinations(range(len(selected_observations)), 2))
+    arguments = [
         (
-            "SELECT min(start) FROM aggregated_events "
-            f"WHERE observation in (?, ?) AND subject in ({','.join('?' * len(selected_subjects))}) "
-        ),
-        (obsid1, obsid2) + tuple(selected_subjects),
-    ).fetchone()[0]
-
-    logging.debug(f"first_event: {first_event}")
-
-    last_event = cursor.execute(
-        (f"SELECT max(stop) FROM aggregated_events WHERE observation in (?, ?) AND subject in ({','.join('?' * len(selected_subjects))}) "),
-        (obsid1, obsid2) + tuple(selected_subjects),
-    ).fetchone()[0]
-
-    logging.debug(f"last_event: {last_event}")
-
-    nb_events1 = cursor.execute(
-        (f"SELECT COUNT(*) FROM aggregated_events WHERE observation = ? AND subject in ({','.join('?' * len(selected_subjects))}) "),
-        (obsid1,) + tuple(selected_subjects),
-    ).fetchone()[0]
-    nb_events2 = cursor.execute(
-        (f"SELECT COUNT(*) FROM aggregated_events WHERE observation = ? AND subject in ({','.join('?' * len(selected_subjects))}) "),
-        (obsid2,) + tuple(selected_subjects),
-    ).fetchone()[0]
-
-    total_states = []
-
-    currentTime = dec(str(first_event))
-    while currentTime <= last_event:
-        for obsid in [obsid1, obsid2]:
-            for subject in selected_subjects:
-                s = subj_behav_modif(cursor, obsid, subject, currentTime, interval, include_modifiers)
-
-                if s not in total_states:
-                    total_states.append(s)
-
-                logging.debug(f"{obsid} {subject} {currentTime} {s}")
-
-        currentTime += interval
-
-    total_states = sorted(total_states)
-
-    logging.debug(f"total_states: {total_states} len:{len(total_states)}")
-
-    contingency_table = np.zeros((len(total_states), len(total_states)))
-
-    seq1 = {}
-    seq2 = {}
-    currentTime = dec(str(first_event))
-    while currentTime <= last_event:
-        seq1[currentTime] = []
-        seq2[currentTime] = []
-        for subject in selected_subjects:
-            s1 = subj_behav_modif(cursor, obsid1, subject, currentTime, interval, include_modifiers)
-            s2 = subj_behav_modif(cursor, obsid2, subject, currentTime, interval, include_modifiers)
-
-            seq1[currentTime].append(s1)
-            seq2[currentTime].append(s2)
-
-            logging.debug(f"currentTime: {currentTime} s1:{s1} s2:{s2}")
-
-            try:
-                contingency_table[total_states.index(s1), total_states.index(s2)] += 1
-            except Exception:
-                return -100, "Error with contingency table"
+            {obs_id: indexes[obs_id] for obs_id in (selected_observations[i], selected_observations[j])},
+            selected_observations[i],
+            selected_observations[j],
+            interval,
+            selected_subjects,
+            include_modifiers,
+        )
+        + extra_arguments
+        for i, j in pairs
+    ]
+    obs_pairs = [(selected_observations[i], selected_observations[j]) for i, j in pairs]
+    if pairs_time_units(indexes, obs_pairs, interval, selected_subjects) >= min_time_units:
+        pairs_results = util.parallel_map(function, arguments)
+    else:
+        pairs_results = [function(x) for x in arguments]
 
-        currentTime += interval
+    results = np.ones((len(selected_observations), len(selected_observations)))
+    messages: list = []
+    for (i, j), (result, msg) in zip(pairs, pairs_results):
+        results[i, j] = results[j, i] = result
+        messages.append(msg)
+    return results, messages
 
-    logging.debug(f"seq1:\n {list(seq1.values())}")
-    logging.debug(f"seq2:\n {list(seq2.values())}")
 
-    logging.debug(f"contingency_table:\n {contingency_table}")
+def cohen_kappa_matrix(
+    indexes: dict, selected_observations: list, interval: dec, selected_subjects: list, include_modifiers: bool
+) -> tuple:
+    """
+    Cohen's kappa of all pairs of observations (see pairs_matrix)
 
-    template = (
-        "Observation: {obsid1}\nnumber of events: {nb_events1}\n\nObservation: {obsid2}\nnumber of events: {nb_events2:.0f}\n\nK = {K:.3f}"
+    Returns:
+        np.ndarray: symmetric matrix of K
+        list: results of analysis of pairs
+    """
+    return pairs_matrix(
+        irr_functions.cohen_kappa_pair,
+        PARALLEL_MIN_TIME_UNITS_COHEN_KAPPA,
+        indexes,
+        selected_observations,
+        interval,
+        selected_subjects,
+        include_modifiers,
     )
 
-    # out += "Observation length: <b>{:.3f} s</b><br>".format(self.observationTotalMediaLength(obsid1))
-    # out += "Number of intervals: <b>{:.0f}</b><br><br>".format(self.observationTotalMediaLength(obsid1) / interval)
-
-    # out += "Observation length: <b>{:.3f} s</b><br>".format(self.observationTotalMediaLength(obsid2))
-    # out += "Number of intervals: <b>{:.0f}</b><br><br>".format(self.observationTotalMediaLength(obsid2) / interval)
-
-    cols_sums = contingency_table.sum(axis=0)
-    rows_sums = contingency_table.sum(axis=1)
-    overall_total = contingency_table.sum()
-
-    logging.debug(f"overall_total: {overall_total}")
 
-    agreements = sum(contingency_table.diagonal())
-
-    logging.debug(f"agreements: {agreements}")
-
-    sum_ef = 0
-    for idx in range(len(total_states)):
-        sum_ef += rows_sums[idx] * cols_sums[idx] / overall_total
-
-    logging.debug(f"sum_ef {sum_ef}")
-
-    if not (overall_total - sum_ef):
-        K = 1
-    else:
-        try:
-            K = round((agreements - sum_ef) / (overall_total - sum_ef), 3)
-        except Exception:
-            K = np.nan
+def needleman_wunsch_matrix(
+    indexes: dict, selected_observations: list, interval: dec, selected_subjects: list, include_modifiers: bool, band: int | None = None
+) -> tuple:
+    """
+    Needleman-Wunsch identity of all pairs of observations (see pairs_matrix)
 
-    out = template.format(obsid1=obsid1, obsid2=obsid2, nb_events1=nb_events1, nb_events2=nb_events2, K=K)
+    Args:
+        band (int): maximum shift in time units between the aligned observations (None for the full alignment)
 
-    logging.debug(f"K: {K}")
-    return K, out
+    Returns:
+        np.ndarray: symmetric matrix of identities
+        list: results of analysis of pairs
+    """
+    return pairs_matrix(
+        irr_functions.needleman_wunsch_pair,
+        PARALLEL_MIN_TIME_UNITS_NEEDLEMAN_WUNSCH,
+        indexes,
+        selected_observations,
+        interval,
+        selected_subjects,
+        include_modifiers,
+        (band,),
+    )
 
 
 def irr_cohen_kappa(self):
@@ -295,37 +226,18 @@ def irr_cohen_kappa(self):
         return
     interval = util.float2decimal(i)
 
-    ok, msg, db_connector = db_functions.load_aggregated_events_in_db(
-        self.pj, parameters[cfg.SELECTED_SUBJECTS], selected_observations, parameters[cfg.SELECTED_BEHAVIORS]
-    )
+    indexes = irr_functions.observations_indexes(self.pj, selected_observations, parameters[cfg.SELECTED_BEHAVIORS])
 
-    cursor = db_connector.cursor()
     out = (
         "Index of Inter-rater Reliability - Cohen's Kappa\n\n"
         f"Interval time: {interval:.3f} s\n"
         f"Selected subjects: {', '.join(parameters[cfg.SELECTED_SUBJECTS])}\n\n"
     )
 
-    mem_done = []
-    irr_results = np.ones((len(selected_observations), len(selected_observations)))
-
-    for obs_id1 in selected_observations:
-        for obs_id2 in selected_observations:
-            if obs_id1 == obs_id2:
-                continue
-            if set([obs_id1, obs_id2]) not in mem_done:
-                K, msg = cohen_kappa(
-                    cursor,
-                    obs_id1,
-                    obs_id2,
-                    interval,
-                    parameters[cfg.SELECTED_SUBJECTS],
-                    parameters[cfg.INCLUDE_MODIFIERS],
-                )
-                irr_results[selected_observations.index(obs_id1), selected_observations.index(obs_id2)] = K
-                irr_results[selected_observations.index(obs_id2), selected_observations.index(obs_id1)] = K
-                out += msg + "\n=============\n"
-                mem_done.append(set([obs_id1, obs_id2]))
+    irr_results, messages = cohen_kappa_matrix(
+        indexes, selected_observations, interval, parameters[cfg.SELECTED_SUBJECTS], parameters[cfg.INCLUDE_MODIFIERS]
+    )
+    out += "".join(msg + "\n=============\n" for msg in messages)
 
     out2 = "\t{}\n".format("\t".join(list(selected_observations)))
     for r in range(irr_results.shape[0]):
@@ -342,190 +254,6 @@ def irr_cohen_kappa(self):
     self.results.show()
 
 
-def needleman_wunsch_identity(cursor, obsid1: str, obsid2: str, interval, selected_subjects: list, include_modifiers: bool):
-    """
-    Needleman - Wunsch identity between 2 observations
-
-    see http://anhaidgroup.github.io/py_stringmatching/v0.4.1/NeedlemanWunsch.html#
-
-    Args:
-        cursor (sqlite3.cursor): cursor to aggregated events db
-        obsid1 (str): id of observation #1
-        obsid2 (str): id of observation #2
-        interval
-        selected_subjects (list): subjects selected for analysis
-        include_modifiers (bool): True: include modifiers False: do not
-
-    Return:
-        float: identity
-        str: result of analysis
-    """
-
-    def zeros(shape):
-        retval = []
-        for x in range(shape[0]):
-            retval.append([])
-            for y in range(shape[1]):
-                retval[-1].append(0)
-        return retval
-
-    match_award = 1
-    mismatch_penalty = -1
-    gap_penalty = -1
-
-    def match_score(alpha, beta):
-        if alpha == beta:
-            return match_award
-        elif alpha == "-" or beta == "-":
-            return gap_penalty
-        else:
-            return mismatch_penalty
-
-    def finalize(align1, align2):
-        align1 = align1[::-1]
-        align2 = align2[::-1]
-
-        i = 0
-        symbol = []
-        score = 0
-        identity = 0
-        for i in range(0, len(align1)):
-            if align1[i] == align2[i]:
-                symbol.append(align1[i])
-                identity += 1
-                score += match_score(align1[i], align2[i])
-
-            elif align1[i] != align2[i] and align1[i] != "-" and align2[i] != "-":
-                score += match_score(align1[i], align2[i])
-                symbol.append(" ")
-
-            # if one of them is a gap, output a space
-            elif align1[i] == "-" or align2[i] == "-":
-                symbol.append(" ")
-                score += gap_penalty
-
-        identity = float(identity) / len(align1) * 100
-
-        return {"identity": identity, "score": score, "align1": align1, "align2": align2, "symbol": symbol}
-
-    def needle(seq1, seq2):
-        m, n = len(seq1), len(seq2)
-
-        score = zeros((m + 1, n + 1))
-
-        for i in range(0, m + 1):
-            score[i][0] = gap_penalty * i
-        for j in range(0, n + 1):
-            score[0][j] = gap_penalty * j
-        for i in range(1, m + 1):
-            for j in range(1, n + 1):
-                match = score[i - 1][j - 1] + match_score(seq1[i - 1], seq2[j - 1])
-                delete = score[i - 1][j] + gap_penalty
-                insert = score[i][j - 1] + gap_penalty
-                score[i][j] = max(match, delete, insert)
-
-        align1, align2 = [], []
-        i, j = m, n
-        while i > 0 and j > 0:
-            score_current = score[i][j]
-            score_diagonal = score[i - 1][j - 1]
-            score_up = score[i][j - 1]
-            score_left = score[i - 1][j]
-
-            if score_current == score_diagonal + match_score(seq1[i - 1], seq2[j - 1]):
-                align1.append(seq1[i - 1])
-                align2.append(seq2[j - 1])
-                i -= 1
-                j -= 1
-            elif score_current == score_left + gap_penalty:
-                align1.append(seq1[i - 1])
-                align2.append("-")
-                i -= 1
-            elif score_current == score_up + gap_penalty:
-                align1.append("-")
-                align2.append(seq2[j - 1])
-                j -= 1
-
-        # Finish tracing up to the top left cell
-        while i > 0:
-            align1.append(seq1[i - 1])
-            align2.append("-")
-            i -= 1
-        while j > 0:
-            align1.append("-")
-            align2.append(seq2[j - 1])
-            j -= 1
-
-        return finalize(align1, align2)
-
-    first_event = cursor.execute(
-        (
-            "SELECT min(start) FROM aggregated_events "
-            f"WHERE observation in (?, ?) AND subject in ({','.join('?' * len(selected_subjects))}) "
-        ),
-        (obsid1, obsid2) + tuple(selected_subjects),
-    ).fetchone()[0]
-
-    if first_event is None:
-        logging.debug(f"An observation has no recorded events: {obsid1} or {obsid2}")
-
-        return -100, f"An observation has no recorded events: {obsid1} {obsid2}"
-
-    logging.debug(f"first_event: {first_event}")
-
-    last_event = cursor.execute(
-        (f"SELECT max(stop) FROM aggregated_events WHERE observation in (?, ?) AND subject in ({','.join('?' * len(selected_subjects))}) "),
-        (obsid1, obsid2) + tuple(selected_subjects),
-    ).fetchone()[0]
-
-    logging.debug(f"last_event: {last_event}")
-
-    nb_events1 = cursor.execute(
-        (f"SELECT COUNT(*) FROM aggregated_events WHERE observation = ? AND subject in ({','.join('?' * len(selected_subjects))}) "),
-        (obsid1,) + tuple(selected_subjects),
-    ).fetchone()[0]
-
-    nb_events2 = cursor.execute(
-        (f"SELECT COUNT(*) FROM aggregated_events WHERE observation = ? AND subject in ({','.join('?' * len(selected_subjects))}) "),
-        (obsid2,) + tuple(selected_subjects),
-    ).fetchone()[0]
-
-    seq1: dict = {}
-    seq2: dict = {}
-
-    currentTime = dec(str(first_event))
-    while currentTime <= last_event:
-        seq1[currentTime], seq2[currentTime] = [], []
-
-        for subject in selected_subjects:
-            s1 = subj_behav_modif(cursor, obsid1, subject, currentTime, interval, include_modifiers)
-            s2 = subj_behav_modif(cursor, obsid2, subject, currentTime, interval, include_modifiers)
-
-            seq1[currentTime].append(s1)
-            seq2[currentTime].append(s2)
-
-            logging.debug(f"currentTime: {currentTime} s1:{s1} s2:{s2}")
-
-        currentTime += interval
-
-    logging.debug(f"seq1:\n {list(seq1.values())}")
-    logging.debug(f"seq2:\n {list(seq2.values())}")
-
-    r = needle(list(seq1.values()), list(seq2.values()))
-
-    out = (
-        f"Observation: {obsid1}\n"
-        f"number of events: {nb_events1}\n\n"
-        f"Observation: {obsid2}\n"
-        f"number of events: {nb_events2:.0f}\n\n"
-        f"identity = {r['identity']:.3f} %"
-    )
-
-    logging.debug(f"identity: {r['identity']}")
-
-    return r["identity"], out
-
-
 def needleman_wunch(self):
     """
     calculate the Needleman-Wunsch similarity for 2 or more observations
@@ -588,34 +316,33 @@ def needleman_wunch(self):
         return
     interval = util.float2decimal(i)
 
-    ok, msg, db_connector = db_functions.load_aggregated_events_in_db(
-        self.pj, parameters[cfg.SELECTED_SUBJECTS], selected_observations, parameters[cfg.SELECTED_BEHAVIORS]
+    # ask for the maximum time shift between the observations (band of the alignment)
+    max_shift, ok = QInputDialog.getDouble(
+        self,
+        "Needleman-Wunsch similarity",
+        "Maximum time shift between the observations (in seconds, 0 for no limit):",
+        NW_DEFAULT_MAX_SHIFT,
+        0,
+        86400,
+        3,
     )
+    if not ok:
+        return
+    band = math.ceil(util.float2decimal(max_shift) / interval) if max_shift else None
+    max_shift_text = f"{max_shift:.3f} s" if band else "no limit"
+
+    indexes = irr_functions.observations_indexes(self.pj, selected_observations, parameters[cfg.SELECTED_BEHAVIORS])
 
-    cursor = db_connector.cursor()
     out = (
-        f"Needleman-Wunsch similarity\n\nTime unit: {interval:.3f} s\nSelected subjects: {', '.join(parameters[cfg.SELECTED_SUBJECTS])}\n\n"
+        "Needleman-Wunsch similarity\n\n"
+        f"Time unit: {interval:.3f} s\n"
+        f"Maximum time shift: {max_shift_text}\n"
+        f"Selected subjects: {', '.join(parameters[cfg.SELECTED_SUBJECTS])}\n\n"
+    )
+    nws_results, messages = needleman_wunsch_matrix(
+        indexes, selected_observations, interval, parameters[cfg.SELECTED_SUBJECTS], parameters[cfg.INCLUDE_MODIFIERS], band
     )
-    mem_done = []
-    nws_results = np.ones((len(selected_observations), len(selected_observations)))
-
-    for obs_id1 in selected_observations:
-        for obs_id2 in selected_observations:
-            if obs_id1 == obs_id2:
-                continue
-            if set([obs_id1, obs_id2]) not in mem_done:
-                similarity, msg = needleman_wunsch_identity(
-                    cursor,
-                    obs_id1,
-                    obs_id2,
-                    interval,
-                    parameters[cfg.SELECTED_SUBJECTS],
-                    parameters[cfg.INCLUDE_MODIFIERS],
-                )
-                nws_results[selected_observations.index(obs_id1), selected_observations.index(obs_id2)] = similarity
-                nws_results[selected_observations.index(obs_id2), selected_observations.index(obs_id1)] = similarity
-                out += msg + "\n=============\n"
-                mem_done.append(set([obs_id1, obs_id2]))
+    out += "".join(msg + "\n=============\n" for msg in messages)
 
     out2 = "\t{}\n".format("\t".join(list(selected_observations)))
     for r in range(nws_results.shape[0]):
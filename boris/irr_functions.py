@@ -0,0 +1,450 @@
+"""
+BORIS
+Behavioral Observation Research Interactive Software
+Copyright 2012-2026 Olivier Friard
+
+This file is part of BORIS.
+
+  BORIS is free software; you can redistribute it and/or modify
+  it under the terms of the GNU General Public License as published by
+  the Free Software Foundation; either version 3 of the License, or
+  any later version.
+
+  BORIS is distributed in the hope that it will be useful,
+  but WITHOUT ANY WARRANTY; without even the implied warranty of
+  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+  GNU General Public License for more details.
+
+  You should have received a copy of the GNU General Public License
+  along with this program; if not see <http://www.gnu.org/licenses/>.
+
+Inter-rater reliability (Cohen's kappa and Needleman-Wunsch identity) without GUI.
+The processes of the process pools (see irr.pairs_matrix) import this module:
+it must not import PySide6 or the modules importing it (utilities, dialog, ...)
+"""
+
+import logging
+from decimal import Decimal as dec
+
+import numpy as np
+
+from . import event_index
+
+
+def subj_behav_modif(index, subject: str, time: dec, interval, include_modifiers: bool) -> list:
+    """
+    current behaviors for observation at time
+
+    Args:
+        index (event_index.EventIntervalIndex): interval index of observation events
+        subject (str): name of subject
+        time (Decimal): time
+        interval (Decimal): time unit. Point events are included if they are at less than interval / 2 from time
+        include_modifiers (bool): True: include modifiers False: do not
+
+    Returns:
+        list: list of lists [subject, behavior, modifiers]
+    """
+
+    subject_key = event_index.subject_key(subject)
+
+    # state behaviors (start <= time <= stop)
+    behaviors = index.states_at(subject_key, time, include_stop=True)
+    # point behaviors
+    behaviors.extend(index.points_between(subject_key, *event_index.window_bounds(time, interval / 2), include_end=True))
+
+    if include_modifiers:
+        return [[subject, behavior, modifiers] for behavior, modifiers in behaviors]
+    else:
+        return [[subject, behavior] for behavior, _ in behaviors]
+
+
+def observations_indexes(pj: dict, selected_observations: list, selected_behaviors: list) -> dict:
+    """
+    interval indexes of the selected behaviors for the selected observations
+
+    Returns:
+        dict: {observation id: event_index.EventIntervalIndex}
+    """
+    return {obs_id: event_index.observation_index(pj, obs_id, selected_behaviors) for obs_id in selected_observations}
+
+
+def first_last_events(index1, index2, subjects: set) -> tuple:
+    """
+    time of first and last events of subjects in the 2 observations
+
+    Returns:
+        float: time of first event (None if no events)
+        float: time of last event (None if no events)
+    """
+    times = [t for t in index1.time_range(subjects) + index2.time_range(subjects) if t is not None]
+    if not times:
+        return None, None
+    return min(times), max(times)
+
+
+def time_grid(first_event: float, last_event: float, interval) -> np.ndarray:
+    """
+    times (integer milliseconds) of the time units from first_event to last_event (included)
+
+    Args:
+        first_event (float): time of first event
+        last_event (float): time of last event
+        interval (Decimal): time unit (s)
+
+    Returns:
+        np.ndarray: times in milliseconds (int64)
+    """
+    first_ms = event_index.time_to_ms(dec(str(first_event)))
+    interval_ms = event_index.time_to_ms(interval)
+    if interval_ms <= 0:
+        raise ValueError("The time unit must be at least 1 ms")
+    # the last time is compared with the exact value of last_event (like the Decimal comparison)
+    last = dec(last_event)
+    n_units = max(-1, (event_index.time_to_ms(last) - first_ms) // interval_ms)
+    while n_units >= 0 and event_index.ms_to_time(first_ms + n_units * interval_ms) > last:
+        n_units -= 1
+    while event_index.ms_to_time(first_ms + (n_units + 1) * interval_ms) <= last:
+        n_units += 1
+    return first_ms + interval_ms * np.arange(n_units + 1, dtype=np.int64)
+
+
+def sampled_states(index, subject: str, grid_ms: np.ndarray, interval, include_modifiers: bool, codes: dict) -> np.ndarray:
+    """
+    combination of behaviors of subject at every time of the grid (vectorised subj_behav_modif)
+
+    Args:
+        index (event_index.EventIntervalIndex): interval index of observation events
+        subject (str): name of subject
+        grid_ms (np.ndarray): times in milliseconds (see time_grid)
+        interval (Decimal): time unit. Point events are included if they are at less than interval / 2 from time
+        include_modifiers (bool): True: include modifiers False: do not
+        codes (dict): integer code of every combination of behaviors (tuple of (subject, behavior[, modifiers])).
+                      New combinations are added
+
+    Returns:
+        np.ndarray: codes of the combinations of behaviors
+    """
+
+    def code(behaviors: list) -> int:
+        combination = tuple(
+            (subject, behavior, modifiers) if include_modifiers else (subject, behavior) for behavior, modifiers in behaviors
+        )
+        return codes.setdefault(combination, len(codes))
+
+    subject_key = event_index.subject_key(subject)
+    interval_ms = event_index.time_to_ms(interval)
+
+    # state behaviors (start <= time <= stop)
+    states, active = index.states_matrix(subject_key, grid_ms / 1000, include_stop=True)
+    # the states change only at the events: the consecutive samples with the same states are coded once
+    runs_starts = np.flatnonzero(np.concatenate(([True], np.any(active[1:] != active[:-1], axis=1))))
+    runs_states = [[states[column] for column in np.flatnonzero(active[start]).tolist()] for start in runs_starts.tolist()]
+    samples = np.repeat(
+        np.array([code(run_states) for run_states in runs_states], dtype=np.int64), np.diff(np.append(runs_starts, len(grid_ms)))
+    )
+
+    # point behaviors (time - interval / 2 <= t <= time + interval / 2)
+    points = index.points_in_windows(subject_key, (2 * grid_ms - interval_ms) / 2000, (2 * grid_ms + interval_ms) / 2000, include_end=True)
+    samples_runs = np.searchsorted(runs_starts, np.fromiter(points, dtype=np.int64, count=len(points)), side="right") - 1
+    for (sample_idx, behaviors), run in zip(points.items(), samples_runs.tolist()):
+        samples[sample_idx] = code(runs_states[run] + behaviors)
+
+    return samples
+
+
+def cohen_kappa(indexes: dict, obsid1: str, obsid2: str, interval: dec, selected_subjects: list, include_modifiers: bool):
+    """
+    Inter-rater reliability Cohen's kappa coefficient (time-unit)
+    see Sequential Analysis and Observational Methods for the Behavioral Sciences p. 77
+
+    The observations are sampled on the same time grid and the combinations of behaviors are coded as integers
+
+    Args:
+        indexes (dict): interval indexes of observations events (see observations_indexes)
+        obsid1 (str): id of observation #1
+        obsid2 (str): id of observation #2
+        interval (decimal.Decimal): time unit (s)
+        selected_subjects (list): subjects selected for analysis
+        include_modifiers (bool): True: include modifiers False: do not
+
+    Return:
+        float: K
+        str: result of analysis
+    """
+
+    # check if obs have events
+    for obs_id in [obsid1, obsid2]:
+        if not indexes[obs_id].count():
+            return -100, f"The observation {obs_id} has no recorded events"
+
+    subjects_keys = {event_index.subject_key(subject) for subject in selected_subjects}
+    first_event, last_event = first_last_events(indexes[obsid1], indexes[obsid2], subjects_keys)
+
+    logging.debug(f"first_event: {first_event}")
+    logging.debug(f"last_event: {last_event}")
+
+    if first_event is None:
+        return -100, "The observations have no recorded events for the selected subjects"
+
+    nb_events1 = indexes[obsid1].count(subjects_keys)
+    nb_events2 = indexes[obsid2].count(subjects_keys)
+
+    try:
+        grid_ms = time_grid(first_event, last_event, interval)
+    except ValueError as exc:
+        return -100, str(exc)
+
+    codes: dict = {}
+    samples1 = np.concatenate(
+        [sampled_states(indexes[obsid1], subject, grid_ms, interval, include_modifiers, codes) for subject in selected_subjects]
+    )
+    samples2 = np.concatenate(
+        [sampled_states(indexes[obsid2], subject, grid_ms, interval, include_modifiers, codes) for subject in selected_subjects]
+    )
+
+    # rank of the combinations of behaviors in sorted order
+    total_states = sorted(codes)
+    rank = np.empty(len(codes), dtype=np.int64)
+    for idx, state in enumerate(total_states):
+        rank[codes[state]] = idx
+
+    logging.debug(f"total_states: {total_states} len:{len(total_states)}")
+
+    n_states = len(total_states)
+    contingency_table = (
+        np.bincount(rank[samples1] * n_states + rank[samples2], minlength=n_states * n_states).reshape(n_states, n_states).astype(float)
+    )
+
+    logging.debug(f"contingency_table:\n {contingency_table}")
+
+    template = (
+        "Observation: {obsid1}\nnumber of events: {nb_events1}\n\nObservation: {obsid2}\nnumber of events: {nb_events2:.0f}\n\nK = {K:.3f}"
+    )
+
+    cols_sums = contingency_table.sum(axis=0)
+    rows_sums = contingency_table.sum(axis=1)
+    overall_total = contingency_table.sum()
+
+    logging.debug(f"overall_total: {overall_total}")
+
+    agreements = sum(contingency_table.diagonal())
+
+    logging.debug(f"agreements: {agreements}")
+
+    sum_ef = 0
+    for idx in range(len(total_states)):
+        sum_ef += rows_sums[idx] * cols_sums[idx] / overall_total
+
+    logging.debug(f"sum_ef {sum_ef}")
+
+    if not (overall_total - sum_ef):
+        K = 1
+    else:
+        try:
+            K = round((agreements - sum_ef) / (overall_total - sum_ef), 3)
+        except Exception:
+            K = np.nan
+
+    out = template.format(obsid1=obsid1, obsid2=obsid2, nb_events1=nb_events1, nb_events2=nb_events2, K=K)
+
+    logging.debug(f"K: {K}")
+    return K, out
+
+
+# directions of the Needleman-Wunsch traceback
+NW_DIAGONAL, NW_UP, NW_LEFT = 0, 1, 2
+
+
+def needleman_wunsch(seq1: np.ndarray, seq2: np.ndarray, band: int | None = None) -> tuple:
+    """
+    Needleman-Wunsch global alignment of 2 sequences of integer symbols (match: 1, mismatch: -1, gap: -1)
+
+    The score matrix is filled row by row with NumPy: the gaps in a row are resolved with a cumulative maximum.
+    Only the directions of the traceback are stored (int8).
+
+    Args:
+        seq1 (np.ndarray): symbols of sequence #1
+        seq2 (np.ndarray): symbols of sequence #2
+        band (int): compute only the cells at less than band from the diagonal (None for the full matrix).
+                    The band is enlarged to the difference of length of the sequences
+
+    Returns:
+        int: number of identical symbols in the alignment
+        int: length of the alignment
+    """
+    m, n = len(seq1), len(seq2)
+    if not m or not n:
+        return 0, m + n
+    if band is not None:
+        band = max(band, abs(n - m), 1)
+    # first and last column of the cells computed in each row
+    rows = np.arange(m + 1)
+    first_col = np.zeros(m + 1, dtype=np.int64) if band is None else np.maximum(rows - band, 0)
+    last_col = np.full(m + 1, n, dtype=np.int64) if band is None else np.minimum(rows + band, n)
+
+    minus_inf = np.iinfo(np.int64).min // 4
+    directions = np.full((m + 1, int((last_col - first_col).max()) + 1), NW_LEFT, dtype=np.int8)
+
+    # row 0: gaps
+    previous = -np.arange(first_col[0], last_col[0] + 1, dtype=np.int64)
+    for i in range(1, m + 1):
+        lo, hi = int(first_col[i]), int(last_col[i])
+        previous_lo, previous_hi = int(first_col[i - 1]), int(last_col[i - 1])
+        cols = np.arange(lo, hi + 1)
+
+        # previous row extended to the columns lo - 1 ... hi
+        previous_row = np.full(hi - lo + 2, minus_inf, dtype=np.int64)
+        a, b = max(lo - 1, previous_lo), min(hi, previous_hi)
+        if a <= b:
+            previous_row[a - lo + 1 : b - lo + 2] = previous[a - previous_lo : b - previous_lo + 1]
+
+        up = previous_row[1:] - 1
+        diagonal = previous_row[:-1].copy()
+        diagonal[cols == 0] = minus_inf
+        matches = np.where(seq2[np.maximum(cols - 1, 0)] == seq1[i - 1], 1, -1)
+        diagonal = np.where(diagonal > minus_inf, diagonal + matches, minus_inf)
+
+        best = np.maximum(diagonal, up)
+        # gaps in the row: score[j] = max(best[k] - (j - k)) for k <= j
+        current = np.maximum.accumulate(best + cols) - cols
+
+        directions[i, : hi - lo + 1] = np.where(current == diagonal, NW_DIAGONAL, np.where(current == up, NW_UP, NW_LEFT))
+        previous = current
+
+    # traceback
+    identical, length = 0, 0
+    i, j = m, n
+    while i > 0 and j > 0:
+        direction = directions[i, j - first_col[i]]
+        if direction == NW_DIAGONAL:
+            if seq1[i - 1] == seq2[j - 1]:
+                identical += 1
+            i -= 1
+            j -= 1
+        elif direction == NW_UP:
+            i -= 1
+        else:
+            j -= 1
+        length += 1
+    # gaps up to the top left cell
+    length += i + j
+
+    return identical, length
+
+
+def combined_symbols(samples: list) -> np.ndarray:
+    """
+    code of the combination of the symbols of every sample in the sequences
+
+    Args:
+        samples (list): sequences of symbols (np.ndarray of the same length)
+
+    Returns:
+        np.ndarray: codes
+    """
+    symbols = samples[0]
+    for subject_samples in samples[1:]:
+        _, symbols = np.unique(symbols * (int(subject_samples.max()) + 1) + subject_samples, return_inverse=True)
+    return symbols.ravel()
+
+
+def needleman_wunsch_identity(
+    indexes: dict, obsid1: str, obsid2: str, interval, selected_subjects: list, include_modifiers: bool, band: int | None = None
+):
+    """
+    Needleman - Wunsch identity between 2 observations
+
+    see http://anhaidgroup.github.io/py_stringmatching/v0.4.1/NeedlemanWunsch.html#
+
+    The observations are sampled on the same time grid: the symbol of a time unit is the code of the
+    combinations of behaviors of the selected subjects
+
+    Args:
+        indexes (dict): interval indexes of observations events (see observations_indexes)
+        obsid1 (str): id of observation #1
+        obsid2 (str): id of observation #2
+        interval (decimal.Decimal): time unit (s)
+        selected_subjects (list): subjects selected for analysis
+        include_modifiers (bool): True: include modifiers False: do not
+        band (int): band width in time units for the alignment (None for the full alignment, see needleman_wunsch)
+
+    Return:
+        float: identity
+        str: result of analysis
+    """
+
+    subjects_keys = {event_index.subject_key(subject) for subject in selected_subjects}
+    first_event, last_event = first_last_events(indexes[obsid1], indexes[obsid2], subjects_keys)
+
+    if first_event is None:
+        logging.debug(f"An observation has no recorded events: {obsid1} or {obsid2}")
+
+        return -100, f"An observation has no recorded events: {obsid1} {obsid2}"
+
+    logging.debug(f"first_event: {first_event}")
+    logging.debug(f"last_event: {last_event}")
+
+    nb_events1 = indexes[obsid1].count(subjects_keys)
+    nb_events2 = indexes[obsid2].count(subjects_keys)
+
+    try:
+        grid_ms = time_grid(first_event, last_event, interval)
+    except ValueError as exc:
+        return -100, str(exc)
+
+    codes: dict = {}
+    symbols = combined_symbols(
+        [
+            np.concatenate(
+                (
+                    sampled_states(indexes[obsid1], subject, grid_ms, interval, include_modifiers, codes),
+                    sampled_states(indexes[obsid2], subject, grid_ms, interval, include_modifiers, codes),
+                )
+            )
+            for subject in selected_subjects
+        ]
+    )
+
+    identical, length = needleman_wunsch(symbols[: len(grid_ms)], symbols[len(grid_ms) :], band)
+    identity = float(identical) / length * 100
+
+    out = (
+        f"Observation: {obsid1}\n"
+        f"number of events: {nb_events1}\n\n"
+        f"Observation: {obsid2}\n"
+        f"number of events: {nb_events2:.0f}\n\n"
+        f"identity = {identity:.3f} %"
+    )
+
+    logging.debug(f"identity: {identity}")
+
+    return identity, out
+
+
+def cohen_kappa_pair(arguments: tuple) -> tuple:
+    """
+    Cohen's kappa of a pair of observations (task of the process pool, see irr.pairs_matrix)
+
+    Args:
+        arguments (tuple): arguments of cohen_kappa
+
+    Returns:
+        float: K
+        str: result of analysis
+    """
+    return cohen_kappa(*arguments)
+
+
+def needleman_wunsch_pair(arguments: tuple) -> tuple:
+    """
+    Needleman-Wunsch identity of a pair of observations (task of the process pool, see irr.pairs_matrix)
+
+    Args:
+        arguments (tuple): arguments of needleman_wunsch_identity
+
+    Returns:
+        float: identity
+        str: result of analysis
+    """
+    return needleman_wunsch_identity(*arguments)
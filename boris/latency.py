@@ -23,10 +23,204 @@ This file is part of BORIS.
 
 # Module for analyzing the latency of behaviors after another behavior(s) (marker)
 
+import numpy as np
+import pandas as pd
 from PySide6.QtWidgets import QMessageBox
 
 from . import config as cfg
 from . import dialog, observation_operations, project_functions, select_observations, select_subj_behav
+from . import utilities as util
+
+MARKER_COLUMNS = ["Marker time", "Marker subject", "Marker behavior", "Marker modifiers"]
+LATENCY_COLUMNS = ["Subject", "Behavior", "Modifiers", "Latency"]
+
+
+def is_selected_subject(subject: str, selected_subjects: list) -> bool:
+    """
+    True if subject of event ("" for no focal subject) is selected
+    """
+    return subject in selected_subjects or (subject == "" and cfg.NO_FOCAL_SUBJECT in selected_subjects)
+
+
+def onsets(events: list, state_behaviors: list) -> dict:
+    """
+    onsets of behaviors (START of state events and POINT events) by (subject, behavior, modifiers)
+    The status of state events is given by the parity of their occurrences (like project_functions.events_start_stop)
+
+    Args:
+        events (list): events of observation
+        state_behaviors (list): behavior codes defined as STATE event
+
+    Returns:
+        dict: {(subject, behavior, modifiers): (positions in events list, times in ms)} as sorted np.ndarray
+    """
+    state_set = set(state_behaviors)
+    occurrences: dict = {}
+    positions: dict = {}
+    times: dict = {}
+    for position, event in enumerate(events):
+        key = (event[cfg.EVENT_SUBJECT_FIELD_IDX], event[cfg.EVENT_BEHAVIOR_FIELD_IDX], event[cfg.EVENT_MODIFIER_FIELD_IDX])
+        if key[1] in state_set:
+            occurrences[key] = occurrences.get(key, 0) + 1
+            # STOP
+            if not occurrences[key] % 2:
+                continue
+        positions.setdefault(key, []).append(position)
+        times.setdefault(key, []).append(util.time_to_ms(event[cfg.EVENT_TIME_FIELD_IDX]))
+    return {key: (np.array(positions[key], dtype=np.int64), np.array(times[key], dtype=np.int64)) for key in positions}
+
+
+def observation_latency(
+    events: list,
+    state_behaviors: list,
+    marker_behaviors: list,
+    marker_subjects: list,
+    latency_behaviors: list,
+    latency_subjects: list,
+) -> list:
+    """
+    latencies of the onsets of the latency behaviors after the last onset of a marker behavior
+
+    Args:
+        events (list): events of observation
+        state_behaviors (list): behavior codes defined as STATE event
+        marker_behaviors (list): marker behaviors
+        marker_subjects (list): subjects of marker behaviors
+        latency_behaviors (list): latency behaviors
+        latency_subjects (list): subjects of latency behaviors
+
+    Returns:
+        list: (marker position, marker time (ms), marker key, event position, event key, latency (ms))
+              in order of marker then event. The key is (subject, behavior, modifiers).
+              The markers without following events have None as event position, key and latency
+    """
+    keys_onsets = onsets(events, state_behaviors)
+
+    marker_keys = [key for key in keys_onsets if key[1] in marker_behaviors and is_selected_subject(key[0], marker_subjects)]
+    if not marker_keys:
+        return []
+    # markers in events list order
+    marker_positions = np.concatenate([keys_onsets[key][0] for key in marker_keys])
+    order = np.argsort(marker_positions, kind="stable")
+    marker_positions = marker_positions[order]
+    marker_times = np.concatenate([keys_onsets[key][1] for key in marker_keys])[order]
+    marker_key_idx = np.repeat(np.arange(len(marker_keys)), [len(keys_onsets[key][0]) for key in marker_keys])[order]
+
+    rows: list = []
+    with_latency = np.zeros(len(marker_positions), dtype=bool)
+    for key, (positions, times) in keys_onsets.items():
+        if key[1] not in latency_behaviors or not is_selected_subject(key[0], latency_subjects):
+            continue
+        # last marker before the event
+        marker_idx = np.searchsorted(marker_positions, positions, side="left") - 1
+        valid = marker_idx >= 0
+        marker_idx, positions = marker_idx[valid], positions[valid]
+        with_latency[marker_idx] = True
+        for idx, position, latency in zip(marker_idx.tolist(), positions.tolist(), (times[valid] - marker_times[marker_idx]).tolist()):
+            rows.append((int(marker_positions[idx]), int(marker_times[idx]), marker_keys[marker_key_idx[idx]], position, key, latency))
+
+    for idx in np.flatnonzero(~with_latency).tolist():
+        rows.append((int(marker_positions[idx]), int(marker_times[idx]), marker_keys[marker_key_idx[idx]], None, None, None))
+
+    rows.sort(key=lambda row: (row[0], -1 if row[3] is None else row[3]))
+    return rows
+
+
+def latency(
+    pj: dict,
+    selected_observations: list,
+    marker_behaviors: list,
+    marker_subjects: list,
+    include_marker_modifiers: bool,
+    latency_behaviors: list,
+    latency_subjects: list,
+    include_latency_modifiers: bool,
+) -> pd.DataFrame:
+    """
+    latency of behaviors after the marker behaviors (stimulus) in the selected observations.
+    The latency of an onset (START or POINT event) is the time after the last onset of a marker behavior.
+
+    Args:
+        pj (dict): BORIS project
+        selected_observations (list): ids of observations
+        marker_behaviors (list): marker behaviors
+        marker_subjects (list): subjects of marker behaviors
+        include_marker_modifiers (bool): distinguish the markers by modifiers
+        latency_behaviors (list): latency behaviors
+        latency_subjects (list): subjects of latency behaviors
+        include_latency_modifiers (bool): distinguish the latency behaviors by modifiers
+
+    Returns:
+        pd.DataFrame: one row by latency (Observation id, Marker time, Marker subject, Marker behavior, [Marker modifiers],
+                      Subject, Behavior, [Modifiers], Latency) with times in seconds.
+                      The latency of the markers without following latency behavior is NaN
+    """
+    state_behaviors = util.state_behavior_codes(pj[cfg.ETHOGRAM])
+
+    def subject_name(subject: str) -> str:
+        return cfg.NO_FOCAL_SUBJECT if subject == "" else subject
+
+    records: list = []
+    for obs_id in selected_observations:
+        rows = observation_latency(
+            pj[cfg.OBSERVATIONS][obs_id][cfg.EVENTS],
+            state_behaviors,
+            marker_behaviors,
+            marker_subjects,
+            latency_behaviors,
+            latency_subjects,
+        )
+        for _, marker_time, marker_key, _, key, latency_ms in rows:
+            records.append(
+                (obs_id, marker_time / 1000, subject_name(marker_key[0]), marker_key[1], marker_key[2])
+                + ((None, None, None, np.nan) if key is None else (subject_name(key[0]), key[1], key[2], latency_ms / 1000))
+            )
+
+    df = pd.DataFrame(records, columns=["Observation id"] + MARKER_COLUMNS + LATENCY_COLUMNS)
+    if not include_marker_modifiers:
+        df = df.drop(columns="Marker modifiers")
+    if not include_latency_modifiers:
+        df = df.drop(columns="Modifiers")
+    return df
+
+
+def latency_report(df: pd.DataFrame) -> str:
+    """
+    HTML report of the latency analysis
+
+    Args:
+        df (pd.DataFrame): results of latency analysis (see latency)
+
+    Returns:
+        str: HTML
+    """
+    marker_columns = [column for column in MARKER_COLUMNS if column in df.columns]
+    latency_columns = [column for column in LATENCY_COLUMNS[:-1] if column in df.columns]
+    out = ""
+    for obs_id, obs_df in df.groupby("Observation id", sort=False):
+        out += f"Observation: <b>{obs_id}</b><br><br>"
+        for marker, marker_df in obs_df.groupby(marker_columns, sort=True):
+            if "Marker modifiers" in marker_columns:
+                out += f"Marker: <b>{marker[2]}</b> at {marker[0]:.3f} s (subject: {marker[1]} - modifiers: {marker[3]})<br><br>"
+            else:
+                out += f"Marker: <b>{marker[2]}</b> at {marker[0]:.3f} s (subject: {marker[1]})<br><br>"
+            # the markers without latency are dropped (NaN)
+            for behav, latency_df in marker_df.groupby(latency_columns, sort=False):
+                if "Modifiers" in latency_columns:
+                    out += f"\nLatency for behavior: <b>{behav[1]}</b> (subject: {behav[0]} - modifiers: {behav[2]})<br>"
+                else:
+                    out += f"\nLatency for behavior:  <b>{behav[1]}</b> (subject: {behav[0]})<br>"
+
+                latencies = sorted(latency_df["Latency"])
+                out += "first occurrence: "
+                out += f"{latencies[0]:.3f} s<br>"
+                out += "all occurrences: "
+
+                out += ", ".join([f"{x:.3f} s" for x in latencies])
+                out += "<br><br>"
+
+            out += "<br><br>"
+    return out
 
 
 def get_latency(self):
@@ -47,10 +241,8 @@ def get_latency(self):
         QMessageBox.StandardButton.NoButton,
     )
 
-    SUBJECT, BEHAVIOR, MODIFIERS = 0, 1, 2
-
     _, selected_observations = select_observations.select_observations2(
-        self, cfg.SELECT1, windows_title="Select one observation for latency analysis"
+        self, cfg.MULTIPLE, windows_title="Select observations for latency analysis"
     )
 
     if not selected_observations:
@@ -96,147 +288,28 @@ def get_latency(self):
     marker_subjects = parameters[cfg.SELECTED_SUBJECTS]
     include_marker_modifiers = parameters[cfg.INCLUDE_MODIFIERS]
 
-    print(f"{marker_behaviors=} {marker_subjects=} {include_marker_modifiers=}")
-
     parameters: dict = select_subj_behav.choose_obs_subj_behav_category(
         self, selected_observations, show_exclude_non_coded_behaviors=False, window_title="Select the latency behaviors"
     )
+    if parameters == {}:
+        return
     if not parameters[cfg.SELECTED_SUBJECTS] or not parameters[cfg.SELECTED_BEHAVIORS]:
         return
-    latency_behaviors = parameters[cfg.SELECTED_BEHAVIORS]
-    latency_subjects = parameters[cfg.SELECTED_SUBJECTS]
-    include_latency_modifiers = parameters[cfg.INCLUDE_MODIFIERS]
-
-    print(f"{latency_behaviors=} {latency_subjects=} {include_latency_modifiers=}")
-
-    results: dict = {}
-    for obs_id in selected_observations:
-        print(f"{obs_id=}")
-
-        events_with_status = project_functions.events_start_stop(
-            self.pj[cfg.ETHOGRAM],
-            self.pj[cfg.OBSERVATIONS][obs_id][cfg.EVENTS],
-            self.pj[cfg.OBSERVATIONS][obs_id][cfg.TYPE],
-        )
-
-        print(f"{events_with_status=}")
-
-        for idx, event in enumerate(events_with_status):
-            print(f"{event=}")
 
-            print(f"{event[cfg.EVENT_STATUS_FIELD_IDX]=}")
-
-            print(f"{event[cfg.EVENT_BEHAVIOR_FIELD_IDX]=}")
-
-            print(f"{event[cfg.EVENT_SUBJECT_FIELD_IDX]=}")
-
-            if all(
-                (
-                    event[cfg.EVENT_STATUS_FIELD_IDX] in (cfg.START, cfg.POINT),
-                    event[cfg.EVENT_BEHAVIOR_FIELD_IDX] in marker_behaviors,
-                    any(
-                        (
-                            event[cfg.EVENT_SUBJECT_FIELD_IDX] in marker_subjects,
-                            all((event[cfg.EVENT_SUBJECT_FIELD_IDX] == "", cfg.NO_FOCAL_SUBJECT in marker_subjects)),
-                        )
-                    ),
-                )
-            ):
-                if include_marker_modifiers:
-                    marker = event[cfg.EVENT_TIME_FIELD_IDX : cfg.EVENT_MODIFIER_FIELD_IDX + 1]
-                else:
-                    marker = event[cfg.EVENT_TIME_FIELD_IDX : cfg.EVENT_BEHAVIOR_FIELD_IDX + 1]
-
-                print(f"{marker=}")
-
-                if marker not in results:
-                    results[marker] = {}
-
-                for event2 in events_with_status[idx + 1 :]:
-                    if all(
-                        (
-                            event2[cfg.EVENT_STATUS_FIELD_IDX] in (cfg.START, cfg.POINT),
-                            event2[cfg.EVENT_BEHAVIOR_FIELD_IDX] in latency_behaviors,
-                            any(
-                                (
-                                    event2[cfg.EVENT_SUBJECT_FIELD_IDX] in latency_subjects,
-                                    all(
-                                        (
-                                            event2[cfg.EVENT_SUBJECT_FIELD_IDX] == "",
-                                            cfg.NO_FOCAL_SUBJECT in latency_subjects,
-                                        )
-                                    ),
-                                )
-                            ),
-                        )
-                    ):
-                        print(event, event2)
-                        if include_latency_modifiers:
-                            latency = event2[cfg.EVENT_SUBJECT_FIELD_IDX : cfg.EVENT_MODIFIER_FIELD_IDX + 1]
-                        else:
-                            latency = event2[cfg.EVENT_SUBJECT_FIELD_IDX : cfg.EVENT_BEHAVIOR_FIELD_IDX + 1]
-
-                        # print(f"{marker=}")
-                        print(f"{latency=}")
-                        if latency not in results[marker]:
-                            results[marker][latency] = []
-                        results[marker][latency].append(event2[cfg.EVENT_TIME_FIELD_IDX] - event[cfg.EVENT_TIME_FIELD_IDX])
-
-                        print(f"{results[marker][latency]=}")
-
-                    # check if new marker
-                    if all(
-                        (
-                            event2[cfg.EVENT_STATUS_FIELD_IDX] in (cfg.START, cfg.POINT),
-                            event2[cfg.EVENT_BEHAVIOR_FIELD_IDX] in marker_behaviors,
-                            any(
-                                (
-                                    event2[cfg.EVENT_SUBJECT_FIELD_IDX] in marker_subjects,
-                                    all(
-                                        (
-                                            event2[cfg.EVENT_SUBJECT_FIELD_IDX] == "",
-                                            cfg.NO_FOCAL_SUBJECT in marker_subjects,
-                                        )
-                                    ),
-                                )
-                            ),
-                        )
-                    ):
-                        break
-
-        break
-
-    # print()
-    # import pprint
-    # pprint.pprint(results)
-
-    out = ""
-
-    for marker in sorted(results.keys()):
-        subject = cfg.NO_FOCAL_SUBJECT if marker[cfg.EVENT_SUBJECT_FIELD_IDX] == "" else marker[1]
-        if include_marker_modifiers:
-            out += f"Marker: <b>{marker[cfg.EVENT_BEHAVIOR_FIELD_IDX]}</b> at {marker[cfg.EVENT_TIME_FIELD_IDX]} s (subject: {subject} - modifiers: {marker[cfg.EVENT_MODIFIER_FIELD_IDX]})<br><br>"
-        else:
-            out += f"Marker: <b>{marker[cfg.EVENT_BEHAVIOR_FIELD_IDX]}</b> at {marker[cfg.EVENT_TIME_FIELD_IDX]} s (subject: {subject})<br><br>"
-        for behav in results[marker]:
-            subject = cfg.NO_FOCAL_SUBJECT if behav[SUBJECT] == "" else behav[SUBJECT]
-            if include_latency_modifiers:
-                out += f"\nLatency for behavior: <b>{behav[BEHAVIOR]}</b> (subject: {subject} - modifiers: {behav[MODIFIERS]})<br>"
-            else:
-                out += f"\nLatency for behavior:  <b>{behav[BEHAVIOR]}</b> (subject: {subject})<br>"
-
-            out += "first occurrence: "
-            out += f"{sorted(results[marker][behav])[0]} s<br>"
-            out += "all occurrences: "
-
-            out += ", ".join([f"{x} s" for x in sorted(results[marker][behav])])
-            out += "<br><br>"
-
-        out += "<br><br>"
+    df = latency(
+        self.pj,
+        selected_observations,
+        marker_behaviors,
+        marker_subjects,
+        include_marker_modifiers,
+        parameters[cfg.SELECTED_BEHAVIORS],
+        parameters[cfg.SELECTED_SUBJECTS],
+        parameters[cfg.INCLUDE_MODIFIERS],
+    )
 
     self.remove_closed_results_objects()
     self.results_objects.append(dialog.Results_widget())
     self.results_objects[-1].setWindowTitle("Latency")
     self.results_objects[-1].ptText.clear()
-    self.results_objects[-1].ptText.appendHtml(out)
+    self.results_objects[-1].ptText.appendHtml(latency_report(df))
     self.results_objects[-1].show()
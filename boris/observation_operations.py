@@ -27,7 +27,6 @@ import subprocess
 import sys
 import tempfile
 import time
-from collections import deque
 from decimal import Decimal as dec
 from math import floor, log2
 from pathlib import Path
@@ -110,6 +109,7 @@ def close_observation(self):
         self.media_scan_sampling_mem = []
         logging.info("Stop plot timer")
         self.plot_timer.stop()
+        self.refresh_scheduler.reset()
 
         if self.MPV_IPC_MODE:
             self.main_window_activation_timer.stop()
@@ -159,8 +159,9 @@ def close_observation(self):
     self.observationId = ""
 
     # delete undo queue
-    self.undo_queue = deque()
-    self.undo_description = deque()
+    self.events_undo.clear()
+
+    self.current_states_cursor = None
 
     if self.playerType in (cfg.MEDIA, cfg.IMAGES):
         for dw in self.dw_player:
@@ -2005,7 +2006,9 @@ def initialize_new_media_observation(self) -> bool:
 
     else:
         self.ipc_mpv_timer = None
-        self.time_observer_signal.connect(self.mpv_timer_out)
+        # time_observer_signal is connected to the refresh scheduler (see MainWindow.__init__)
+        self.refresh_scheduler.reset()
+        self.refresh_scheduler.set_refresh_rate(self.config_param.get(cfg.UI_REFRESH_RATE, cfg.UI_REFRESH_RATE_DEFAULT_VALUE))
 
     self.mpv_eof_reached_signal.connect(self.mpv_eof_reached)
     self.video_click_signal.connect(self.player_clicked)
@@ -20,7 +20,7 @@ This file is part of BORIS.
 
 """
 
-import copy
+import ast
 import importlib
 import inspect
 import json
@@ -28,6 +28,8 @@ import logging
 import re
 import shutil
 import tempfile
+import threading
+import traceback
 import urllib.request
 import zipfile
 from pathlib import Path
@@ -35,11 +37,12 @@ from typing import get_args, get_origin
 
 import numpy as np
 import pandas as pd
+from PySide6.QtCore import QObject, Qt, QThread, QTimer, Signal, Slot
 from PySide6.QtGui import QAction, QFont, QTextOption
-from PySide6.QtWidgets import QMessageBox
+from PySide6.QtWidgets import QApplication, QMessageBox, QProgressDialog
 
 from . import config as cfg
-from . import dialog, project_functions, version, view_df
+from . import dialog, project_functions, project_view, version, view_df
 
 
 def add_plugins_to_menu(self):
@@ -115,6 +118,111 @@ def get_plugin_version(plugin_path: str) -> str | None:
     return plugin_version
 
 
+# metadata of Python plugins by plugin path: (modification time, metadata)
+_plugin_metadata_cache: dict[str, tuple[float, dict]] = {}
+
+PLUGIN_METADATA_ATTRIBUTES = {
+    "__plugin_name__": "name",
+    "__version__": "version",
+    "__version_date__": "version_date",
+    "__require_boris_version__": "require_boris_version",
+    "__author__": "author",
+    "__description__": "description",
+    "__run_in_thread__": "run_in_thread",
+}
+
+# top-level packages of the GUI toolkits: a plugin importing them runs in the GUI thread
+PLUGIN_GUI_PACKAGES = ("PySide6", "PySide2", "PyQt6", "PyQt5", "qtpy", "tkinter")
+
+
+def parse_plugin_metadata(source: str) -> dict:
+    """
+    read the metadata of a Python plugin from its source code without executing it
+
+    Args:
+        source (str): source code of the plugin
+
+    Returns:
+        dict: name, version, version_date, require_boris_version, author, description (None if not found)
+              has_run (bool): True if a run function is defined
+              run_parameters (dict): parameter name: annotation (as string) of the run function
+              uses_gui (bool): True if the plugin imports a GUI toolkit (see PLUGIN_GUI_PACKAGES)
+              run_in_thread (bool): value of __run_in_thread__ if declared, otherwise True if the plugin does not use the GUI
+    """
+    metadata: dict = {key: None for key in PLUGIN_METADATA_ATTRIBUTES.values()}
+    metadata["has_run"] = False
+    metadata["run_parameters"] = {}
+
+    tree = ast.parse(source)
+    for node in tree.body:
+        if isinstance(node, (ast.Assign, ast.AnnAssign)):
+            targets = node.targets if isinstance(node, ast.Assign) else [node.target]
+            for target in targets:
+                if not isinstance(target, ast.Name):
+                    continue
+                if target.id in PLUGIN_METADATA_ATTRIBUTES and node.value is not None:
+                    try:
+                        metadata[PLUGIN_METADATA_ATTRIBUTES[target.id]] = ast.literal_eval(node.value)
+                    except ValueError:
+                        # value computed at run time
+                        pass
+                if target.id == "run":
+                    metadata["has_run"] = True
+        elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)) and node.name == "run":
+            metadata["has_run"] = True
+            args = node.args
+            metadata["run_parameters"] = {
+                arg.arg: ast.unparse(arg.annotation) if arg.annotation is not None else None
+                for arg in args.posonlyargs + args.args + args.kwonlyargs
+            }
+        elif isinstance(node, ast.ImportFrom) and any((alias.asname or alias.name) == "run" for alias in node.names):
+            metadata["has_run"] = True
+
+    # imports of the GUI toolkits anywhere in the plugin (also in functions)
+    imported_modules: list = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            imported_modules.extend(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            imported_modules.append(node.module)
+    metadata["uses_gui"] = any(module.split(".")[0] in PLUGIN_GUI_PACKAGES for module in imported_modules)
+    if metadata["run_in_thread"] is None:
+        metadata["run_in_thread"] = not metadata["uses_gui"]
+    else:
+        metadata["run_in_thread"] = bool(metadata["run_in_thread"])
+
+    return metadata
+
+
+def plugin_metadata(plugin_path: str | Path) -> dict | None:
+    """
+    metadata of a Python plugin (see parse_plugin_metadata).
+    The metadata are cached by plugin path and modification time.
+
+    Returns:
+        dict: metadata or None if the plugin cannot be read or parsed
+    """
+    plugin_path = str(plugin_path)
+    try:
+        mtime = Path(plugin_path).stat().st_mtime
+    except OSError as exc:
+        logging.warning(f"Unable to read plugin {plugin_path}: {exc}")
+        return None
+
+    cached = _plugin_metadata_cache.get(plugin_path)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+
+    try:
+        metadata = parse_plugin_metadata(Path(plugin_path).read_text(encoding="utf-8"))
+    except (OSError, SyntaxError, UnicodeDecodeError, ValueError) as exc:
+        logging.warning(f"Unable to parse plugin {plugin_path}: {exc}")
+        return None
+
+    _plugin_metadata_cache[plugin_path] = (mtime, metadata)
+    return metadata
+
+
 def version_parts(version_str: str) -> tuple[int, ...]:
     """
     Return the numeric parts of a version string.
@@ -583,22 +691,12 @@ def load_plugins(self):
         for file_ in plugin_files:
             logging.debug(f"Loading {source} plugin: {Path(file_).stem}")
 
-            # test module
-            module_name = Path(file_).stem
-            spec = importlib.util.spec_from_file_location(module_name, file_)
-            plugin_module = importlib.util.module_from_spec(spec)
-            spec.loader.exec_module(plugin_module)
-            attributes_list = dir(plugin_module)
-
-            if "__plugin_name__" in attributes_list:
-                plugin_name = plugin_module.__plugin_name__
-            else:
-                continue
-
-            if "run" not in attributes_list:
+            # the module is not executed: it will be loaded when the plugin is run
+            metadata = plugin_metadata(file_)
+            if metadata is None or not metadata["has_run"]:
                 continue
+            plugin_name = metadata["name"]
 
-            # plugin_name = get_plugin_name(file_)
             if plugin_name is not None and plugin_name not in self.config_param.get(cfg.EXCLUDED_PLUGINS, set()):
                 # check if plugin with same name already loaded
                 if plugin_name in self.config_param[cfg.ANALYSIS_PLUGINS]:
@@ -738,9 +836,274 @@ def annotation_includes_type(annotation, expected_type: type) -> bool:
     return any(annotation_includes_type(arg, expected_type) for arg in get_args(annotation) if arg is not type(None))
 
 
+class PluginCancelled(Exception):
+    """
+    raised by the progress callback of a plugin when the run was cancelled
+    """
+
+
+# status of a plugin run (a plugin can return None as results)
+PLUGIN_COMPLETED = "completed"
+PLUGIN_CANCELLED = "cancelled"
+PLUGIN_ERROR = "error"
+
+
+class PluginWorker(QObject):
+    """
+    run the run function of a Python plugin in a separated thread (plugins without GUI, see parse_plugin_metadata)
+    """
+
+    progress = Signal(int, str)  # percentage (-1 if unknown), message
+    error = Signal(str)
+    finished = Signal(str, object)  # status of the run (PLUGIN_COMPLETED, PLUGIN_CANCELLED or PLUGIN_ERROR), plugin results
+
+    def __init__(self, run_function, plugin_kwargs: dict, parent=None):
+        super().__init__(parent)
+        self.run_function = run_function
+        self.plugin_kwargs = plugin_kwargs
+        self.cancelled = threading.Event()
+
+    def report_progress(self, value: float | None = None, message: str = "") -> None:
+        """
+        progress callback passed to the plugins declaring a progress argument
+
+        Args:
+            value (float): percentage of progress (None if unknown)
+            message (str): message to display
+
+        Raises:
+            PluginCancelled: if the run was cancelled by the user or exceeded the time limit
+        """
+        if self.cancelled.is_set():
+            raise PluginCancelled()
+        self.progress.emit(-1 if value is None else int(value), str(message))
+
+    def cancel(self) -> None:
+        """
+        ask the plugin to stop (at the next call of the progress callback)
+        """
+        self.cancelled.set()
+
+    def run(self):
+        """
+        run the plugin
+        """
+        results = None
+        try:
+            results = self.run_function(**self.plugin_kwargs)
+            status = PLUGIN_COMPLETED
+        except PluginCancelled:
+            status = PLUGIN_CANCELLED
+        except Exception:
+            status = PLUGIN_ERROR
+            self.error.emit(traceback.format_exc())
+        if self.cancelled.is_set():
+            status, results = PLUGIN_CANCELLED, None
+        self.finished.emit(status, results)
+
+
+class PluginRun(QObject):
+    """
+    run a Python plugin in a worker thread with a progress dialog (with cancel button) and a time limit.
+    The results are displayed when the plugin is finished.
+
+    A thread cannot be killed: on cancel or when the time limit is exceeded the plugin is asked to stop
+    at the next call of its progress callback and its results are discarded.
+    A plugin that does not call the progress callback runs until its end.
+    """
+
+    def __init__(
+        self,
+        main_window,
+        plugin_name: str,
+        plugin_version: str,
+        plugin_version_date: str,
+        run_function,
+        plugin_kwargs: dict,
+        progress_required: bool = False,
+        time_limit: int = cfg.PLUGIN_TIME_LIMIT_DEFAULT_VALUE,
+    ):
+        super().__init__(main_window)
+        self.main_window = main_window
+        self.plugin_name = plugin_name
+        self.plugin_version = plugin_version
+        self.plugin_version_date = plugin_version_date
+        self.time_limit = time_limit
+        self.progress_required = progress_required
+        # results will not be displayed (cancelled or time limit exceeded)
+        self.discarded: bool = False
+        self.done: bool = False
+
+        self.thread = QThread(self)
+        self.worker = PluginWorker(run_function, plugin_kwargs)
+        if progress_required:
+            self.worker.plugin_kwargs["progress"] = self.worker.report_progress
+        self.worker.moveToThread(self.thread)
+
+        self.thread.started.connect(self.worker.run)
+        self.worker.progress.connect(self.on_progress)
+        self.worker.error.connect(self.on_error)
+        self.worker.finished.connect(self.on_finished)
+        self.worker.finished.connect(self.thread.quit)
+        self.thread.finished.connect(self.on_thread_finished)
+
+        self.progress_dialog = QProgressDialog(
+            f"Running the <b>{plugin_name}</b> plugin"
+            + ("" if progress_required else "<br>The plugin cannot be interrupted: Cancel discards its results"),
+            "Cancel",
+            0,
+            0,
+            main_window,
+        )
+        self.progress_dialog.setWindowTitle(cfg.programName)
+        self.progress_dialog.setWindowModality(Qt.WindowModality.NonModal)
+        self.progress_dialog.setMinimumDuration(500)
+        self.progress_dialog.setAutoClose(False)
+        self.progress_dialog.setAutoReset(False)
+        self.progress_dialog.canceled.connect(self.cancel)
+
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self.on_timeout)
+
+    def start(self) -> None:
+        """
+        start the plugin
+        """
+        self.thread.start()
+        if self.time_limit:
+            self.timer.start(self.time_limit * 1000)
+
+    def is_running(self) -> bool:
+        return self.thread.isRunning()
+
+    def cancel(self) -> None:
+        """
+        cancel the plugin run: the results will not be displayed
+        """
+        # closing the progress dialog emits the canceled signal
+        if self.done:
+            return
+        self.discarded = True
+        self.worker.cancel()
+        self.timer.stop()
+        self.progress_dialog.close()
+
+    @Slot()
+    def on_timeout(self) -> None:
+        self.cancel()
+        QMessageBox.warning(
+            self.main_window,
+            cfg.programName,
+            (
+                f"The plugin '{self.plugin_name}' did not finish after {self.time_limit} seconds.\n"
+                "The results will not be displayed.\n\n"
+                + (
+                    "The plugin was asked to stop."
+                    if self.progress_required
+                    else "The plugin cannot be interrupted and continues to run in background until its end."
+                )
+            ),
+        )
+
+    @Slot(int, str)
+    def on_progress(self, value: int, message: str) -> None:
+        if self.discarded:
+            return
+        if value >= 0:
+            self.progress_dialog.setMaximum(100)
+            self.progress_dialog.setValue(min(value, 100))
+        if message:
+            self.progress_dialog.setLabelText(f"<b>{self.plugin_name}</b><br>{message}")
+
+    @Slot(str)
+    def on_error(self, message: str) -> None:
+        logging.critical(f"Error in the plugin {self.plugin_name}: {message}")
+        if self.discarded:
+            return
+        QMessageBox.critical(self.main_window, cfg.programName, f"Error in the plugin '{self.plugin_name}':\n\n{message}")
+
+    @Slot(str, object)
+    def on_finished(self, status: str, plugin_results) -> None:
+        self.done = True
+        self.timer.stop()
+        self.progress_dialog.close()
+        if self.discarded or status != PLUGIN_COMPLETED:
+            return
+        show_plugin_results(self.main_window, self.plugin_name, self.plugin_version, self.plugin_version_date, plugin_results)
+
+    @Slot()
+    def on_thread_finished(self) -> None:
+        if self in self.main_window.running_plugins:
+            self.main_window.running_plugins.remove(self)
+        self.worker.deleteLater()
+        self.deleteLater()
+
+
+def run_plugin_in_gui_thread(self, plugin_name: str, run_function, plugin_kwargs: dict, progress_required: bool = False):
+    """
+    run the run function of a Python plugin in the GUI thread.
+    If the plugin declares a progress argument a progress dialog is displayed and
+    the plugin is stopped at the next call of the progress callback when the user clicks Cancel.
+
+    Args:
+        plugin_name (str): name of the plugin
+        run_function: run function of the plugin
+        plugin_kwargs (dict): arguments of the run function
+        progress_required (bool): True if the run function has a progress argument
+
+    Returns:
+        str: status of the run (PLUGIN_COMPLETED, PLUGIN_CANCELLED or PLUGIN_ERROR)
+        results of the plugin (None if the run is not completed)
+    """
+    progress_dialog = None
+    if progress_required:
+        progress_dialog = QProgressDialog(f"Running the <b>{plugin_name}</b> plugin", "Cancel", 0, 0, self)
+        progress_dialog.setWindowTitle(cfg.programName)
+        progress_dialog.setWindowModality(Qt.WindowModality.WindowModal)
+        progress_dialog.setMinimumDuration(500)
+        progress_dialog.setAutoClose(False)
+        progress_dialog.setAutoReset(False)
+
+        def report_progress(value: float | None = None, message: str = "") -> None:
+            if value is not None:
+                progress_dialog.setMaximum(100)
+                progress_dialog.setValue(min(int(value), 100))
+            if message:
+                progress_dialog.setLabelText(f"<b>{plugin_name}</b><br>{message}")
+            QApplication.processEvents()
+            if progress_dialog.wasCanceled():
+                raise PluginCancelled()
+
+        plugin_kwargs = dict(plugin_kwargs, progress=report_progress)
+
+    try:
+        return PLUGIN_COMPLETED, run_function(**plugin_kwargs)
+    except PluginCancelled:
+        return PLUGIN_CANCELLED, None
+    except Exception:
+        logging.critical(f"Error in the plugin {plugin_name}: {traceback.format_exc()}")
+        QMessageBox.critical(self, cfg.programName, f"Error in the plugin '{plugin_name}':\n\n{traceback.format_exc()}")
+        return PLUGIN_ERROR, None
+    finally:
+        if progress_dialog is not None:
+            progress_dialog.close()
+
+
 def run_plugin(self, plugin_name):
     """
     run plugin
+
+    The run function of a Python plugin receives the arguments it declares:
+        df (pd.DataFrame): events of the selected observations filtered with the selected parameters
+        project (dict): read-only copy-on-write view of the project restricted to the selected observations
+                        (see project_view.ProjectView). The view is a Mapping, not a dict:
+                        use project.to_python() to obtain a plain dictionary (isinstance checks, JSON serialization)
+        parameters (dict): parameters selected by the user
+        progress: callback progress(value=None, message="") to report the progress of the plugin
+
+    A plugin importing a GUI toolkit (see PLUGIN_GUI_PACKAGES) runs in the GUI thread,
+    the other plugins run in a worker thread. The plugin can declare __run_in_thread__ = True or False instead.
     """
 
     if not self.project:
@@ -774,29 +1137,35 @@ def run_plugin(self, plugin_name):
 
     # Python plugin
     if Path(plugin_path).suffix == ".py":
-        # load plugin as module
-        module_name = Path(plugin_path).stem
-
-        spec = importlib.util.spec_from_file_location(module_name, plugin_path)
-        plugin_module = importlib.util.module_from_spec(spec)
-
-        logging.debug(f"{plugin_module=}")
-
-        spec.loader.exec_module(plugin_module)
-
-        required_boris_version = getattr(plugin_module, "__require_boris_version__", None)
+        # check the required BORIS version before loading the plugin
+        metadata = plugin_metadata(plugin_path) or {}
+        required_boris_version = metadata.get("require_boris_version")
         if required_boris_version and not boris_version_satisfies_requirement(version.__version__, required_boris_version):
-            plugin_display_name = getattr(plugin_module, "__plugin_name__", plugin_name)
             QMessageBox.critical(
                 self,
                 cfg.programName,
                 (
-                    f"The plugin '{plugin_display_name}' requires BORIS {required_boris_version}.\n\n"
+                    f"The plugin '{metadata.get('name') or plugin_name}' requires BORIS {required_boris_version}.\n\n"
                     f"Current BORIS version: {version.__version__}."
                 ),
             )
             return
 
+        # load plugin as module (only when the plugin is run)
+        module_name = Path(plugin_path).stem
+
+        spec = importlib.util.spec_from_file_location(module_name, plugin_path)
+        plugin_module = importlib.util.module_from_spec(spec)
+
+        logging.debug(f"{plugin_module=}")
+
+        try:
+            spec.loader.exec_module(plugin_module)
+        except Exception:
+            logging.critical(f"Error loading the plugin {plugin_path}: {traceback.format_exc()}")
+            QMessageBox.critical(self, cfg.programName, f"The plugin {plugin_name} cannot be loaded:\n\n{traceback.format_exc()}")
+            return
+
     # select observations to analyze
     selected_observations, parameters = self.obs_param()
     if not selected_observations:
@@ -815,6 +1184,7 @@ def run_plugin(self, plugin_name):
         dataframe_required: bool = False
         project_required: bool = False
         parameters_required: bool = False
+        progress_required: bool = "progress" in inspect.signature(plugin_module.run).parameters
         # for param in inspect.signature(plugin_module.run).parameters.values():
         for name, annotation in inspect.getfullargspec(plugin_module.run).annotations.items():
             if name == "df" and annotation_includes_type(annotation, pd.DataFrame):
@@ -844,19 +1214,34 @@ def run_plugin(self, plugin_name):
             plugin_kwargs["df"] = filtered_df
 
         if project_required:
-            pj_copy = copy.deepcopy(self.pj)
-
-            # remove unselected observations from project
-            for obs_id in self.pj[cfg.OBSERVATIONS]:
-                if obs_id not in selected_observations:
-                    del pj_copy[cfg.OBSERVATIONS][obs_id]
-
-            plugin_kwargs["project"] = pj_copy
+            # copy-on-write view of the project restricted to the selected observations
+            # (the events lists are snapshotted, an observation is copied only if the plugin modifies it)
+            plugin_kwargs["project"] = project_view.ProjectView(self.pj, selected_observations)
 
         if parameters_required:
             plugin_kwargs["parameters"] = parameters
 
-        plugin_results = plugin_module.run(**plugin_kwargs)
+        if metadata.get("run_in_thread"):
+            # plugin that does not use the GUI (or declaring __run_in_thread__ = True): run in a worker thread,
+            # the results are displayed when the plugin is finished
+            plugin_run = PluginRun(
+                self,
+                plugin_name,
+                plugin_version,
+                plugin_version_date,
+                plugin_module.run,
+                plugin_kwargs,
+                progress_required=progress_required,
+                time_limit=self.config_param.get(cfg.PLUGIN_TIME_LIMIT, cfg.PLUGIN_TIME_LIMIT_DEFAULT_VALUE),
+            )
+            self.running_plugins.append(plugin_run)
+            plugin_run.start()
+            return
+
+        # run the plugin in the GUI thread (the plugin can open dialogs)
+        status, plugin_results = run_plugin_in_gui_thread(self, plugin_name, plugin_module.run, plugin_kwargs, progress_required)
+        if status != PLUGIN_COMPLETED:
+            return
 
     # R plugin
     if Path(plugin_path).suffix in (".R", ".r"):
@@ -925,6 +1310,19 @@ def run_plugin(self, plugin_name):
         with localconverter(robjects.default_converter + pandas2ri.converter):
             plugin_results = robjects.conversion.rpy2py(r_result)
 
+    show_plugin_results(self, plugin_name, plugin_version, plugin_version_date, plugin_results)
+
+
+def show_plugin_results(self, plugin_name: str, plugin_version, plugin_version_date, plugin_results) -> None:
+    """
+    display the results of a plugin (str or dataframe or tuple of them)
+    """
+
+    if plugin_results is None:
+        # the plugin did not return results (e.g. it wrote a file)
+        QMessageBox.information(self, cfg.programName, f"The plugin '{plugin_name}' is finished. It did not return results.")
+        return
+
     # test if plugin_results is a tuple: if not transform it to tuple
     if not isinstance(plugin_results, tuple):
         plugin_results = tuple([plugin_results])
@@ -30,7 +30,7 @@ from PySide6.QtGui import QFont
 from PySide6.QtWidgets import QApplication, QDialog, QFileDialog, QListWidgetItem, QMessageBox
 
 from . import config as cfg
-from . import config_file, dialog, gui_utilities, menu_options, plugins
+from . import config_file, dialog, event_columns, gui_utilities, menu_options, plugins
 from .preferences_ui import Ui_prefDialog
 
 PLUGIN_PATH_ROLE = 100
@@ -383,31 +383,25 @@ def preferences(self):
 
         # Python plugins
         if Path(plugin_path).suffix == ".py":
-            import importlib
-
-            module_name = Path(plugin_path).stem
-            spec = importlib.util.spec_from_file_location(module_name, plugin_path)
-            plugin_module = importlib.util.module_from_spec(spec)
-            spec.loader.exec_module(plugin_module)
-            attributes_list = dir(plugin_module)
+            # metadata are read without executing the plugin
+            metadata = plugins.plugin_metadata(plugin_path) or {}
 
             out: list = []
-            out.append((plugin_module.__plugin_name__ + "\n") if "__plugin_name__" in attributes_list else "No plugin name provided")
-            out.append(plugin_module.__author__ if "__author__" in attributes_list else "No author provided")
+            out.append((metadata["name"] + "\n") if metadata.get("name") else "No plugin name provided")
+            out.append(metadata["author"] if metadata.get("author") else "No author provided")
             version_str: str = ""
-            if "__version__" in attributes_list:
-                version_str += str(plugin_module.__version__)
-            if "__version_date__" in attributes_list:
+            if metadata.get("version"):
+                version_str += str(metadata["version"])
+            if metadata.get("version_date"):
                 version_str += " " if version_str else ""
-                version_str += f"({plugin_module.__version_date__})"
+                version_str += f"({metadata['version_date']})"
 
             out.append(f"Version: {version_str}\n" if version_str else "No version provided")
 
-            # out.append(plugin_module.run.__doc__.strip())
             # description
-            if "__description__" in attributes_list:
+            if metadata.get("description"):
                 out.append("Description:\n")
-            out.append(plugin_module.__description__ if "__description__" in attributes_list else "No description provided")
+            out.append(metadata["description"] if metadata.get("description") else "No description provided")
 
             preferencesWindow.pte_plugin_description.setPlainText("\n".join(out))
 
@@ -482,6 +476,10 @@ def preferences(self):
         preferencesWindow.cb_hwdec.setCurrentIndex(cfg.MPV_HWDEC_OPTIONS.index(cfg.MPV_HWDEC_DEFAULT_VALUE))
     # check integrity
     preferencesWindow.cb_check_integrity_at_opening.setChecked(self.config_param.get(cfg.CHECK_PROJECT_INTEGRITY, True))
+    # columnar events store
+    preferencesWindow.cb_columnar_event_store.setChecked(
+        self.config_param.get(cfg.COLUMNAR_EVENT_STORE, cfg.COLUMNAR_EVENT_STORE_DEFAULT_VALUE)
+    )
 
     # Official BORIS plugins
     preferencesWindow.lv_all_plugins.itemClicked.connect(show_plugin_info)
@@ -527,6 +525,9 @@ def preferences(self):
             item.setData(PLUGIN_NAME_ROLE, plugin_name)
             preferencesWindow.lw_personal_plugins.addItem(item)
 
+    # time limit for plugins running in a worker thread
+    preferencesWindow.sb_plugin_time_limit.setValue(self.config_param.get(cfg.PLUGIN_TIME_LIMIT, cfg.PLUGIN_TIME_LIMIT_DEFAULT_VALUE))
+
     # PROJET FILE INDENTATION
     preferencesWindow.combo_project_file_indentation.clear()
     preferencesWindow.combo_project_file_indentation.addItems(cfg.PROJECT_FILE_INDENTATION_COMBO_OPTIONS)
@@ -590,6 +591,7 @@ def preferences(self):
 
     # interface
     preferencesWindow.sb_toolbar_icon_size.setValue(self.config_param.get(cfg.TOOLBAR_ICON_SIZE, cfg.DEFAULT_TOOLBAR_ICON_SIZE_VALUE))
+    preferencesWindow.sb_ui_refresh_rate.setValue(self.config_param.get(cfg.UI_REFRESH_RATE, cfg.UI_REFRESH_RATE_DEFAULT_VALUE))
 
     gui_utilities.restore_geometry(preferencesWindow, "preferences", (700, 500))
 
@@ -665,6 +667,10 @@ def preferences(self):
             # check project integrity
             self.config_param[cfg.CHECK_PROJECT_INTEGRITY] = preferencesWindow.cb_check_integrity_at_opening.isChecked()
 
+            # columnar events store
+            self.config_param[cfg.COLUMNAR_EVENT_STORE] = preferencesWindow.cb_columnar_event_store.isChecked()
+            event_columns.enable_columnar_store(self.config_param[cfg.COLUMNAR_EVENT_STORE])
+
             # update official BORIS analysis plugins
             self.config_param[cfg.OFFICIAL_PLUGINS_DIR] = preferencesWindow.le_official_plugins_dir.text()
             self.config_param[cfg.OFFICIAL_PLUGINS_SOURCE] = preferencesWindow.installed_official_plugins_source
@@ -691,6 +697,9 @@ def preferences(self):
             plugins.load_plugins(self)
             plugins.add_plugins_to_menu(self)
 
+            # time limit for plugins running in a worker thread
+            self.config_param[cfg.PLUGIN_TIME_LIMIT] = preferencesWindow.sb_plugin_time_limit.value()
+
             # project file indentation
             self.config_param[cfg.PROJECT_FILE_INDENTATION] = cfg.PROJECT_FILE_INDENTATION_OPTIONS[
                 preferencesWindow.combo_project_file_indentation.currentIndex()
@@ -725,6 +734,8 @@ def preferences(self):
 
             # interface
             self.config_param[cfg.TOOLBAR_ICON_SIZE] = preferencesWindow.sb_toolbar_icon_size.value()
+            self.config_param[cfg.UI_REFRESH_RATE] = preferencesWindow.sb_ui_refresh_rate.value()
+            self.refresh_scheduler.set_refresh_rate(self.config_param[cfg.UI_REFRESH_RATE])
 
             menu_options.update_menu(self)
 
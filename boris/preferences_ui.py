@@ -129,6 +129,11 @@ class Ui_prefDialog(object):
 
         self.verticalLayout_5.addWidget(self.cb_check_integrity_at_opening)
 
+        self.cb_columnar_event_store = QCheckBox(self.tab_project)
+        self.cb_columnar_event_store.setObjectName(u"cb_columnar_event_store")
+
+        self.verticalLayout_5.addWidget(self.cb_columnar_event_store)
+
         self.verticalSpacer_2 = QSpacerItem(20, 40, QSizePolicy.Policy.Minimum, QSizePolicy.Policy.Expanding)
 
         self.verticalLayout_5.addItem(self.verticalSpacer_2)
@@ -361,6 +366,27 @@ class Ui_prefDialog(object):
 
         self.verticalLayout_11.addWidget(self.lw_personal_plugins)
 
+        self.horizontalLayout_plugin_time_limit = QHBoxLayout()
+        self.horizontalLayout_plugin_time_limit.setObjectName(u"horizontalLayout_plugin_time_limit")
+        self.lb_plugin_time_limit = QLabel(self.layoutWidget)
+        self.lb_plugin_time_limit.setObjectName(u"lb_plugin_time_limit")
+
+        self.horizontalLayout_plugin_time_limit.addWidget(self.lb_plugin_time_limit)
+
+        self.sb_plugin_time_limit = QSpinBox(self.layoutWidget)
+        self.sb_plugin_time_limit.setObjectName(u"sb_plugin_time_limit")
+        self.sb_plugin_time_limit.setMaximum(86400)
+        self.sb_plugin_time_limit.setValue(3600)
+
+        self.horizontalLayout_plugin_time_limit.addWidget(self.sb_plugin_time_limit)
+
+        self.horizontalSpacer_plugin_time_limit = QSpacerItem(40, 20, QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Minimum)
+
+        self.horizontalLayout_plugin_time_limit.addItem(self.horizontalSpacer_plugin_time_limit)
+
+
+        self.verticalLayout_11.addLayout(self.horizontalLayout_plugin_time_limit)
+
         self.splitter_2.addWidget(self.layoutWidget)
         self.splitter = QSplitter(self.splitter_2)
         self.splitter.setObjectName(u"splitter")
@@ -727,6 +753,18 @@ class Ui_prefDialog(object):
 
         self.formLayout.setWidget(0, QFormLayout.ItemRole.FieldRole, self.sb_toolbar_icon_size)
 
+        self.lb_ui_refresh_rate = QLabel(self.tab_interface)
+        self.lb_ui_refresh_rate.setObjectName(u"lb_ui_refresh_rate")
+
+        self.formLayout.setWidget(1, QFormLayout.ItemRole.LabelRole, self.lb_ui_refresh_rate)
+
+        self.sb_ui_refresh_rate = QSpinBox(self.tab_interface)
+        self.sb_ui_refresh_rate.setObjectName(u"sb_ui_refresh_rate")
+        self.sb_ui_refresh_rate.setMaximum(120)
+        self.sb_ui_refresh_rate.setValue(25)
+
+        self.formLayout.setWidget(1, QFormLayout.ItemRole.FieldRole, self.sb_ui_refresh_rate)
+
 
         self.verticalLayout_7.addLayout(self.formLayout)
 
@@ -787,6 +825,10 @@ class Ui_prefDialog(object):
         self.lb_hwdec.setText(QCoreApplication.translate("prefDialog", u"MPV player hardware video decoding", None))
         self.lb_project_file_indent.setText(QCoreApplication.translate("prefDialog", u"Project file indentation type", None))
         self.cb_check_integrity_at_opening.setText(QCoreApplication.translate("prefDialog", u"Check project integrity when opening and saving project (recommended)", None))
+#if QT_CONFIG(tooltip)
+        self.cb_columnar_event_store.setToolTip(QCoreApplication.translate("prefDialog", u"The analyses read the events from a columnar copy (NumPy arrays) of the events of the observations", None))
+#endif // QT_CONFIG(tooltip)
+        self.cb_columnar_event_store.setText(QCoreApplication.translate("prefDialog", u"Use a columnar store of the events for the analyses", None))
         self.tabWidget.setTabText(self.tabWidget.indexOf(self.tab_project), QCoreApplication.translate("prefDialog", u"Project", None))
         self.label_4.setText(QCoreApplication.translate("prefDialog", u"Fast forward/backward value (seconds)", None))
         self.cb_adapt_fast_jump.setText(QCoreApplication.translate("prefDialog", u"Adapt the fast forward/backward jump to playback speed", None))
@@ -810,6 +852,12 @@ class Ui_prefDialog(object):
         self.pb_browse_plugins_dir.setText(QCoreApplication.translate("prefDialog", u"Browse", None))
         self.pb_clear_plugins_dir.setToolTip(QCoreApplication.translate("prefDialog", u"Clear the personal plugins path without deleting files", None))
         self.pb_clear_plugins_dir.setText(QCoreApplication.translate("prefDialog", u"Clear", None))
+#if QT_CONFIG(tooltip)
+        self.lb_plugin_time_limit.setToolTip(QCoreApplication.translate("prefDialog", u"The results of a plugin running in background are discarded after this time (0 for no limit).\n"
+"A running plugin cannot be killed: it is only asked to stop.", None))
+#endif // QT_CONFIG(tooltip)
+        self.lb_plugin_time_limit.setText(QCoreApplication.translate("prefDialog", u"Time limit for plugins running in background (s)", None))
+        self.sb_plugin_time_limit.setSpecialValueText(QCoreApplication.translate("prefDialog", u"No limit", None))
         self.label_14.setText(QCoreApplication.translate("prefDialog", u"Plugin info", None))
         self.label_23.setText(QCoreApplication.translate("prefDialog", u"Plugin code", None))
         self.tabWidget.setTabText(self.tabWidget.indexOf(self.tab_analysis_plugins), QCoreApplication.translate("prefDialog", u"Analysis plugins", None))
@@ -845,6 +893,11 @@ class Ui_prefDialog(object):
         self.pb_reset_category_colors.setText(QCoreApplication.translate("prefDialog", u"Reset colors to default", None))
         self.tabWidget.setTabText(self.tabWidget.indexOf(self.tab_colors), QCoreApplication.translate("prefDialog", u"Plot colors", None))
         self.label_9.setText(QCoreApplication.translate("prefDialog", u"Toolbar icons size", None))
+#if QT_CONFIG(tooltip)
+        self.lb_ui_refresh_rate.setToolTip(QCoreApplication.translate("prefDialog", u"Maximum number of refreshes by second of the observation status during media playback (0 for no limit)", None))
+#endif // QT_CONFIG(tooltip)
+        self.lb_ui_refresh_rate.setText(QCoreApplication.translate("prefDialog", u"Refresh rate during playback (Hz)", None))
+        self.sb_ui_refresh_rate.setSpecialValueText(QCoreApplication.translate("prefDialog", u"No limit", None))
         self.tabWidget.setTabText(self.tabWidget.indexOf(self.tab_interface), QCoreApplication.translate("prefDialog", u"Interface", None))
         self.pb_refresh.setText(QCoreApplication.translate("prefDialog", u"Refresh", None))
         self.pbCancel.setText(QCoreApplication.translate("prefDialog", u"Cancel", None))
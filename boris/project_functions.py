@@ -20,7 +20,6 @@ Copyright 2012-2026 Olivier Friard
 """
 
 import gzip
-import json
 import logging
 import sys
 from decimal import Decimal as dec
@@ -35,10 +34,19 @@ from PySide6.QtCore import Qt
 from PySide6.QtWidgets import QAbstractItemView, QMessageBox, QTableWidgetItem
 
 from . import config as cfg
-from . import db_functions, dialog, observation_operations, version
+from . import db_functions, dialog, event_columns, observation_operations, project_loader, version
 from . import portion as I
 from . import utilities as util
 
+# cache of the observations data for project2dataframe
+# key: observation id value: (project dict, observation dict, events list, number of events, data)
+_dataframe_cache: dict = {}
+# events with status (START/STOP/POINT) by observation (see observation_events_start_stop)
+_events_status_cache: dict = {}
+# result of check_state_events_obs by observation (see observations_state_events_check)
+_state_events_check_cache: dict = {}
+_dataframe_cache_enabled: bool = False
+
 
 def check_observation_exhaustivity(
     events: List[list],
@@ -58,10 +66,11 @@ def check_observation_exhaustivity(
         returns duration of an interval or a set of intervals
         """
         if interval.empty:
-            return dec(0)
+            return 0
         else:
-            return dec(sum([x.upper - x.lower for x in interval]))
+            return sum([x.upper - x.lower for x in interval])
 
+    # the intervals are built with times in integer milliseconds
     events_interval: dict = {}
     mem_events_interval: dict = {}
 
@@ -77,7 +86,7 @@ def check_observation_exhaustivity(
         # state event
         if event[cfg.EVENT_BEHAVIOR_FIELD_IDX] in state_events_list:
             mem_events_interval[event[cfg.EVENT_SUBJECT_FIELD_IDX]][event[cfg.EVENT_BEHAVIOR_FIELD_IDX]].append(
-                event[cfg.EVENT_TIME_FIELD_IDX]
+                util.time_to_ms(event[cfg.EVENT_TIME_FIELD_IDX])
             )
             if len(mem_events_interval[event[cfg.EVENT_SUBJECT_FIELD_IDX]][event[cfg.EVENT_BEHAVIOR_FIELD_IDX]]) == 2:
                 events_interval[event[cfg.EVENT_SUBJECT_FIELD_IDX]][event[cfg.EVENT_BEHAVIOR_FIELD_IDX]] |= I.closedopen(
@@ -88,15 +97,15 @@ def check_observation_exhaustivity(
         # point event
         else:
             events_interval[event[cfg.EVENT_SUBJECT_FIELD_IDX]][event[cfg.EVENT_BEHAVIOR_FIELD_IDX]] |= I.singleton(
-                event[cfg.EVENT_TIME_FIELD_IDX]
+                util.time_to_ms(event[cfg.EVENT_TIME_FIELD_IDX])
             )
 
     if events:
         # coding duration
         event_timestamps = [event[cfg.EVENT_TIME_FIELD_IDX] for event in events]
-        obs_theo_dur = max(event_timestamps) - min(event_timestamps)
+        obs_theo_dur = util.time_to_ms(max(event_timestamps) - min(event_timestamps))
     else:
-        obs_theo_dur = dec("0")
+        obs_theo_dur = 0
 
     total_duration = 0
     for subject in events_interval:
@@ -112,7 +121,7 @@ def check_observation_exhaustivity(
         total_duration += obs_real_dur
 
     if len(events_interval) and obs_theo_dur:
-        exhausivity_percent = total_duration / (len(events_interval) * obs_theo_dur) * 100
+        exhausivity_percent = dec(total_duration) / (len(events_interval) * dec(obs_theo_dur)) * 100
     else:
         exhausivity_percent = 0
 
@@ -292,73 +301,95 @@ def check_state_events_obs(obsId: str, ethogram: dict, observation: dict, time_f
         tuple (bool, str): if OK True else False , message
     """
 
-    out: str = ""
-
     # check if behaviors are defined as "state event"
     event_types = {ethogram[idx]["type"] for idx in ethogram}
 
     if not event_types or event_types == {"Point event"}:
         return (True, "No behavior is defined as `State event`")
 
-    subjects = [event[cfg.EVENT_SUBJECT_FIELD_IDX] for event in observation[cfg.EVENTS]]
-    ethogram_behaviors = {ethogram[idx][cfg.BEHAVIOR_CODE] for idx in ethogram}
     state_behaviors = set(util.state_behavior_codes(ethogram))
 
-    for subject in sorted(set(subjects)):
-        behaviors = [
-            event[cfg.EVENT_BEHAVIOR_FIELD_IDX] for event in observation[cfg.EVENTS] if event[cfg.EVENT_SUBJECT_FIELD_IDX] == subject
-        ]
+    # time of the unpaired START by (subject, behavior, modifiers) in order of insertion
+    open_starts: dict = {}
+    for event in observation[cfg.EVENTS]:
+        if event[cfg.EVENT_BEHAVIOR_FIELD_IDX] not in state_behaviors:
+            continue
+        key = (event[cfg.EVENT_SUBJECT_FIELD_IDX], event[cfg.EVENT_BEHAVIOR_FIELD_IDX], event[cfg.EVENT_MODIFIER_FIELD_IDX])
+        if key in open_starts:
+            del open_starts[key]
+        else:
+            open_starts[key] = event[cfg.EVENT_TIME_FIELD_IDX]
 
-        for behavior in sorted(set(behaviors)):
-            if behavior not in ethogram_behaviors:
-                # return (False, "The behaviour <b>{}</b> is not defined in the ethogram.<br>".format(behavior))
-                continue
-            else:
-                if behavior not in state_behaviors:
-                    continue
+    out: str = ""
+    # sort by subject and behavior (the sort is stable: the modifiers stay in order of insertion)
+    for (subject, behavior, modifiers), time_ in sorted(open_starts.items(), key=lambda x: x[0][:2]):
+        out += (
+            f"The behavior <b>{behavior}</b> "
+            f"{('(modifier ' + modifiers + ') ') if modifiers else ''} is not PAIRED "
+            f'for subject "<b>{subject if subject else cfg.NO_FOCAL_SUBJECT}</b>" at '
+            f"<b>{time_ if time_format == cfg.S else util.seconds2time(time_)}</b><br>"
+        )
 
-                lst: list = []
-                memTime: dict = {}
-                for event in [
-                    event
-                    for event in observation[cfg.EVENTS]
-                    if event[cfg.EVENT_BEHAVIOR_FIELD_IDX] == behavior and event[cfg.EVENT_SUBJECT_FIELD_IDX] == subject
-                ]:
-                    behav_modif = [
-                        event[cfg.EVENT_BEHAVIOR_FIELD_IDX],
-                        event[cfg.EVENT_MODIFIER_FIELD_IDX],
-                    ]
+    return (False, out) if out else (True, "No problem detected")
 
-                    if behav_modif in lst:
-                        lst.remove(behav_modif)
-                        del memTime[str(behav_modif)]
-                    else:
-                        lst.append(behav_modif)
-                        memTime[str(behav_modif)] = event[cfg.EVENT_TIME_FIELD_IDX]
 
-                for event in lst:
-                    out += (
-                        f"The behavior <b>{behavior}</b> "
-                        f"{('(modifier ' + event[1] + ') ') if event[1] else ''} is not PAIRED "
-                        f'for subject "<b>{subject if subject else cfg.NO_FOCAL_SUBJECT}</b>" at '
-                        f"<b>{memTime[str(event)] if time_format == cfg.S else util.seconds2time(memTime[str(event)])}</b><br>"
-                    )
+def observations_state_events_check(pj: dict, observations_list: list) -> Dict[str, Tuple[bool, str]]:
+    """
+    check_state_events_obs for a list of observations.
+    The results are cached until the observation is modified (see invalidate_dataframe_cache)
 
-    return (False, out) if out else (True, "No problem detected")
+    Args:
+        pj (dict): BORIS project
+        observations_list (list): ids of observations
+
+    Returns:
+        dict: result of check_state_events_obs by observation id
+    """
+    ethogram_key = tuple((pj[cfg.ETHOGRAM][idx][cfg.BEHAVIOR_CODE], pj[cfg.ETHOGRAM][idx][cfg.TYPE]) for idx in pj[cfg.ETHOGRAM])
+
+    results: dict = {}
+    for obs_id in observations_list:
+        observation = pj[cfg.OBSERVATIONS][obs_id]
+        cached = _state_events_check_cache.get(obs_id) if _dataframe_cache_enabled else None
+        if (
+            cached is not None
+            and cached[0] is pj
+            and cached[1] is observation
+            and cached[2] is observation[cfg.EVENTS]
+            and cached[3] == len(observation[cfg.EVENTS])
+            and cached[4] == ethogram_key
+        ):
+            results[obs_id] = cached[5]
+            continue
+
+        results[obs_id] = check_state_events_obs(obs_id, pj[cfg.ETHOGRAM], observation)
+        if _dataframe_cache_enabled:
+            _state_events_check_cache[obs_id] = (
+                pj,
+                observation,
+                observation[cfg.EVENTS],
+                len(observation[cfg.EVENTS]),
+                ethogram_key,
+                results[obs_id],
+            )
+
+    return results
 
 
 def check_state_events(pj: dict, observations_list: list) -> tuple[bool, list]:
     """
     check if state events are paired in a list of observations
-    use check_state_events_obs function
+    use check_state_events_obs function (see observations_state_events_check)
     """
 
     logging.info("Check state events function")
 
+    checks = observations_state_events_check(pj, observations_list)
+
     out = ""
     not_paired_obs_list = []
     for obs_id in observations_list:
-        r, msg = check_state_events_obs(obs_id, pj[cfg.ETHOGRAM], pj[cfg.OBSERVATIONS][obs_id])
+        r, msg = checks[obs_id]
 
         if not r:
             out += f"Observation: <strong>{obs_id}</strong><br>{msg}<br>"
@@ -1264,6 +1295,7 @@ def observed_interval(observation: dict) -> tuple[dec, dec] | None:
 def events_start_stop(ethogram: dict, events: list, obs_type: str) -> List[tuple]:
     """
     returns events with status (START/STOP or POINT)
+    The status of a state event is given by the parity of the previous events with the same subject, behavior and modifiers
 
     Args:
         events (list): list of events
@@ -1272,31 +1304,20 @@ def events_start_stop(ethogram: dict, events: list, obs_type: str) -> List[tuple
         list: list of events with type (POINT or STATE)
     """
 
-    state_events_list = util.state_behavior_codes(ethogram)
+    state_events_list = set(util.state_behavior_codes(ethogram))
 
+    # number of previous occurrences of state events by (subject, behavior, modifiers)
+    occurrences: dict = {}
     events_flagged: list = []
-    for idx, event in enumerate(events):
+    for event in events:
         _, subject, code, modifier = event[: cfg.EVENT_MODIFIER_FIELD_IDX + 1]
 
         # check if code is state
         if code in state_events_list:
-            # how many code before with same subject?
-            if (
-                len(
-                    [
-                        x[cfg.EVENT_BEHAVIOR_FIELD_IDX]
-                        for idx1, x in enumerate(events)
-                        if x[cfg.EVENT_BEHAVIOR_FIELD_IDX] == code
-                        and idx1 < idx
-                        and x[cfg.EVENT_SUBJECT_FIELD_IDX] == subject
-                        and x[cfg.EVENT_MODIFIER_FIELD_IDX] == modifier
-                    ]
-                )
-                % 2
-            ):  # test if odd
-                flag = cfg.STOP
-            else:
-                flag = cfg.START
+            key = (subject, code, modifier)
+            n_occurrences = occurrences.get(key, 0)
+            occurrences[key] = n_occurrences + 1
+            flag = cfg.STOP if n_occurrences % 2 else cfg.START
         else:
             flag = cfg.POINT
 
@@ -1315,6 +1336,37 @@ def events_start_stop(ethogram: dict, events: list, obs_type: str) -> List[tuple
     return events_flagged
 
 
+def observation_events_start_stop(pj: dict, obs_id: str) -> List[tuple]:
+    """
+    events of observation obs_id with status (see events_start_stop).
+    The result is cached until the observation is modified (see invalidate_dataframe_cache) and must not be modified
+
+    Args:
+        pj (dict): BORIS project
+        obs_id (str): observation id
+
+    Returns:
+        list: list of events with status
+    """
+    observation = pj[cfg.OBSERVATIONS][obs_id]
+    state_behaviors = tuple(util.state_behavior_codes(pj[cfg.ETHOGRAM]))
+    cached = _events_status_cache.get(obs_id) if _dataframe_cache_enabled else None
+    if (
+        cached is not None
+        and cached[0] is pj
+        and cached[1] is observation
+        and cached[2] is observation[cfg.EVENTS]
+        and cached[3] == len(observation[cfg.EVENTS])
+        and cached[4] == state_behaviors
+    ):
+        return cached[5]
+
+    events_with_status = events_start_stop(pj[cfg.ETHOGRAM], observation[cfg.EVENTS], observation[cfg.TYPE])
+    if _dataframe_cache_enabled:
+        _events_status_cache[obs_id] = (pj, observation, observation[cfg.EVENTS], len(observation[cfg.EVENTS]), state_behaviors, events_with_status)
+    return events_with_status
+
+
 def extract_observed_subjects(pj: dict, selected_observations: list) -> list:
     """
     extract unique subjects present in observations list
@@ -1362,10 +1414,11 @@ def open_project_json(project_file_name: str) -> tuple:
 
     try:
         if project_file_name.endswith(".boris.gz"):
-            file_in = gzip.open(project_file_name, mode="rt", encoding="utf-8")
+            with gzip.open(project_file_name, mode="rb") as file_in:
+                file_content = file_in.read()
         else:
-            file_in = open(project_file_name, "r")
-        file_content = file_in.read()
+            with open(project_file_name, "rb") as file_in:
+                file_content = file_in.read()
     except PermissionError:
         return (
             project_file_name,
@@ -1382,8 +1435,9 @@ def open_project_json(project_file_name: str) -> tuple:
         )
 
     try:
-        pj = json.loads(file_content)
-    except json.JSONDecodeError:
+        # the events of observations are parsed on first access
+        pj = project_loader.loads(file_content)
+    except ValueError:
         return (
             project_file_name,
             projectChanged,
@@ -1627,6 +1681,9 @@ def open_project_json(project_file_name: str) -> tuple:
 
     # sort events by time asc
     for obs_id in pj[cfg.OBSERVATIONS]:
+        # the events of an observation loaded lazily are sorted when they are loaded
+        if not getattr(pj[cfg.OBSERVATIONS][obs_id], "events_loaded", True):
+            continue
         if pj[cfg.OBSERVATIONS][obs_id][cfg.TYPE] in (cfg.LIVE, cfg.MEDIA):
             # sort events list using the first 3 items (time, subject, behavior)
             pj[cfg.OBSERVATIONS][obs_id][cfg.EVENTS].sort(key=lambda x: x[:3])
@@ -1895,9 +1952,263 @@ def explore_project(self) -> None:
         QMessageBox.information(self, cfg.programName, "No events found")
 
 
+def enable_dataframe_cache(enabled: bool = True) -> None:
+    """
+    enable or disable the cache of the observations data used by project2dataframe, observation_events_start_stop
+    and observations_state_events_check.
+    The cache must be invalidated (see invalidate_dataframe_cache) when observations are modified
+    """
+    global _dataframe_cache_enabled
+    _dataframe_cache_enabled = enabled
+    invalidate_dataframe_cache()
+
+
+def invalidate_dataframe_cache(obs_id: str | None = None) -> None:
+    """
+    remove the cached data of observation obs_id (all observations if obs_id is None)
+    """
+    if obs_id is None:
+        _dataframe_cache.clear()
+        _events_status_cache.clear()
+        _state_events_check_cache.clear()
+    else:
+        _dataframe_cache.pop(obs_id, None)
+        _events_status_cache.pop(obs_id, None)
+        _state_events_check_cache.pop(obs_id, None)
+
+
+def event_columns2dataframe_rows(
+    columns: event_columns.EventColumns, obs_id: str, state_behaviors: list, modifier_sets_by_behavior: dict
+) -> Tuple[str, dict]:
+    """
+    returns the rows of the events of an observation stored in columns for project2dataframe
+    (same rows as the single pass of observation2dataframe_data).
+
+    The state events are paired by (subject, behavior, modifiers): the events of a group are alternately START and STOP.
+
+    Args:
+        columns (event_columns.EventColumns): events of the observation
+        obs_id (str): observation id
+        state_behaviors (list): codes of the state behaviors
+        modifier_sets_by_behavior (dict): modifier sets (columns of dataframe) by behavior
+
+    Returns:
+        str: error message ("" if no error)
+        dict: lists of values of the rows (START events and point events)
+    """
+    n_events = len(columns)
+    # position of the STOP event (position of the event itself for point events)
+    stop_positions = np.arange(n_events)
+    is_stop = np.zeros(n_events, dtype=bool)
+    is_state = np.zeros(n_events, dtype=bool)
+    unpaired = False
+    for positions in columns.groups(state_behaviors).values():
+        unpaired = unpaired or len(positions) % 2 == 1
+        start_positions, end_positions = positions[0::2], positions[1::2]
+        stop_positions[start_positions[: len(end_positions)]] = end_positions
+        is_stop[end_positions] = True
+        is_state[positions] = True
+
+    rows = np.flatnonzero(~is_stop)
+    row_stops = stop_positions[rows]
+    behavior_codes = columns.behavior_codes[rows]
+    behavior_values = columns.categories[cfg.EVENT_BEHAVIOR_FIELD_IDX].values
+    modifier_codes = columns.modifier_codes[rows]
+    modifier_values = columns.categories[cfg.EVENT_MODIFIER_FIELD_IDX].values
+
+    # values of the modifier sets (the modifiers are split once by distinct modifiers string)
+    modifiers: dict = {}
+    first_error = None
+    for behavior, modifier_sets in modifier_sets_by_behavior.items():
+        code = columns.categories[cfg.EVENT_BEHAVIOR_FIELD_IDX].get(behavior)
+        if code == -1:
+            continue
+        behavior_rows = np.flatnonzero(behavior_codes == code)
+        split_values = {
+            modifier_code: modifier_values[modifier_code].split("|") for modifier_code in np.unique(modifier_codes[behavior_rows]).tolist()
+        }
+        for row, modifier_code in zip(behavior_rows.tolist(), modifier_codes[behavior_rows].tolist()):
+            if len(split_values[modifier_code]) < len(modifier_sets):
+                first_error = row if first_error is None else min(first_error, row)
+                break
+            for modifier_set, value in zip(modifier_sets, split_values[modifier_code]):
+                modifiers.setdefault(modifier_set, []).append((row, value))
+    if first_error is not None:
+        return f"Modifier error for {behavior_values[behavior_codes[first_error]]} in observation {obs_id}", {}
+    if unpaired:
+        return f"Some events are not paired in {obs_id}", {}
+
+    time_ms = columns.time_ms
+    times = columns.times()
+    durations = (time_ms[row_stops] - time_ms[rows]) / 1000
+    durations[(time_ms[rows] == event_columns.TIME_NAN) | (time_ms[row_stops] == event_columns.TIME_NAN) | ~is_state[rows]] = np.nan
+    subject_values = [
+        cfg.NO_FOCAL_SUBJECT if subject == "" else subject for subject in columns.categories[cfg.EVENT_SUBJECT_FIELD_IDX].values
+    ]
+    comment_values = columns.categories[cfg.EVENT_COMMENT_FIELD_IDX].values
+    comment_codes = columns.comment_codes
+
+    return "", {
+        "times ms": time_ms[rows].tolist(),
+        "subjects": [subject_values[code] for code in columns.subject_codes[rows].tolist()],
+        "behaviors": [behavior_values[code] for code in behavior_codes.tolist()],
+        "behavior types": [cfg.STATE_EVENT if state else cfg.POINT_EVENT for state in is_state[rows].tolist()],
+        "starts": times[rows].tolist(),
+        "stops": times[row_stops].tolist(),
+        "durations": durations.tolist(),
+        "comments start": [comment_values[code] for code in comment_codes[rows].tolist()],
+        "comments stop": [comment_values[code] for code in comment_codes[row_stops].tolist()],
+        "modifiers": modifiers,
+    }
+
+
+def observation2dataframe_data(
+    observation: dict,
+    obs_id: str,
+    indep_variables: dict,
+    behavioral_category: dict,
+    all_modifier_sets: list,
+    state_behaviors: list,
+) -> Tuple[str, dict]:
+    """
+    returns the data (dict of columns) of the events of an observation for project2dataframe
+
+    The state events are paired in a single pass (dict of open START events by subject, behavior and modifiers).
+    The rows are built from the columnar copy of the events if the columnar store is enabled (see event_columns2dataframe_rows).
+
+    Returns:
+        str: error message ("" if no error)
+        dict: columns
+    """
+
+    state_behaviors_set = set(state_behaviors)
+    # index of the modifier set columns for each behavior
+    modifier_sets_by_behavior: dict = {}
+    for modifier_set in all_modifier_sets:
+        modifier_sets_by_behavior.setdefault(modifier_set[0], []).append(modifier_set)
+
+    if observation[cfg.TYPE] != cfg.MEDIA:
+        # same source for all events
+        source_info = event_source_info(observation, None)
+
+    columns = event_columns.observation_columns(observation[cfg.EVENTS])
+    if columns is not None:
+        msg, rows = event_columns2dataframe_rows(columns, obs_id, state_behaviors, modifier_sets_by_behavior)
+        if msg:
+            return msg, {}
+        subjects, behaviors, behavior_types = rows["subjects"], rows["behaviors"], rows["behavior types"]
+        starts, stops, durations = rows["starts"], rows["stops"], rows["durations"]
+        comments_start, comments_stop = rows["comments start"], rows["comments stop"]
+        modifiers_values: dict = {modifier_set: rows["modifiers"].get(modifier_set, []) for modifier_set in all_modifier_sets}
+        if observation[cfg.TYPE] == cfg.MEDIA:
+            sources_info = [event_source_info(observation, event_columns.ms_to_time(time_ms)) for time_ms in rows["times ms"]]
+        else:
+            sources_info = [source_info] * len(starts)
+        sources = [info[0] for info in sources_info]
+        media_durations = [info[1] for info in sources_info]
+        fps_list = [info[2] for info in sources_info]
+        open_states: dict = {}
+        events: list = []
+    else:
+        subjects, behaviors, behavior_types, sources, media_durations, fps_list = [], [], [], [], [], []
+        starts, stops, durations, comments_start, comments_stop = [], [], [], [], []
+        modifiers_values = {modifier_set: [] for modifier_set in all_modifier_sets}
+        # row index of START event by (subject, behavior, modifiers)
+        open_states = {}
+        events = observation[cfg.EVENTS]
+
+    for event in events:
+        behavior = event[cfg.EVENT_BEHAVIOR_FIELD_IDX]
+        if behavior in state_behaviors_set:
+            key = (event[cfg.EVENT_SUBJECT_FIELD_IDX], behavior, event[cfg.EVENT_MODIFIER_FIELD_IDX])
+            if key in open_states:
+                # STOP event
+                row, start_time = open_states.pop(key)
+                stops[row] = float(event[cfg.EVENT_TIME_FIELD_IDX])
+                durations[row] = float(event[cfg.EVENT_TIME_FIELD_IDX] - start_time)
+                comments_stop[row] = event[cfg.EVENT_COMMENT_FIELD_IDX]
+                continue
+            open_states[key] = (len(starts), event[cfg.EVENT_TIME_FIELD_IDX])
+
+        if modifier_sets_by_behavior.get(behavior):
+            values = event[cfg.EVENT_MODIFIER_FIELD_IDX].split("|")
+            if len(values) < len(modifier_sets_by_behavior[behavior]):
+                return f"Modifier error for {behavior} in observation {obs_id}", {}
+            for modifier_set, value in zip(modifier_sets_by_behavior[behavior], values):
+                modifiers_values[modifier_set].append((len(starts), value))
+
+        subjects.append(event[cfg.EVENT_SUBJECT_FIELD_IDX] if event[cfg.EVENT_SUBJECT_FIELD_IDX] != "" else cfg.NO_FOCAL_SUBJECT)
+        behaviors.append(behavior)
+
+        if observation[cfg.TYPE] == cfg.MEDIA:
+            source_info = event_source_info(observation, event[cfg.EVENT_TIME_FIELD_IDX])
+        sources.append(source_info[0])
+        media_durations.append(source_info[1])
+        fps_list.append(source_info[2])
+
+        starts.append(float(event[cfg.EVENT_TIME_FIELD_IDX]))
+        comments_start.append(event[cfg.EVENT_COMMENT_FIELD_IDX])
+        if behavior in state_behaviors_set:
+            behavior_types.append(cfg.STATE_EVENT)
+            # completed with the STOP event
+            stops.append(None)
+            durations.append(None)
+            comments_stop.append(None)
+        else:  # point
+            behavior_types.append(cfg.POINT_EVENT)
+            stops.append(float(event[cfg.EVENT_TIME_FIELD_IDX]))
+            durations.append(np.nan)
+            comments_stop.append(event[cfg.EVENT_COMMENT_FIELD_IDX])
+
+    if open_states:
+        return f"Some events are not paired in {obs_id}", {}
+
+    n_rows = len(starts)
+    obs_interval = observation.get(cfg.OBSERVATION_TIME_INTERVAL, [None, None])
+
+    data = {
+        "Observation id": [obs_id] * n_rows,
+        "Observation date": [observation["date"]] * n_rows,
+        "Description": [" ".join(observation["description"].splitlines())] * n_rows,
+        "Observation type": [observation["type"]] * n_rows,
+        "Observation interval start": [obs_interval[0]] * n_rows,
+        "Observation interval stop": [obs_interval[1]] * n_rows,
+        "Source": sources,
+        "Media duration (s)": media_durations,
+        "FPS (frame/s)": fps_list,
+    }
+
+    for indep_var in indep_variables:
+        data[f"independent variable '{indep_var}'"] = [observation[cfg.INDEPENDENT_VARIABLES].get(indep_var, None)] * n_rows
+
+    data = data | {
+        "Subject": subjects,
+        "Observation duration by subject by observation": [-1] * n_rows,
+        "Behavior": behaviors,
+        "Behavioral category": [behavioral_category[behavior] for behavior in behaviors],
+    }
+
+    for modifier_set in all_modifier_sets:
+        column = [np.nan] * n_rows
+        for row, value in modifiers_values[modifier_set]:
+            column[row] = value
+        data[modifier_set] = column
+
+    return "", data | {
+        "Behavior type": behavior_types,
+        "Start (s)": starts,
+        "Stop (s)": stops,
+        "Duration (s)": durations,
+        "Comment start": comments_start,
+        "Comment stop": comments_stop,
+    }
+
+
 def project2dataframe(pj: dict, observations_list: list = []) -> Tuple[str, pd.DataFrame]:
     """
     returns a pandas dataframe containing observations data
+
+    The data of each observation are cached (if the cache is enabled) until the observation is modified
     """
 
     indep_variables = dict(
@@ -1923,171 +2234,59 @@ def project2dataframe(pj: dict, observations_list: list = []) -> Tuple[str, pd.D
                 set_count += 1
                 modifier_names.append((pj[cfg.ETHOGRAM][behavior_id][cfg.BEHAVIOR_CODE], f"set #{set_count}"))
 
-        # print(modifier_names)
         if modifier_names:
             all_modifier_sets.extend(modifier_names)
 
-    # create df
-
-    data = {
-        "Observation id": [],
-        "Observation date": [],
-        "Description": [],
-        "Observation type": [],
-        "Observation interval start": [],
-        "Observation interval stop": [],
-        "Source": [],
-        # "Time offset (s)": [],
-        # "Coding duration": [],
-        "Media duration (s)": [],
-        "FPS (frame/s)": [],
-    }
-
-    for indep_var in indep_variables:
-        data[f"independent variable '{indep_var}'"] = []
-
-    data = data | {
-        "Subject": [],
-        "Observation duration by subject by observation": [],
-        "Behavior": [],
-        "Behavioral category": [],
-    }
-
-    for modifier_set in all_modifier_sets:
-        data[modifier_set] = []
-
-    data = data | {
-        "Behavior type": [],
-        "Start (s)": [],
-        "Stop (s)": [],
-        "Duration (s)": [],
-        # "Media file name": [],
-        # "Image index start": [],
-        # "Image index stop": [],
-        # "Image file path start": [],
-        # "Image file path stop": [],
-        "Comment start": [],
-        "Comment stop": [],
-    }
-
-    #
-
-    type_ = {
-        "Observation id": "string",
-        "Observation date": "string",
-        "Description": "string",
-        "Observation type": "string",
-        "Observation interval start": "float64",
-        "Observation interval stop": "float64",
-        "Source": "string",
-        # "Time offset (s)": "string",
-        # "Coding duration": "float64",
-        "Media duration (s)": "float64",
-        "FPS (frame/s)": "float64",
-    }
-
-    # TODO: set correct type in base of the var type
-    for indep_var in indep_variables:
-        type_[f"independent variable '{indep_var}'"] = "float64" if indep_variables[indep_var] == cfg.NUMERIC else "string"
+    state_behaviors = util.state_behavior_codes(pj[cfg.ETHOGRAM])
 
-    type_ = type_ | {
-        "Subject": "string",
-        "Observation duration by subject by observation": "float64",
-        "Behavior": "string",
-        "Behavioral category": "string",
-    }
+    # create df
 
-    for modifer_set in all_modifier_sets:
-        type_[modifer_set] = "string"
-
-    type_ = type_ | {
-        "Behavior type": "string",
-        "Start (s)": "float64",
-        "Stop (s)": "float64",
-        "Duration (s)": "float64",
-        # "Media file name": "string",
-        # "Image index start": "float64",
-        # "Image index stop": "float64",
-        # "Image file path start": "string",
-        # "Image file path stop": "string",
-        "Comment start": "string",
-        "Comment stop": "string",
-    }
+    columns = [
+        "Observation id",
+        "Observation date",
+        "Description",
+        "Observation type",
+        "Observation interval start",
+        "Observation interval stop",
+        "Source",
+        "Media duration (s)",
+        "FPS (frame/s)",
+    ]
+    columns.extend(f"independent variable '{indep_var}'" for indep_var in indep_variables)
+    columns.extend(["Subject", "Observation duration by subject by observation", "Behavior", "Behavioral category"])
+    columns.extend(all_modifier_sets)
+    columns.extend(["Behavior type", "Start (s)", "Stop (s)", "Duration (s)", "Comment start", "Comment stop"])
 
-    state_behaviors = util.state_behavior_codes(pj[cfg.ETHOGRAM])
+    data: dict = {column: [] for column in columns}
 
     for obs_id in pj[cfg.OBSERVATIONS]:
         if observations_list and obs_id not in observations_list:
             continue
-        # print(obs_id)
-        stop_event_idx = set()
-        for idx_event, event in enumerate(pj[cfg.OBSERVATIONS][obs_id][cfg.EVENTS]):
-            if idx_event in stop_event_idx:
-                continue
-            data["Observation id"].append(obs_id)
-            data["Observation date"].append(pj[cfg.OBSERVATIONS][obs_id]["date"])
-            data["Description"].append(" ".join(pj[cfg.OBSERVATIONS][obs_id]["description"].splitlines()))
-            data["Observation type"].append(pj[cfg.OBSERVATIONS][obs_id]["type"])
-
-            data["Observation interval start"].append(pj[cfg.OBSERVATIONS][obs_id].get(cfg.OBSERVATION_TIME_INTERVAL, [None, None])[0])
-            data["Observation interval stop"].append(pj[cfg.OBSERVATIONS][obs_id].get(cfg.OBSERVATION_TIME_INTERVAL, [None, None])[1])
-
-            source, media_duration, fps = event_source_info(pj[cfg.OBSERVATIONS][obs_id], event[0])
-            data["Source"].append(source)
-            # data["Time offset (s)"].append(pj["observations"][obs_id]["time offset"])
-            # data["Coding duration"].append("")
-            data["Media duration (s)"].append(media_duration)
-            data["FPS (frame/s)"].append(fps)
-
-            for indep_var in indep_variables:
-                data[f"independent variable '{indep_var}'"].append(
-                    pj[cfg.OBSERVATIONS][obs_id][cfg.INDEPENDENT_VARIABLES].get(indep_var, None)
-                )
-
-            data["Subject"].append(event[cfg.EVENT_SUBJECT_FIELD_IDX] if event[cfg.EVENT_SUBJECT_FIELD_IDX] != "" else cfg.NO_FOCAL_SUBJECT)
-            data["Observation duration by subject by observation"].append(-1)
-            data["Behavior"].append(event[2])
-            data["Behavioral category"].append(behavioral_category[event[2]])
 
-            count_set = 0
-            for modifier_set in all_modifier_sets:
-                if event[2] == modifier_set[0]:
-                    try:
-                        data[modifier_set].append(event[3].split("|")[count_set])
-                    except Exception:
-                        return f"Modifier error for {event[2]} in observation {obs_id}", pd.DataFrame()
-                    count_set += 1
-                else:
-                    data[modifier_set].append(np.nan)
-
-            data["Behavior type"].append(cfg.STATE_EVENT if event[2] in state_behaviors else cfg.POINT_EVENT)
-            data["Start (s)"].append(float(event[0]))
-            if event[2] in state_behaviors:
-                # search stop
-                # print(f"==> {idx_event=} {event[1:4]=}")
-                for idx_event2, event2 in enumerate(pj[cfg.OBSERVATIONS][obs_id][cfg.EVENTS][idx_event + 1 :], start=idx_event + 1):
-                    # print(f"{idx_event2=} {event2[1:4]=}")
-                    if event2[1:4] == event[1:4]:
-                        # print("found")
-                        stop_event_idx.add(idx_event2)
-                        data["Stop (s)"].append(float(event2[0]))
-                        data["Duration (s)"].append(float(event2[0] - event[0]))
-                        data["Comment start"].append(event[4])
-                        data["Comment stop"].append(event2[4])
-                        break
-                else:
-                    return f"Some events are not paired in {obs_id}", pd.DataFrame()
+        observation = pj[cfg.OBSERVATIONS][obs_id]
+        cached = _dataframe_cache.get(obs_id) if _dataframe_cache_enabled else None
+        if (
+            cached is not None
+            and cached[0] is pj
+            and cached[1] is observation
+            and cached[2] is observation[cfg.EVENTS]
+            and cached[3] == len(observation[cfg.EVENTS])
+        ):
+            obs_data = cached[4]
+        else:
+            msg, obs_data = observation2dataframe_data(
+                observation, obs_id, indep_variables, behavioral_category, all_modifier_sets, state_behaviors
+            )
+            if msg:
+                return msg, pd.DataFrame()
+            if _dataframe_cache_enabled:
+                _dataframe_cache[obs_id] = (pj, observation, observation[cfg.EVENTS], len(observation[cfg.EVENTS]), obs_data)
 
-            else:  # point
-                data["Stop (s)"].append(float(event[0]))
-                data["Duration (s)"].append(np.nan)
-                data["Comment start"].append(event[4])
-                data["Comment stop"].append(event[4])
+        for column in columns:
+            data[column].extend(obs_data[column])
 
     # Set the display option to show all rows and columns
     pd.set_option("display.max_rows", None)
     pd.set_option("display.max_columns", None)
 
-    pd.DataFrame(data).info()
-
     return "", pd.DataFrame(data)
@@ -0,0 +1,347 @@
+"""
+BORIS
+Behavioral Observation Research Interactive Software
+Copyright 2012-2026 Olivier Friard
+
+This file is part of BORIS.
+
+  BORIS is free software; you can redistribute it and/or modify
+  it under the terms of the GNU General Public License as published by
+  the Free Software Foundation; either version 3 of the License, or
+  any later version.
+
+  BORIS is distributed in the hope that it will be useful,
+  but WITHOUT ANY WARRANTY; without even the implied warranty of
+  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+  GNU General Public License for more details.
+
+  You should have received a copy of the GNU General Public License
+  along with this program; if not see <http://www.gnu.org/licenses/>.
+
+Append-only journal of the modifications of a project (autosave and crash recovery)
+"""
+
+import copy
+import json
+import logging
+import os
+
+from . import config as cfg
+from . import project_loader
+from . import utilities as util
+
+JOURNAL_SUFFIX = ".journal"
+JOURNAL_VERSION = 1
+
+
+def journal_path(project_file_name: str) -> str:
+    """
+    path of the journal of a project file
+    """
+    return project_file_name + JOURNAL_SUFFIX
+
+
+def _file_signature(project_file_name: str) -> dict | None:
+    """
+    size and modification time of the project file (None if the file does not exist)
+    """
+    try:
+        file_stat = os.stat(os.path.realpath(project_file_name))
+    except OSError:
+        return None
+    return {"size": file_stat.st_size, "mtime_ns": file_stat.st_mtime_ns}
+
+
+def _metadata(observation: dict) -> dict:
+    """
+    values of the observation without the events (dict.items does not load the events of lazy observations)
+    """
+    return {key: value for key, value in dict.items(observation) if key != cfg.EVENTS}
+
+
+def read_journal(project_file_name: str) -> list | None:
+    """
+    read the journal of the project file.
+    The journal is ignored if it was not written after the current version of the project file.
+    An incomplete last line (crash during the writing) is ignored.
+
+    Args:
+        project_file_name (str): path of the project file
+
+    Returns:
+        list: list of flushes (every flush is a list of changes), None if there is no journal for the project file
+    """
+    try:
+        with open(journal_path(project_file_name), "r", encoding="utf-8") as f_in:
+            lines = f_in.read().split("\n")
+    except OSError:
+        return None
+    try:
+        header = json.loads(lines[0])
+    except ValueError:
+        return None
+    if header.get("BORIS project journal") != JOURNAL_VERSION or header.get("project file") != _file_signature(project_file_name):
+        logging.warning(f"The journal of {project_file_name} does not match the project file")
+        return None
+    flushes: list = []
+    for line in lines[1:]:
+        try:
+            flushes.append(json.loads(line))
+        except ValueError:
+            break
+    return flushes
+
+
+def apply_changes(pj: dict, changes: list) -> None:
+    """
+    apply the changes of a flush of the journal to the project
+
+    Args:
+        pj (dict): BORIS project (modified in place)
+        changes (list): changes (see ProjectJournal.flush)
+    """
+    for change in changes:
+        if "section" in change:
+            if "value" in change:
+                pj[change["section"]] = change["value"]
+            else:
+                pj.pop(change["section"], None)
+
+        elif "remove observation" in change:
+            pj[cfg.OBSERVATIONS].pop(change["remove observation"], None)
+
+        elif "observation" in change:
+            pj[cfg.OBSERVATIONS][change["observation"]] = change["value"]
+            util.convert_time_to_decimal({cfg.OBSERVATIONS: {change["observation"]: change["value"]}})
+
+        elif "metadata" in change:
+            observation = pj[cfg.OBSERVATIONS][change["metadata"]]
+            for key in [key for key in dict.keys(observation) if key != cfg.EVENTS and key not in change["value"]]:
+                del observation[key]
+            observation.update(change["value"])
+            util.convert_time_to_decimal({cfg.OBSERVATIONS: {change["metadata"]: observation}})
+
+        elif "events" in change:
+            events = pj[cfg.OBSERVATIONS][change["events"]][cfg.EVENTS]
+            # the hunks are applied in order: the index of a hunk is valid after the modifications of the previous hunks
+            for position, n_old_rows, rows in change["hunks"]:
+                events[position : position + n_old_rows] = util.convert_events_time_to_decimal(rows)
+
+
+def replay(pj: dict, flushes: list) -> None:
+    """
+    apply the flushes read from the journal (see read_journal) to the project loaded from the project file
+    """
+    for changes in flushes:
+        apply_changes(pj, changes)
+
+
+class ProjectJournal:
+    """
+    write-ahead journal of the modifications of the project, written next to the project file.
+
+    The journal starts from the project sections and the observation values without the events of a snapshot
+    of the project (see project_save.project_snapshot) corresponding to the project file.
+    The modifications of the events lists are recorded when the events are edited (see events_changed):
+    flush() appends a line with these hunks and the modified project sections and observation values.
+    An observation whose events were modified without recorded hunks (see mark_changed) is written entirely.
+    When the project file is written the journal starts again from the saved snapshot and the journal file is removed.
+    """
+
+    def __init__(self, project_file_name: str):
+        self.project_file_name = project_file_name
+        self.path = journal_path(project_file_name)
+        self._baseline: dict | None = None
+        self._signature: dict | None = None
+        # baseline of a save running in background (see start and saved)
+        self._pending: dict | None = None
+        # hunks (position, number of old rows, new rows) by observation not yet written
+        self._hunks: dict = {}
+        # observations to write entirely
+        self._rewrite: set = set()
+        self._all_changed: bool = False
+        # modifications recorded before a save running in background (restored if the save fails)
+        self._stashed: tuple | None = None
+        # expected number of events by observation (None if the events are not loaded)
+        self._lengths: dict = {}
+
+    @staticmethod
+    def _baseline_from(snapshot: dict) -> dict:
+        # the containers are copied: the snapshot can be serialized in another thread while the baseline is updated
+        return {
+            "sections": {key: value for key, value in snapshot.items() if key != cfg.OBSERVATIONS},
+            "observations": {obs_id: _metadata(observation) for obs_id, observation in snapshot.get(cfg.OBSERVATIONS, {}).items()},
+        }
+
+    @staticmethod
+    def _lengths_from(snapshot: dict) -> dict:
+        lengths: dict = {}
+        for obs_id, observation in snapshot.get(cfg.OBSERVATIONS, {}).items():
+            events = dict.get(observation, cfg.EVENTS, [])
+            lengths[obs_id] = None if isinstance(events, project_loader.EventsSource) else len(events)
+        return lengths
+
+    def start(self, snapshot: dict, pending: bool = False, keep: bool = False) -> None:
+        """
+        start the journal from the snapshot of the project written in the project file
+
+        Args:
+            snapshot (dict): snapshot of the project (see project_save.project_snapshot)
+            pending (bool): the snapshot is being saved in background (the journal starts when the save is finished, see saved)
+            keep (bool): keep the journal file (the snapshot was built after the replay of the journal)
+        """
+        self._lengths = self._lengths_from(snapshot)
+        if pending:
+            self._pending = self._baseline_from(snapshot)
+            # the modifications recorded before the snapshot are in the saved project
+            self._stashed = (self._hunks, self._rewrite, self._all_changed)
+            self._hunks, self._rewrite, self._all_changed = {}, set(), False
+            return
+        self._baseline = self._baseline_from(snapshot)
+        self._pending = None
+        self._stashed = None
+        self._hunks, self._rewrite, self._all_changed = {}, set(), False
+        self._signature = _file_signature(self.project_file_name)
+        if not keep:
+            self.remove()
+
+    def saved(self, error: str = "") -> None:
+        """
+        end of the save in background started with start(pending=True)
+
+        Args:
+            error (str): error message ("" if the project was saved). On error the journal continues from the previous state
+        """
+        if self._pending is None:
+            return
+        if not error:
+            self._baseline = self._pending
+            self._signature = _file_signature(self.project_file_name)
+            self.remove()
+        elif self._stashed is not None:
+            # the modifications recorded before the snapshot are not saved
+            hunks, rewrite, all_changed = self._stashed
+            for obs_id, obs_hunks in self._hunks.items():
+                hunks.setdefault(obs_id, []).extend(obs_hunks)
+            self._hunks, self._rewrite, self._all_changed = hunks, rewrite | self._rewrite, all_changed or self._all_changed
+        self._pending = None
+        self._stashed = None
+
+    def events_changed(self, obs_id: str, hunks: list) -> None:
+        """
+        record the modifications of the events list of an observation
+
+        Args:
+            obs_id (str): observation id
+            hunks (list): hunks (position, old rows, new rows) in order of application (see event_store)
+        """
+        obs_hunks = self._hunks.setdefault(obs_id, [])
+        for position, old_rows, new_rows in hunks:
+            obs_hunks.append((position, len(old_rows), new_rows))
+            if self._lengths.get(obs_id) is not None:
+                self._lengths[obs_id] += len(new_rows) - len(old_rows)
+
+    def mark_changed(self, obs_id: str | None) -> None:
+        """
+        mark the events of an observation as modified without recorded hunks: the observation is written entirely.
+        None if the project was modified outside of an observation: the project file must be saved
+        """
+        if obs_id:
+            self._rewrite.add(obs_id)
+        else:
+            self._all_changed = True
+
+    def changes(self, pj: dict) -> list:
+        """
+        modifications of the project since the last journaled state (the state is updated)
+
+        Args:
+            pj (dict): BORIS project
+
+        Returns:
+            list: changes
+        """
+        changes: list = []
+        sections = self._baseline["sections"]
+        for key, value in pj.items():
+            if key != cfg.OBSERVATIONS and (key not in sections or sections[key] != value):
+                sections[key] = copy.deepcopy(value)
+                changes.append({"section": key, "value": value})
+        for key in [key for key in sections if key not in pj]:
+            del sections[key]
+            changes.append({"section": key})
+
+        observations = self._baseline["observations"]
+        for obs_id in [obs_id for obs_id in observations if obs_id not in pj[cfg.OBSERVATIONS]]:
+            del observations[obs_id]
+            changes.append({"remove observation": obs_id})
+
+        for obs_id, observation in pj[cfg.OBSERVATIONS].items():
+            # the events not loaded are not modified
+            events_loaded = getattr(observation, "events_loaded", True)
+            length = self._lengths.get(obs_id)
+            if events_loaded and length is not None and length != len(observation.get(cfg.EVENTS, [])):
+                # events modified without recorded hunks
+                logging.debug(f"events of {obs_id} modified without journal")
+                self._rewrite.add(obs_id)
+
+            if obs_id not in observations or obs_id in self._rewrite:
+                # the events of a lazy observation are loaded
+                value = {key: observation[key] for key in observation}
+                observations[obs_id] = copy.deepcopy(_metadata(value))
+                self._lengths[obs_id] = len(value.get(cfg.EVENTS, []))
+                changes.append({"observation": obs_id, "value": value})
+                continue
+
+            metadata = _metadata(observation)
+            if metadata != observations[obs_id]:
+                observations[obs_id] = copy.deepcopy(metadata)
+                changes.append({"metadata": obs_id, "value": metadata})
+
+            if self._hunks.get(obs_id):
+                changes.append({"events": obs_id, "hunks": self._hunks[obs_id]})
+            if events_loaded and length is None:
+                self._lengths[obs_id] = len(observation.get(cfg.EVENTS, []))
+
+        self._hunks = {}
+        self._rewrite = set()
+        return changes
+
+    def flush(self, pj: dict) -> bool:
+        """
+        append the modifications of the project to the journal file
+
+        Args:
+            pj (dict): BORIS project
+
+        Returns:
+            bool: False if the modifications cannot be journaled (the project file must be saved)
+        """
+        if self._baseline is None or self._pending is not None or self._signature is None or self._all_changed:
+            return False
+        try:
+            with open(self.path, "a", encoding="utf-8") as f_out:
+                if not f_out.tell():
+                    f_out.write(json.dumps({"BORIS project journal": JOURNAL_VERSION, "project file": self._signature}) + "\n")
+                changes = self.changes(pj)
+                if changes:
+                    f_out.write(json.dumps(changes, default=util.decimal_default) + "\n")
+                f_out.flush()
+                os.fsync(f_out.fileno())
+        except OSError:
+            logging.warning(f"Error writing the journal {self.path}")
+            # the journal can not be continued
+            self._baseline = None
+            return False
+        return True
+
+    def remove(self) -> None:
+        """
+        remove the journal file
+        """
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+        except OSError:
+            logging.warning(f"Error removing the journal {self.path}")
@@ -0,0 +1,288 @@
+"""
+BORIS
+Behavioral Observation Research Interactive Software
+Copyright 2012-2026 Olivier Friard
+
+This file is part of BORIS.
+
+  BORIS is free software; you can redistribute it and/or modify
+  it under the terms of the GNU General Public License as published by
+  the Free Software Foundation; either version 3 of the License, or
+  any later version.
+
+  BORIS is distributed in the hope that it will be useful,
+  but WITHOUT ANY WARRANTY; without even the implied warranty of
+  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+  GNU General Public License for more details.
+
+  You should have received a copy of the GNU General Public License
+  along with this program; if not see <http://www.gnu.org/licenses/>.
+
+Loading of BORIS project files with lazy loading of the events of observations
+"""
+
+import copy
+import json
+import re
+import threading
+
+from . import config as cfg
+from . import utilities as util
+
+# JSON string (unrolled loop: fast when the strings contain few escaped characters)
+_STRING_PATTERN = rb'"[^"\\]*+(?:\\.[^"\\]*+)*+"'
+_ROW_PATTERN = rb'\[[^\[\]"]*+(?:' + _STRING_PATTERN + rb'[^\[\]"]*+)*+\]'
+
+_WS = re.compile(rb"[ \t\n\r]*")
+_STRING = re.compile(_STRING_PATTERN, re.S)
+_SCALAR = re.compile(rb"[^,\]}\s]+")
+_STRUCTURE = re.compile(rb'[\[\]{}"]')
+# array of arrays without deeper nesting (list of events) matched in one pass
+_EVENTS = re.compile(rb'\[[^\[\]"]*+(?:(?:' + _ROW_PATTERN + rb"|" + _STRING_PATTERN + rb')[^\[\]"]*+)*+\]', re.S)
+
+_load_lock = threading.Lock()
+
+
+class EventsSource:
+    """
+    position of the (not yet parsed) events of an observation in the project file content
+    """
+
+    __slots__ = ("buffer", "start", "end")
+
+    def __init__(self, buffer: bytes, start: int, end: int):
+        self.buffer = buffer
+        self.start = start
+        self.end = end
+
+    def parse(self, observation_type: str) -> list:
+        """
+        parse the events, convert the times to Decimal and sort the events (like open_project_json)
+        """
+        events = json.loads(self.buffer[self.start : self.end])
+        util.convert_events_time_to_decimal(events)
+        if observation_type in (cfg.LIVE, cfg.MEDIA):
+            events.sort(key=lambda x: x[:3])
+        return events
+
+
+class LazyObservation(dict):
+    """
+    observation dictionary whose events are parsed on first access
+
+    The dictionary can be used like the observation dictionary loaded with json.loads:
+    the events are parsed when the value of the events key is read (obs[cfg.EVENTS], get, items, values, copy...)
+    and then stored in the dictionary. The keys of the dictionary are available without loading the events.
+    """
+
+    @property
+    def events_loaded(self) -> bool:
+        return not isinstance(dict.get(self, cfg.EVENTS), EventsSource)
+
+    def load_events(self) -> list | None:
+        """
+        parse the events if not already done
+
+        Returns:
+            list: events of observation (None if the observation has no events key)
+        """
+        with _load_lock:
+            events = dict.get(self, cfg.EVENTS)
+            if isinstance(events, EventsSource):
+                events = events.parse(dict.get(self, cfg.TYPE))
+                dict.__setitem__(self, cfg.EVENTS, events)
+        return events
+
+    def __getitem__(self, key):
+        value = dict.__getitem__(self, key)
+        if isinstance(value, EventsSource):
+            return self.load_events()
+        return value
+
+    def get(self, key, default=None):
+        return self[key] if key in self else default
+
+    def __iter__(self):
+        # defining __iter__ disables the fast copy of the dictionary internals (dict(obs), {**obs}, update):
+        # the values are read with __getitem__
+        return dict.__iter__(self)
+
+    def items(self):
+        self.load_events()
+        return dict.items(self)
+
+    def values(self):
+        self.load_events()
+        return dict.values(self)
+
+    def pop(self, key, *default):
+        if key == cfg.EVENTS:
+            self.load_events()
+        return dict.pop(self, key, *default)
+
+    def popitem(self):
+        self.load_events()
+        return dict.popitem(self)
+
+    def setdefault(self, key, default=None):
+        if key in self:
+            return self[key]
+        dict.__setitem__(self, key, default)
+        return default
+
+    def copy(self) -> dict:
+        return dict(self)
+
+    def __copy__(self) -> dict:
+        return dict(self)
+
+    def __deepcopy__(self, memo) -> dict:
+        return copy.deepcopy(dict(self), memo)
+
+    def __reduce_ex__(self, protocol):
+        return (dict, (dict(self),))
+
+    def __eq__(self, other):
+        self.load_events()
+        if isinstance(other, LazyObservation):
+            other.load_events()
+        return dict.__eq__(self, other)
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        return result if result is NotImplemented else not result
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        self.load_events()
+        return dict.__repr__(self)
+
+
+def _skip_ws(buffer: bytes, pos: int) -> int:
+    return _WS.match(buffer, pos).end()
+
+
+def _expect(buffer: bytes, pos: int, char: bytes) -> int:
+    if buffer[pos : pos + 1] != char:
+        raise ValueError(f"{char.decode()} expected at position {pos}")
+    return pos + 1
+
+
+def _value_end(buffer: bytes, pos: int) -> int:
+    """
+    position of the end of the JSON value starting at pos
+    """
+    char = buffer[pos : pos + 1]
+    if char == b'"':
+        match = _STRING.match(buffer, pos)
+        if match is None:
+            raise ValueError(f"unterminated string at position {pos}")
+        return match.end()
+    if char in (b"[", b"{"):
+        depth = 0
+        while True:
+            match = _STRUCTURE.search(buffer, pos)
+            if match is None:
+                raise ValueError("unexpected end of file")
+            pos = match.start()
+            char = buffer[pos : pos + 1]
+            if char == b'"':
+                pos = _value_end(buffer, pos)
+                continue
+            depth += 1 if char in (b"[", b"{") else -1
+            pos += 1
+            if not depth:
+                return pos
+    match = _SCALAR.match(buffer, pos)
+    if match is None:
+        raise ValueError(f"value expected at position {pos}")
+    return match.end()
+
+
+def _parse_value(buffer: bytes, pos: int) -> tuple:
+    end = _value_end(buffer, pos)
+    return json.loads(buffer[pos:end]), end
+
+
+def _parse_object(buffer: bytes, pos: int, parse_member) -> tuple:
+    """
+    parse a JSON object starting at pos. The value of every member is parsed with parse_member(key, buffer, pos)
+
+    Returns:
+        dict: object
+        int: position after the object
+    """
+    pos = _expect(buffer, _skip_ws(buffer, pos), b"{")
+    result: dict = {}
+    pos = _skip_ws(buffer, pos)
+    if buffer[pos : pos + 1] == b"}":
+        return result, pos + 1
+    while True:
+        match = _STRING.match(buffer, pos)
+        if match is None:
+            raise ValueError(f"key expected at position {pos}")
+        key = json.loads(match.group())
+        pos = _skip_ws(buffer, _expect(buffer, _skip_ws(buffer, match.end()), b":"))
+        result[key], pos = parse_member(key, buffer, pos)
+        pos = _skip_ws(buffer, pos)
+        if buffer[pos : pos + 1] == b",":
+            pos = _skip_ws(buffer, pos + 1)
+            continue
+        return result, _expect(buffer, pos, b"}")
+
+
+def _parse_observation_member(key: str, buffer: bytes, pos: int) -> tuple:
+    if key == cfg.EVENTS:
+        match = _EVENTS.match(buffer, pos)
+        if match is not None:
+            return EventsSource(buffer, match.start(), match.end()), match.end()
+    return _parse_value(buffer, pos)
+
+
+def _parse_observation(obs_id: str, buffer: bytes, pos: int) -> tuple:
+    if buffer[pos : pos + 1] != b"{":
+        return _parse_value(buffer, pos)
+    observation, pos = _parse_object(buffer, pos, _parse_observation_member)
+    return LazyObservation(observation), pos
+
+
+def _parse_project_member(key: str, buffer: bytes, pos: int) -> tuple:
+    if key == cfg.OBSERVATIONS and buffer[pos : pos + 1] == b"{":
+        return _parse_object(buffer, pos, _parse_observation)
+    return _parse_value(buffer, pos)
+
+
+def loads(content: bytes) -> dict:
+    """
+    load a BORIS project from the content of the project file.
+    The project is parsed except the events of the observations: the positions of the events in content are stored
+    and the events are parsed on first access (see LazyObservation).
+    The time of events is converted to Decimal and the events are sorted when they are loaded.
+
+    Args:
+        content (bytes): content of project file (JSON)
+
+    Returns:
+        dict: BORIS project
+
+    Raises:
+        ValueError: if content is not a valid JSON object
+    """
+    if isinstance(content, str):
+        content = content.encode("utf-8")
+    if content.startswith(b"\xef\xbb\xbf"):
+        content = content[3:]
+    pj, pos = _parse_object(content, 0, _parse_project_member)
+    if _skip_ws(content, pos) != len(content):
+        raise ValueError(f"extra data at position {pos}")
+    return pj
+
+
+def load_all_events(pj: dict) -> None:
+    """
+    parse the events of all the observations of project
+    """
+    for observation in pj.get(cfg.OBSERVATIONS, {}).values():
+        if isinstance(observation, LazyObservation):
+            observation.load_events()
@@ -0,0 +1,228 @@
+"""
+BORIS
+Behavioral Observation Research Interactive Software
+Copyright 2012-2026 Olivier Friard
+
+This file is part of BORIS.
+
+  BORIS is free software; you can redistribute it and/or modify
+  it under the terms of the GNU General Public License as published by
+  the Free Software Foundation; either version 3 of the License, or
+  any later version.
+
+  BORIS is distributed in the hope that it will be useful,
+  but WITHOUT ANY WARRANTY; without even the implied warranty of
+  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+  GNU General Public License for more details.
+
+  You should have received a copy of the GNU General Public License
+  along with this program; if not see <http://www.gnu.org/licenses/>.
+
+Saving of BORIS project files: snapshot of the project, serialization and atomic writing (in a worker thread for the autosave)
+"""
+
+import copy
+import gzip
+import json
+import logging
+import os
+import re
+import stat
+import tempfile
+import traceback
+
+from PySide6.QtCore import QObject, Qt, QThread, Signal
+
+from . import config as cfg
+from . import project_loader
+from . import utilities as util
+
+# permissions of a new project file
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+# placeholder of the events of observations not loaded (see project_loader) in the serialized project
+_RAW_EVENTS_PLACEHOLDER = re.compile(r'"\\u0000raw events (\d+)\\u0000"')
+
+
+def project_snapshot(pj: dict) -> dict:
+    """
+    copy of the project that can be serialized in another thread while the project is modified.
+    The events are copied as tuples (the fields of events are immutable), the other values are deep copied.
+    The events of the observations not loaded (see project_loader) are not parsed.
+
+    Args:
+        pj (dict): BORIS project
+
+    Returns:
+        dict: snapshot of the project
+    """
+    snapshot: dict = {}
+    for key, value in pj.items():
+        if key == cfg.OBSERVATIONS:
+            snapshot[key] = {obs_id: _observation_snapshot(observation) for obs_id, observation in value.items()}
+        else:
+            snapshot[key] = copy.deepcopy(value)
+    return snapshot
+
+
+def _observation_snapshot(observation: dict) -> dict:
+    snapshot: dict = {}
+    # dict.items does not load the events of lazy observations
+    for key, value in dict.items(observation):
+        if key == cfg.EVENTS and isinstance(value, project_loader.EventsSource):
+            snapshot[key] = value
+        elif key == cfg.EVENTS:
+            snapshot[key] = list(map(tuple, value))
+        else:
+            snapshot[key] = copy.deepcopy(value)
+    return snapshot
+
+
+def project_json(snapshot: dict, indent=cfg.PROJECT_FILE_INDENTATION_DEFAULT_VALUE) -> str:
+    """
+    serialize the project snapshot in JSON.
+    The events not loaded are copied from the content of the project file.
+
+    Args:
+        snapshot (dict): snapshot of the project (see project_snapshot)
+        indent: indentation of the JSON
+
+    Returns:
+        str: JSON
+    """
+    raw_events: list = []
+
+    def default(obj):
+        if isinstance(obj, project_loader.EventsSource):
+            raw_events.append(obj)
+            return f"\0raw events {len(raw_events) - 1}\0"
+        return util.decimal_default(obj)
+
+    def raw_content(match) -> str:
+        events = raw_events[int(match.group(1))]
+        return events.buffer[events.start : events.end].decode("utf-8")
+
+    content = json.dumps(snapshot, default=default, indent=indent)
+    if raw_events:
+        content = _RAW_EVENTS_PLACEHOLDER.sub(raw_content, content)
+    return content
+
+
+def write_project_file(project_file_name: str, content: str) -> None:
+    """
+    write the project file: the content is written in a temporary file in the same directory
+    that replaces the project file (atomic rename), so the project file is never left partially written.
+    The file is compressed with gzip if its name ends with .boris.gz
+
+    Args:
+        project_file_name (str): path of the project file
+        content (str): content of the project file (JSON)
+
+    Raises:
+        OSError: if the file cannot be written
+    """
+    # replace the target of a symbolic link
+    target = os.path.realpath(project_file_name)
+    fd, temp_file_name = tempfile.mkstemp(dir=os.path.dirname(target), prefix=f".{os.path.basename(target)}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f_out:
+            if project_file_name.endswith(".boris.gz"):
+                with gzip.GzipFile(fileobj=f_out, mode="wb") as gz_out:
+                    gz_out.write(content.encode("utf-8"))
+            else:
+                f_out.write(content.encode("utf-8"))
+            f_out.flush()
+            os.fsync(f_out.fileno())
+        # keep the permissions of the project file
+        if os.path.exists(target):
+            os.chmod(temp_file_name, stat.S_IMODE(os.stat(target).st_mode))
+        else:
+            os.chmod(temp_file_name, 0o666 & ~_UMASK)
+        os.replace(temp_file_name, target)
+    except BaseException:
+        try:
+            os.remove(temp_file_name)
+        except OSError:
+            pass
+        raise
+
+
+def save_project(snapshot: dict, project_file_name: str, indent=cfg.PROJECT_FILE_INDENTATION_DEFAULT_VALUE) -> None:
+    """
+    serialize the project snapshot and write it in the project file
+
+    Raises:
+        OSError: if the file cannot be written
+    """
+    write_project_file(project_file_name, project_json(snapshot, indent))
+
+
+class ProjectSaveWorker(QObject):
+    """
+    save a project snapshot in a separated thread
+    """
+
+    finished = Signal(str, str)  # project file name, error message ("" if the project was saved)
+
+    def __init__(self, snapshot: dict, project_file_name: str, indent, parent=None):
+        super().__init__(parent)
+        self.snapshot = snapshot
+        self.project_file_name = project_file_name
+        self.indent = indent
+
+    def run(self):
+        error = ""
+        try:
+            save_project(self.snapshot, self.project_file_name, self.indent)
+        except PermissionError:
+            error = "Permission denied to save the project file. Try another directory"
+        except Exception as exc:
+            logging.warning(traceback.format_exc())
+            error = f"Error saving the project file: {exc}"
+        self.snapshot = None
+        self.finished.emit(self.project_file_name, error)
+
+
+class BackgroundProjectSave(QObject):
+    """
+    save project snapshots in a worker thread (one save at a time)
+    """
+
+    saved = Signal(str, str)  # project file name, error message ("" if the project was saved)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.thread: QThread | None = None
+        self.worker: ProjectSaveWorker | None = None
+
+    def is_running(self) -> bool:
+        return self.thread is not None and self.thread.isRunning()
+
+    def start(self, snapshot: dict, project_file_name: str, indent=cfg.PROJECT_FILE_INDENTATION_DEFAULT_VALUE) -> bool:
+        """
+        start the save of the snapshot
+
+        Returns:
+            bool: False if a save is already running
+        """
+        if self.is_running():
+            return False
+        if self.thread is not None:
+            self.thread.deleteLater()
+        self.thread = QThread(self)
+        self.worker = ProjectSaveWorker(snapshot, project_file_name, indent)
+        self.worker.moveToThread(self.thread)
+        self.thread.started.connect(self.worker.run)
+        self.worker.finished.connect(self.saved)
+        # direct connection: the thread can be stopped while the GUI thread is waiting for it (see wait)
+        self.worker.finished.connect(self.thread.quit, Qt.ConnectionType.DirectConnection)
+        self.thread.start()
+        return True
+
+    def wait(self) -> None:
+        """
+        wait the end of the running save
+        """
+        if self.thread is not None:
+            self.thread.wait()
@@ -0,0 +1,317 @@
+"""
+BORIS
+Behavioral Observation Research Interactive Software
+Copyright 2012-2026 Olivier Friard
+
+This file is part of BORIS.
+
+  BORIS is free software; you can redistribute it and/or modify
+  it under the terms of the GNU General Public License as published by
+  the Free Software Foundation; either version 3 of the License, or
+  any later version.
+
+  BORIS is distributed in the hope that it will be useful,
+  but WITHOUT ANY WARRANTY; without even the implied warranty of
+  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+  GNU General Public License for more details.
+
+  You should have received a copy of the GNU General Public License
+  along with this program; if not see <http://www.gnu.org/licenses/>.
+
+Copy-on-write view of a project restricted to selected observations (used for the plugins).
+
+The view reads the original project dictionary without copying it.
+An observation (or a top-level entry of the project like the ethogram) is copied
+only when the plugin modifies it: the original project is never modified.
+The events lists of the selected observations are snapshotted (shallow copy) when the view is created,
+so the events recorded or edited in the meantime are not seen by a plugin running in a worker thread.
+
+The view is a Mapping, not a dict: isinstance(project, dict) is False and json.dumps(project) fails.
+Use project.to_python() to obtain a plain dictionary.
+"""
+
+import copy
+from collections.abc import MutableMapping, MutableSequence
+
+from . import config as cfg
+
+
+class _Section:
+    """
+    part of the project copied on first write (an observation or a top-level entry of the project)
+    """
+
+    __slots__ = ("original", "copy")
+
+    def __init__(self, original, owned: bool = False):
+        self.original = original
+        self.copy = original if owned else None
+
+    @property
+    def data(self):
+        return self.original if self.copy is None else self.copy
+
+    def materialize(self):
+        if self.copy is None:
+            self.copy = copy.deepcopy(self.original)
+        return self.copy
+
+
+def _resolve(obj, path: tuple):
+    for key in path:
+        obj = obj[key]
+    return obj
+
+
+def _wrap(section: _Section, path: tuple, value):
+    """
+    return a copy-on-write proxy for containers, the value for other types
+    """
+    if isinstance(value, dict):
+        return CowMapping(section, path)
+    if isinstance(value, list):
+        return CowList(section, path)
+    return value
+
+
+def _unwrap(value):
+    """
+    return a plain (deep copied) object for proxies
+    """
+    if isinstance(value, (CowMapping, CowList, ProjectView, ObservationsView)):
+        return value.to_python()
+    return value
+
+
+class CowMapping(MutableMapping):
+    """
+    copy-on-write proxy of a dictionary of the project
+    """
+
+    __slots__ = ("_section", "_path")
+
+    def __init__(self, section: _Section, path: tuple = ()):
+        self._section = section
+        self._path = path
+
+    def _target(self) -> dict:
+        return _resolve(self._section.data, self._path)
+
+    def _writable_target(self) -> dict:
+        return _resolve(self._section.materialize(), self._path)
+
+    def __getitem__(self, key):
+        return _wrap(self._section, self._path + (key,), self._target()[key])
+
+    def __setitem__(self, key, value):
+        self._writable_target()[key] = _unwrap(value)
+
+    def __delitem__(self, key):
+        del self._writable_target()[key]
+
+    def __iter__(self):
+        return iter(list(self._target()))
+
+    def __len__(self):
+        return len(self._target())
+
+    def __contains__(self, key):
+        return key in self._target()
+
+    def __repr__(self):
+        return repr(self._target())
+
+    def copy(self) -> dict:
+        return self.to_python()
+
+    def to_python(self) -> dict:
+        """
+        return a deep copy as dict
+        """
+        return copy.deepcopy(self._target())
+
+
+class CowList(MutableSequence):
+    """
+    copy-on-write proxy of a list of the project (events, media files...)
+    """
+
+    __slots__ = ("_section", "_path")
+
+    def __init__(self, section: _Section, path: tuple = ()):
+        self._section = section
+        self._path = path
+
+    def _target(self) -> list:
+        return _resolve(self._section.data, self._path)
+
+    def _writable_target(self) -> list:
+        return _resolve(self._section.materialize(), self._path)
+
+    def __getitem__(self, index):
+        target = self._target()
+        if isinstance(index, slice):
+            return [_wrap(self._section, self._path + (idx,), target[idx]) for idx in range(len(target))[index]]
+        if index < 0:
+            index += len(target)
+        return _wrap(self._section, self._path + (index,), target[index])
+
+    def __setitem__(self, index, value):
+        if isinstance(index, slice):
+            self._writable_target()[index] = [_unwrap(x) for x in value]
+        else:
+            self._writable_target()[index] = _unwrap(value)
+
+    def __delitem__(self, index):
+        del self._writable_target()[index]
+
+    def __len__(self):
+        return len(self._target())
+
+    def insert(self, index, value):
+        self._writable_target().insert(index, _unwrap(value))
+
+    def sort(self, *args, **kwargs):
+        self._writable_target().sort(*args, **kwargs)
+
+    def __eq__(self, other):
+        if isinstance(other, (list, CowList)):
+            return self._target() == (other._target() if isinstance(other, CowList) else other)
+        return NotImplemented
+
+    def __repr__(self):
+        return repr(self._target())
+
+    def copy(self) -> list:
+        return self.to_python()
+
+    def to_python(self) -> list:
+        """
+        return a deep copy as list
+        """
+        return copy.deepcopy(self._target())
+
+
+def _snapshot_observation(observation: dict) -> dict:
+    """
+    shallow copy of an observation with a shallow copy of its events list.
+    The events rows are not copied: an edited event is replaced in the events list, not modified in place
+    """
+    snapshot = dict(observation)
+    if isinstance(snapshot.get(cfg.EVENTS), list):
+        snapshot[cfg.EVENTS] = list(snapshot[cfg.EVENTS])
+    return snapshot
+
+
+class ObservationsView(MutableMapping):
+    """
+    observations of the project restricted to the selected observations.
+    Each observation is copied on first write
+    """
+
+    def __init__(self, observations: dict, selected_observations: list):
+        selected = set(selected_observations)
+        self._sections: dict = {
+            obs_id: _Section(_snapshot_observation(observations[obs_id])) for obs_id in observations if obs_id in selected
+        }
+
+    def __getitem__(self, obs_id):
+        return CowMapping(self._sections[obs_id])
+
+    def __setitem__(self, obs_id, observation):
+        self._sections[obs_id] = _Section(_unwrap(observation), owned=True)
+
+    def __delitem__(self, obs_id):
+        del self._sections[obs_id]
+
+    def __iter__(self):
+        return iter(list(self._sections))
+
+    def __len__(self):
+        return len(self._sections)
+
+    def __contains__(self, obs_id):
+        return obs_id in self._sections
+
+    def __repr__(self):
+        return f"ObservationsView({list(self._sections)})"
+
+    def modified_observations(self) -> list:
+        """
+        list of observations id copied after modification by the plugin
+        """
+        return [obs_id for obs_id, section in self._sections.items() if section.copy is not None]
+
+    def to_python(self) -> dict:
+        return {obs_id: copy.deepcopy(section.data) for obs_id, section in self._sections.items()}
+
+
+class ProjectView(MutableMapping):
+    """
+    copy-on-write view of a project restricted to selected observations
+
+    The view behaves like the project dictionary. Only the events lists of the selected observations
+    are copied (shallow copy) when the view is created. Nothing else is copied until the plugin
+    modifies an observation or a top-level entry (only this part is copied).
+    The view is not a dict: use to_python() to obtain a plain dictionary (e.g. for isinstance checks or JSON serialization).
+    """
+
+    def __init__(self, pj: dict, selected_observations: list):
+        """
+        Args:
+            pj (dict): project dictionary (not modified)
+            selected_observations (list): observations visible in the view
+        """
+        self._sections: dict = {}
+        for key in pj:
+            if key == cfg.OBSERVATIONS:
+                self._sections[key] = ObservationsView(pj[cfg.OBSERVATIONS], selected_observations)
+            elif isinstance(pj[key], (dict, list)):
+                self._sections[key] = _Section(pj[key])
+            else:
+                self._sections[key] = pj[key]
+
+    def __getitem__(self, key):
+        value = self._sections[key]
+        if isinstance(value, _Section):
+            return _wrap(value, (), value.data)
+        return value
+
+    def __setitem__(self, key, value):
+        if key == cfg.OBSERVATIONS and isinstance(value, ObservationsView):
+            self._sections[key] = value
+            return
+        value = _unwrap(value)
+        self._sections[key] = _Section(value, owned=True) if isinstance(value, (dict, list)) else value
+
+    def __delitem__(self, key):
+        del self._sections[key]
+
+    def __iter__(self):
+        return iter(list(self._sections))
+
+    def __len__(self):
+        return len(self._sections)
+
+    def __contains__(self, key):
+        return key in self._sections
+
+    def __repr__(self):
+        return f"ProjectView({list(self._sections)})"
+
+    def copy(self) -> dict:
+        return self.to_python()
+
+    def to_python(self) -> dict:
+        """
+        return a deep copy of the view as a plain project dictionary
+        """
+        out: dict = {}
+        for key, value in self._sections.items():
+            if isinstance(value, _Section):
+                out[key] = copy.deepcopy(value.data)
+            elif isinstance(value, ObservationsView):
+                out[key] = value.to_python()
+            else:
+                out[key] = value
+        return out
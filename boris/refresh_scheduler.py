@@ -0,0 +1,95 @@
+"""
+BORIS
+Behavioral Observation Research Interactive Software
+Copyright 2012-2026 Olivier Friard
+
+This file is part of BORIS.
+
+  BORIS is free software; you can redistribute it and/or modify
+  it under the terms of the GNU General Public License as published by
+  the Free Software Foundation; either version 3 of the License, or
+  any later version.
+
+  BORIS is distributed in the hope that it will be useful,
+  but WITHOUT ANY WARRANTY; without even the implied warranty of
+  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+  GNU General Public License for more details.
+
+  You should have received a copy of the GNU General Public License
+  along with this program; if not see <http://www.gnu.org/licenses/>.
+
+"""
+
+from PySide6.QtCore import QObject, QTimer, Slot
+
+from . import config as cfg
+
+
+class RefreshScheduler(QObject):
+    """
+    coalesce the time-pos notifications of the media player to a UI refresh rate
+
+    The check function (e.g. end of observation interval, scan sampling) is called for every new position.
+    The refresh function (status, current states, events table, slider...) is called
+    at most refresh_rate times per second with the last notified position.
+    Notifications with an unchanged position are ignored.
+    """
+
+    def __init__(self, check_function, refresh_function, refresh_rate: float = cfg.UI_REFRESH_RATE_DEFAULT_VALUE, parent=None):
+        """
+        Args:
+            check_function (callable): function called with the position at every notification
+            refresh_function (callable): function called with the position at the refresh rate
+            refresh_rate (float): maximum number of refreshes by second
+        """
+        super().__init__(parent)
+        self.check_function = check_function
+        self.refresh_function = refresh_function
+
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self.refresh)
+        self.set_refresh_rate(refresh_rate)
+
+        self.reset()
+
+    def set_refresh_rate(self, refresh_rate: float) -> None:
+        """
+        set the maximum number of refreshes by second (<= 0 to refresh at every notification)
+        """
+        self._timer.setInterval(round(1000 / refresh_rate) if refresh_rate > 0 else 0)
+
+    def reset(self) -> None:
+        """
+        forget the last positions and cancel the pending refresh (e.g. when an observation is opened or closed)
+        """
+        self._timer.stop()
+        self._last_position: float | None = None
+        self._pending_position: float | None = None
+        self._refreshed_position: float | None = None
+
+    @Slot(float)
+    def notify(self, position: float) -> None:
+        """
+        new position of the media player
+        """
+        if position == self._last_position:
+            return
+        self._last_position = position
+
+        self.check_function(position)
+
+        self._pending_position = position
+        if not self._timer.isActive():
+            self._timer.start()
+
+    @Slot()
+    def refresh(self) -> None:
+        """
+        call the refresh function with the last notified position if it was not already refreshed
+        """
+        position, self._pending_position = self._pending_position, None
+        if position is None or position == self._refreshed_position:
+            return
+        self._refreshed_position = position
+        self.refresh_function(position)
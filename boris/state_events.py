@@ -26,7 +26,7 @@ from decimal import Decimal as dec
 from PySide6.QtWidgets import QAbstractItemView, QMessageBox
 
 from . import config as cfg
-from . import dialog, project_functions, select_observations
+from . import dialog, event_operations, event_store, project_functions, select_observations
 
 
 def check_state_events(self, mode: str = "all") -> None:
@@ -137,10 +137,9 @@ def fix_unpaired_events(self, silent_mode: bool = False):
                         event[cfg.PJ_OBS_FIELDS[cfg.MEDIA][cfg.FRAME_INDEX]] = frame_idx
                 self.seek_mediaplayer(mem_time)
 
-            self.pj[cfg.OBSERVATIONS][self.observationId][cfg.EVENTS].extend(events_to_add)
+            event_operations.fill_events_undo_list(self, "Undo 'Fix unpaired state events'")
+            self.insert_events(events_to_add)
             self.project_changed()
-            self.pj[cfg.OBSERVATIONS][self.observationId][cfg.EVENTS].sort(key=lambda x: x[:3])
-            self.load_tw_events(self.observationId)
 
             index = self.tv_events.model().index(
                 [
@@ -170,16 +169,20 @@ def fix_unpaired_events(self, silent_mode: bool = False):
                     self.pj[cfg.ETHOGRAM], self.pj[cfg.OBSERVATIONS][obs_id], fix_at_time
                 )
                 if events_to_add:
-                    events_backup = self.pj[cfg.OBSERVATIONS][obs_id][cfg.EVENTS][:]
-                    self.pj[cfg.OBSERVATIONS][obs_id][cfg.EVENTS].extend(events_to_add)
+                    hunks: list = []
+                    positions = event_store.insert_events(
+                        self.pj[cfg.OBSERVATIONS][obs_id][cfg.EVENTS], events_to_add, self.pj[cfg.OBSERVATIONS][obs_id][cfg.TYPE], hunks
+                    )
 
                     # check if modified obs if fixed
                     r, msg = project_functions.check_state_events_obs(obs_id, self.pj[cfg.ETHOGRAM], self.pj[cfg.OBSERVATIONS][obs_id])
                     if "NOT PAIRED" in msg.upper():
                         out += f"The observation <b>{obs_id}</b> can not be automatically fixed.<br><br>"
-                        self.pj[cfg.OBSERVATIONS][obs_id][cfg.EVENTS] = events_backup
+                        event_store.remove_events(self.pj[cfg.OBSERVATIONS][obs_id][cfg.EVENTS], positions)
                     else:
                         out += f"<b>{obs_id}</b><br>"
+                        if self.project_journal is not None:
+                            self.project_journal.events_changed(obs_id, hunks)
                         self.project_changed()
         if out:
             out = "The following observations were modified to fix the unpaired state events:<br><br>" + out
@@ -33,6 +33,7 @@ import tablib
 from . import config as cfg
 from . import db_functions, observation_operations, project_functions
 from . import portion as I
+from . import utilities as util
 
 
 def default_value(ethogram: dict, behavior_code: str, param):
@@ -135,21 +136,23 @@ def synthetic_time_budget_bin(pj: dict, selected_observations: list, parameters_
         tablib.Dataset: dataset containing synthetic time budget data
     """
 
-    def interval_len(interval):
-        return dec(0) if interval.empty else sum([x.upper - x.lower for x in interval])
+    # the intervals are built with times in integer milliseconds (converted in seconds for the results)
+
+    def interval_len(interval) -> int:
+        return 0 if interval.empty else sum([x.upper - x.lower for x in interval])
 
     def interval_number(interval):
         return dec(0) if interval.empty else len(interval)
 
     def interval_mean(interval):
-        return dec(0) if interval.empty else sum([x.upper - x.lower for x in interval]) / len(interval)
+        return dec(0) if interval.empty else util.ms_to_time(interval_len(interval)) / len(interval)
 
     def interval_std_dev(interval) -> str:
         if interval.empty:
             return cfg.NA
         else:
             try:
-                return f"{statistics.stdev([x.upper - x.lower for x in interval]):.3f}"
+                return f"{statistics.stdev([util.ms_to_time(x.upper - x.lower) for x in interval]):.3f}"
             except Exception:
                 return cfg.NA
 
@@ -293,7 +296,9 @@ def synthetic_time_budget_bin(pj: dict, selected_observations: list, parameters_
                 mem_events_interval[current_subject][(event[cfg.EVENT_BEHAVIOR_FIELD_IDX], modif)] = []
 
             if event[cfg.EVENT_BEHAVIOR_FIELD_IDX] in state_events_list:
-                mem_events_interval[current_subject][(event[cfg.EVENT_BEHAVIOR_FIELD_IDX], modif)].append(event[cfg.EVENT_TIME_FIELD_IDX])
+                mem_events_interval[current_subject][(event[cfg.EVENT_BEHAVIOR_FIELD_IDX], modif)].append(
+                    util.time_to_ms(event[cfg.EVENT_TIME_FIELD_IDX])
+                )
                 if len(mem_events_interval[current_subject][(event[cfg.EVENT_BEHAVIOR_FIELD_IDX], modif)]) == 2:
                     events_interval[current_subject][(event[cfg.EVENT_BEHAVIOR_FIELD_IDX], modif)] |= I.closedopen(
                         mem_events_interval[current_subject][(event[cfg.EVENT_BEHAVIOR_FIELD_IDX], modif)][0],
@@ -302,17 +307,20 @@ def synthetic_time_budget_bin(pj: dict, selected_observations: list, parameters_
                     mem_events_interval[current_subject][(event[cfg.EVENT_BEHAVIOR_FIELD_IDX], modif)] = []
             else:
                 events_interval[current_subject][(event[cfg.EVENT_BEHAVIOR_FIELD_IDX], modif)] |= I.singleton(
-                    event[cfg.EVENT_TIME_FIELD_IDX]
+                    util.time_to_ms(event[cfg.EVENT_TIME_FIELD_IDX])
                 )
 
-        time_bin_start = min_time
+        # time bins in integer milliseconds
+        max_time_ms = util.time_to_ms(max_time)
+        time_bin_size_ms = util.time_to_ms(time_bin_size)
+        time_bin_start = util.time_to_ms(min_time)
 
-        if time_bin_size:
-            time_bin_end = time_bin_start + time_bin_size
-            if time_bin_end > max_time:
-                time_bin_end = max_time
+        if time_bin_size_ms:
+            time_bin_end = time_bin_start + time_bin_size_ms
+            if time_bin_end > max_time_ms:
+                time_bin_end = max_time_ms
         else:
-            time_bin_end = max_time
+            time_bin_end = max_time_ms
 
         while True:
             for subject in events_interval:
@@ -333,14 +341,14 @@ def synthetic_time_budget_bin(pj: dict, selected_observations: list, parameters_
                     behav_type = project_functions.event_type(behav[0], pj[cfg.ETHOGRAM])
                     if behav_type in cfg.STATE_EVENT_TYPES:
                         dur = interval_len(interval_intersec)
-                        behaviors[subject][behav]["duration"] = f"{dur:.3f}"
+                        behaviors[subject][behav]["duration"] = f"{util.ms_to_time(dur):.3f}"
                         behaviors[subject][behav]["duration mean"] = f"{interval_mean(interval_intersec):.3f}"
                         behaviors[subject][behav]["duration stdev"] = interval_std_dev(interval_intersec)
 
                         if behav[0] in parameters_obs.get(cfg.EXCLUDED_BEHAVIORS, []):
-                            proportion = dur / (time_bin_end - time_bin_start)
+                            proportion = dec(dur) / dec(time_bin_end - time_bin_start)
                         else:
-                            proportion = dur / ((time_bin_end - time_bin_start) - time_to_subtract)
+                            proportion = dec(dur) / dec((time_bin_end - time_bin_start) - time_to_subtract)
                         behaviors[subject][behav]["proportion of time"] = f"{proportion:.3f}"
 
                     if behav_type in cfg.POINT_EVENT_TYPES:
@@ -349,7 +357,7 @@ def synthetic_time_budget_bin(pj: dict, selected_observations: list, parameters_
                         behaviors[subject][behav]["duration stdev"] = cfg.NA
                         behaviors[subject][behav]["proportion of time"] = cfg.NA
 
-            columns = [obs_id, f"{max_time - min_time:.3f}", f"{time_bin_start:.3f}-{time_bin_end:.3f}"]
+            columns = [obs_id, f"{max_time - min_time:.3f}", f"{util.ms_to_time(time_bin_start):.3f}-{util.ms_to_time(time_bin_end):.3f}"]
             for subject in parameters_obs[cfg.SELECTED_SUBJECTS]:
                 for behavior_modifiers in distinct_behav_modif:
                     behavior, modifiers = behavior_modifiers
@@ -361,9 +369,9 @@ def synthetic_time_budget_bin(pj: dict, selected_observations: list, parameters_
             data_report.append(columns)
 
             time_bin_start = time_bin_end
-            time_bin_end = time_bin_start + time_bin_size
-            if time_bin_end > max_time:
-                time_bin_end = max_time
+            time_bin_end = time_bin_start + time_bin_size_ms
+            if time_bin_end > max_time_ms:
+                time_bin_end = max_time_ms
 
             if time_bin_start == time_bin_end:
                 break
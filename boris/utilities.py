@@ -20,12 +20,14 @@ This file is part of BORIS.
 
 """
 
+import bisect
 import csv
 import datetime
 import datetime as dt
 import json
 import logging
 import math
+import multiprocessing
 import os
 import platform
 import re
@@ -36,6 +38,8 @@ import sys
 import urllib.parse
 import urllib.request
 import wave
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from decimal import ROUND_DOWN, getcontext
 from decimal import Decimal as dec
 from pathlib import Path
@@ -54,6 +58,9 @@ from PySide6.QtGui import QImage, QPixmap
 from . import config as cfg
 from . import version
 
+# the time conversions are defined without GUI for the processes of the process pools
+from .event_index import ms_to_time, time_to_ms  # noqa: F401
+
 logger = logging.getLogger(__name__)
 
 if (sys.platform.startswith("win") or sys.platform.startswith("linux")) and ("-i" not in sys.argv) and ("--ipc" not in sys.argv):
@@ -429,14 +436,53 @@ def convert_time_to_decimal(pj: dict) -> dict:
                 pj[cfg.OBSERVATIONS][obs_id][cfg.TIME_OFFSET] = dec(str(pj[cfg.OBSERVATIONS][obs_id][cfg.TIME_OFFSET]))
             else:
                 pj[cfg.OBSERVATIONS][obs_id][cfg.TIME_OFFSET] = dec("0.000")
-        for idx, _ in enumerate(pj[cfg.OBSERVATIONS][obs_id][cfg.EVENTS]):
-            pj[cfg.OBSERVATIONS][obs_id][cfg.EVENTS][idx][cfg.EVENT_TIME_FIELD_IDX] = dec(
-                pj[cfg.OBSERVATIONS][obs_id][cfg.EVENTS][idx][cfg.EVENT_TIME_FIELD_IDX]
-            ).quantize(dec(".001"))
+        # the events of an observation loaded lazily are converted when they are loaded (see project_loader)
+        if not getattr(pj[cfg.OBSERVATIONS][obs_id], "events_loaded", True):
+            continue
+        convert_events_time_to_decimal(pj[cfg.OBSERVATIONS][obs_id][cfg.EVENTS])
 
     return pj
 
 
+def convert_events_time_to_decimal(events: list) -> list:
+    """
+    convert time of events from float to decimal (events are modified in place)
+
+    Args:
+        events (list): list of events
+
+    Returns:
+        list: list of events
+    """
+    for event in events:
+        event[cfg.EVENT_TIME_FIELD_IDX] = dec(event[cfg.EVENT_TIME_FIELD_IDX]).quantize(dec(".001"))
+    return events
+
+
+def parallel_map(function, arguments: list) -> list:
+    """
+    apply function to every item of arguments in a process pool
+    (in the current process if there is only one task or CPU or if the pool can not be started).
+    The caller decides if the work is large enough for the cost of starting the processes.
+
+    Args:
+        function: function defined at the top level of a module that does not import the GUI (picklable)
+        arguments (list): argument of function for every task
+
+    Returns:
+        list: results in the order of arguments
+    """
+    n_workers = min(len(arguments), os.cpu_count() or 1)
+    if n_workers > 1:
+        try:
+            # spawn: the GUI process must not be forked
+            with ProcessPoolExecutor(max_workers=n_workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+                return list(executor.map(function, arguments))
+        except (OSError, BrokenProcessPool):
+            logging.warning("The process pool can not be used, the tasks are run sequentially")
+    return [function(x) for x in arguments]
+
+
 def count_media_file(media_files: dict) -> int:
     """
     count number of media file for observation
@@ -700,17 +746,18 @@ def get_current_states_modifiers_by_subject(
         return current_states
 
     # check if time contains NA
-    if [x for x in events if x[cfg.EVENT_TIME_FIELD_IDX].is_nan()]:
+    if any(x[cfg.EVENT_TIME_FIELD_IDX].is_nan() for x in events):
         check_index = cfg.PJ_OBS_FIELDS[cfg.IMAGES][cfg.IMAGE_INDEX]
     else:
         check_index = cfg.EVENT_TIME_FIELD_IDX
 
+    # events until time_ (the events are sorted): no time comparison in the loops
+    events = events[: bisect.bisect_right(events, time_, key=lambda x: x[check_index])]
+
     if include_modifiers:
         for idx in subjects:
             current_states[subjects[idx]["name"]] = {}
         for x in events:
-            if x[check_index] > time_:
-                break
             if x[cfg.EVENT_BEHAVIOR_FIELD_IDX] in state_behaviors_codes:
                 if (x[cfg.EVENT_BEHAVIOR_FIELD_IDX], x[cfg.EVENT_MODIFIER_FIELD_IDX]) not in current_states[x[cfg.EVENT_SUBJECT_FIELD_IDX]]:
                     current_states[x[cfg.EVENT_SUBJECT_FIELD_IDX]][(x[cfg.EVENT_BEHAVIOR_FIELD_IDX], x[cfg.EVENT_MODIFIER_FIELD_IDX])] = (
@@ -731,8 +778,6 @@ def get_current_states_modifiers_by_subject(
             for b in state_behaviors_codes:
                 current_states[subjects[idx]["name"]][b] = False
         for x in events:
-            if x[check_index] > time_:
-                break
             if x[cfg.EVENT_BEHAVIOR_FIELD_IDX] in state_behaviors_codes:
                 current_states[x[cfg.EVENT_SUBJECT_FIELD_IDX]][x[cfg.EVENT_BEHAVIOR_FIELD_IDX]] = not current_states[
                     x[cfg.EVENT_SUBJECT_FIELD_IDX]
@@ -745,41 +790,25 @@ def get_current_states_modifiers_by_subject(
     return r
 
 
-def get_current_states_modifiers_by_subject_2(state_behaviors_codes: list, events: list, subjects: dict, time: dec) -> dict:
+def get_current_states_modifiers_by_subject_2(index, subjects: dict, time: dec) -> dict:
     """
     get current states and modifiers for subjects at given time
     differs from get_current_states_modifiers_by_subject in the output format: [behavior, modifiers]
 
     Args:
-        state_behaviors_codes (list): list of behavior codes defined as STATE event
-        events (list): list of events
+        index (event_index.EventIntervalIndex): interval index of the events (see event_index.observation_index)
         subjects (dict): dictionary of subjects
         time (Decimal): time
 
     Returns:
         dict: current states by subject. dict of list
     """
-    current_states = {}
-    for idx in subjects:
-        current_states[idx] = []
-        for sbc in state_behaviors_codes:
-            bl = [
-                (x[cfg.EVENT_BEHAVIOR_FIELD_IDX], x[cfg.EVENT_MODIFIER_FIELD_IDX])
-                for x in events
-                if x[cfg.EVENT_SUBJECT_FIELD_IDX] == subjects[idx][cfg.SUBJECT_NAME]
-                and x[cfg.EVENT_BEHAVIOR_FIELD_IDX] == sbc
-                and x[cfg.EVENT_TIME_FIELD_IDX] <= time
-            ]
-
-            if len(bl) % 2:  # test if odd
-                current_states[idx].append(bl[-1])
-
-    return current_states
+    return {idx: index.states_at(subjects[idx][cfg.SUBJECT_NAME], time) for idx in subjects}
 
 
 def get_current_points_by_subject(
+    index,
     point_behaviors_codes: list,
-    events: list,
     subjects: dict,
     time: dec,
     tolerance: dec,
@@ -789,8 +818,8 @@ def get_current_points_by_subject(
     get point events for subjects between given time (time) and (time + tolerance)
     includes modifiers
     Args:
+        index (event_index.EventIntervalIndex): interval index of the events (see event_index.observation_index)
         point_behaviors_codes (list): list of behavior codes defined as POINT event
-        events (list): list of events
         subjects (dict): dictionary of subjects
         time (Decimal): time (s)
         tolerance (Decimal): tolerance (s)
@@ -799,29 +828,11 @@ def get_current_points_by_subject(
     Returns:
         dict: current point behaviors by subject. dict of list
     """
-
     current_points = {}
     for idx in subjects:
-        current_points[idx] = []
-        for sbc in point_behaviors_codes:
-            # if include_modifiers:
-            point_events = [
-                (x[cfg.EVENT_BEHAVIOR_FIELD_IDX], x[cfg.EVENT_MODIFIER_FIELD_IDX])
-                for x in events
-                if x[cfg.EVENT_SUBJECT_FIELD_IDX] == subjects[idx]["name"]
-                and x[cfg.EVENT_BEHAVIOR_FIELD_IDX] == sbc
-                # and abs(x[EVENT_TIME_FIELD_IDX] - time) <= tolerance
-                and time <= x[cfg.EVENT_TIME_FIELD_IDX] < (time + tolerance)
-            ]
-
-            # else:
-            #    point_events = [x[EVENT_BEHAVIOR_FIELD_IDX] for x in events
-            #                    if x[EVENT_SUBJECT_FIELD_IDX] == subjects[idx]["name"]
-            #                    and x[EVENT_BEHAVIOR_FIELD_IDX] == sbc
-            #                   # and abs(x[EVENT_TIME_FIELD_IDX] - time) <= tolerance
-            #                    and time <= x[EVENT_TIME_FIELD_IDX] < (time + tolerance)]
-            for point_event in point_events:
-                current_points[idx].append(point_event)
+        points = index.points_between(subjects[idx]["name"], time, time + tolerance)
+        # order by behavior
+        current_points[idx] = [point for sbc in point_behaviors_codes for point in points if point[0] == sbc]
 
     return current_points
 
@@ -21,7 +21,6 @@ Copyright 2012-2026 Olivier Friard
 
 """
 
-import bisect
 import logging
 from decimal import Decimal as dec
 import re
@@ -192,9 +191,6 @@ def write_event(self, event: dict, mem_time: dec) -> int:
                 )
                 return 1
 
-    # extract State events
-    state_behaviors_codes = util.state_behavior_codes(self.pj[cfg.ETHOGRAM])
-
     # index of current subject
     # subject_idx = self.subject_name_index[self.currentSubject] if self.currentSubject else ""
 
@@ -203,10 +199,8 @@ def write_event(self, event: dict, mem_time: dec) -> int:
     if self.pj[cfg.OBSERVATIONS][self.observationId][cfg.TYPE] == cfg.IMAGES:
         position = dec(image_idx)  # decimal to pass to util.get_current_states_modifiers_by_subject
 
-    current_states: dict = util.get_current_states_modifiers_by_subject(
-        state_behaviors_codes,
+    current_states: dict = self.current_states_cursor.current_states(
         self.pj[cfg.OBSERVATIONS][self.observationId][cfg.EVENTS],
-        dict(self.pj[cfg.SUBJECTS], **{"": {"name": ""}}),
         position,
         include_modifiers=False,
     )
@@ -319,6 +313,9 @@ def write_event(self, event: dict, mem_time: dec) -> int:
 
     logging.debug("save list of events for undo operation")
 
+    # events to insert in the events list (inserted in order with self.insert_events)
+    events_to_add: list = []
+
     if not editing_event:
         if self.currentSubject:
             csj: list = []  # list of current state for the current subject
@@ -364,7 +361,9 @@ def write_event(self, event: dict, mem_time: dec) -> int:
                     if e[2] == event[cfg.BEHAVIOR_CODE] and e[1] == self.currentSubject and e[3] == "":
                         mem_idx = idx
                 if mem_idx != -1:
-                    self.pj[cfg.OBSERVATIONS][self.observationId][cfg.EVENTS][mem_idx][3] = modifier_str
+                    new_event = list(self.pj[cfg.OBSERVATIONS][self.observationId][cfg.EVENTS][mem_idx])
+                    new_event[3] = modifier_str
+                    self.replace_events({mem_idx: new_event})
                     csj.remove(event[cfg.BEHAVIOR_CODE])
 
         for cs in csj:
@@ -424,97 +423,37 @@ def write_event(self, event: dict, mem_time: dec) -> int:
                                 if e[2] == behavior_to_stop[cfg.BEHAVIOR_CODE] and e[1] == self.currentSubject and e[3] == "":
                                     mem_idx = idx
                             if mem_idx != -1:
-                                self.pj[cfg.OBSERVATIONS][self.observationId][cfg.EVENTS][mem_idx][3] = behavior_to_stop_modifier_str
+                                new_event = list(self.pj[cfg.OBSERVATIONS][self.observationId][cfg.EVENTS][mem_idx])
+                                new_event[3] = behavior_to_stop_modifier_str
+                                self.replace_events({mem_idx: new_event})
 
                     else:
                         behavior_to_stop_modifier_str = cm[cs]
 
                 # add excluded state event to observations (= STOP them)
                 if self.pj[cfg.OBSERVATIONS][self.observationId][cfg.TYPE] in (cfg.LIVE):
-                    bisect.insort(
-                        self.pj[cfg.OBSERVATIONS][self.observationId][cfg.EVENTS],
-                        [mem_time - dec("0.001"), self.currentSubject, cs, behavior_to_stop_modifier_str, ""],
-                    )
+                    events_to_add.append([mem_time - dec("0.001"), self.currentSubject, cs, behavior_to_stop_modifier_str, ""])
 
                 if self.pj[cfg.OBSERVATIONS][self.observationId][cfg.TYPE] in (cfg.MEDIA):
-                    bisect.insort(
-                        self.pj[cfg.OBSERVATIONS][self.observationId][cfg.EVENTS],
-                        [mem_time - dec("0.001"), self.currentSubject, cs, behavior_to_stop_modifier_str, "", cfg.NA],
-                    )
+                    events_to_add.append([mem_time - dec("0.001"), self.currentSubject, cs, behavior_to_stop_modifier_str, "", cfg.NA])
 
                 if self.pj[cfg.OBSERVATIONS][self.observationId][cfg.TYPE] in (cfg.IMAGES):
-                    self.pj[cfg.OBSERVATIONS][self.observationId][cfg.EVENTS].append(
-                        [mem_time, self.currentSubject, cs, behavior_to_stop_modifier_str, "", image_idx, image_path]
-                    )
-
-                    # order by image index ASC
-                    self.pj[cfg.OBSERVATIONS][self.observationId][cfg.EVENTS].sort(
-                        key=lambda x: x[cfg.PJ_OBS_FIELDS[self.playerType][cfg.IMAGE_INDEX]]
-                    )
+                    events_to_add.append([mem_time, self.currentSubject, cs, behavior_to_stop_modifier_str, "", image_idx, image_path])
 
     # add event to pj
-    if editing_event:  # modifying event
-        if self.pj[cfg.OBSERVATIONS][self.observationId][cfg.TYPE] == cfg.MEDIA:
-            self.pj[cfg.OBSERVATIONS][self.observationId][cfg.EVENTS][event["row"]] = [
-                mem_time,
-                subject,
-                event[cfg.BEHAVIOR_CODE],
-                modifier_str,
-                comment,
-                frame_idx,
-            ]
-            # order events list using time, subject, behavior
-            self.pj[cfg.OBSERVATIONS][self.observationId][cfg.EVENTS].sort(key=lambda x: x[:3])
-
-        elif self.pj[cfg.OBSERVATIONS][self.observationId][cfg.TYPE] == cfg.LIVE:
-            self.pj[cfg.OBSERVATIONS][self.observationId][cfg.EVENTS][event["row"]] = [
-                mem_time,
-                subject,
-                event[cfg.BEHAVIOR_CODE],
-                modifier_str,
-                comment,
-            ]
-            # order events list using time, subject, behavior
-            self.pj[cfg.OBSERVATIONS][self.observationId][cfg.EVENTS].sort(key=lambda x: x[:3])
-
-        elif self.pj[cfg.OBSERVATIONS][self.observationId][cfg.TYPE] == cfg.IMAGES:
-            self.pj[cfg.OBSERVATIONS][self.observationId][cfg.EVENTS][event["row"]] = [
-                mem_time,
-                subject,
-                event[cfg.BEHAVIOR_CODE],
-                modifier_str,
-                comment,
-                image_idx,
-                image_path,
-            ]
-            # order by image index ASC
-            self.pj[cfg.OBSERVATIONS][self.observationId][cfg.EVENTS].sort(
-                key=lambda x: x[cfg.PJ_OBS_FIELDS[self.playerType][cfg.IMAGE_INDEX]]
-            )
+    if self.pj[cfg.OBSERVATIONS][self.observationId][cfg.TYPE] == cfg.MEDIA:
+        events_to_add.append([mem_time, subject, event[cfg.BEHAVIOR_CODE], modifier_str, comment, frame_idx])
+    elif self.pj[cfg.OBSERVATIONS][self.observationId][cfg.TYPE] == cfg.LIVE:
+        events_to_add.append([mem_time, subject, event[cfg.BEHAVIOR_CODE], modifier_str, comment])
+    elif self.pj[cfg.OBSERVATIONS][self.observationId][cfg.TYPE] == cfg.IMAGES:
+        events_to_add.append([mem_time, subject, event[cfg.BEHAVIOR_CODE], modifier_str, comment, image_idx, image_path])
 
-    else:  # add event
-        if self.pj[cfg.OBSERVATIONS][self.observationId][cfg.TYPE] == cfg.MEDIA:
-            bisect.insort(
-                self.pj[cfg.OBSERVATIONS][self.observationId][cfg.EVENTS],
-                [mem_time, subject, event[cfg.BEHAVIOR_CODE], modifier_str, comment, frame_idx],
-            )
-        elif self.pj[cfg.OBSERVATIONS][self.observationId][cfg.TYPE] == cfg.LIVE:
-            bisect.insort(
-                self.pj[cfg.OBSERVATIONS][self.observationId][cfg.EVENTS],
-                [mem_time, subject, event[cfg.BEHAVIOR_CODE], modifier_str, comment],
-            )
-
-        elif self.pj[cfg.OBSERVATIONS][self.observationId][cfg.TYPE] == cfg.IMAGES:
-            self.pj[cfg.OBSERVATIONS][self.observationId][cfg.EVENTS].append(
-                [mem_time, subject, event[cfg.BEHAVIOR_CODE], modifier_str, comment, image_idx, image_path]
-            )
-            # order by image index ASC
-            self.pj[cfg.OBSERVATIONS][self.observationId][cfg.EVENTS].sort(
-                key=lambda x: x[cfg.PJ_OBS_FIELDS[self.playerType][cfg.IMAGE_INDEX]]
-            )
+    if editing_event:  # modifying event
+        # the modified event is removed and inserted at its new position
+        self.remove_events([event["row"]])
 
-    # reload all events in tw
-    self.load_tw_events(self.observationId)
+    # insert events in the events list (ordered by time, subject, behavior or by image index) and update the events table
+    self.insert_events(events_to_add)
 
     self.project_changed()
 
@@ -523,10 +462,8 @@ def write_event(self, event: dict, mem_time: dec) -> int:
     # index of current subject selected by observer
     subject_idx = self.subject_name_index[self.currentSubject] if self.currentSubject else ""
 
-    self.currentStates = util.get_current_states_modifiers_by_subject(
-        self.state_behaviors_codes,
+    self.currentStates = self.current_states_cursor.current_states(
         self.pj[cfg.OBSERVATIONS][self.observationId][cfg.EVENTS],
-        dict(self.pj[cfg.SUBJECTS], **{"": {"name": ""}}),
         self.getLaps(),
         include_modifiers=True,
     )
@@ -20,4 +20,7 @@ This file is part of BORIS.
 
 """
 
-import boris.__main__
+from boris.__main__ import main
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+module for testing behavior_binary_table.py
+
+pytest -s -vv test_behavior_binary_table.py
+"""
+
+import json
+import os
+import sys
+from decimal import Decimal
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from boris import behavior_binary_table
+from boris import config as cfg
+from boris import event_index
+from boris import utilities
+
+
+class Test_binary_table_rows(object):
+    def test_states_and_points(self):
+        events = [
+            [Decimal("1"), "", "s", "", ""],
+            [Decimal("1.2"), "", "p", "", ""],
+            [Decimal("1.4"), "", "p", "", ""],
+            [Decimal("2"), "", "s", "", ""],
+            [Decimal("3"), "", "p", "", ""],
+        ]
+        index = event_index.EventIntervalIndex(events, ["s"])
+        rows = list(
+            behavior_binary_table.binary_table_rows(
+                index, "", [("p", ""), ("s", "")], ["s"], Decimal("0"), Decimal("3"), Decimal("0.5"), chunk_size=2
+            )
+        )
+        assert rows == [
+            [0.0, 0, 0],
+            [0.5, 0, 0],
+            [1.0, 2, 1],
+            [1.5, 0, 1],
+            [2.0, 0, 0],
+            [2.5, 0, 0],
+            [3.0, 1, 0],
+        ]
+
+    def test_end_before_start(self):
+        index = event_index.EventIntervalIndex([], ["s"])
+        assert list(behavior_binary_table.binary_table_rows(index, "", [("s", "")], ["s"], Decimal("5"), Decimal("1"), Decimal("1"))) == []
+
+
+class Test_create_behavior_binary_table(object):
+    def test_observation_1(self, tmp_path):
+        pj = utilities.convert_time_to_decimal(json.loads(open("files/test.boris").read()))
+        parameters = {
+            cfg.SELECTED_SUBJECTS: ["subject1"],
+            cfg.SELECTED_BEHAVIORS: ["s", "p"],
+            cfg.INCLUDE_MODIFIERS: False,
+            cfg.EXCLUDE_BEHAVIORS: False,
+            "time": cfg.TIME_ARBITRARY_INTERVAL,
+            cfg.START_TIME: Decimal("0"),
+            cfg.END_TIME: Decimal("10"),
+        }
+        results = behavior_binary_table.create_behavior_binary_table(pj, ["observation #1"], parameters, Decimal("1"))
+        headers, rows = results["observation #1"]["subject1"]
+        file_name = str(tmp_path / "binary_table.tsv")
+        behavior_binary_table.write_binary_table(file_name, cfg.TSV_EXT, headers, rows)
+        lines = open(file_name).read().splitlines()
+        assert lines[0].split("\t")[0] == "time"
+        assert len(lines) == 12
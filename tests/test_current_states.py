@@ -0,0 +1,87 @@
+"""
+module for testing current_states.py
+
+pytest -s -vv test_current_states.py
+"""
+
+import json
+import os
+import random
+import sys
+from decimal import Decimal
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from boris import current_states, event_store
+from boris import utilities
+
+
+class Test_current_states_cursor(object):
+    def test_forward_backward(self):
+        pj = utilities.convert_time_to_decimal(json.loads(open("files/test.boris").read()))
+        events = pj["observations"]["observation #1"]["events"]
+        cursor = current_states.CurrentStatesCursor(["s"], pj["subjects_conf"])
+        for t in ("0", "4", "8", "10", "40", "47", "5", "-12.456", "20", "20", "1000", "3.3"):
+            for include_modifiers in (False, True):
+                assert cursor.current_states(events, Decimal(t), include_modifiers=include_modifiers) == (
+                    utilities.get_current_states_modifiers_by_subject(
+                        ["s"],
+                        events,
+                        dict(pj["subjects_conf"], **{"": {"name": ""}}),
+                        Decimal(t),
+                        include_modifiers=include_modifiers,
+                    )
+                )
+
+    def test_with_modifiers(self):
+        pj = utilities.convert_time_to_decimal(json.loads(open("files/test.boris").read()))
+        events = pj["observations"]["observation #1"]["events"]
+        cursor = current_states.CurrentStatesCursor(["s"], pj["subjects_conf"])
+        assert cursor.current_states(events, Decimal("4"), include_modifiers=True) == {"0": ["s ()"], "1": [], "": []}
+
+    def test_events_list_modified(self):
+        pj = utilities.convert_time_to_decimal(json.loads(open("files/test.boris").read()))
+        events = pj["observations"]["observation #1"]["events"]
+        cursor = current_states.CurrentStatesCursor(["s"], pj["subjects_conf"])
+        assert cursor.current_states(events, Decimal("40")) == {"0": [], "1": ["s"], "": []}
+
+        # delete the STOP of subject1
+        events.pop(1)
+        assert cursor.current_states(events, Decimal("8")) == {"0": ["s"], "1": [], "": []}
+
+        # edit the START of subject1 in place
+        events[0][2] = "p"
+        cursor.invalidate()
+        assert cursor.current_states(events, Decimal("8")) == {"0": [], "1": [], "": []}
+
+    def test_apply_hunks(self):
+        pj = utilities.convert_time_to_decimal(json.loads(open("files/test.boris").read()))
+        events = pj["observations"]["observation #1"]["events"]
+        subjects = dict(pj["subjects_conf"], **{"": {"name": ""}})
+        cursor = current_states.CurrentStatesCursor(["s"], pj["subjects_conf"])
+        rng = random.Random(1)
+        for _ in range(200):
+            t = Decimal(rng.randint(0, 500)) / 10
+            assert cursor.current_states(events, t, include_modifiers=True) == utilities.get_current_states_modifiers_by_subject(
+                ["s"], events, subjects, t, include_modifiers=True
+            )
+            hunks: list = []
+            operation = rng.choice(("insert", "remove", "replace"))
+            if operation == "insert" or len(events) < 2:
+                event = [Decimal(rng.randint(0, 500)) / 10, rng.choice(["subject1", "subject2", ""]), rng.choice(["s", "p"]), "", ""]
+                event_store.insert_events(events, [event], "MEDIA", hunks)
+            elif operation == "remove":
+                event_store.remove_events(events, rng.sample(range(len(events)), rng.randint(1, 2)), hunks)
+            else:
+                position = rng.randrange(len(events))
+                event_store.replace_events(
+                    events, {position: events[position][:1] + [rng.choice(["subject1", "subject2"])] + events[position][2:]}, hunks
+                )
+            cursor.apply_hunks(events, hunks)
+            # the cursor is not restarted from the beginning of the events list
+            assert cursor._events is events
+
+    def test_nan(self):
+        pj = utilities.convert_time_to_decimal(json.loads(open("files/test.boris").read()))
+        cursor = current_states.CurrentStatesCursor(["s"], pj["subjects_conf"])
+        assert cursor.current_states(pj["observations"]["observation #1"]["events"], Decimal("NaN")) == {"0": [], "1": [], "": []}
@@ -14,7 +14,9 @@ import json
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
+from boris import config as cfg
 from boris import db_functions
+from boris import utilities
 
 
 class Test_load_events_in_db(object):
@@ -66,6 +68,15 @@ class Test_load_events_in_db(object):
 
         assert out == REF
 
+    def test_cache_size_indexes(self):
+        pj = utilities.convert_time_to_decimal(json.loads(open("files/test.boris").read()))
+
+        cursor = db_functions.load_events_in_db(pj, ["subject1", "No focal subject"], ["observation #1"], ["s"], cache_size_kib=8192)
+        assert cursor.execute("PRAGMA cache_size").fetchone()[0] == -8192
+        cursor.execute("SELECT occurence FROM events WHERE subject = ? AND code = ?", ("subject1", "s"))
+        assert [r[0] for r in cursor.fetchall()] == [3.3, 7.75, 9.9, 16.2, 18.35, 24.475]
+        assert len(cursor.execute("SELECT name FROM sqlite_master WHERE type = 'index'").fetchall()) == 4
+
 
 class Test_load_aggregated_events_in_db(object):
     def test_dump(self):
@@ -99,3 +110,49 @@ class Test_load_aggregated_events_in_db(object):
         ok, msg, db = db_functions.load_aggregated_events_in_db(pj, [], [], [])
 
         assert ok == False
+
+
+class Test_aggregated_events_rows(object):
+    def test_observation_1(self):
+        pj = utilities.convert_time_to_decimal(json.loads(open("files/test.boris").read()))
+
+        rows = db_functions.aggregated_events_rows(pj, "observation #1", ["subject1"], ["s"], ["s"], [])
+        assert [(row[5], row[6]) for row in rows] == [(3.3, 7.75), (9.9, 16.2), (18.35, 24.475)]
+        assert {row[3] for row in rows} == {"STATE"}
+
+    def test_point_events(self):
+        pj = utilities.convert_time_to_decimal(json.loads(open("files/test.boris").read()))
+
+        rows = db_functions.aggregated_events_rows(pj, "observation #1", ["subject1", "subject2"], ["p"], [], ["p"])
+        assert all(row[5] == row[6] for row in rows)
+        assert [row[1] for row in rows] == sorted((row[1] for row in rows), key=["subject1", "subject2"].index)
+
+
+class Test_analysis_cache(object):
+    def test_cache(self):
+        pj = utilities.convert_time_to_decimal(json.loads(open("files/test.boris").read()))
+        db_functions.enable_analysis_cache()
+        try:
+            ok, msg, db = db_functions.load_aggregated_events_in_db(pj, ["subject1"], ["observation #1"], ["s"])
+            n_rows = db.execute("SELECT COUNT(*) FROM aggregated_events").fetchone()[0]
+            # the analyses can modify the returned database
+            db.execute("DELETE FROM aggregated_events")
+
+            # same selection: database from cache
+            pj[cfg.OBSERVATIONS]["observation #1"][cfg.EVENTS] = []
+            ok, msg, db = db_functions.load_aggregated_events_in_db(pj, ["subject1"], ["observation #1"], ["s"])
+            assert db.execute("SELECT COUNT(*) FROM aggregated_events").fetchone()[0] == n_rows
+
+            # project changed
+            db_functions.invalidate_analysis_cache()
+            ok, msg, db = db_functions.load_aggregated_events_in_db(pj, ["subject1"], ["observation #1"], ["s"])
+            assert db.execute("SELECT COUNT(*) FROM aggregated_events").fetchone()[0] == 0
+
+            # another project
+            cursor = db_functions.load_events_in_db(pj, ["subject1"], ["observation #1"], ["s"])
+            assert cursor.execute("SELECT COUNT(*) FROM events").fetchone()[0] == 0
+            pj2 = utilities.convert_time_to_decimal(json.loads(open("files/test.boris").read()))
+            cursor = db_functions.load_events_in_db(pj2, ["subject1"], ["observation #1"], ["s"])
+            assert cursor.execute("SELECT COUNT(*) FROM events").fetchone()[0] == n_rows * 2
+        finally:
+            db_functions.enable_analysis_cache(False)
@@ -0,0 +1,165 @@
+"""
+module for testing event_columns.py
+
+pytest -s -vv test_event_columns.py
+"""
+
+import json
+import random
+import os
+import sys
+from decimal import Decimal
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from boris import config as cfg
+from boris import event_columns
+from boris import event_index
+from boris import event_store
+from boris import utilities
+
+
+def project():
+    return utilities.convert_time_to_decimal(json.loads(open("files/test.boris").read()))
+
+
+class Test_event_columns(object):
+    def test_round_trip(self):
+        pj = project()
+        for obs_id in pj[cfg.OBSERVATIONS]:
+            events = pj[cfg.OBSERVATIONS][obs_id][cfg.EVENTS]
+            columns = event_columns.EventColumns.from_events(events)
+            assert len(columns) == len(events)
+            assert json.dumps(columns.to_events(), default=utilities.decimal_default) == json.dumps(
+                events, default=utilities.decimal_default
+            )
+
+    def test_columns(self):
+        events = [
+            [Decimal("1.5"), "s1", "a", "", "", 10],
+            [Decimal("2"), "", "b", "m", "comment", cfg.NA],
+            [Decimal("3.25"), "s1", "a", "", ""],
+        ]
+        columns = event_columns.EventColumns.from_events(events)
+        assert columns.time_ms.tolist() == [1500, 2000, 3250]
+        assert columns.frame_idx.tolist() == [10, event_columns.FRAME_NA, event_columns.FRAME_NONE]
+        assert columns.subject_codes.tolist() == [0, 1, 0]
+        assert columns.mask(cfg.EVENT_BEHAVIOR_FIELD_IDX, ["a"]).tolist() == [True, False, True]
+        assert np.allclose(columns.times(), [1.5, 2, 3.25])
+        assert not columns.time_ms.flags.writeable
+        assert columns[-1] == [Decimal("3.250"), "s1", "a", "", ""]
+
+    def test_nan(self):
+        events = [[Decimal("NaN"), "", "a", "", "", 1, "1.jpg"]]
+        columns = event_columns.EventColumns.from_events(events)
+        assert columns[0][0].is_nan()
+        assert columns[0][1:] == events[0][1:]
+        assert np.isnan(columns.times()[0])
+
+    def test_list_interface(self):
+        events = [[Decimal(str(t)), "", "a", "", ""] for t in range(10)]
+        columns = event_columns.EventColumns.from_events(events)
+        new_events = [[Decimal("2.5"), "", "b", "", ""], [Decimal("20"), "s", "a", "", ""]]
+        assert event_store.insert_events(columns, new_events, cfg.LIVE) == event_store.insert_events(events, new_events, cfg.LIVE)
+        assert columns == events
+        del columns[3]
+        del events[3]
+        columns[0] = [Decimal("0.1"), "", "c", "", ""]
+        events[0] = [Decimal("0.1"), "", "c", "", ""]
+        assert columns == events
+
+    def test_interval_index(self):
+        pj = project()
+        state_behaviors = utilities.state_behavior_codes(pj[cfg.ETHOGRAM])
+        for obs_id in pj[cfg.OBSERVATIONS]:
+            events = pj[cfg.OBSERVATIONS][obs_id][cfg.EVENTS]
+            from_list = event_index.EventIntervalIndex(events, state_behaviors)
+            from_columns = event_index.EventIntervalIndex(event_columns.EventColumns.from_events(events), state_behaviors)
+            assert from_list.state_keys == from_columns.state_keys
+            assert from_list.point_keys == from_columns.point_keys
+            for key in from_list.state_keys:
+                for list_times, columns_times in zip(from_list.state_intervals(key), from_columns.state_intervals(key)):
+                    assert np.allclose(list_times, columns_times, equal_nan=True)
+
+    def test_apply_hunk(self):
+        events = [[Decimal(str(t)), "", "a", "", ""] for t in range(6)]
+        columns = event_columns.EventColumns.from_events(events)
+        for hunk in (
+            (1, [events[1], events[2]], [[Decimal("1.5"), "s", "b", "m", "c"]]),
+            (0, [], [[Decimal("0"), "", "c", "", ""], [Decimal("0.5"), "", "c", "", ""]]),
+            (3, [events[3]], [[Decimal("3"), "", "d", "", ""]]),
+        ):
+            event_store.apply_hunk(events, hunk)
+            columns.apply_hunk(hunk)
+            assert columns == events
+        columns[1:3] = [[Decimal("9"), "", "e", "", ""]]
+        events[1:3] = [[Decimal("9"), "", "e", "", ""]]
+        assert columns == events
+
+
+class Test_columnar_store(object):
+    def test_opt_in(self):
+        events = [[Decimal("1"), "", "a", "", ""]]
+        assert event_columns.observation_columns(events) is None
+        event_columns.enable_columnar_store()
+        try:
+            columns = event_columns.observation_columns(events)
+            assert columns == events
+            assert event_columns.observation_columns(events) is columns
+        finally:
+            event_columns.enable_columnar_store(False)
+        assert event_columns.tracked_columns(events) is None
+
+    def test_sync(self):
+        """
+        the columnar copy is modified with the events list by event_store (also when undoing with the hunks)
+        """
+        rng = random.Random(1)
+
+        def random_event():
+            return [Decimal(rng.randint(0, 2000)).scaleb(-2), rng.choice(["", "s1"]), rng.choice("abc"), rng.choice(["", "m"]), ""]
+
+        events = sorted([random_event() for _ in range(50)], key=lambda event: event[:3])
+        event_columns.enable_columnar_store()
+        try:
+            columns = event_columns.observation_columns(events)
+            undo: list = []
+            for _ in range(100):
+                hunks: list = []
+                operation = rng.random()
+                if operation < 0.4 or not events:
+                    event_store.insert_events(events, [random_event() for _ in range(rng.randint(1, 3))], cfg.LIVE, hunks)
+                elif operation < 0.7:
+                    event_store.remove_events(events, rng.sample(range(len(events)), min(len(events), rng.randint(1, 4))), hunks)
+                else:
+                    position = rng.randrange(len(events))
+                    event_store.replace_events(events, {position: events[position][:4] + ["comment"]}, hunks)
+                undo.append(hunks)
+                assert event_columns.observation_columns(events) is columns
+                assert columns == events
+            while undo:
+                for position, old_rows, new_rows in reversed(undo.pop()):
+                    event_store.apply_hunk(events, (position, new_rows, old_rows))
+                assert event_columns.observation_columns(events) is columns
+                assert columns == events
+        finally:
+            event_columns.enable_columnar_store(False)
+
+    def test_observation_index(self):
+        pj = project()
+        event_columns.enable_columnar_store()
+        try:
+            for obs_id in pj[cfg.OBSERVATIONS]:
+                from_columns = event_index.observation_index(pj, obs_id)
+                assert event_columns.tracked_columns(pj[cfg.OBSERVATIONS][obs_id][cfg.EVENTS]) is not None
+                event_columns.enable_columnar_store(False)
+                from_list = event_index.observation_index(pj, obs_id)
+                event_columns.enable_columnar_store()
+                assert from_list.state_keys == from_columns.state_keys
+                assert from_list.point_keys == from_columns.point_keys
+                for key in from_list.point_keys:
+                    assert np.array_equal(from_list.point_times(key), from_columns.point_times(key), equal_nan=True)
+        finally:
+            event_columns.enable_columnar_store(False)
@@ -0,0 +1,80 @@
+"""
+module for testing event_index.py
+
+pytest -s -vv test_event_index.py
+"""
+
+import json
+import os
+import sys
+from decimal import Decimal
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from boris import event_index
+from boris import utilities
+
+
+class Test_event_interval_index(object):
+    def test_states_at(self):
+        pj = utilities.convert_time_to_decimal(json.loads(open("files/test.boris").read()))
+        index = event_index.observation_index(pj, "observation #1")
+        events = pj["observations"]["observation #1"]["events"]
+        for t in ("0", "4", "8", "10", "40", "47", "5", "20", "1000"):
+            current_states = utilities.get_current_states_modifiers_by_subject(
+                ["s"], events, dict(pj["subjects_conf"], **{"": {"name": ""}}), Decimal(t), include_modifiers=False
+            )
+            for idx, subject in (("0", "subject1"), ("1", "subject2"), ("", "")):
+                assert [b for b, _ in index.states_at(subject, Decimal(t))] == current_states[idx]
+
+    def test_states_at_stop_time(self):
+        events = [[Decimal("1"), "", "s", "", ""], [Decimal("2"), "", "s", "", ""]]
+        index = event_index.EventIntervalIndex(events, ["s"])
+        assert index.states_at("", Decimal("2")) == []
+        assert index.states_at("", Decimal("2"), include_stop=True) == [("s", "")]
+
+    def test_unpaired_start(self):
+        events = [[Decimal("1"), "", "s", "", ""]]
+        index = event_index.EventIntervalIndex(events, ["s"])
+        assert index.states_at("", 1e9) == [("s", "")]
+
+    def test_points_between(self):
+        events = [
+            [Decimal("1"), "", "p", "", ""],
+            [Decimal("2"), "", "q", "", ""],
+            [Decimal("3"), "", "p", "", ""],
+        ]
+        index = event_index.EventIntervalIndex(events, [])
+        assert index.points_between("", 1, 3) == [("p", ""), ("q", "")]
+        assert index.points_between("", 1, 3, include_end=True) == [("p", ""), ("q", ""), ("p", "")]
+        assert index.count() == 3
+        assert index.time_range() == (1.0, 3.0)
+
+    def test_states_matrix(self):
+        pj = utilities.convert_time_to_decimal(json.loads(open("files/test.boris").read()))
+        index = event_index.observation_index(pj, "observation #1")
+        times = [0.0, 4.0, 8.0, 10.0, 40.0, 47.0, 5.0, 20.0, 1000.0]
+        for subject in ("subject1", "subject2", ""):
+            for include_stop in (False, True):
+                states, active = index.states_matrix(subject, np.array(times), include_stop=include_stop)
+                for row, t in enumerate(times):
+                    assert [states[column] for column in np.flatnonzero(active[row])] == index.states_at(subject, t, include_stop)
+
+    def test_points_in_windows(self):
+        events = [
+            [Decimal("1"), "", "p", "", ""],
+            [Decimal("2"), "", "q", "", ""],
+            [Decimal("3"), "", "p", "", ""],
+        ]
+        index = event_index.EventIntervalIndex(events, [])
+        assert index.points_in_windows("", np.array([1.0, 3.5, 0.0]), np.array([3.0, 4.0, 0.5]), include_end=True) == {
+            0: [("p", ""), ("q", ""), ("p", "")]
+        }
+        assert index.points_in_windows("", np.array([1.0]), np.array([3.0])) == {0: [("p", ""), ("q", "")]}
+
+    def test_no_events(self):
+        index = event_index.EventIntervalIndex([], ["s"])
+        assert index.count() == 0
+        assert index.time_range() == (None, None)
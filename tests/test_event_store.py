@@ -0,0 +1,77 @@
+"""
+module for testing event_store.py
+
+pytest -s -vv test_event_store.py
+"""
+
+import json
+import os
+import sys
+from decimal import Decimal
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from boris import config as cfg
+from boris import event_store
+from boris import events_cursor
+from boris import utilities
+
+
+class Test_insert_events(object):
+    def test_same_as_sort(self):
+        pj = utilities.convert_time_to_decimal(json.loads(open("files/test.boris").read()))
+        events = pj["observations"]["observation #1"]["events"]
+        new_events = [
+            [Decimal("0"), "", "s", "", ""],
+            [events[3][0], events[3][1], events[3][2], "", "same key"],
+            [Decimal("100000"), "", "p", "", ""],
+            [Decimal("1.5"), "", "p", "", ""],
+        ]
+        expected = sorted(events + new_events, key=lambda x: x[:3])
+        positions = event_store.insert_events(events, new_events, cfg.LIVE)
+        assert events == expected
+        assert positions == sorted(positions)
+        assert sorted(events[position][4] for position in positions) == sorted(x[4] for x in new_events)
+
+    def test_images(self):
+        events = [
+            [Decimal("NaN"), "", "a", "", "", 1, "1.jpg"],
+            [Decimal("NaN"), "", "a", "", "", 3, "3.jpg"],
+        ]
+        positions = event_store.insert_events(events, [[Decimal("NaN"), "", "b", "", "", 2, "2.jpg"]], cfg.IMAGES)
+        assert positions == [1]
+        assert [event[5] for event in events] == [1, 2, 3]
+
+    def test_remove(self):
+        events = [[Decimal(str(t)), "", "a", "", ""] for t in range(5)]
+        removed = event_store.remove_events(events, [3, 1])
+        assert [event[0] for event in removed] == [Decimal("1"), Decimal("3")]
+        assert [event[0] for event in events] == [Decimal("0"), Decimal("2"), Decimal("4")]
+
+    def test_remove_contiguous(self):
+        events = [[Decimal(str(t)), "", "a", "", ""] for t in range(8)]
+        hunks: list = []
+        removed = event_store.remove_events(events, [6, 1, 2, 3, 7], hunks)
+        assert [event[0] for event in removed] == [Decimal(t) for t in (1, 2, 3, 6, 7)]
+        assert [event[0] for event in events] == [Decimal(t) for t in (0, 4, 5)]
+        # contiguous events removed together from the end of the list
+        assert [(position, len(old_rows), len(new_rows)) for position, old_rows, new_rows in hunks] == [(6, 2, 0), (1, 3, 0)]
+
+    def test_replace_not_in_place(self):
+        events = [[Decimal(str(t)), "", "a", "", ""] for t in range(3)]
+        old_event = events[1]
+        hunks: list = []
+        event_store.replace_events(events, {1: [Decimal("1"), "", "a", "", "comment"]}, hunks)
+        assert events[1][4] == "comment"
+        assert old_event[4] == ""
+        assert hunks == [(1, ((Decimal("1"), "", "a", "", ""),), ((Decimal("1"), "", "a", "", "comment"),))]
+
+    def test_events_row_cursor(self):
+        events = [[Decimal(str(t)), "", "a", "", ""] for t in range(5)]
+        cursor = events_cursor.EventsRowCursor(events)
+        positions = event_store.insert_events(events, [[Decimal("2.5"), "", "a", "", ""]], cfg.LIVE)
+        cursor.insert_events(positions)
+        assert cursor.times == [event[0] for event in events]
+        event_store.remove_events(events, [0, 3])
+        cursor.remove_events([0, 3])
+        assert cursor.times == [event[0] for event in events]
@@ -0,0 +1,66 @@
+"""
+module for testing events_cursor.py
+
+pytest -s -vv test_events_cursor.py
+"""
+
+import json
+import os
+import sys
+from decimal import Decimal
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from boris import events_cursor
+from boris import utilities
+
+
+def events_current_row(events, ct, cursor_above_event):
+    """
+    previous implementation (linear scan)
+    """
+    if ct >= events[-1][0]:
+        return len(events)
+    cr_list = [idx for idx, x in enumerate(events[:-1]) if x[0] <= ct and events[idx + 1][0] > ct]
+    if cr_list:
+        return cr_list[0] if cursor_above_event else cr_list[0] + 1
+    return -1
+
+
+class Test_events_row_cursor(object):
+    def test_same_as_linear_scan(self):
+        pj = utilities.convert_time_to_decimal(json.loads(open("files/test.boris").read()))
+        for obs_id in pj["observations"]:
+            events = pj["observations"][obs_id]["events"]
+            if not events:
+                continue
+            cursor = events_cursor.EventsRowCursor(events)
+            if cursor.has_nan:
+                continue
+            times = sorted({event[0] for event in events})
+            for ct in [times[0] - 1] + times + [t + Decimal("0.001") for t in times] + [times[-1] + 100]:
+                for cursor_above_event in (True, False):
+                    assert cursor.row(ct, cursor_above_event) == events_current_row(events, ct, cursor_above_event)
+
+    def test_same_times(self):
+        events = [
+            [Decimal("1"), "", "a", "", ""],
+            [Decimal("2"), "", "b", "", ""],
+            [Decimal("2"), "", "c", "", ""],
+            [Decimal("5"), "", "d", "", ""],
+        ]
+        cursor = events_cursor.EventsRowCursor(events)
+        for ct in ("0", "1", "1.5", "2", "3", "5", "6"):
+            assert cursor.row(Decimal(ct), True) == events_current_row(events, Decimal(ct), True)
+
+    def test_is_valid(self):
+        events = [[Decimal("1"), "", "a", "", ""]]
+        cursor = events_cursor.EventsRowCursor(events)
+        assert cursor.is_valid(events)
+        events.append([Decimal("2"), "", "a", "", ""])
+        assert not cursor.is_valid(events)
+        assert not cursor.is_valid(list(events))
+
+    def test_nan(self):
+        events = [[Decimal("NaN"), "", "a", "", "", 1, "a.jpg"]]
+        assert events_cursor.EventsRowCursor(events).has_nan
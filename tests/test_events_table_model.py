@@ -0,0 +1,89 @@
+"""
+module for testing events_table_model.py
+
+pytest -s -vv test_events_table_model.py
+"""
+
+import bisect
+import json
+import os
+import sys
+from decimal import Decimal
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from boris import config as cfg
+from boris import events_table_model
+from boris import utilities
+
+
+def model_for(events, behaviors_filter=tuple(), subjects_filter=tuple()):
+    return events_table_model.EventsTableModel(
+        events, list(cfg.TW_EVENTS_FIELDS[cfg.LIVE]), cfg.S, cfg.LIVE, ["s"], behaviors_filter, subjects_filter
+    )
+
+
+def assert_same(model, events, behaviors_filter=tuple(), subjects_filter=tuple()):
+    reference = model_for(events, behaviors_filter, subjects_filter)
+    assert model.types == reference.types
+    assert model.keys == reference.keys
+    assert model.rows == reference.rows
+    assert model.rowCount() == reference.rowCount()
+
+
+class Test_events_table_model(object):
+    def test_types(self):
+        pj = utilities.convert_time_to_decimal(json.loads(open("files/test.boris").read()))
+        events = [event[:5] for event in pj["observations"]["observation #1"]["events"]]
+        model = model_for(events)
+        assert model.rowCount() == len(events)
+        assert model.columnCount() == len(cfg.TW_EVENTS_FIELDS[cfg.LIVE])
+        assert model.types[:2] == [cfg.START, cfg.STOP]
+        assert model.data(model.index(0, 3)) == cfg.START
+        assert model.data(model.index(0, 2)) == events[0][2]
+
+    def test_insert(self):
+        events = [
+            [Decimal("1"), "", "s", "", ""],
+            [Decimal("2"), "", "p", "", ""],
+            [Decimal("3"), "", "s", "", ""],
+            [Decimal("4"), "", "s", "", ""],
+        ]
+        model = model_for(events)
+        new_event = [Decimal("1.5"), "", "s", "", ""]
+        position = bisect.bisect_right(events, new_event)
+        events.insert(position, new_event)
+        model.insert_events([position])
+        assert_same(model, events)
+        assert model.types == [cfg.START, cfg.STOP, "", cfg.START, cfg.STOP]
+
+    def test_insert_batch_with_filter(self):
+        events = [[Decimal(str(t)), "s1" if t % 2 else "s2", "s", "", ""] for t in range(20)]
+        model = model_for(events, subjects_filter=("s1",))
+        new_events = [[Decimal("3.5"), "s1", "s", "", ""], [Decimal("10.5"), "s2", "s", "", ""], [Decimal("30"), "s1", "p", "", ""]]
+        for new_event in new_events:
+            bisect.insort(events, new_event)
+        positions = [events.index(new_event) for new_event in new_events]
+        model.insert_events(positions)
+        assert_same(model, events, subjects_filter=("s1",))
+
+    def test_remove_and_update(self):
+        events = [[Decimal(str(t)), "", "s" if t % 3 else "p", "", ""] for t in range(15)]
+        model = model_for(events)
+        del events[7]
+        del events[4]
+        model.remove_events([4, 7])
+        assert_same(model, events)
+
+        events[2][3] = "modifier"
+        events[5][2] = "p"
+        model.update_events([2, 5])
+        assert_same(model, events)
+
+    def test_remove_all(self):
+        events = [[Decimal("1"), "", "s", "", ""]]
+        model = model_for(events)
+        del events[0]
+        model.remove_events([0])
+        assert model.rowCount() == 0
+        assert model.columnCount() == 0
@@ -0,0 +1,119 @@
+"""
+module for testing events_undo.py
+
+pytest -s -vv test_events_undo.py
+"""
+
+import copy
+import json
+import os
+import sys
+from decimal import Decimal
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from boris import config as cfg
+from boris import event_store
+from boris import events_undo
+from boris import utilities
+
+
+def undo(undo_stack, events):
+    """
+    undo the last operation as undo_event_operation
+    """
+    description, hunks = undo_stack.undo()
+    for hunk in hunks:
+        event_store.apply_hunk(events, hunk)
+    return description, hunks
+
+
+class Test_events_undo_stack(object):
+    def test_insert_edit_delete(self):
+        pj = utilities.convert_time_to_decimal(json.loads(open("files/test.boris").read()))
+        events = pj["observations"]["observation #1"]["events"]
+        states = [copy.deepcopy(events)]
+        undo_stack = events_undo.EventsUndoStack(10)
+
+        undo_stack.record("insert")
+        hunks: list = []
+        event_store.insert_events(events, [[Decimal("5"), "", "p", "", "", 0]], cfg.MEDIA, hunks)
+        undo_stack.add(hunks)
+        states.append(copy.deepcopy(events))
+
+        undo_stack.record("edit")
+        hunks = []
+        new_event_0 = list(events[0])
+        new_event_0[3] = "modifier"
+        new_event_4 = list(events[4])
+        new_event_4[4] = "comment"
+        event_store.replace_events(events, {4: new_event_4, 0: new_event_0}, hunks)
+        undo_stack.add(hunks)
+        states.append(copy.deepcopy(events))
+
+        undo_stack.record("delete")
+        hunks = []
+        event_store.remove_events(events, [5, 1, 6, 7], hunks)
+        undo_stack.add(hunks)
+        states.append(copy.deepcopy(events))
+
+        assert len(undo_stack) == 3
+        assert undo_stack.last_description() == "delete"
+
+        for description in ("delete", "edit", "insert"):
+            states.pop()
+            assert undo(undo_stack, events)[0] == description
+            assert events == states[-1]
+
+        assert undo_stack.undo() == (None, [])
+
+    def test_hunks_in_order_of_application(self):
+        events = [[Decimal(str(t)), "", "p", "", ""] for t in range(10)]
+        original = copy.deepcopy(events)
+        undo_stack = events_undo.EventsUndoStack(10)
+        undo_stack.record("insert and remove")
+        modifications = (
+            ([[Decimal("2.5"), "", "s", "", ""]], None),
+            (None, [0, 1]),
+            ([[Decimal("0.5"), "", "s", "", ""]], None),
+        )
+        for new_events, positions in modifications:
+            hunks: list = []
+            if new_events:
+                event_store.insert_events(events, new_events, cfg.LIVE, hunks)
+            else:
+                event_store.remove_events(events, positions, hunks)
+            undo_stack.add(hunks)
+        description, hunks = undo(undo_stack, events)
+        assert events == original
+        # the last modification is undone first: removal of the event inserted at position 0
+        assert hunks[0] == (0, ((Decimal("0.5"), "", "s", "", ""),), ())
+
+    def test_only_modified_events_stored(self):
+        events = [[Decimal(str(t)), "", "p", "", ""] for t in range(1000)]
+        undo_stack = events_undo.EventsUndoStack(10)
+        undo_stack.record("insert")
+        hunks: list = []
+        event_store.insert_events(events, [[Decimal("2000"), "", "p", "", ""]], cfg.LIVE, hunks)
+        undo_stack.add(hunks)
+        # the operation is stored as a single inserted row
+        assert undo_stack._operations[0][1] == [(1000, (), ((Decimal("2000"), "", "p", "", ""),))]
+
+    def test_no_recorded_operation(self):
+        undo_stack = events_undo.EventsUndoStack(10)
+        undo_stack.add([(0, (), ((Decimal("1"), "", "p", "", ""),))])
+        assert len(undo_stack) == 0
+
+    def test_max_size(self):
+        events: list = []
+        undo_stack = events_undo.EventsUndoStack(3)
+        for t in range(10):
+            undo_stack.record(f"insert {t}")
+            hunks: list = []
+            event_store.insert_events(events, [[Decimal(t), "", "p", "", ""]], cfg.LIVE, hunks)
+            undo_stack.add(hunks)
+        assert len(undo_stack) == 3
+        for _ in range(4):
+            undo(undo_stack, events)
+        assert len(events) == 7
+        assert len(undo_stack) == 0
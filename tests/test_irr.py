@@ -9,29 +9,30 @@ import sys
 import json
 import os
 import decimal
+import subprocess
+
+import numpy as np
 
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
-from boris import irr
-from boris import db_functions
+from boris import irr, irr_functions
+from boris import utilities
 from boris import config
 
 
 class Test_irr(object):
     def test_cohen_kappa_same_observation(self):
-        pj = json.loads(open("files/test.boris").read())
+        pj = utilities.convert_time_to_decimal(json.loads(open("files/test.boris").read()))
 
         ethogram = pj[config.ETHOGRAM]
         selected_observations = ["observation #1", "observation #1"]
         selected_subjects = ["subject1", "subject2"]
 
-        r, s, db = cursor = db_functions.load_aggregated_events_in_db(pj, selected_subjects, selected_observations, ["s", "p"])
-        assert r == True
+        indexes = irr_functions.observations_indexes(pj, selected_observations, ["s", "p"])
 
-        cursor = db.cursor()
-        K, msg = irr.cohen_kappa(
-            cursor,
+        K, msg = irr_functions.cohen_kappa(
+            indexes,
             obsid1=selected_observations[0],
             obsid2=selected_observations[1],
             interval=decimal.Decimal("1.0"),
@@ -42,17 +43,16 @@ class Test_irr(object):
         assert K == 1
 
     def test_cohen_kappa_very_different_obs(self):
-        pj = json.loads(open("files/test.boris").read())
+        pj = utilities.convert_time_to_decimal(json.loads(open("files/test.boris").read()))
 
         ethogram = pj[config.ETHOGRAM]
         selected_observations = ["observation #1", "observation #2"]
         selected_subjects = ["subject1", "subject2"]
 
-        r, s, db = cursor = db_functions.load_aggregated_events_in_db(pj, selected_subjects, selected_observations, ["s"])
+        indexes = irr_functions.observations_indexes(pj, selected_observations, ["s"])
 
-        cursor = db.cursor()
-        K, msg = irr.cohen_kappa(
-            cursor,
+        K, msg = irr_functions.cohen_kappa(
+            indexes,
             obsid1=selected_observations[0],
             obsid2=selected_observations[1],
             interval=decimal.Decimal("1.0"),
@@ -63,17 +63,16 @@ class Test_irr(object):
         assert K == -0.036
 
     def test_cohen_kappa_very_similar_obs_interval_state_1s(self):
-        pj = json.loads(open("files/test.boris").read())
+        pj = utilities.convert_time_to_decimal(json.loads(open("files/test.boris").read()))
 
         ethogram = pj[config.ETHOGRAM]
         selected_observations = ["observation #2", "observation #2 (copy)"]
         selected_subjects = ["No focal subject", "subject1", "subject2"]
 
-        r, s, db = cursor = db_functions.load_aggregated_events_in_db(pj, selected_subjects, selected_observations, ["s"])
+        indexes = irr_functions.observations_indexes(pj, selected_observations, ["s"])
 
-        cursor = db.cursor()
-        K, _ = irr.cohen_kappa(
-            cursor,
+        K, _ = irr_functions.cohen_kappa(
+            indexes,
             obsid1=selected_observations[0],
             obsid2=selected_observations[1],
             interval=decimal.Decimal("1.0"),
@@ -84,17 +83,16 @@ class Test_irr(object):
         assert K == 0.988
 
     def test_cohen_kappa_very_similar_obs_interval_state_3s(self):
-        pj = json.loads(open("files/test.boris").read())
+        pj = utilities.convert_time_to_decimal(json.loads(open("files/test.boris").read()))
 
         ethogram = pj[config.ETHOGRAM]
         selected_observations = ["observation #2", "observation #2 (copy)"]
         selected_subjects = ["No focal subject", "subject1", "subject2"]
 
-        r, s, db = cursor = db_functions.load_aggregated_events_in_db(pj, selected_subjects, selected_observations, ["s"])
+        indexes = irr_functions.observations_indexes(pj, selected_observations, ["s"])
 
-        cursor = db.cursor()
-        K, _ = irr.cohen_kappa(
-            cursor,
+        K, _ = irr_functions.cohen_kappa(
+            indexes,
             obsid1=selected_observations[0],
             obsid2=selected_observations[1],
             interval=decimal.Decimal("3"),
@@ -105,17 +103,16 @@ class Test_irr(object):
         assert K == 1
 
     def test_cohen_kappa_very_similar_obs_interval_point_1s(self):
-        pj = json.loads(open("files/test.boris").read())
+        pj = utilities.convert_time_to_decimal(json.loads(open("files/test.boris").read()))
 
         ethogram = pj[config.ETHOGRAM]
         selected_observations = ["observation #2", "observation #2 (copy)"]
         selected_subjects = ["No focal subject", "subject1", "subject2"]
 
-        r, s, db = cursor = db_functions.load_aggregated_events_in_db(pj, selected_subjects, selected_observations, ["p"])
+        indexes = irr_functions.observations_indexes(pj, selected_observations, ["p"])
 
-        cursor = db.cursor()
-        K, _ = irr.cohen_kappa(
-            cursor,
+        K, _ = irr_functions.cohen_kappa(
+            indexes,
             obsid1=selected_observations[0],
             obsid2=selected_observations[1],
             interval=decimal.Decimal("1.0"),
@@ -126,17 +123,16 @@ class Test_irr(object):
         assert K == 0.866
 
     def test_cohen_kappa_very_similar_obs_interval_point_3s(self):
-        pj = json.loads(open("files/test.boris").read())
+        pj = utilities.convert_time_to_decimal(json.loads(open("files/test.boris").read()))
 
         ethogram = pj[config.ETHOGRAM]
         selected_observations = ["observation #2", "observation #2 (copy)"]
         selected_subjects = ["No focal subject", "subject1", "subject2"]
 
-        r, s, db = cursor = db_functions.load_aggregated_events_in_db(pj, selected_subjects, selected_observations, ["p"])
+        indexes = irr_functions.observations_indexes(pj, selected_observations, ["p"])
 
-        cursor = db.cursor()
-        K, _ = irr.cohen_kappa(
-            cursor,
+        K, _ = irr_functions.cohen_kappa(
+            indexes,
             obsid1=selected_observations[0],
             obsid2=selected_observations[1],
             interval=decimal.Decimal("3.0"),
@@ -147,17 +143,16 @@ class Test_irr(object):
         assert K == 0.798
 
     def test_obs_without_events(self):
-        pj = json.loads(open("files/test.boris").read())
+        pj = utilities.convert_time_to_decimal(json.loads(open("files/test.boris").read()))
 
         ethogram = pj[config.ETHOGRAM]
         selected_observations = ["observation #2", "observation without events"]
         selected_subjects = ["No focal subject", "subject1", "subject2"]
 
-        r, s, db = cursor = db_functions.load_aggregated_events_in_db(pj, selected_subjects, selected_observations, ["s"])
+        indexes = irr_functions.observations_indexes(pj, selected_observations, ["s"])
 
-        cursor = db.cursor()
-        K, _ = irr.cohen_kappa(
-            cursor,
+        K, _ = irr_functions.cohen_kappa(
+            indexes,
             obsid1=selected_observations[0],
             obsid2=selected_observations[1],
             interval=decimal.Decimal("1"),
@@ -168,18 +163,16 @@ class Test_irr(object):
         assert K == -100
 
     def test_needleman_wunsch_identity_same_observation(self):
-        pj = json.loads(open("files/test.boris").read())
+        pj = utilities.convert_time_to_decimal(json.loads(open("files/test.boris").read()))
 
         ethogram = pj[config.ETHOGRAM]
         selected_observations = ["observation #1", "observation #1"]
         selected_subjects = ["subject1", "subject2"]
 
-        r, s, db = cursor = db_functions.load_aggregated_events_in_db(pj, selected_subjects, selected_observations, ["s", "p"])
-        assert r == True
+        indexes = irr_functions.observations_indexes(pj, selected_observations, ["s", "p"])
 
-        cursor = db.cursor()
-        identity, msg = irr.needleman_wunsch_identity(
-            cursor,
+        identity, msg = irr_functions.needleman_wunsch_identity(
+            indexes,
             obsid1=selected_observations[0],
             obsid2=selected_observations[1],
             interval=decimal.Decimal("1.0"),
@@ -190,17 +183,16 @@ class Test_irr(object):
         assert identity == 100.0
 
     def test_needleman_wunsch_identity_very_different_obs(self):
-        pj = json.loads(open("files/test.boris").read())
+        pj = utilities.convert_time_to_decimal(json.loads(open("files/test.boris").read()))
 
         ethogram = pj[config.ETHOGRAM]
         selected_observations = ["observation #1", "observation #2"]
         selected_subjects = ["subject1", "subject2"]
 
-        r, s, db = cursor = db_functions.load_aggregated_events_in_db(pj, selected_subjects, selected_observations, ["s"])
+        indexes = irr_functions.observations_indexes(pj, selected_observations, ["s"])
 
-        cursor = db.cursor()
-        identity, msg = irr.needleman_wunsch_identity(
-            cursor,
+        identity, msg = irr_functions.needleman_wunsch_identity(
+            indexes,
             obsid1=selected_observations[0],
             obsid2=selected_observations[1],
             interval=decimal.Decimal("1.0"),
@@ -209,20 +201,19 @@ class Test_irr(object):
         )
 
         # print(identity)
-        assert identity == 85.84070796460178
+        assert identity == 85.08771929824562
 
     def test_needleman_wunsch_identity_very_similar_obs_state_1s(self):
-        pj = json.loads(open("files/test.boris").read())
+        pj = utilities.convert_time_to_decimal(json.loads(open("files/test.boris").read()))
 
         ethogram = pj[config.ETHOGRAM]
         selected_observations = ["observation #2", "observation #2 (copy)"]
         selected_subjects = ["No focal subject", "subject1", "subject2"]
 
-        r, s, db = cursor = db_functions.load_aggregated_events_in_db(pj, selected_subjects, selected_observations, ["s"])
+        indexes = irr_functions.observations_indexes(pj, selected_observations, ["s"])
 
-        cursor = db.cursor()
-        identity, msg = irr.needleman_wunsch_identity(
-            cursor,
+        identity, msg = irr_functions.needleman_wunsch_identity(
+            indexes,
             obsid1=selected_observations[0],
             obsid2=selected_observations[1],
             interval=decimal.Decimal("1.0"),
@@ -231,20 +222,19 @@ class Test_irr(object):
         )
 
         # print(identity)
-        assert identity == 99.36708860759494
+        assert identity == 99.37304075235109
 
     def test_needleman_wunsch_identity_very_similar_obs_state_3s(self):
-        pj = json.loads(open("files/test.boris").read())
+        pj = utilities.convert_time_to_decimal(json.loads(open("files/test.boris").read()))
 
         ethogram = pj[config.ETHOGRAM]
         selected_observations = ["observation #2", "observation #2 (copy)"]
         selected_subjects = ["No focal subject", "subject1", "subject2"]
 
-        r, s, db = cursor = db_functions.load_aggregated_events_in_db(pj, selected_subjects, selected_observations, ["s"])
+        indexes = irr_functions.observations_indexes(pj, selected_observations, ["s"])
 
-        cursor = db.cursor()
-        identity, msg = irr.needleman_wunsch_identity(
-            cursor,
+        identity, msg = irr_functions.needleman_wunsch_identity(
+            indexes,
             obsid1=selected_observations[0],
             obsid2=selected_observations[1],
             interval=decimal.Decimal("3.0"),
@@ -256,17 +246,16 @@ class Test_irr(object):
         assert identity == 100.0
 
     def test_needleman_wunsch_identity_very_similar_obs_point_1s(self):
-        pj = json.loads(open("files/test.boris").read())
+        pj = utilities.convert_time_to_decimal(json.loads(open("files/test.boris").read()))
 
         ethogram = pj[config.ETHOGRAM]
         selected_observations = ["observation #2", "observation #2 (copy)"]
         selected_subjects = ["No focal subject", "subject1", "subject2"]
 
-        r, s, db = cursor = db_functions.load_aggregated_events_in_db(pj, selected_subjects, selected_observations, ["p"])
+        indexes = irr_functions.observations_indexes(pj, selected_observations, ["p"])
 
-        cursor = db.cursor()
-        identity, msg = irr.needleman_wunsch_identity(
-            cursor,
+        identity, msg = irr_functions.needleman_wunsch_identity(
+            indexes,
             obsid1=selected_observations[0],
             obsid2=selected_observations[1],
             interval=decimal.Decimal("1.0"),
@@ -278,17 +267,16 @@ class Test_irr(object):
         assert identity == 99.29577464788733
 
     def test_needleman_wunsch_identity_very_similar_obs_point_3s(self):
-        pj = json.loads(open("files/test.boris").read())
+        pj = utilities.convert_time_to_decimal(json.loads(open("files/test.boris").read()))
 
         ethogram = pj[config.ETHOGRAM]
         selected_observations = ["observation #2", "observation #2 (copy)"]
         selected_subjects = ["No focal subject", "subject1", "subject2"]
 
-        r, s, db = cursor = db_functions.load_aggregated_events_in_db(pj, selected_subjects, selected_observations, ["p"])
+        indexes = irr_functions.observations_indexes(pj, selected_observations, ["p"])
 
-        cursor = db.cursor()
-        identity, msg = irr.needleman_wunsch_identity(
-            cursor,
+        identity, msg = irr_functions.needleman_wunsch_identity(
+            indexes,
             obsid1=selected_observations[0],
             obsid2=selected_observations[1],
             interval=decimal.Decimal("3.0"),
@@ -298,3 +286,63 @@ class Test_irr(object):
 
         print(identity)
         assert identity == 97.91666666666666
+
+    def test_cohen_kappa_matrix(self):
+        pj = utilities.convert_time_to_decimal(json.loads(open("files/test.boris").read()))
+        selected_observations = ["observation #1", "observation #2", "observation #2 (copy)"]
+        selected_subjects = ["No focal subject", "subject1", "subject2"]
+        indexes = irr_functions.observations_indexes(pj, selected_observations, ["s", "p"])
+
+        matrix, messages = irr.cohen_kappa_matrix(indexes, selected_observations, decimal.Decimal("1.0"), selected_subjects, False)
+
+        assert len(messages) == 3
+        for i, obs_id1 in enumerate(selected_observations):
+            assert matrix[i, i] == 1
+            for j, obs_id2 in enumerate(selected_observations[i + 1 :], start=i + 1):
+                K, _ = irr_functions.cohen_kappa(indexes, obs_id1, obs_id2, decimal.Decimal("1.0"), selected_subjects, False)
+                assert matrix[i, j] == matrix[j, i] == K
+
+    def test_time_grid(self):
+        assert irr_functions.time_grid(1.5, 4.0, decimal.Decimal("1.0")).tolist() == [1500, 2500, 3500]
+        assert irr_functions.time_grid(1.5, 3.5, decimal.Decimal("1.0")).tolist() == [1500, 2500, 3500]
+        # the last time is compared with the exact value of the float
+        assert irr_functions.time_grid(0.0, 10.1, decimal.Decimal("0.1")).tolist()[-1] == 10000
+
+    def test_needleman_wunsch(self):
+        # GATTACA / GCATGCU: G-ATTACA / GCA-TGCU
+        seq1 = np.array([ord(x) for x in "GATTACA"])
+        seq2 = np.array([ord(x) for x in "GCATGCU"])
+        assert irr_functions.needleman_wunsch(seq1, seq2) == (4, 8)
+        assert irr_functions.needleman_wunsch(seq1, seq2, band=10) == (4, 8)
+        assert irr_functions.needleman_wunsch(seq1, seq1, band=1) == (7, 7)
+        assert irr_functions.needleman_wunsch(seq1, np.array([], dtype=np.int64)) == (0, 7)
+
+    def test_needleman_wunsch_matrix(self):
+        pj = utilities.convert_time_to_decimal(json.loads(open("files/test.boris").read()))
+        selected_observations = ["observation #1", "observation #2", "observation #2 (copy)"]
+        selected_subjects = ["No focal subject", "subject1", "subject2"]
+        indexes = irr_functions.observations_indexes(pj, selected_observations, ["s", "p"])
+
+        matrix, messages = irr.needleman_wunsch_matrix(indexes, selected_observations, decimal.Decimal("1.0"), selected_subjects, False)
+
+        assert len(messages) == 3
+        identity, _ = irr_functions.needleman_wunsch_identity(
+            indexes, selected_observations[1], selected_observations[2], decimal.Decimal("1.0"), selected_subjects, False
+        )
+        assert matrix[1, 2] == matrix[2, 1] == identity
+
+        matrix, _ = irr.needleman_wunsch_matrix(indexes, selected_observations, decimal.Decimal("1.0"), selected_subjects, False, 5)
+        identity, _ = irr_functions.needleman_wunsch_identity(
+            indexes, selected_observations[0], selected_observations[1], decimal.Decimal("1.0"), selected_subjects, False, 5
+        )
+        assert matrix[0, 1] == identity
+
+    def test_irr_functions_without_gui(self):
+        # the processes of the process pools import irr_functions
+        result = subprocess.run(
+            [sys.executable, "-c", "import sys, boris.irr_functions; print(sorted(m for m in sys.modules if m.startswith('PySide6')))"],
+            cwd=os.path.abspath(os.path.join(os.path.dirname(__file__), "..")),
+            capture_output=True,
+            text=True,
+        )
+        assert result.stdout.strip() == "[]"
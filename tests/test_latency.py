@@ -0,0 +1,67 @@
+"""
+module for testing latency.py
+
+pytest -s -vv test_latency.py
+"""
+
+import os
+import sys
+from decimal import Decimal
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from boris import config as cfg
+from boris import latency
+
+
+def project(events: list) -> dict:
+    return {
+        cfg.ETHOGRAM: {
+            "0": {cfg.BEHAVIOR_CODE: "m", cfg.TYPE: cfg.POINT_EVENT},
+            "1": {cfg.BEHAVIOR_CODE: "s", cfg.TYPE: cfg.STATE_EVENT},
+            "2": {cfg.BEHAVIOR_CODE: "p", cfg.TYPE: cfg.POINT_EVENT},
+        },
+        cfg.OBSERVATIONS: {"obs": {cfg.TYPE: cfg.LIVE, cfg.EVENTS: events}},
+    }
+
+
+EVENTS = [
+    [Decimal("1.000"), "", "m", "", ""],
+    [Decimal("2.500"), "", "s", "", ""],
+    [Decimal("3.000"), "", "s", "", ""],
+    [Decimal("4.000"), "", "p", "", ""],
+    [Decimal("10.000"), "", "m", "", ""],
+    [Decimal("11.000"), "", "p", "x", ""],
+    [Decimal("20.000"), "", "m", "", ""],
+]
+
+
+class Test_latency(object):
+    def test_onsets(self):
+        onsets = latency.onsets(EVENTS, ["s"])
+        # the STOP of the state event is not an onset
+        assert onsets[("", "s", "")][0].tolist() == [1]
+        assert onsets[("", "m", "")][1].tolist() == [1000, 10000, 20000]
+
+    def test_latency(self):
+        df = latency.latency(project(EVENTS), ["obs"], ["m"], [cfg.NO_FOCAL_SUBJECT], False, ["s", "p"], [cfg.NO_FOCAL_SUBJECT], False)
+        assert list(df.columns) == ["Observation id", "Marker time", "Marker subject", "Marker behavior", "Subject", "Behavior", "Latency"]
+        assert df["Marker time"].tolist()[:4] == [1.0, 1.0, 10.0, 20.0]
+        assert df["Behavior"].tolist()[:3] == ["s", "p", "p"]
+        assert df["Latency"].tolist()[:3] == [1.5, 3.0, 1.0]
+        # marker without following behavior
+        assert np.isnan(df["Latency"].tolist()[3])
+
+    def test_latency_modifiers(self):
+        df = latency.latency(project(EVENTS), ["obs", "obs"], ["m"], [cfg.NO_FOCAL_SUBJECT], True, ["p"], [cfg.NO_FOCAL_SUBJECT], True)
+        assert len(df) == 6
+        assert df[df["Marker time"] == 10.0]["Modifiers"].tolist() == ["x", "x"]
+
+    def test_report(self):
+        df = latency.latency(project(EVENTS), ["obs"], ["m"], [cfg.NO_FOCAL_SUBJECT], False, ["p"], [cfg.NO_FOCAL_SUBJECT], False)
+        report = latency.latency_report(df)
+        assert "Marker: <b>m</b> at 1.000 s (subject: No focal subject)" in report
+        assert "all occurrences: 3.000 s" in report
+        assert "Marker: <b>m</b> at 20.000 s" in report
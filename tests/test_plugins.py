@@ -1,5 +1,6 @@
 import io
 import json
+import os
 from pathlib import Path
 import sys
 
@@ -161,3 +162,129 @@ class TestPluginBorisVersionRequirement:
 
     def test_requirement_rejects_malformed_required_version(self):
         assert not plugins.boris_version_satisfies_requirement("9.12.0", ">=current")
+
+
+class TestPluginWorker:
+    def run_worker(self, worker):
+        emitted = {"finished": [], "error": [], "progress": []}
+        worker.finished.connect(lambda status, results: emitted["finished"].append((status, results)))
+        worker.error.connect(lambda message: emitted["error"].append(message))
+        worker.progress.connect(lambda value, message: emitted["progress"].append((value, message)))
+        worker.run()
+        return emitted
+
+    def test_results_and_progress(self):
+        def run(df, progress):
+            progress(50, "half")
+            progress()
+            return "ok"
+
+        worker = plugins.PluginWorker(run, {"df": None})
+        worker.plugin_kwargs["progress"] = worker.report_progress
+        emitted = self.run_worker(worker)
+        assert emitted == {"finished": [(plugins.PLUGIN_COMPLETED, "ok")], "error": [], "progress": [(50, "half"), (-1, "")]}
+
+    def test_cancel(self):
+        def run(progress):
+            progress(10)
+            return "not displayed"
+
+        worker = plugins.PluginWorker(run, {})
+        worker.plugin_kwargs["progress"] = worker.report_progress
+        worker.cancel()
+        emitted = self.run_worker(worker)
+        assert emitted["finished"] == [(plugins.PLUGIN_CANCELLED, None)]
+        assert emitted["progress"] == []
+
+    def test_error(self):
+        def run():
+            raise ValueError("plugin error")
+
+        emitted = self.run_worker(plugins.PluginWorker(run, {}))
+        assert emitted["finished"] == [(plugins.PLUGIN_ERROR, None)]
+        assert "plugin error" in emitted["error"][0]
+
+    def test_no_results(self):
+        def run():
+            return None
+
+        assert self.run_worker(plugins.PluginWorker(run, {}))["finished"] == [(plugins.PLUGIN_COMPLETED, None)]
+
+
+class TestPluginInGuiThread:
+    def test_results(self):
+        def run(df, parameters):
+            return (df, parameters)
+
+        assert plugins.run_plugin_in_gui_thread(None, "test", run, {"df": 1, "parameters": 2}) == (plugins.PLUGIN_COMPLETED, (1, 2))
+
+    def test_cancelled_by_plugin(self):
+        def run():
+            raise plugins.PluginCancelled()
+
+        assert plugins.run_plugin_in_gui_thread(None, "test", run, {}) == (plugins.PLUGIN_CANCELLED, None)
+
+    def test_no_results(self):
+        def run():
+            return None
+
+        assert plugins.run_plugin_in_gui_thread(None, "test", run, {}) == (plugins.PLUGIN_COMPLETED, None)
+
+
+class TestPluginMetadata:
+    def test_metadata_without_execution(self, tmp_path):
+        plugin_file = tmp_path / "my_plugin.py"
+        plugin_file.write_text(
+            "\n".join(
+                [
+                    "import module_not_installed",
+                    '__version__ = "1.2"',
+                    '__version_date__ = "2026-01-01"',
+                    '__plugin_name__ = "My plugin"',
+                    '__require_boris_version__ = ">=9.0"',
+                    "def run(df: pd.DataFrame, project: dict, progress=None):",
+                    "    raise RuntimeError",
+                ]
+            )
+        )
+        metadata = plugins.plugin_metadata(plugin_file)
+        assert metadata["name"] == "My plugin"
+        assert metadata["version"] == "1.2"
+        assert metadata["version_date"] == "2026-01-01"
+        assert metadata["require_boris_version"] == ">=9.0"
+        assert metadata["author"] is None
+        assert metadata["has_run"]
+        assert metadata["run_parameters"] == {"df": "pd.DataFrame", "project": "dict", "progress": None}
+
+    def test_run_in_thread(self):
+        assert plugins.parse_plugin_metadata("import pandas as pd\ndef run(df): pass\n")["run_in_thread"]
+        metadata = plugins.parse_plugin_metadata("def run(df):\n    from PySide6.QtWidgets import QInputDialog\n")
+        assert metadata["uses_gui"]
+        assert not metadata["run_in_thread"]
+        assert plugins.parse_plugin_metadata("import PyQt5.QtWidgets\n__run_in_thread__ = True\ndef run(df): pass\n")["run_in_thread"]
+        assert not plugins.parse_plugin_metadata("__run_in_thread__ = False\ndef run(df): pass\n")["run_in_thread"]
+
+    def test_shipped_plugins_run_in_thread(self):
+        plugins_dir = os.path.join(os.path.dirname(__file__), "..", "boris", "analysis_plugins")
+        assert plugins.plugin_metadata(os.path.join(plugins_dir, "time_budget.py"))["run_in_thread"]
+        assert plugins.plugin_metadata(os.path.join(plugins_dir, "latency.py"))["run_in_thread"]
+        assert not plugins.plugin_metadata(os.path.join(plugins_dir, "irr_cohen_kappa.py"))["run_in_thread"]
+
+    def test_no_run_function(self):
+        assert not plugins.parse_plugin_metadata('__plugin_name__ = "no run"')["has_run"]
+
+    def test_syntax_error(self, tmp_path):
+        plugin_file = tmp_path / "bad_plugin.py"
+        plugin_file.write_text("def run(:\n")
+        assert plugins.plugin_metadata(plugin_file) is None
+
+    def test_cache_uses_modification_time(self, tmp_path):
+        plugin_file = tmp_path / "my_plugin.py"
+        plugin_file.write_text('__plugin_name__ = "A"\ndef run(df): pass\n')
+        assert plugins.plugin_metadata(plugin_file)["name"] == "A"
+        assert plugins.plugin_metadata(plugin_file) is plugins.plugin_metadata(plugin_file)
+
+        plugin_file.write_text('__plugin_name__ = "B"\ndef run(df): pass\n')
+        mtime = plugin_file.stat().st_mtime + 10
+        os.utime(plugin_file, (mtime, mtime))
+        assert plugins.plugin_metadata(plugin_file)["name"] == "B"
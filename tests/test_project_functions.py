@@ -11,9 +11,13 @@ import sys
 import json
 from decimal import Decimal
 
+import pandas as pd
+
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
+from boris import event_columns
 from boris import project_functions
+from boris import utilities
 from boris import config
 
 
@@ -73,6 +77,100 @@ class Test_project2dataframe(object):
         assert df["FPS (frame/s)"].tolist() == [25.0, 50.0, 50.0, 50.0]
 
 
+    def test_state_events_paired(self):
+        pj = utilities.convert_time_to_decimal(json.loads(open("files/test.boris").read()))
+        message, df = project_functions.project2dataframe(pj, ["observation #1"])
+
+        assert message == ""
+        assert df[["Subject", "Start (s)", "Stop (s)", "Duration (s)"]].values.tolist() == [
+            ["subject1", 3.3, 7.75, 4.45],
+            ["subject1", 9.9, 16.2, 6.3],
+            ["subject1", 18.35, 24.475, 6.125],
+            ["subject2", 38.425, 46.1, 7.675],
+        ]
+
+    def test_not_paired(self):
+        pj = utilities.convert_time_to_decimal(json.loads(open("files/test.boris").read()))
+        message, df = project_functions.project2dataframe(pj, ["live not paired"])
+
+        assert message == "Some events are not paired in live not paired"
+        assert df.empty
+
+    def test_cache(self):
+        pj = utilities.convert_time_to_decimal(json.loads(open("files/test.boris").read()))
+        project_functions.enable_dataframe_cache()
+        try:
+            _, df1 = project_functions.project2dataframe(pj, ["observation #1"])
+            # events list modified: the cached data are not used
+            pj[config.OBSERVATIONS]["observation #1"][config.EVENTS].pop()
+            pj[config.OBSERVATIONS]["observation #1"][config.EVENTS].pop()
+            _, df2 = project_functions.project2dataframe(pj, ["observation #1"])
+            assert len(df2) < len(df1)
+
+            # event modified in place: the cache must be invalidated
+            pj[config.OBSERVATIONS]["observation #1"][config.EVENTS][0][4] = "new comment"
+            project_functions.invalidate_dataframe_cache("observation #1")
+            _, df3 = project_functions.project2dataframe(pj, ["observation #1"])
+            assert df3["Comment start"].tolist()[0] == "new comment"
+        finally:
+            project_functions.enable_dataframe_cache(False)
+
+
+    def test_columnar_store(self):
+        """
+        same dataframe from the columnar copies of the events lists
+        """
+        pj = utilities.convert_time_to_decimal(json.loads(open("files/test.boris").read()))
+        for obs_id in pj[config.OBSERVATIONS]:
+            message, df = project_functions.project2dataframe(pj, [obs_id])
+            event_columns.enable_columnar_store()
+            try:
+                columns_message, columns_df = project_functions.project2dataframe(pj, [obs_id])
+            finally:
+                event_columns.enable_columnar_store(False)
+            assert columns_message == message
+            pd.testing.assert_frame_equal(columns_df, df)
+
+
+class Test_events_start_stop(object):
+    def test_status(self):
+        ethogram = {
+            "0": {config.BEHAVIOR_CODE: "s", config.TYPE: config.STATE_EVENT},
+            "1": {config.BEHAVIOR_CODE: "p", config.TYPE: config.POINT_EVENT},
+        }
+        events = [
+            [Decimal("1"), "", "s", "", ""],
+            [Decimal("2"), "", "s", "m", ""],
+            [Decimal("3"), "", "p", "", ""],
+            [Decimal("4"), "", "s", "", ""],
+            [Decimal("5"), "", "s", "", ""],
+            [Decimal("6"), "", "s", "m", ""],
+        ]
+        events_with_status = project_functions.events_start_stop(ethogram, events, config.LIVE)
+        assert [event[-1] for event in events_with_status] == [
+            config.START,
+            config.START,
+            config.POINT,
+            config.STOP,
+            config.START,
+            config.STOP,
+        ]
+        assert events_with_status[0][:-1] == tuple(events[0])
+
+    def test_cache(self):
+        pj = utilities.convert_time_to_decimal(json.loads(open("files/test.boris").read()))
+        project_functions.enable_dataframe_cache()
+        try:
+            events_with_status = project_functions.observation_events_start_stop(pj, "observation #1")
+            assert project_functions.observation_events_start_stop(pj, "observation #1") is events_with_status
+
+            pj[config.OBSERVATIONS]["observation #1"][config.EVENTS][0][4] = "new comment"
+            project_functions.invalidate_dataframe_cache("observation #1")
+            assert project_functions.observation_events_start_stop(pj, "observation #1")[0][4] == "new comment"
+        finally:
+            project_functions.enable_dataframe_cache(False)
+
+
 class Test_check_coded_behaviors(object):
     def test_1(self):
         pj = json.loads(open("files/test.boris").read())
@@ -157,6 +255,32 @@ class Test_check_state_events_obs(object):
         assert results == (False, 'The behavior <b>s</b>  is not PAIRED for subject "<b>No focal subject</b>" at <b>00:00:26.862</b><br>')
 
 
+class Test_observations_state_events_check(object):
+    def test_observations(self):
+        pj = json.loads(open("files/test.boris").read())
+        observations = ["offset positif", "live not paired"]
+
+        results = project_functions.observations_state_events_check(pj, observations)
+
+        assert results == {
+            obs_id: project_functions.check_state_events_obs(obs_id, pj[config.ETHOGRAM], pj[config.OBSERVATIONS][obs_id])
+            for obs_id in observations
+        }
+        assert results["live not paired"][0] is False
+
+    def test_cache_invalidated(self):
+        pj = json.loads(open("files/test.boris").read())
+        project_functions.enable_dataframe_cache(True)
+        try:
+            assert project_functions.observations_state_events_check(pj, ["live not paired"])["live not paired"][0] is False
+            # add the missing STOP
+            pj[config.OBSERVATIONS]["live not paired"][config.EVENTS].append([Decimal("30.0"), "", "s", "", ""])
+            project_functions.invalidate_dataframe_cache("live not paired")
+            assert project_functions.observations_state_events_check(pj, ["live not paired"])["live not paired"] == (True, "No problem detected")
+        finally:
+            project_functions.enable_dataframe_cache(False)
+
+
 class Test_export_observations_list(object):
     @pytest.mark.usefixtures("before")
     def test1(self):
@@ -0,0 +1,156 @@
+"""
+module for testing project_journal.py
+
+pytest -s -vv test_project_journal.py
+"""
+
+import os
+import shutil
+import sys
+from decimal import Decimal
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from boris import config as cfg
+from boris import event_store
+from boris import project_journal
+from boris import project_loader
+from boris import project_save
+from boris import utilities
+
+
+def open_project(path) -> dict:
+    return utilities.convert_time_to_decimal(project_loader.loads(open(path, "rb").read()))
+
+
+def start_journal(tmp_path):
+    path = str(tmp_path / "test.boris")
+    shutil.copy("files/test.boris", path)
+    pj = open_project(path)
+    journal = project_journal.ProjectJournal(path)
+    journal.start(project_save.project_snapshot(pj))
+    return path, pj, journal
+
+
+def modify(pj: dict, journal) -> None:
+    events = pj[cfg.OBSERVATIONS]["observation #1"][cfg.EVENTS]
+    hunks: list = []
+    event_store.insert_events(events, [[Decimal("1.500"), "", "p", "", "inserted"]], cfg.MEDIA, hunks)
+    new_event = list(events[5])
+    new_event[cfg.EVENT_COMMENT_FIELD_IDX] = "modified"
+    event_store.replace_events(events, {5: new_event}, hunks)
+    event_store.remove_events(events, [len(events) - 1], hunks)
+    journal.events_changed("observation #1", hunks)
+    pj[cfg.SUBJECTS]["0"]["name"] = "modified"
+    pj[cfg.OBSERVATIONS]["live"][cfg.DESCRIPTION] = "modified"
+
+
+def recover(path) -> dict:
+    pj = open_project(path)
+    project_journal.replay(pj, project_journal.read_journal(path))
+    return pj
+
+
+class Test_project_journal(object):
+    def test_no_modification(self, tmp_path):
+        path, pj, journal = start_journal(tmp_path)
+        assert journal.flush(pj)
+        assert project_journal.read_journal(path) == []
+
+    def test_replay(self, tmp_path):
+        path, pj, journal = start_journal(tmp_path)
+        modify(pj, journal)
+        assert journal.flush(pj)
+        # the events of the other observations are not loaded
+        assert not pj[cfg.OBSERVATIONS]["live"].events_loaded
+        assert recover(path) == pj
+
+    def test_successive_flushes(self, tmp_path):
+        path, pj, journal = start_journal(tmp_path)
+        modify(pj, journal)
+        assert journal.flush(pj)
+        pj[cfg.OBSERVATIONS]["new observation"] = pj[cfg.OBSERVATIONS].pop("live")
+        hunks: list = []
+        events = pj[cfg.OBSERVATIONS]["observation #1"][cfg.EVENTS]
+        event_store.insert_events(events, [[Decimal("1000.000"), "", "s", "", ""]], cfg.MEDIA, hunks)
+        journal.events_changed("observation #1", hunks)
+        assert journal.flush(pj)
+        assert len(project_journal.read_journal(path)) == 2
+        assert recover(path) == pj
+
+    def test_only_hunks_journaled(self, tmp_path):
+        path, pj, journal = start_journal(tmp_path)
+        modify(pj, journal)
+        assert journal.flush(pj)
+        flushes = project_journal.read_journal(path)
+        events_changes = [change for change in flushes[0] if "events" in change]
+        assert len(events_changes) == 1
+        # insertion, replacement and removal
+        assert [(position, n_old_rows, len(rows)) for position, n_old_rows, rows in events_changes[0]["hunks"]] == [
+            (0, 0, 1),
+            (5, 1, 1),
+            (len(pj[cfg.OBSERVATIONS]["observation #1"][cfg.EVENTS]), 1, 0),
+        ]
+        assert not any("observation" in change for change in flushes[0])
+
+    def test_events_modified_without_hunks(self, tmp_path):
+        path, pj, journal = start_journal(tmp_path)
+        # the number of events of a lazy observation is known after its loading
+        modify(pj, journal)
+        assert journal.flush(pj)
+        # the number of events does not match the recorded hunks: the observation is written entirely
+        pj[cfg.OBSERVATIONS]["observation #1"][cfg.EVENTS].append([Decimal("1000.000"), "", "s", "", ""])
+        assert journal.flush(pj)
+        assert [change["observation"] for change in project_journal.read_journal(path)[1] if "observation" in change] == ["observation #1"]
+        assert recover(path) == pj
+
+    def test_project_modified_outside_observation(self, tmp_path):
+        path, pj, journal = start_journal(tmp_path)
+        journal.mark_changed(None)
+        # the project file must be saved
+        assert not journal.flush(pj)
+        journal.start(project_save.project_snapshot(pj))
+        assert journal.flush(pj)
+
+    def test_incomplete_line(self, tmp_path):
+        path, pj, journal = start_journal(tmp_path)
+        pj[cfg.SUBJECTS]["0"]["name"] = "modified"
+        assert journal.flush(pj)
+        with open(journal.path, "a") as f_out:
+            f_out.write('[{"section": "subj')
+        assert recover(path) == pj
+
+    def test_project_file_modified(self, tmp_path):
+        path, pj, journal = start_journal(tmp_path)
+        modify(pj, journal)
+        assert journal.flush(pj)
+        project_save.save_project(project_save.project_snapshot(pj), path)
+        assert project_journal.read_journal(path) is None
+
+    def test_save(self, tmp_path):
+        path, pj, journal = start_journal(tmp_path)
+        modify(pj, journal)
+        snapshot = project_save.project_snapshot(pj)
+        journal.start(snapshot, pending=True)
+        # the journal is suspended during the save
+        assert not journal.flush(pj)
+        project_save.save_project(snapshot, path)
+        journal.saved()
+        assert not os.path.exists(journal.path)
+        pj[cfg.SUBJECTS]["0"]["name"] = "after save"
+        assert journal.flush(pj)
+        assert recover(path) == pj
+
+    def test_save_error(self, tmp_path):
+        path, pj, journal = start_journal(tmp_path)
+        modify(pj, journal)
+        journal.start(project_save.project_snapshot(pj), pending=True)
+        # modification during the save
+        hunks: list = []
+        events = pj[cfg.OBSERVATIONS]["observation #1"][cfg.EVENTS]
+        event_store.insert_events(events, [[Decimal("2.000"), "", "s", "", ""]], cfg.MEDIA, hunks)
+        journal.events_changed("observation #1", hunks)
+        journal.saved("error")
+        # the journal continues from the state of the project file
+        assert journal.flush(pj)
+        assert recover(path) == pj
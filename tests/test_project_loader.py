@@ -0,0 +1,63 @@
+"""
+module for testing project_loader.py
+
+pytest -s -vv test_project_loader.py
+"""
+
+import copy
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from boris import config as cfg
+from boris import project_loader
+from boris import utilities
+
+
+def eager(file_name):
+    pj = utilities.convert_time_to_decimal(json.loads(open(file_name).read()))
+    for obs_id in pj[cfg.OBSERVATIONS]:
+        if pj[cfg.OBSERVATIONS][obs_id][cfg.TYPE] in (cfg.LIVE, cfg.MEDIA):
+            pj[cfg.OBSERVATIONS][obs_id][cfg.EVENTS].sort(key=lambda x: x[:3])
+    return pj
+
+
+class Test_project_loader(object):
+    def test_same_as_json(self):
+        for file_name in ("files/test.boris", "files/otx_import_test.boris", "files/test_with_leading_trailing_spaces_in_modifiers.boris"):
+            pj = project_loader.loads(open(file_name, "rb").read())
+            assert pj == eager(file_name)
+            assert json.dumps(pj, default=utilities.decimal_default) == json.dumps(eager(file_name), default=utilities.decimal_default)
+
+    def test_lazy(self):
+        pj = project_loader.loads(open("files/test.boris", "rb").read())
+        observation = pj[cfg.OBSERVATIONS]["observation #1"]
+        assert isinstance(observation, project_loader.LazyObservation)
+        assert not observation.events_loaded
+        # keys and metadata without loading the events
+        assert cfg.EVENTS in observation
+        assert list(observation) == list(observation.keys())
+        assert observation[cfg.TYPE] == cfg.MEDIA
+        assert not observation.events_loaded
+
+        events = observation[cfg.EVENTS]
+        assert observation.events_loaded
+        assert observation[cfg.EVENTS] is events
+        assert events == eager("files/test.boris")[cfg.OBSERVATIONS]["observation #1"][cfg.EVENTS]
+
+    def test_copies(self):
+        expected = eager("files/test.boris")[cfg.OBSERVATIONS]["live"]
+        for make_copy in (dict, copy.copy, copy.deepcopy, lambda x: {**x}, lambda x: x.copy()):
+            pj = project_loader.loads(open("files/test.boris", "rb").read())
+            observation_copy = make_copy(pj[cfg.OBSERVATIONS]["live"])
+            assert type(observation_copy) is dict
+            assert observation_copy == expected
+
+    def test_invalid(self):
+        for content in (b"", b"{", b'{"a": 1', b'{"a": 1} x', b'{"observations": {"o": {"events": [[1, "a"]}}}'):
+            with pytest.raises(ValueError):
+                project_loader.loads(content)
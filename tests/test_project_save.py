@@ -0,0 +1,69 @@
+"""
+module for testing project_save.py
+
+pytest -s -vv test_project_save.py
+"""
+
+import gzip
+import json
+import os
+import stat
+import sys
+from decimal import Decimal
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from boris import config as cfg
+from boris import project_loader
+from boris import project_save
+from boris import utilities
+
+
+def project():
+    return utilities.convert_time_to_decimal(json.loads(open("files/test.boris").read()))
+
+
+class Test_project_save(object):
+    def test_same_as_json_dumps(self):
+        pj = project()
+        for indent in cfg.PROJECT_FILE_INDENTATION_OPTIONS:
+            assert project_save.project_json(project_save.project_snapshot(pj), indent) == json.dumps(
+                pj, default=utilities.decimal_default, indent=indent
+            )
+
+    def test_snapshot_is_independent(self):
+        pj = project()
+        snapshot = project_save.project_snapshot(pj)
+        expected = project_save.project_json(snapshot)
+        pj[cfg.OBSERVATIONS]["observation #1"][cfg.EVENTS][0][cfg.EVENT_MODIFIER_FIELD_IDX] = "modified"
+        pj[cfg.OBSERVATIONS]["observation #1"][cfg.EVENTS].append([Decimal("1000"), "", "p", "", ""])
+        pj[cfg.SUBJECTS]["0"]["name"] = "modified"
+        assert project_save.project_json(snapshot) == expected
+
+    def test_events_not_loaded(self):
+        pj = project_loader.loads(open("files/test.boris", "rb").read())
+        pj[cfg.OBSERVATIONS]["live"][cfg.EVENTS].append([Decimal("1000.000"), "", "p", "", ""])
+        content = project_save.project_json(project_save.project_snapshot(pj), indent=2)
+        assert not pj[cfg.OBSERVATIONS]["observation #1"].events_loaded
+        assert project_loader.loads(content.encode()) == pj
+
+    def test_write(self, tmp_path):
+        pj = project()
+        for file_name in ("test.boris", "test.boris.gz"):
+            path = tmp_path / file_name
+            path.write_text("old content")
+            os.chmod(path, 0o640)
+            project_save.save_project(project_save.project_snapshot(pj), str(path))
+            content = gzip.open(path, "rt").read() if file_name.endswith(".gz") else path.read_text()
+            assert utilities.convert_time_to_decimal(json.loads(content)) == pj
+            assert stat.S_IMODE(os.stat(path).st_mode) == 0o640
+        # no temporary file left
+        assert sorted(os.listdir(tmp_path)) == ["test.boris", "test.boris.gz"]
+
+    def test_background(self, tmp_path):
+        path = tmp_path / "test.boris"
+        background_save = project_save.BackgroundProjectSave()
+        assert background_save.start(project_save.project_snapshot(project()), str(path))
+        background_save.wait()
+        assert not background_save.is_running()
+        assert utilities.convert_time_to_decimal(json.loads(path.read_text())) == project()
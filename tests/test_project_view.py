@@ -0,0 +1,72 @@
+"""
+module for testing project_view.py
+
+pytest -s -vv test_project_view.py
+"""
+
+import copy
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from boris import project_view
+from boris import utilities
+
+
+class Test_project_view(object):
+    def test_selected_observations(self):
+        pj = utilities.convert_time_to_decimal(json.loads(open("files/test.boris").read()))
+        view = project_view.ProjectView(pj, ["observation #1"])
+        assert list(view["observations"]) == ["observation #1"]
+        assert view["observations"]["observation #1"]["events"] == pj["observations"]["observation #1"]["events"]
+        assert view.get("behaviors_conf", {})["0"]["code"] == pj["behaviors_conf"]["0"]["code"]
+        assert view["project_name"] == pj["project_name"]
+
+    def test_no_copy_on_read(self):
+        pj = utilities.convert_time_to_decimal(json.loads(open("files/test.boris").read()))
+        view = project_view.ProjectView(pj, list(pj["observations"]))
+        for obs_id in view["observations"]:
+            for event in view["observations"][obs_id]["events"]:
+                _ = event[2]
+        assert view["observations"].modified_observations() == []
+
+    def test_copy_on_write(self):
+        pj = utilities.convert_time_to_decimal(json.loads(open("files/test.boris").read()))
+        original = copy.deepcopy(pj)
+        view = project_view.ProjectView(pj, list(pj["observations"]))
+
+        view["observations"]["observation #1"]["events"][0][2] = "XXX"
+        view["observations"]["observation #1"]["events"].append([0, "", "p", "", ""])
+        view["behaviors_conf"]["0"]["code"] = "YYY"
+        del view["observations"]["observation #2"]
+        view["project_name"] = "modified"
+
+        # the project is not modified
+        assert pj == original
+
+        assert view["observations"]["observation #1"]["events"][0][2] == "XXX"
+        assert view["observations"]["observation #1"]["events"][-1] == [0, "", "p", "", ""]
+        assert view["behaviors_conf"]["0"]["code"] == "YYY"
+        assert "observation #2" not in view["observations"]
+        assert view["observations"].modified_observations() == ["observation #1"]
+
+    def test_events_snapshot(self):
+        pj = utilities.convert_time_to_decimal(json.loads(open("files/test.boris").read()))
+        view = project_view.ProjectView(pj, ["observation #1"])
+        events = list(pj["observations"]["observation #1"]["events"])
+        # events recorded after the creation of the view
+        pj["observations"]["observation #1"]["events"].append([0, "", "p", "", ""])
+        del pj["observations"]["observation #1"]["events"][0]
+        assert view["observations"]["observation #1"]["events"] == events
+        assert view["observations"].modified_observations() == []
+
+    def test_to_python(self):
+        pj = utilities.convert_time_to_decimal(json.loads(open("files/test.boris").read()))
+        view = project_view.ProjectView(pj, ["observation #1"])
+        pj_dict = view.to_python()
+        assert isinstance(pj_dict, dict)
+        assert list(pj_dict["observations"]) == ["observation #1"]
+        assert pj_dict["observations"]["observation #1"] == pj["observations"]["observation #1"]
+        assert pj_dict["observations"]["observation #1"] is not pj["observations"]["observation #1"]
@@ -0,0 +1,45 @@
+"""
+module for testing refresh_scheduler.py
+
+pytest -s -vv test_refresh_scheduler.py
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from boris import refresh_scheduler
+
+
+class Test_refresh_scheduler(object):
+    def scheduler(self):
+        calls = {"check": [], "refresh": []}
+        scheduler = refresh_scheduler.RefreshScheduler(calls["check"].append, calls["refresh"].append, refresh_rate=25)
+        return scheduler, calls
+
+    def test_coalesce(self):
+        scheduler, calls = self.scheduler()
+        for position in (0.1, 0.2, 0.3):
+            scheduler.notify(position)
+        # checks at every new position, one refresh with the last position
+        scheduler.refresh()
+        assert calls == {"check": [0.1, 0.2, 0.3], "refresh": [0.3]}
+
+    def test_unchanged_position(self):
+        scheduler, calls = self.scheduler()
+        scheduler.notify(1.0)
+        scheduler.notify(1.0)
+        scheduler.refresh()
+        scheduler.refresh()
+        assert calls == {"check": [1.0], "refresh": [1.0]}
+
+    def test_reset(self):
+        scheduler, calls = self.scheduler()
+        scheduler.notify(2.0)
+        scheduler.reset()
+        scheduler.refresh()
+        assert calls["refresh"] == []
+        scheduler.notify(2.0)
+        scheduler.refresh()
+        assert calls == {"check": [2.0, 2.0], "refresh": [2.0]}
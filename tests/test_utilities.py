@@ -25,6 +25,7 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")
 
 from boris import utilities
 from boris import config
+from boris import event_index
 
 
 @pytest.fixture()
@@ -183,6 +184,20 @@ class Test_convert_time_to_decimal(object):
         assert r == pj_dec
 
 
+class Test_time_to_ms(object):
+    def test_decimal(self):
+        assert utilities.time_to_ms(Decimal("12.345")) == 12345
+        assert utilities.time_to_ms(Decimal("-1.5")) == -1500
+
+    def test_float(self):
+        assert utilities.time_to_ms(0.1) == 100
+        assert utilities.time_to_ms(7) == 7000
+
+    def test_round_trip(self):
+        assert utilities.ms_to_time(12345) == Decimal("12.345")
+        assert str(utilities.ms_to_time(utilities.time_to_ms(Decimal("2")))) == "2.000"
+
+
 class Test_datetime_iso8601(object):
     def test_1(self):
         r = utilities.datetime_iso8601(datetime.datetime(2018, 12, 1, 22, 36, 7, 652523))
@@ -246,8 +261,8 @@ class Test_get_current_points_by_subject(object):
     def test_no_events(self):
         pj = json.loads(open("files/test.boris").read())
         r = utilities.get_current_points_by_subject(
+            index=event_index.EventIntervalIndex(pj[config.OBSERVATIONS]["observation #1"]["events"], [], selected_behaviors=["p"]),
             point_behaviors_codes=["p"],
-            events=pj[config.OBSERVATIONS]["observation #1"]["events"],
             subjects=pj["subjects_conf"],
             time=Decimal("3"),
             tolerance=Decimal("3"),
@@ -258,8 +273,8 @@ class Test_get_current_points_by_subject(object):
         pj_float = json.loads(open("files/test.boris").read())
         pj = utilities.convert_time_to_decimal(pj_float)
         r = utilities.get_current_points_by_subject(
+            index=event_index.EventIntervalIndex(pj[config.OBSERVATIONS]["offset positif"]["events"], [], selected_behaviors=["p"]),
             point_behaviors_codes=["p"],
-            events=pj[config.OBSERVATIONS]["offset positif"]["events"],
             subjects={"0": {"key": "", "name": "", "description": "no focal subject"}},
             time=Decimal("22.000"),
             tolerance=Decimal("1"),
@@ -272,8 +287,8 @@ class Test_get_current_points_by_subject(object):
         pj_float = json.loads(open("files/test.boris").read())
         pj = utilities.convert_time_to_decimal(pj_float)
         r = utilities.get_current_points_by_subject(
+            index=event_index.EventIntervalIndex(pj[config.OBSERVATIONS]["modifiers"][config.EVENTS], [], selected_behaviors=["p"]),
             point_behaviors_codes=["p"],
-            events=pj[config.OBSERVATIONS]["modifiers"][config.EVENTS],
             subjects={"0": {"key": "", "name": "", "description": "no focal subject"}},
             time=Decimal("8.000"),
             tolerance=Decimal("5"),
@@ -286,8 +301,8 @@ class Test_get_current_points_by_subject(object):
         pj_float = json.loads(open("files/test.boris").read())
         pj = utilities.convert_time_to_decimal(pj_float)
         r = utilities.get_current_points_by_subject(
+            index=event_index.EventIntervalIndex(pj[config.OBSERVATIONS]["modifiers"][config.EVENTS], [], selected_behaviors=["q"]),
             point_behaviors_codes=["q"],
-            events=pj[config.OBSERVATIONS]["modifiers"][config.EVENTS],
             subjects={"0": {"key": "", "name": "", "description": "no focal subject"}},
             time=Decimal("8.000"),
             tolerance=Decimal("5"),
@@ -299,8 +314,8 @@ class Test_get_current_points_by_subject(object):
         pj_float = json.loads(open("files/test.boris").read())
         pj = utilities.convert_time_to_decimal(pj_float)
         r = utilities.get_current_points_by_subject(
+            index=event_index.EventIntervalIndex(pj[config.OBSERVATIONS]["offset positif"]["events"], [], selected_behaviors=["p"]),
             point_behaviors_codes=["p"],
-            events=pj[config.OBSERVATIONS]["offset positif"]["events"],
             subjects={"0": {"key": "", "name": "", "description": "no focal subject"}},
             time=Decimal("22.000"),
             tolerance=Decimal("1"),
@@ -312,8 +327,8 @@ class Test_get_current_points_by_subject(object):
         pj_float = json.loads(open("files/test.boris").read())
         pj = utilities.convert_time_to_decimal(pj_float)
         r = utilities.get_current_points_by_subject(
+            index=event_index.EventIntervalIndex(pj[config.OBSERVATIONS]["modifiers"]["events"], [], selected_behaviors=["p"]),
             point_behaviors_codes=["p"],
-            events=pj[config.OBSERVATIONS]["modifiers"]["events"],
             subjects={"0": {"key": "", "name": "", "description": "no focal subject"}},
             time=Decimal("8.000"),
             tolerance=Decimal("5"),